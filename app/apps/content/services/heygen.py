@@ -15,6 +15,8 @@ from decimal import Decimal
 import requests
 from django.conf import settings
 
+from apps.core.services import http_client
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = 'https://api.heygen.com'
@@ -75,7 +77,7 @@ def _headers(idempotency_key=None):
 
 
 def _request(method, path, *, json=None, params=None, idempotency_key=None):
-    resp = requests.request(
+    resp = http_client.request(
         method, f'{BASE_URL}{path}',
         json=json, params=params,
         headers=_headers(idempotency_key),
@@ -236,7 +238,7 @@ def upload_asset(fileobj, filename, content_type='video/mp4'):
     size = len(data)
 
     if size <= ASSET_SIMPLE_UPLOAD_MAX:
-        resp = requests.post(
+        resp = http_client.post(
             f'{BASE_URL}/v3/assets',
             files={'file': (filename, data, content_type)},
             headers={'X-Api-Key': getattr(settings, 'HEYGEN_API_KEY', '')},
@@ -261,8 +263,8 @@ def upload_asset(fileobj, filename, content_type='video/mp4'):
     if not upload_url or not asset_id:
         raise HeygenError('direct_upload_init_failed',
                           f'resposta inesperada do init: {list(init.keys())}')
-    put = requests.put(upload_url, data=data,
-                       headers={'Content-Type': content_type}, timeout=600)
+    put = http_client.put(upload_url, data=data,
+                          headers={'Content-Type': content_type}, timeout=600)
     put.raise_for_status()
     # complete pode devolver resource_not_ready enquanto o PUT aterrissa — retry
     for _ in range(5):
@@ -349,7 +351,7 @@ def sync_group_looks(avatar, activate_new=False):
             preview_url = item.get('preview_image_url')
             if preview_url:
                 try:
-                    resp = requests.get(preview_url, timeout=60)
+                    resp = http_client.get(preview_url, timeout=60)
                     if resp.ok:
                         look.preview_image.save(f'{look_id}.jpg',
                                                 ContentFile(resp.content))
@@ -1,17 +1,19 @@
 """
 Signals para auto-incremento de QuotaUsageDaily
 
-Incrementa contadores diários quando Pauta/Post/VideoAvatar são criados.
+Incrementa contadores diários quando Pauta/Post/VideoAvatar são criados
+(Post/VideoAvatar via contadores atômicos de apps.core.services.quota).
 Segue padrão estabelecido na aplicação anterior.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.core.cache import cache
 from decimal import Decimal
 import logging
 
-from apps.content.models import Pauta, VideoAvatar
+from apps.content.models import Pauta, TrendMonitor, VideoAvatar
+from apps.pautas.models import Pauta as PautaGerada
 from apps.posts.models import Post
 from apps.core.models import QuotaUsageDaily
 
@@ -68,9 +70,11 @@ def increment_pauta_quota(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Post)
 def increment_post_quota(sender, instance, created, **kwargs):
     """
-    Incrementa quota de posts ao criar novo Post.
+    Conta o Post criado na quota (contador atomico no Redis).
     
-    Referência: core/views.py linhas 1036-1077 (aplicação anterior)
+    Criado com quota.reserve() na view: a reserva ja contou, so e consumida.
+    Sem reserva (admin, shell, comandos): incrementa aqui. O banco
+    (QuotaUsageDaily) e atualizado pelo reconcile_quota_counters.
     """
     if not created:
         return
@@ -80,33 +84,8 @@ def increment_post_quota(sender, instance, created, **kwargs):
         return
     
     try:
-        # Get or create do registro do dia
-        usage, created_usage = QuotaUsageDaily.objects.get_or_create(
-            organization=instance.organization,
-            date=timezone.now().date(),
-            defaults={
-                'pautas_requested': 0,
-                'posts_created': 0,
-                'videos_created': 0,
-                'cost_usd': Decimal('0.0000')
-            }
-        )
-        
-        # Incrementar contador
-        usage.posts_created += 1
-        usage.save(update_fields=['posts_created', 'updated_at'])
-        
-        posts_month = instance.organization.get_posts_this_month()
-        logger.info(
-            f'[POST] Quota atualizada: {usage.posts_used}/{instance.organization.quota_posts_dia} '
-            f'(mês: {posts_month}/{instance.organization.quota_posts_mes}) '
-            f'(Post #{instance.id}, Org: {instance.organization.name})'
-        )
-        
-        # Limpar cache de quota
-        cache_key = f'quota_usage_{instance.organization.id}_{timezone.now().date()}'
-        cache.delete(cache_key)
-        
+        from apps.core.services import quota
+        quota.record_created(instance.organization, 'post')
     except Exception as e:
         logger.error(f'[POST] Erro ao incrementar quota para Post #{instance.id}: {e}')
 
@@ -114,9 +93,7 @@ def increment_post_quota(sender, instance, created, **kwargs):
 @receiver(post_save, sender=VideoAvatar)
 def increment_video_quota(sender, instance, created, **kwargs):
     """
-    Incrementa quota de vídeos ao criar novo VideoAvatar.
-    
-    Referência: core/views.py linhas 1234-1252 (aplicação anterior)
+    Conta o VideoAvatar criado na quota (mesmo esquema de increment_post_quota).
     """
     if not created:
         return
@@ -126,30 +103,20 @@ def increment_video_quota(sender, instance, created, **kwargs):
         return
     
     try:
-        # Get or create do registro do dia
-        usage, created_usage = QuotaUsageDaily.objects.get_or_create(
-            organization=instance.organization,
-            date=timezone.now().date(),
-            defaults={
-                'pautas_requested': 0,
-                'posts_created': 0,
-                'videos_created': 0,
-                'cost_usd': Decimal('0.0000')
-            }
-        )
-        
-        # Incrementar contador
-        usage.videos_created += 1
-        usage.save(update_fields=['videos_created', 'updated_at'])
-        
-        logger.info(
-            f'[VIDEO] Quota atualizada: vídeos={usage.videos_created} '
-            f'(VideoAvatar #{instance.id}, Org: {instance.organization.name})'
-        )
-        
-        # Limpar cache de quota (se implementado para vídeos)
-        cache_key = f'quota_usage_{instance.organization.id}_{timezone.now().date()}'
-        cache.delete(cache_key)
-        
+        from apps.core.services import quota
+        quota.record_created(instance.organization, 'video')
     except Exception as e:
         logger.error(f'[VIDEO] Erro ao incrementar quota para VideoAvatar #{instance.id}: {e}')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=PautaGerada)
+@receiver(post_delete, sender=PautaGerada)
+@receiver(post_save, sender=QuotaUsageDaily)
+@receiver(post_save, sender=TrendMonitor)
+@receiver(post_delete, sender=TrendMonitor)
+def invalidate_dashboard_stats(sender, instance, **kwargs):
+    """Contadores/recentes do dashboard mudaram: descarta o snapshot da org."""
+    from apps.core.services import dashboard_stats
+    dashboard_stats.invalidate(instance.organization_id)
@@ -46,11 +46,49 @@ def videos_list(request):
     return render(request, 'content/videos_avatar_list.html', {'videos': videos})
 
 
+def _create_video(request, reservation, look, *, script, action, speed, aspect):
+    """Consome crédito + cria o VideoAvatar na quota reservada (devolvida se falhar)."""
+    from django.db.models import F
+    from apps.content.models import VideoAvatar, VideoAvatarStatus
+    from apps.core.models import Organization
+
+    try:
+        consumed = Organization.objects.filter(
+            pk=request.organization.pk,
+            video_avatar_credits__gt=0,
+        ).update(video_avatar_credits=F('video_avatar_credits') - 1)
+        status, _ = VideoAvatarStatus.objects.get_or_create(
+            code='pending', defaults={'label': 'Na fila'})
+        video = VideoAvatar.objects.create(
+            organization=request.organization,
+            avatar=look.avatar,
+            look=look,
+            created_by=request.user,
+            script_text=script,
+            avatar_action=action,
+            voice_speed=speed,
+            aspect_ratio=aspect,
+            credit_consumed=bool(consumed),
+            status=status,
+        )
+    except Exception:
+        reservation.refund()
+        raise
+    reservation.commit()
+
+    from apps.core.emails import send_video_avatar_received
+    send_video_avatar_received(video)
+
+    from apps.content.tasks_heygen import create_heygen_video_task
+    create_heygen_video_task.delay(video.pk)
+    return video
+
+
 @login_required
 @require_organization
 @require_videos_avatar
 def video_create(request):
-    from apps.content.models import HeygenLook, VideoAvatar, VideoAvatarStatus
+    from apps.content.models import HeygenLook
 
     # Cards = LOOKS ativos de apresentadores ativos da org, agrupados por
     # apresentador no template. Catálogo vazio → o template mostra o aviso
@@ -85,33 +123,13 @@ def video_create(request):
         elif len(script) > SCRIPT_MAX_CHARS:
             form_error = f'O texto passou de {SCRIPT_MAX_CHARS} caracteres.'
         else:
-            from django.db.models import F
-            from apps.core.models import Organization
-            consumed = Organization.objects.filter(
-                pk=request.organization.pk,
-                video_avatar_credits__gt=0,
-            ).update(video_avatar_credits=F('video_avatar_credits') - 1)
-            status, _ = VideoAvatarStatus.objects.get_or_create(
-                code='pending', defaults={'label': 'Na fila'})
-            video = VideoAvatar.objects.create(
-                organization=request.organization,
-                avatar=look.avatar,
-                look=look,
-                created_by=request.user,
-                script_text=script,
-                avatar_action=action,
-                voice_speed=speed,
-                aspect_ratio=aspect,
-                credit_consumed=bool(consumed),
-                status=status,
-            )
-            from apps.core.emails import send_video_avatar_received
-            send_video_avatar_received(video)
-
-            from apps.content.tasks_heygen import create_heygen_video_task
-            create_heygen_video_task.delay(video.pk)
-
-            return redirect('content:video_avatar_detail', pk=video.pk)
+            from apps.core.services import quota
+            reservation = quota.reserve(request.organization, 'video')
+            if reservation:
+                video = _create_video(request, reservation, look, script=script,
+                                      action=action, speed=speed, aspect=aspect)
+                return redirect('content:video_avatar_detail', pk=video.pk)
+            form_error = reservation.message
 
     context = {
         'looks': looks,
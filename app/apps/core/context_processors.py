@@ -26,15 +26,15 @@ def tenant_context(request):
         context['tenant'] = request.organization
     
     # ETAPA 5: Adicionar status de onboarding ao contexto
-    # Disponível em todos os templates (incluindo sidebar)
+    # Disponível em todos os templates (incluindo sidebar). Vem do
+    # request.tenant (mesma projecao ja lida pelo middleware de onboarding).
     if request.user.is_authenticated:
-        from apps.knowledge.models import KnowledgeBase
+        from apps.core.tenant import get_tenant_context
         try:
-            org = getattr(request, 'organization', None)
-            kb = KnowledgeBase.objects.filter(organization=org).first()
-            context['kb_onboarding_completed'] = kb.onboarding_completed if kb else False
-            context['kb_suggestions_reviewed'] = kb.suggestions_reviewed if kb else False
-            context['kb_compilation_status'] = kb.compilation_status if kb else None
+            tenant = get_tenant_context(request)
+            context['kb_onboarding_completed'] = tenant.onboarding_completed
+            context['kb_suggestions_reviewed'] = tenant.suggestions_reviewed
+            context['kb_compilation_status'] = tenant.compilation_status
         except Exception:
             context['kb_onboarding_completed'] = False
             context['kb_suggestions_reviewed'] = False
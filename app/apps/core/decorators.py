@@ -7,6 +7,8 @@ from functools import wraps
 from django.http import HttpResponseForbidden
 from django.shortcuts import redirect
 
+from apps.core.tenant import get_tenant_context
+
 
 def require_organization(view_func):
     """
@@ -49,12 +51,13 @@ def organization_required(redirect_url='/login/'):
 
 def tenant_scoped_view(view_func):
     """
-    Decorator que adiciona organization ao contexto da view.
+    Decorator que garante request.organization e request.tenant (TenantContext).
     
     Uso:
         @tenant_scoped_view
         def my_view(request):
             org = request.organization  # Garantido
+            kb = request.tenant.kb      # Flags da KB (lazy, memoizado)
             posts = Post.objects.for_organization(org)
             ...
     """
@@ -64,9 +67,8 @@ def tenant_scoped_view(view_func):
         if not hasattr(request, 'organization'):
             request.organization = None
         
-        # Adicionar helper para queries
-        if request.organization:
-            request.tenant = request.organization
+        # Contexto de tenant do request (TenantMiddleware; cria se faltar)
+        get_tenant_context(request)
         
         return view_func(request, *args, **kwargs)
     return wrapper
@@ -306,3 +306,58 @@ def send_video_avatar_ready(video):
     return _send_video_avatar_email(
         video, 'emails/video_avatar_ready.html',
         'Seu vídeo avatar está pronto! - IAMKT')
+
+
+QUOTA_ALERT_NAMES = {
+    'pauta_daily': 'Pautas Diárias',
+    'post_daily': 'Posts Diários',
+    'post_monthly': 'Posts Mensais',
+    'video_daily': 'Vídeos Avatar Diários',
+    'video_monthly': 'Vídeos Avatar Mensais',
+}
+
+
+def build_quota_alert_email(alert, org_name, current, limit, connection=None):
+    """
+    Monta (sem enviar) o email de um QuotaAlert — envio em lote pela task
+    apps.core.tasks.send_quota_alert_emails, numa conexão compartilhada.
+    """
+    alert_name = QUOTA_ALERT_NAMES.get(alert.resource_type, alert.resource_type)
+    percentage = (current / limit * 100) if limit > 0 else 0
+
+    if alert.alert_type == '100':
+        subject = f'⚠️ ALERTA: Quota de {alert_name} ESGOTADA - {org_name}'
+        status = 'ESGOTADA (100%)'
+        urgency = 'CRÍTICO'
+        footer = '⚠️ A quota foi totalmente utilizada. Novas criações podem ser bloqueadas.'
+    else:
+        subject = f'⚠️ Alerta: Quota de {alert_name} em {alert.alert_type}% - {org_name}'
+        status = f'em {percentage:.1f}%'
+        urgency = 'ATENÇÃO'
+        footer = '⚠️ A quota está próxima do limite. Considere ajustar ou aguardar renovação.'
+
+    message = f"""
+Olá,
+
+{urgency}: A quota de {alert_name} da organização {org_name} está {status}.
+
+Detalhes:
+- Tipo: {alert_name}
+- Uso atual: {int(current)}
+- Limite: {int(limit)}
+- Percentual: {percentage:.1f}%
+- Data: {alert.date.strftime('%d/%m/%Y')}
+
+{footer}
+
+---
+Sistema IAMKT - Alertas de Quota
+    """.strip()
+
+    return EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[alert.sent_to],
+        connection=connection,
+    )
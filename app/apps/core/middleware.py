@@ -7,6 +7,7 @@ Garante que todas as views tenham acesso à organization atual.
 from django.utils.deprecation import MiddlewareMixin
 from django.http import HttpResponseForbidden
 from apps.core.models import Organization
+from apps.core.tenant import TenantContext
 
 
 class TenantMiddleware(MiddlewareMixin):
@@ -15,7 +16,8 @@ class TenantMiddleware(MiddlewareMixin):
     
     Funcionalidades:
     1. Detecta organization do usuário logado
-    2. Disponibiliza em request.organization
+    2. Disponibiliza em request.organization (+ request.tenant: contexto
+       do request com os flags da KB carregados sob demanda, 1x)
     3. Bloqueia acesso se usuário não tiver organization
     4. Permite acesso público a URLs específicas
     """
@@ -37,6 +39,7 @@ class TenantMiddleware(MiddlewareMixin):
         """
         # Inicializar organization como None
         request.organization = None
+        request.tenant = TenantContext()
         
         # Verificar se é URL pública
         if self._is_public_url(request.path):
@@ -49,6 +52,7 @@ class TenantMiddleware(MiddlewareMixin):
         # Buscar organization do usuário
         if hasattr(request.user, 'organization') and request.user.organization:
             request.organization = request.user.organization
+            request.tenant = TenantContext(request.organization)
         else:
             # Usuário sem organization - bloquear acesso
             # (exceto para superusers que podem acessar admin)
@@ -61,10 +61,10 @@ class OnboardingRequiredMiddleware(MiddlewareMixin):
         print(f"🔍 [MIDDLEWARE] Path: {request.path} | Organization: {organization}", flush=True)
 
         if organization:
-            from apps.knowledge.models import KnowledgeBase
+            from apps.core.tenant import get_tenant_context
 
             try:
-                kb = KnowledgeBase.objects.filter(organization=organization).first()
+                kb = get_tenant_context(request).kb
                 print(f"🔍 [MIDDLEWARE] KB encontrado: {kb is not None}", flush=True)
                 
                 if kb:
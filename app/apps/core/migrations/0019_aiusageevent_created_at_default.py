@@ -0,0 +1,19 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_organization_look_creation_enabled'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aiusageevent',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_aiusageevent_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiusageevent',
+            name='cache_prefix',
+            field=models.CharField(blank=True, help_text="Prefixo de system cacheado ('<skill>:<sha12>', posts.services.skills)", max_length=64, verbose_name='Prefixo de cache'),
+        ),
+    ]
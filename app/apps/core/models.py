@@ -687,7 +687,9 @@ class Organization(TimeStampedModel):
             
             cache.set(cache_key, usage, 60)  # Cache por 1 minuto
         
-        return usage
+        # Posts: contador atomico da quota (o banco e reconciliado pelo beat)
+        from apps.core.services import quota
+        return {**usage, 'posts_used': quota.usage(self, 'post')['day']}
     
     def get_billing_cycle_start(self):
         """
@@ -743,23 +745,9 @@ class Organization(TimeStampedModel):
         return next_reset
     
     def get_posts_this_month(self):
-        """Conta posts criados no ciclo mensal atual"""
-        from django.db.models import Sum
-        
-        cycle_start = self.get_billing_cycle_start()
-        
-        total = QuotaUsageDaily.objects.filter(
-            organization=self,
-            date__gte=cycle_start.date()
-        ).aggregate(total=Sum('posts_created'))['total'] or 0
-        
-        adjustments = QuotaAdjustment.objects.filter(
-            organization=self,
-            resource_type='post_monthly',
-            created_at__gte=cycle_start
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        return max(0, total + adjustments)
+        """Conta posts criados no ciclo mensal atual (contadores da quota + ajustes)"""
+        from apps.core.services import quota
+        return quota.usage(self, 'post')['month']
     
     @property
     def has_pautas_module(self):
@@ -829,16 +817,9 @@ class Organization(TimeStampedModel):
         if self.quota_posts_dia == 0:
             return False, 'no_quota', 'Sem quota de posts disponível'
         
-        usage = self.get_quota_usage_today()
-        if usage['posts_used'] >= self.quota_posts_dia:
-            return False, 'daily_limit', f'Limite diário de posts atingido ({self.quota_posts_dia}/{self.quota_posts_dia})'
-        
-        if self.quota_posts_mes > 0:
-            posts_month = self.get_posts_this_month()
-            if posts_month >= self.quota_posts_mes:
-                return False, 'monthly_limit', f'Limite mensal de posts atingido ({self.quota_posts_mes}/{self.quota_posts_mes})'
-        
-        return True, None, None
+        # Contadores do Redis (O(1)); a reserva atomica e quota.reserve()
+        from apps.core.services import quota
+        return quota.check_limits(self, 'post')
     
     def can_create_video_avatar(self):
         """
@@ -859,15 +840,9 @@ class Organization(TimeStampedModel):
             return False, 'no_credits', ('Seus créditos de vídeo acabaram. '
                                          'Fale com a equipe IAMKT para adquirir um novo pacote.')
 
-        if self.quota_videos_dia > 0:
-            usage_today = self.get_video_quota_usage_today()
-            if usage_today['videos_used'] >= self.quota_videos_dia:
-                return False, 'daily_limit', f'Limite diário atingido ({self.quota_videos_dia} vídeos/dia).'
-
-        if self.quota_videos_mes > 0:
-            videos_month = self.get_videos_this_month()
-            if videos_month >= self.quota_videos_mes:
-                return False, 'monthly_limit', f'Limite mensal atingido ({self.quota_videos_mes} vídeos/mês).'
+        if self.quota_videos_dia > 0 or self.quota_videos_mes > 0:
+            from apps.core.services import quota
+            return quota.check_limits(self, 'video')
 
         return True, None, None
 
@@ -890,25 +865,13 @@ class Organization(TimeStampedModel):
     
     def get_video_quota_usage_today(self):
         """Retorna uso de quota de vídeos hoje"""
-        today = timezone.now().date()
-        usage = QuotaUsageDaily.objects.filter(
-            organization=self,
-            date=today
-        ).first()
-        
-        if not usage:
-            return {'videos_used': 0}
-        
-        return {'videos_used': usage.videos_created or 0}
+        from apps.core.services import quota
+        return {'videos_used': quota.usage(self, 'video')['day']}
     
     def get_videos_this_month(self):
         """Conta vídeos criados neste ciclo de billing"""
-        from apps.content.models import VideoAvatar
-        start_date = self.get_billing_cycle_start()
-        return VideoAvatar.objects.filter(
-            organization=self,
-            created_at__gte=start_date
-        ).count()
+        from apps.core.services import quota
+        return quota.usage(self, 'video')['month']
 
 
 class QuotaUsageDaily(TimeStampedModel):
@@ -1190,8 +1153,9 @@ class AIUsageEvent(models.Model):
     por org × mês (docs/redesenho-fluxos-geracao.md, C0.3).
 
     Cobre TODA chamada que gasta tokens: com Post (fluxos de geração — o
-    Post.ai_usage_log continua como histórico embutido) e SEM Post (análise
-    visual de KB, brand layout, etc. — o custo "órfão" que antes sumia).
+    histórico do post é uma view sobre estes eventos, ver
+    core.services.ai_usage.post_usage_log) e SEM Post (análise visual de KB,
+    brand layout, etc. — o custo "órfão" que antes sumia).
     Pautas/trends seguem no IAModelUsage (app content); o relatório agrega os dois.
     """
     organization = models.ForeignKey(
@@ -1217,10 +1181,16 @@ class AIUsageEvent(models.Model):
     output_tokens = models.PositiveIntegerField(default=0)
     cache_read_tokens = models.PositiveIntegerField(default=0)
     cache_creation_tokens = models.PositiveIntegerField(default=0)
+    cache_prefix = models.CharField(
+        max_length=64, blank=True, verbose_name='Prefixo de cache',
+        help_text="Prefixo de system cacheado ('<skill>:<sha12>', posts.services.skills)",
+    )
     images_generated = models.PositiveSmallIntegerField(default=0)
     cost_usd = models.DecimalField(max_digits=10, decimal_places=6, default=0)
     cost_brl = models.DecimalField(max_digits=10, decimal_places=4, default=0)
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # default (nao auto_now_add): evento gravado em lote no fim da task
+    # guarda a hora da CHAMADA, nao a do flush
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         verbose_name = 'Evento de Uso de IA'
@@ -0,0 +1,169 @@
+"""
+Registro dos clientes dos provedores de IA — um por PROCESSO.
+
+Antes cada chamada ao brain/visao/orquestrador fazia anthropic.Anthropic(...)
+novo (pool httpx novo: handshake TLS a cada chamada) e utils/ai_* tinham
+managers de modulo criados no import (antes do fork do Celery).
+
+  anthropic_client(api_key=None, max_retries=None) -> anthropic.Anthropic
+  openai_client(api_key=None)                       -> openai.OpenAI
+  perplexity_http()                                 -> httpx.Client
+  gemini_model(name)                                -> genai.GenerativeModel
+  track(provider)                                   -> ctx p/ chamada fora do httpx
+  stats() -> {provider: {'in_flight','requests','errors','retries','total_ms','max_ms'}}
+
+Politica:
+  - um httpx.Client por provedor, compartilhado pelos clientes do SDK (um
+    por api_key/max_retries): keep-alive e sessao TLS reaproveitados;
+    ate AI_POOL_PER_PROVIDER (env; default 16) conexoes por provedor;
+  - medido no TRANSPORTE: cada tentativa HTTP conta; as que o SDK refaz
+    (header x-stainless-retry-count > 0) somam em 'retries';
+  - registro por pid: apos o fork do Celery/gunicorn tudo e recriado (sockets
+    do pai nao sao reaproveitados) — mesmo desenho do http_client.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+POOL_PER_PROVIDER = max(1, int(os.environ.get('AI_POOL_PER_PROVIDER', 16)))
+KEEPALIVE_SECONDS = 60.0
+
+_lock = threading.RLock()
+_pid = None
+_clients = {}   # (provider, *params) -> cliente
+_stats = {}
+
+
+def _registry():
+    """Dict de clientes do processo atual (zera apos fork)."""
+    global _pid
+    pid = os.getpid()
+    if _pid != pid:
+        with _lock:
+            if _pid != pid:
+                _clients.clear()
+                _stats.clear()
+                _pid = pid
+    return _clients
+
+
+def _get(key, build):
+    clients = _registry()
+    client = clients.get(key)
+    if client is None:
+        with _lock:
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = build()
+    return client
+
+
+@contextmanager
+def track(provider, retry=False):
+    """Conta 1 tentativa no provedor (in_flight enquanto dura). O bloco pode
+    gravar out['status'] — >= 400 conta como erro, como excecao."""
+    out = {}
+    with _lock:
+        s = _stats.setdefault(provider, {'in_flight': 0, 'requests': 0, 'errors': 0,
+                                         'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        s['in_flight'] += 1
+    t0 = time.monotonic()
+    error = True
+    try:
+        yield out
+        error = (out.get('status') or 0) >= 400
+    finally:
+        elapsed = (time.monotonic() - t0) * 1000
+        with _lock:
+            s['in_flight'] -= 1
+            s['requests'] += 1
+            s['errors'] += int(error)
+            s['retries'] += int(bool(retry))
+            s['total_ms'] += elapsed
+            s['max_ms'] = max(s['max_ms'], elapsed)
+
+
+def _transport(provider):
+    import httpx
+
+    class _MeteredTransport(httpx.HTTPTransport):
+        def handle_request(self, request):
+            retry = request.headers.get('x-stainless-retry-count', '0') not in ('', '0')
+            with track(provider, retry=retry) as out:
+                resp = super().handle_request(request)
+                out['status'] = resp.status_code
+            return resp
+
+    return _MeteredTransport(limits=httpx.Limits(
+        max_connections=POOL_PER_PROVIDER, max_keepalive_connections=POOL_PER_PROVIDER,
+        keepalive_expiry=KEEPALIVE_SECONDS))
+
+
+def http_client(provider, timeout=600.0):
+    """httpx.Client do provedor (pool + metricas)."""
+    import httpx
+    return _get(('http', provider), lambda: httpx.Client(
+        transport=_transport(provider), timeout=timeout, follow_redirects=True))
+
+
+def anthropic_client(api_key=None, max_retries=None):
+    """anthropic.Anthropic do processo (api_key default: ANTHROPIC_API_KEY)."""
+    import anthropic
+
+    api_key = api_key or os.environ.get('ANTHROPIC_API_KEY')
+    kwargs = {} if max_retries is None else {'max_retries': max_retries}
+    return _get(('anthropic', api_key, max_retries), lambda: anthropic.Anthropic(
+        api_key=api_key, http_client=http_client('anthropic'), **kwargs))
+
+
+def openai_client(api_key=None):
+    """openai.OpenAI do processo (api_key default: settings.OPENAI_API_KEY)."""
+    from openai import OpenAI
+
+    if not api_key:
+        from django.conf import settings
+        api_key = getattr(settings, 'OPENAI_API_KEY', None) or os.environ.get('OPENAI_API_KEY')
+    return _get(('openai', api_key), lambda: OpenAI(
+        api_key=api_key, http_client=http_client('openai')))
+
+
+def perplexity_http():
+    return http_client('perplexity', timeout=60.0)
+
+
+def gemini_model(name):
+    """GenerativeModel do SDK google (gRPC; configurado 1x por processo).
+    Medir com `with track('gemini')` em volta da chamada."""
+    import google.generativeai as genai
+
+    def _build():
+        from django.conf import settings
+        if not _registry().get(('gemini-configured',)):
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            _clients[('gemini-configured',)] = True
+        return genai.GenerativeModel(name)
+    return _get(('gemini', name), _build)
+
+
+def stats():
+    with _lock:
+        return {provider: dict(s) for provider, s in _stats.items()}
+
+
+def reset():
+    """Descarta clientes e metricas (testes; troca de chave em runtime)."""
+    global _pid
+    with _lock:
+        for key, client in list(_clients.items()):
+            if key[0] == 'http':
+                try:
+                    client.close()
+                except Exception:
+                    pass
+        _clients.clear()
+        _stats.clear()
+        _pid = None
@@ -4,45 +4,191 @@ Registro central de eventos de custo de IA (core.AIUsageEvent).
 REGRA (dono, 2026-07-08): TODO fluxo que gasta tokens registra um evento —
 com ou sem Post — para responder "quanto gastou a org X no mês?".
 `record_ai_event` NUNCA levanta exceção: billing não pode derrubar geração.
+
+AIUsageEvent é o ÚNICO caminho de escrita (ledger append-only):
+  - evento com Post também soma nos Post.total_*_cost_usd via F() (atômico,
+    sem refresh + read-modify-write);
+  - o histórico por post é uma VIEW sobre os eventos (post_usage_log); o
+    JSON Post.ai_usage_log ficou só como legado de antes do ledger.
+
+Dentro de `ai_usage_batch()` (toda task Celery: sinais em sistema/celery.py)
+os eventos ficam num buffer da thread e saem num bulk_create só no fim —
+com os totais dos posts num UPDATE por post.
 """
 import logging
+import threading
+from contextlib import contextmanager
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+_local = threading.local()
+
+_POST_TOTAL_FIELD = {
+    'text_generation': 'total_text_cost_usd',
+    'image_generation': 'total_image_cost_usd',
+}
+
+
+def _build_event(organization, *, step, model, usage_dict, purpose, post, source,
+                 images_generated):
+    from django.conf import settings
+
+    from apps.core.models import AIUsageEvent
+
+    u = usage_dict or {}
+    rate = float(getattr(settings, 'USD_TO_BRL_RATE', 5.80))
+    cost_usd = Decimal(str(u.get('cost_usd', 0) or 0))
+    return AIUsageEvent(
+        organization=organization,
+        post=post,
+        source=source or ('posts' if post is not None else ''),
+        pipeline=(getattr(post, 'pipeline_used', '') or '') if post else '',
+        step=step,
+        purpose=purpose or '',
+        model=model or '',
+        input_tokens=int(u.get('input_tokens', 0) or 0),
+        output_tokens=int(u.get('output_tokens', 0) or 0),
+        cache_read_tokens=int(u.get('cache_read_input_tokens', 0) or 0),
+        cache_creation_tokens=int(u.get('cache_creation_input_tokens', 0) or 0),
+        cache_prefix=str(u.get('cache_prefix') or '')[:64],
+        images_generated=int(images_generated or 0),
+        cost_usd=cost_usd,
+        cost_brl=(cost_usd * Decimal(str(rate))).quantize(Decimal('0.0001')),
+    )
+
+
+def _apply_post_totals(events):
+    """Soma o custo dos eventos nos Post.total_*_cost_usd — um UPDATE com F()
+    por post (concorrente-seguro: nada é lido antes)."""
+    from django.db.models import F
+
+    from apps.posts.models import Post
+
+    per_post = {}
+    for ev in events:
+        if not ev.post_id or not ev.cost_usd:
+            continue
+        totals = per_post.setdefault(ev.post_id, {})
+        totals['total_cost_usd'] = totals.get('total_cost_usd', Decimal('0')) + ev.cost_usd
+        field = _POST_TOTAL_FIELD.get(ev.step)
+        if field:
+            totals[field] = totals.get(field, Decimal('0')) + ev.cost_usd
+    for post_id, totals in per_post.items():
+        Post.objects.filter(pk=post_id).update(
+            **{field: F(field) + value for field, value in totals.items()})
+
 
 def record_ai_event(organization, *, step, model, usage_dict, purpose='',
                     post=None, source='', images_generated=0):
-    """Grava um AIUsageEvent. usage_dict: input_tokens/output_tokens/
-    cache_*_tokens/cost_usd (mesmo formato do _record_ai_usage de posts)."""
+    """Grava um AIUsageEvent (ou enfileira, dentro de ai_usage_batch).
+    usage_dict: input_tokens/output_tokens/cache_*_tokens/cost_usd (mesmo
+    formato do _record_ai_usage de posts) e cache_prefix (skills.tag_usage)."""
     try:
-        from django.conf import settings
-
-        from apps.core.models import AIUsageEvent
-
         if organization is None:
             logger.warning('[ai_event] sem organization — evento descartado '
                            '(step=%s model=%s)', step, model)
             return None
-        u = usage_dict or {}
-        rate = float(getattr(settings, 'USD_TO_BRL_RATE', 5.80))
-        cost_usd = Decimal(str(u.get('cost_usd', 0) or 0))
-        return AIUsageEvent.objects.create(
-            organization=organization,
-            post=post,
-            source=source or ('posts' if post is not None else ''),
-            pipeline=(getattr(post, 'pipeline_used', '') or '') if post else '',
-            step=step,
-            purpose=purpose or '',
-            model=model or '',
-            input_tokens=int(u.get('input_tokens', 0) or 0),
-            output_tokens=int(u.get('output_tokens', 0) or 0),
-            cache_read_tokens=int(u.get('cache_read_input_tokens', 0) or 0),
-            cache_creation_tokens=int(u.get('cache_creation_input_tokens', 0) or 0),
-            images_generated=int(images_generated or 0),
-            cost_usd=cost_usd,
-            cost_brl=(cost_usd * Decimal(str(rate))).quantize(Decimal('0.0001')),
-        )
+        event = _build_event(organization, step=step, model=model,
+                             usage_dict=usage_dict, purpose=purpose, post=post,
+                             source=source, images_generated=images_generated)
+        buffer = getattr(_local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(event)
+            return event
+        event.save()
+        _apply_post_totals([event])
+        return event
     except Exception:
         logger.exception('[ai_event] falha ao gravar evento (step=%s)', step)
         return None
+
+
+def flush_ai_events():
+    """Grava o buffer da thread (bulk_create + totais). Nunca levanta."""
+    buffer = getattr(_local, 'buffer', None)
+    if not buffer:
+        return 0
+    events, _local.buffer = list(buffer), []
+    try:
+        from django.db import transaction
+
+        from apps.core.models import AIUsageEvent
+
+        with transaction.atomic():
+            AIUsageEvent.objects.bulk_create(events)
+            _apply_post_totals(events)
+        return len(events)
+    except Exception:
+        logger.exception('[ai_event] falha ao gravar lote de %d eventos', len(events))
+        return 0
+
+
+def begin_ai_usage_batch():
+    """Abre (ou aninha) o buffer da thread."""
+    _local.depth = getattr(_local, 'depth', 0) + 1
+    if getattr(_local, 'buffer', None) is None:
+        _local.buffer = []
+
+
+def end_ai_usage_batch():
+    """Fecha um nível; o mais externo grava o lote."""
+    depth = getattr(_local, 'depth', 0) - 1
+    _local.depth = max(depth, 0)
+    if depth <= 0:
+        flush_ai_events()
+        _local.buffer = None
+
+
+@contextmanager
+def ai_usage_batch():
+    """Acumula os eventos do bloco e grava tudo ao sair (mesmo com exceção:
+    custo gasto é custo registrado)."""
+    begin_ai_usage_batch()
+    try:
+        yield
+    finally:
+        end_ai_usage_batch()
+
+
+def _cache_status(ev):
+    if ev.cache_creation_tokens and ev.cache_read_tokens:
+        return 'partial'
+    if ev.cache_creation_tokens:
+        return 'cold'
+    if ev.cache_read_tokens:
+        return 'warm'
+    return 'no_cache'
+
+
+def post_usage_log(post):
+    """Histórico de uso de IA do post no formato das entries do antigo
+    Post.ai_usage_log — eventos do ledger, precedidos das entries legadas do
+    JSON anteriores ao 1o evento (posts de antes do ledger)."""
+    events = list(post.ai_usage_events.order_by('created_at', 'id'))
+    legacy = post.ai_usage_log if isinstance(post.ai_usage_log, list) else []
+    if events:
+        first = events[0].created_at.isoformat()
+        legacy = [e for e in legacy if (e.get('timestamp') or '') < first]
+    entries = list(legacy)
+    for ev in events:
+        cost_usd = float(ev.cost_usd or 0)
+        cost_brl = float(ev.cost_brl or 0)
+        entries.append({
+            'timestamp': ev.created_at.isoformat(),
+            'step': ev.step,
+            'purpose': ev.purpose,
+            'model': ev.model,
+            'input_tokens': ev.input_tokens,
+            'output_tokens': ev.output_tokens,
+            'cache_read_tokens': ev.cache_read_tokens,
+            'cache_creation_tokens': ev.cache_creation_tokens,
+            'cache_status': _cache_status(ev),
+            'cache_prefix': ev.cache_prefix,
+            'total_tokens': ev.input_tokens + ev.output_tokens,
+            'images_generated': ev.images_generated,
+            'cost_usd': cost_usd,
+            'cost_brl': cost_brl,
+            'usd_to_brl_rate': round(cost_brl / cost_usd, 4) if cost_usd else None,
+        })
+    return entries
@@ -0,0 +1,112 @@
+"""
+Estatisticas do dashboard por org — snapshot em cache compartilhado (Redis).
+
+O dashboard (pagina de entrada de todo login) fazia ~10 count()/aggregate
+separados a cada carga. Aqui: uma query por modelo com agregacao condicional
+(Count/Sum com filter=Q) + as listas de recentes, e o resultado fica em cache
+por org.
+
+  org_stats(org)          -> dict (cache -> banco)
+  invalidate(org_id)      -> signals de save/delete de Post, Pauta, QuotaUsageDaily
+                             e TrendMonitor (apps.content.signals)
+
+Uso de posts hoje/no ciclo vem dos contadores da quota (Redis, fora do
+snapshot); DASHBOARD_CACHE_TTL (default 300s) so cobre escrita por .update()
+fora do model (ex.: custo em QuotaUsageDaily).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(org_id):
+    return f'dashboard_stats_{org_id}'
+
+
+def invalidate(org_id):
+    if not org_id:
+        return
+    try:
+        cache.delete(cache_key(org_id))
+    except Exception as e:
+        logger.warning(f'[DASHBOARD] Falha ao invalidar cache (org {org_id}): {e}')
+
+
+def _compute(org):
+    from apps.content.models import TrendMonitor
+    from apps.core.models import QuotaUsageDaily
+    from apps.pautas.models import Pauta
+    from apps.posts.models import Post
+
+    today = timezone.now().date()
+    pautas = Pauta.objects.filter(organization=org).aggregate(
+        total=Count('id'),
+        pendentes=Count('id', filter=Q(status='requested')),
+    )
+    posts = Post.objects.filter(organization=org).aggregate(
+        total=Count('id'),
+        draft=Count('id', filter=Q(status='draft')),
+        aprovados=Count('id', filter=Q(status='approved')),
+    )
+    usage = QuotaUsageDaily.objects.filter(
+        organization=org, date__gte=today.replace(day=1), date__lte=today,
+    ).aggregate(
+        pautas_hoje=Sum('pautas_requested', filter=Q(date=today)),
+        cost_mes=Sum('cost_usd'),
+    )
+
+    networks = dict(Post._meta.get_field('social_network').choices)
+    atividades = [
+        {'tipo': 'pauta', 'titulo': p['title'], 'data': p['created_at'], 'status': p['status']}
+        for p in Pauta.objects.filter(organization=org).order_by('-created_at')
+        .values('title', 'created_at', 'status')[:3]
+    ] + [
+        {'tipo': 'post',
+         'titulo': f"Post para {networks.get(p['social_network'], p['social_network'])}",
+         'data': p['created_at'], 'status': p['status']}
+        for p in Post.objects.filter(organization=org).order_by('-created_at')
+        .values('social_network', 'created_at', 'status')[:3]
+    ]
+    atividades.sort(key=lambda x: x['data'], reverse=True)
+
+    trends = list(
+        TrendMonitor.objects.filter(organization=org, is_active=True)
+        .only('keyword', 'trend_score', 'relevance', 'created_at')
+        .order_by('-created_at')[:5]
+    )
+
+    return {
+        'pautas_total': pautas['total'],
+        'pautas_pendentes': pautas['pendentes'],
+        'posts_total': posts['total'],
+        'posts_draft': posts['draft'],
+        'posts_aprovados': posts['aprovados'],
+        'pautas_hoje': usage['pautas_hoje'] or 0,
+        'cost_mes': float(usage['cost_mes'] or 0),
+        'atividades_recentes': atividades[:5],
+        'trends_recentes': trends,
+    }
+
+
+def org_stats(org):
+    """Contadores, recentes e uso de quota da org para o dashboard."""
+    key = cache_key(org.pk)
+    try:
+        stats = cache.get(key)
+    except Exception:
+        stats = None
+    if stats is None:
+        stats = _compute(org)
+        try:
+            cache.set(key, stats, getattr(settings, 'DASHBOARD_CACHE_TTL', 300))
+        except Exception:
+            pass
+
+    from apps.core.services import quota
+    posts = quota.usage(org, 'post')
+    return {**stats, 'posts_hoje': posts['day'], 'posts_mes': posts['month']}
@@ -0,0 +1,127 @@
+"""
+Cliente HTTP compartilhado (requests.Session com pool de conexoes).
+
+Antes cada download de S3 presigned, chamada ao Gemini, fonte do Google Fonts,
+HeyGen e webhook N8N abria conexao nova (urllib.urlopen / requests.post sem
+Session): handshake TLS a cada chamada, varias por post.
+
+  get(url, **kw) / post(...) / put(...) / request(method, url, **kw)
+      -> requests.Response (mesma API do requests; status NAO vira excecao)
+  fetch_bytes(url, timeout=30, headers=None) -> (bytes, content_type)
+      GET que levanta em erro HTTP (substitui o urlopen().read())
+  stats() -> {host: {'requests','errors','total_ms','max_ms'}}
+
+Politica:
+  - keep-alive; ate HTTP_POOL_PER_HOST (env; default 8) conexoes por host,
+    HTTP_POOL_HOSTS (default 16) hosts no pool;
+  - retry com backoff (HTTP_RETRIES, default 2; 0.3s, 0.6s...) em falha de
+    conexao e 429/5xx — SO em metodo idempotente (GET/HEAD/PUT/DELETE). POST
+    nunca e repetido aqui (Gemini cobra por chamada; N8N tem retry proprio);
+  - Session por PROCESSO: apos o fork do Celery/gunicorn cria outra (sockets
+    do pai nao sao reaproveitados).
+"""
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+POOL_PER_HOST = max(1, int(os.environ.get('HTTP_POOL_PER_HOST', 8)))
+POOL_HOSTS = max(1, int(os.environ.get('HTTP_POOL_HOSTS', 16)))
+RETRIES = max(0, int(os.environ.get('HTTP_RETRIES', 2)))
+DEFAULT_TIMEOUT = 30
+USER_AGENT = 'Mozilla/5.0 IAMKT'
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_stats = {}
+
+
+def _build_session():
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST,
+                          max_retries=retry)
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Session do processo atual (recriada apos fork)."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session, _session_pid = _build_session(), pid
+                _stats.clear()
+    return _session
+
+
+def _record(host, elapsed_ms, error):
+    with _lock:
+        s = _stats.setdefault(host, {'requests': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        s['requests'] += 1
+        s['errors'] += int(error)
+        s['total_ms'] += elapsed_ms
+        s['max_ms'] = max(s['max_ms'], elapsed_ms)
+
+
+def request(method, url, *, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """requests.request pela Session compartilhada, com metricas por host."""
+    host = urlsplit(url).netloc
+    t0 = time.monotonic()
+    try:
+        resp = get_session().request(method, url, timeout=timeout, **kwargs)
+    except requests.RequestException:
+        _record(host, (time.monotonic() - t0) * 1000, True)
+        raise
+    _record(host, (time.monotonic() - t0) * 1000, resp.status_code >= 400)
+    return resp
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request('PUT', url, **kwargs)
+
+
+def fetch_bytes(url, timeout=DEFAULT_TIMEOUT, headers=None):
+    """GET -> (bytes, content_type sem parametros). Erro HTTP/rede levanta
+    requests.RequestException (como o urlopen levantava URLError)."""
+    resp = get(url, timeout=timeout, headers=headers)
+    resp.raise_for_status()
+    ct = resp.headers.get('Content-Type', '').split(';')[0].strip()
+    return resp.content, ct
+
+
+def stats():
+    with _lock:
+        return {host: dict(s) for host, s in _stats.items()}
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
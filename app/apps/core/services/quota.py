@@ -0,0 +1,333 @@
+"""
+Quota de posts/videos com contadores ATOMICOS no Redis (reserva -> commit/refund).
+
+Antes: can_create_post agregava QuotaUsageDaily + QuotaAdjustment a cada
+checagem e o signal fazia `usage.posts_created += 1; save()` — duas geracoes
+simultaneas passavam no check e o contador perdia incrementos.
+
+  reserve(org, 'post'|'video')  -> Reservation (bool: ok; .code/.message se negada)
+  reservation.commit()          -> objeto criado (o post_save ja contou a reserva)
+  reservation.refund()          -> criacao falhou: devolve a unidade
+  usage(org, resource)          -> {'day': n, 'month': n} sem reservar
+  check_limits(org, resource)   -> (bool, code, msg) com os contadores atuais
+  record_created(org, resource) -> post_save: consome a reserva pendente da
+                                   thread ou conta criacao sem reserva (admin,
+                                   shell) no commit da transacao
+  reconcile()                   -> grava os contadores em QuotaUsageDaily (beat)
+
+Redis (mesmo do cache):
+  quota:<org>:<res>:d:<data>    criados no dia (seed do banco com SET NX)
+  quota:<org>:<res>:f:<data>    valor do contador ja gravado no banco (flush
+                                grava so a diferenca: contagens que cairam
+                                direto no banco com o Redis fora nao se perdem)
+  quota:<org>:<res>:b:<data>    hash: month = dias do ciclo ANTES de hoje +
+                                QuotaAdjustment; day_adj = ajustes do dia
+  quota:dirty                   set '<org>:<data>' com contador a reconciliar
+
+Reserva = INCR do contador do dia (atomico) e checagem do novo valor contra
+os limites; estourou -> DECR e nega. Mes = base + dia: a base nao recebe
+incrementos, entao recalcular (ajuste manual, virada do dia) nao perde nada.
+Redis fora do ar -> checagem/contagem caem no banco (nunca quebra a view).
+"""
+import logging
+import threading
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+DAY_TTL = 3 * 24 * 3600
+BASE_TTL = 24 * 3600
+DIRTY_KEY = 'quota:dirty'
+
+# resource -> (campo de limite diario, campo mensal, campo em QuotaUsageDaily)
+RESOURCES = {
+    'post': ('quota_posts_dia', 'quota_posts_mes', 'posts_created'),
+    'video': ('quota_videos_dia', 'quota_videos_mes', 'videos_created'),
+}
+_ADJ_FIELD = {'post': 'posts_adjustments', 'video': 'videos_adjustments'}
+
+_MESSAGES = {
+    ('post', 'daily_limit'): 'Limite diário de posts atingido ({limit}/{limit})',
+    ('post', 'monthly_limit'): 'Limite mensal de posts atingido ({limit}/{limit})',
+    ('video', 'daily_limit'): 'Limite diário atingido ({limit} vídeos/dia).',
+    ('video', 'monthly_limit'): 'Limite mensal atingido ({limit} vídeos/mês).',
+}
+
+_local = threading.local()
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _today():
+    from django.utils import timezone
+    return timezone.now().date()
+
+
+def _day_key(org_id, resource, day):
+    return f'quota:{org_id}:{resource}:d:{day.isoformat()}'
+
+
+def _flushed_key(org_id, resource, day):
+    return f'quota:{org_id}:{resource}:f:{day.isoformat()}'
+
+
+def _base_key(org_id, resource, day):
+    return f'quota:{org_id}:{resource}:b:{day.isoformat()}'
+
+
+def _db_day(org, resource, day):
+    from apps.core.models import QuotaUsageDaily
+    row = QuotaUsageDaily.objects.filter(organization=org, date=day).values(
+        RESOURCES[resource][2], _ADJ_FIELD[resource]).first()
+    if not row:
+        return 0, 0
+    return row[RESOURCES[resource][2]], row[_ADJ_FIELD[resource]]
+
+
+def _db_month_base(org, resource, day):
+    """Dias do ciclo antes de `day` + ajustes mensais (so posts tem)."""
+    from django.db.models import Sum
+    from apps.core.models import QuotaAdjustment, QuotaUsageDaily
+
+    cycle_start = org.get_billing_cycle_start()
+    total = QuotaUsageDaily.objects.filter(
+        organization=org, date__gte=cycle_start.date(), date__lt=day,
+    ).aggregate(total=Sum(RESOURCES[resource][2]))['total'] or 0
+    if resource == 'post':
+        total += QuotaAdjustment.objects.filter(
+            organization=org, resource_type='post_monthly', created_at__gte=cycle_start,
+        ).aggregate(total=Sum('amount'))['total'] or 0
+    return total
+
+
+def _seed(r, org, resource, day):
+    """Garante contador do dia e base; devolve (month_base, day_adj)."""
+    created, day_adj = None, None
+    dkey = _day_key(org.pk, resource, day)
+    if not r.exists(dkey):
+        created, day_adj = _db_day(org, resource, day)
+        pipe = r.pipeline()
+        pipe.set(dkey, created, nx=True, ex=DAY_TTL)
+        pipe.set(_flushed_key(org.pk, resource, day), created, nx=True, ex=DAY_TTL)
+        pipe.execute()
+    bkey = _base_key(org.pk, resource, day)
+    base = r.hmget(bkey, 'month', 'day_adj')
+    if base[0] is None or base[1] is None:
+        # Ontem ainda pode estar so no Redis: grava antes de somar o banco
+        _flush(r, org.pk, day - timedelta(days=1))
+        if day_adj is None:
+            day_adj = _db_day(org, resource, day)[1]
+        base = (_db_month_base(org, resource, day), day_adj)
+        pipe = r.pipeline()
+        pipe.hset(bkey, mapping={'month': base[0], 'day_adj': base[1]})
+        pipe.expire(bkey, BASE_TTL)
+        pipe.execute()
+    return int(base[0]), int(base[1])
+
+
+def _over_limit(org, resource, day_used, month_used):
+    """(code, msg) do primeiro limite estourado; (None, None) se cabe."""
+    day_field, month_field, _ = RESOURCES[resource]
+    day_limit, month_limit = getattr(org, day_field), getattr(org, month_field)
+    if day_limit > 0 and day_used > day_limit:
+        code, limit = 'daily_limit', day_limit
+    elif month_limit > 0 and month_used > month_limit:
+        code, limit = 'monthly_limit', month_limit
+    else:
+        return None, None
+    return code, _MESSAGES[(resource, code)].format(limit=limit)
+
+
+def usage(org, resource='post'):
+    """Uso atual (inclui reservas em andamento) sem reservar."""
+    day = _today()
+    try:
+        r = _redis()
+        month_base, day_adj = _seed(r, org, resource, day)
+        created = int(r.get(_day_key(org.pk, resource, day)) or 0)
+    except Exception as exc:
+        logger.warning('[quota] Redis indisponivel (%s): uso lido do banco', exc)
+        created, day_adj = _db_day(org, resource, day)
+        month_base = _db_month_base(org, resource, day)
+    return {'day': max(0, created + day_adj), 'month': max(0, month_base + created)}
+
+
+def check_limits(org, resource='post'):
+    """(bool, code, msg) — cabe mais UMA unidade com o uso atual?"""
+    used = usage(org, resource)
+    code, msg = _over_limit(org, resource, used['day'] + 1, used['month'] + 1)
+    return code is None, code, msg
+
+
+class Reservation:
+    """Unidade de quota reservada; falsy quando negada (code/message)."""
+
+    def __init__(self, org, resource, day=None, ok=True, code=None, message=None):
+        self.org, self.resource, self.day = org, resource, day
+        self.ok, self.code, self.message = ok, code, message
+        self.claimed = False   # post_save do objeto ja consumiu a reserva
+        self.done = not ok
+
+    def __bool__(self):
+        return self.ok
+
+    def _release(self):
+        self.done = True
+        pending = getattr(_local, 'pending', [])
+        if self in pending:
+            pending.remove(self)
+
+    def commit(self):
+        self._release()
+
+    def refund(self):
+        """Devolve a unidade (idempotente; sem efeito em reserva negada)."""
+        if self.done:
+            return
+        self._release()
+        if self.day is None:   # reservada sem Redis: contagem (se houve) foi no banco
+            if self.claimed:
+                _db_increment(self.org.pk, self.resource, -1)
+            return
+        try:
+            r = _redis()
+            pipe = r.pipeline()
+            pipe.decr(_day_key(self.org.pk, self.resource, self.day))
+            pipe.sadd(DIRTY_KEY, f'{self.org.pk}:{self.day.isoformat()}')
+            pipe.execute()
+        except Exception as exc:
+            logger.error('[quota] refund falhou org=%s %s: %s', self.org.pk, self.resource, exc)
+
+
+def reserve(org, resource='post'):
+    """Reserva 1 unidade: regras da org (ativa, modulo, creditos) + limites
+    dia/mes checados no proprio INCR. Negada -> Reservation falsy."""
+    can = org.can_create_post if resource == 'post' else org.can_create_video_avatar
+    ok, code, msg = can()
+    if not ok:
+        return Reservation(org, resource, ok=False, code=code, message=msg)
+
+    day = _today()
+    try:
+        r = _redis()
+        month_base, day_adj = _seed(r, org, resource, day)
+        created = int(r.incr(_day_key(org.pk, resource, day)))
+        code, msg = _over_limit(org, resource, created + day_adj, month_base + created)
+        if code:
+            r.decr(_day_key(org.pk, resource, day))
+            return Reservation(org, resource, ok=False, code=code, message=msg)
+        r.sadd(DIRTY_KEY, f'{org.pk}:{day.isoformat()}')
+        reservation = Reservation(org, resource, day=day)
+    except Exception as exc:
+        logger.warning('[quota] Redis indisponivel (%s): reserva sem contador', exc)
+        reservation = Reservation(org, resource)
+    if not hasattr(_local, 'pending'):
+        _local.pending = []
+    _local.pending.append(reservation)
+    return reservation
+
+
+def _db_increment(org_id, resource, delta=1):
+    from django.db.models import F
+    from django.db.models.functions import Greatest
+    from apps.core.models import QuotaUsageDaily
+
+    field = RESOURCES[resource][2]
+    usage_row, _ = QuotaUsageDaily.objects.get_or_create(organization_id=org_id, date=_today())
+    QuotaUsageDaily.objects.filter(pk=usage_row.pk).update(
+        **{field: Greatest(F(field) + delta, 0)})
+
+
+def record_created(org, resource='post'):
+    """post_save de criacao: consome a reserva pendente da thread (ja contada)
+    ou conta a criacao sem reserva — so no commit: rollback da transacao
+    (ex.: TestCase, erro depois do save) nao deixa unidade no contador."""
+    from django.db import transaction
+
+    for reservation in getattr(_local, 'pending', []):
+        if (reservation.org.pk == org.pk and reservation.resource == resource
+                and not reservation.claimed):
+            reservation.claimed = True
+            if reservation.day is None:
+                _db_increment(org.pk, resource)
+            return
+    transaction.on_commit(lambda: _count_unreserved(org, resource))
+
+
+def _count_unreserved(org, resource):
+    day = _today()
+    try:
+        r = _redis()
+        _seed(r, org, resource, day)
+        pipe = r.pipeline()
+        pipe.incr(_day_key(org.pk, resource, day))
+        pipe.sadd(DIRTY_KEY, f'{org.pk}:{day.isoformat()}')
+        pipe.execute()
+    except Exception as exc:
+        logger.warning('[quota] Redis indisponivel (%s): contagem direto no banco', exc)
+        _db_increment(org.pk, resource)
+
+
+def invalidate(org_id):
+    """Descarta as bases de hoje (ajuste manual de quota; recalculadas no proximo uso)."""
+    day = _today()
+    try:
+        _redis().delete(*[_base_key(org_id, res, day) for res in RESOURCES])
+    except Exception as exc:
+        logger.warning('[quota] invalidate org=%s falhou: %s', org_id, exc)
+
+
+def _flush(r, org_id, day):
+    """Grava em QuotaUsageDaily o que os contadores vivos de (org, dia)
+    andaram desde o ultimo flush. O que o banco tem a mais (contagem de
+    fallback com o Redis fora) volta para o contador."""
+    from django.db.models import F
+    from django.db.models.functions import Greatest
+    from apps.core.models import QuotaUsageDaily
+
+    r.srem(DIRTY_KEY, f'{org_id}:{day.isoformat()}')
+    values = r.mget([_day_key(org_id, res, day) for res in RESOURCES])
+    marks = r.mget([_flushed_key(org_id, res, day) for res in RESOURCES])
+    live = {res: int(v) for res, v in zip(RESOURCES, values) if v is not None}
+    if not live:
+        return False
+    fields = {}
+    for res, mark in zip(RESOURCES, marks):
+        if res not in live:
+            continue
+        field = RESOURCES[res][2]
+        if mark is None:   # contador sem marca (anterior ao flush por delta)
+            fields[field] = max(0, live[res])
+        else:
+            fields[field] = Greatest(F(field) + (live[res] - int(mark)), 0)
+    usage_row, _ = QuotaUsageDaily.objects.get_or_create(organization_id=org_id, date=day)
+    QuotaUsageDaily.objects.filter(pk=usage_row.pk).update(**fields)
+
+    stored = QuotaUsageDaily.objects.filter(pk=usage_row.pk).values(*fields).get()
+    pipe = r.pipeline()
+    for res, value in live.items():
+        db_value = stored[RESOURCES[res][2]]
+        if db_value != value:
+            pipe.incrby(_day_key(org_id, res, day), db_value - value)
+        pipe.set(_flushed_key(org_id, res, day), db_value, ex=DAY_TTL)
+    pipe.execute()
+    return True
+
+
+def reconcile():
+    """Grava os contadores marcados como sujos; devolve quantos (org, dia)."""
+    from datetime import date
+
+    r = _redis()
+    written = 0
+    for member in r.smembers(DIRTY_KEY):
+        org_id, _, day = member.decode().partition(':')
+        try:
+            written += _flush(r, int(org_id), date.fromisoformat(day))
+        except Exception:
+            logger.exception('[quota] reconcile falhou em %s', member)
+            r.sadd(DIRTY_KEY, member)
+    return written
@@ -9,12 +9,16 @@ Features:
 """
 
 import boto3
+import os
 import secrets
+import threading
 import time
 import re
 import unicodedata
+from collections import OrderedDict
 from datetime import datetime
 from typing import Tuple, Optional, Dict, Any
+from urllib.parse import unquote, urlsplit
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from django.conf import settings
@@ -68,6 +72,14 @@ class S3Service:
     DOWNLOAD_URL_EXPIRATION = 3600  # 1 hora para download/preview
     
     _s3_client = None  # Cache do cliente S3
+
+    # LRU em processo dos objetos lidos pelo servidor (read_bytes)
+    READ_CACHE_MAX_BYTES = int(float(os.environ.get('S3_READ_CACHE_MB', 32)) * 1024 * 1024)
+    READ_CACHE_MAX_OBJECT = int(float(os.environ.get('S3_READ_CACHE_OBJECT_MB', 4)) * 1024 * 1024)
+    READ_CACHE_FRESH_SECONDS = int(os.environ.get('S3_READ_CACHE_TTL', 300))
+    _read_cache = OrderedDict()  # (bucket, key) -> (bytes, etag, lido_em)
+    _read_cache_bytes = 0
+    _read_lock = threading.Lock()
     
     # ============================================
     # MÉTODOS PRINCIPAIS
@@ -337,6 +349,173 @@ class S3Service:
         except ClientError as e:
             raise Exception(f"Erro AWS ao gerar URL de download: {str(e)}")
     
+    # ============================================
+    # LEITURA INTERNA (servidor -> S3, sem presigned)
+    # ============================================
+    # Presigned URL e so para o BROWSER e servicos externos. Codigo do
+    # servidor (render, transcricao, export) le pelo cliente boto3 em cache:
+    # sem assinar URL + abrir outra conexao HTTP por objeto.
+
+    @classmethod
+    def key_from_url(cls, url: str, bucket: Optional[str] = None) -> Optional[str]:
+        """
+        Extrai a chave S3 de uma URL do bucket da aplicacao (presigned ou
+        publica; virtual-host ou path-style). None se a URL nao for do bucket.
+        """
+        bucket = bucket or getattr(settings, 'AWS_BUCKET_NAME', '')
+        if not url or not bucket or url.startswith('data:'):
+            return None
+        parts = urlsplit(url)
+        host = parts.netloc.split(':')[0]
+        path = unquote(parts.path)
+        if host.startswith(f'{bucket}.s3'):
+            key = path.lstrip('/')
+        elif '.amazonaws.com' in host and path.startswith(f'/{bucket}/'):
+            key = path[len(bucket) + 2:]
+        else:
+            return None
+        return key or None
+
+    @classmethod
+    def open_stream(
+        cls,
+        s3_key: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        bucket: Optional[str] = None
+    ):
+        """
+        Abre o objeto para leitura em streaming (botocore StreamingBody).
+
+        Args:
+            s3_key: Chave do arquivo no S3
+            byte_range: (inicio, fim) inclusivo — le so esse trecho
+            bucket: Nome do bucket (opcional, usa AWS_BUCKET_NAME)
+
+        Raises:
+            Exception: Se erro ao ler o objeto
+        """
+        params = {'Bucket': bucket or settings.AWS_BUCKET_NAME, 'Key': s3_key}
+        if byte_range:
+            params['Range'] = f'bytes={int(byte_range[0])}-{int(byte_range[1])}'
+        try:
+            return cls._get_s3_client().get_object(**params)['Body']
+        except ClientError as e:
+            raise Exception(f"Erro AWS ao ler {s3_key}: {str(e)}")
+
+    @classmethod
+    def read_bytes(
+        cls,
+        s3_key: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        bucket: Optional[str] = None
+    ) -> bytes:
+        """
+        Le o objeto inteiro (ou um trecho) direto pelo boto3.
+
+        Objetos ate S3_READ_CACHE_OBJECT_MB ficam num LRU do processo
+        (S3_READ_CACHE_MB no total). Passados S3_READ_CACHE_TTL segundos, a
+        entrada e revalidada com GET condicional (If-None-Match): sem mudanca
+        o S3 responde 304 e nada e baixado de novo.
+
+        Args:
+            s3_key: Chave do arquivo no S3
+            byte_range: (inicio, fim) inclusivo — le so esse trecho
+            bucket: Nome do bucket (opcional, usa AWS_BUCKET_NAME)
+
+        Raises:
+            Exception: Se erro ao ler o objeto
+        """
+        bucket = bucket or settings.AWS_BUCKET_NAME
+        cache_key = (bucket, s3_key)
+        with cls._read_lock:
+            entry = cls._read_cache.get(cache_key)
+            if entry is not None:
+                cls._read_cache.move_to_end(cache_key)
+        if entry is not None:
+            data, etag, read_at = entry
+            if time.monotonic() - read_at > cls.READ_CACHE_FRESH_SECONDS:
+                data = cls._revalidate(bucket, s3_key, etag)
+            if data is not None:
+                if byte_range:
+                    return data[int(byte_range[0]):int(byte_range[1]) + 1]
+                return data
+
+        if byte_range:
+            return cls.open_stream(s3_key, byte_range, bucket).read()
+
+        try:
+            resp = cls._get_s3_client().get_object(Bucket=bucket, Key=s3_key)
+            data = resp['Body'].read()
+        except ClientError as e:
+            raise Exception(f"Erro AWS ao ler {s3_key}: {str(e)}")
+        cls._read_cache_put(cache_key, data, resp.get('ETag', ''))
+        return data
+
+    @classmethod
+    def read_url_bytes(cls, url: str, timeout: int = 30) -> bytes:
+        """
+        Bytes de uma URL recebida pronta (asset/sticker/logo): do bucket da
+        aplicacao -> read_bytes (boto3 + LRU); externa -> pool HTTP.
+
+        Raises:
+            Exception: Se erro ao ler/baixar
+        """
+        key = cls.key_from_url(url)
+        if key:
+            return cls.read_bytes(key)
+        from apps.core.services import http_client
+        return http_client.fetch_bytes(url, timeout=timeout)[0]
+
+    @classmethod
+    def _revalidate(cls, bucket: str, s3_key: str, etag: str) -> Optional[bytes]:
+        """GET condicional de uma entrada vencida: 304 -> bytes do cache
+        (renovados); objeto mudou -> bytes novos; erro -> None (rele)."""
+        cache_key = (bucket, s3_key)
+        try:
+            resp = cls._get_s3_client().get_object(
+                Bucket=bucket, Key=s3_key, IfNoneMatch=etag,
+            )
+        except ClientError as e:
+            code = str(e.response.get('Error', {}).get('Code', ''))
+            status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            if code in ('304', 'NotModified') or status == 304:
+                with cls._read_lock:
+                    entry = cls._read_cache.get(cache_key)
+                    if entry is not None:
+                        cls._read_cache[cache_key] = (entry[0], etag, time.monotonic())
+                        return entry[0]
+            cls.invalidate_read_cache(s3_key, bucket)
+            return None
+        data = resp['Body'].read()
+        cls._read_cache_put(cache_key, data, resp.get('ETag', ''))
+        return data
+
+    @classmethod
+    def _read_cache_put(cls, cache_key, data: bytes, etag: str) -> None:
+        if len(data) > cls.READ_CACHE_MAX_OBJECT:
+            return
+        with cls._read_lock:
+            old = cls._read_cache.pop(cache_key, None)
+            if old is not None:
+                cls._read_cache_bytes -= len(old[0])
+            cls._read_cache[cache_key] = (data, etag, time.monotonic())
+            cls._read_cache_bytes += len(data)
+            while cls._read_cache_bytes > cls.READ_CACHE_MAX_BYTES and cls._read_cache:
+                _k, (evicted, _e, _t) = cls._read_cache.popitem(last=False)
+                cls._read_cache_bytes -= len(evicted)
+
+    @classmethod
+    def invalidate_read_cache(cls, s3_key: Optional[str] = None, bucket: Optional[str] = None) -> None:
+        """Descarta uma chave do LRU de leitura (ou tudo, sem s3_key)."""
+        with cls._read_lock:
+            if s3_key is None:
+                cls._read_cache.clear()
+                cls._read_cache_bytes = 0
+                return
+            old = cls._read_cache.pop((bucket or settings.AWS_BUCKET_NAME, s3_key), None)
+            if old is not None:
+                cls._read_cache_bytes -= len(old[0])
+
     @classmethod
     def delete_file(cls, s3_key: str) -> bool:
         """
@@ -355,6 +534,7 @@ class S3Service:
                 Bucket=settings.AWS_BUCKET_NAME,
                 Key=s3_key
             )
+            cls.invalidate_read_cache(s3_key)
             return True
         except ClientError:
             return False
@@ -402,6 +582,8 @@ class S3Service:
         except ClientError:
             # Retornar o que foi possivel deletar; caller decide o que fazer
             return deleted_count
+        finally:
+            cls.invalidate_read_cache()
 
         return deleted_count
     
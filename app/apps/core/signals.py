@@ -4,7 +4,7 @@ Detecta mudanças e envia emails automaticamente
 """
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
-from .models import Organization
+from .models import Organization, QuotaAdjustment, QuotaUsageDaily
 from .emails import (
     send_organization_approved_email,
     send_organization_suspended_email,
@@ -86,3 +86,14 @@ def handle_organization_changes(sender, instance, created, **kwargs):
     # Limpar cache
     if instance.pk in _org_state_cache:
         del _org_state_cache[instance.pk]
+
+
+@receiver(post_save, sender=QuotaAdjustment)
+@receiver(post_save, sender=QuotaUsageDaily)
+def invalidate_quota_base(sender, instance, created=False, update_fields=None, **kwargs):
+    """Ajuste manual de quota (admin): base do mês/ajustes do dia recalculados no próximo uso."""
+    if sender is QuotaUsageDaily and (
+            created or (update_fields and not {'posts_adjustments', 'videos_adjustments'} & set(update_fields))):
+        return
+    from apps.core.services import quota
+    quota.invalidate(instance.organization_id)
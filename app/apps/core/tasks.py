@@ -2,277 +2,210 @@
 IAMKT - Celery Tasks para Core
 
 Tasks assíncronas para monitoramento de quotas e envio de alertas.
+
+check_quota_alerts avalia TODAS as orgs numa query agregada (uso do dia e do
+ciclo x limites, alertas já enviados via Exists) e enfileira os emails em
+lotes na fila 'email' (send_quota_alert_emails: uma conexão SMTP por lote,
+retry só das mensagens que falharam).
 """
+import logging
+from datetime import timedelta
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
+from django.db.models import (Case, DateField, Exists, F, IntegerField, OuterRef, Q,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.conf import settings
-from django.db.models import Sum
-from decimal import Decimal
 
-from apps.core.models import Organization, QuotaUsageDaily, QuotaAlert
+from apps.core.models import Organization, QuotaAdjustment, QuotaAlert
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE = 50
+
+# resource_type -> (campo de limite, uso anotado, mensal?)
+ALERT_RESOURCES = {
+    QuotaAlert.ResourceType.PAUTA_DAILY: ('quota_pautas_dia', 'pautas_dia', False),
+    QuotaAlert.ResourceType.POST_DAILY: ('quota_posts_dia', 'posts_dia', False),
+    QuotaAlert.ResourceType.POST_MONTHLY: ('quota_posts_mes', 'posts_mes', True),
+    QuotaAlert.ResourceType.VIDEO_DAILY: ('quota_videos_dia', 'videos_dia', False),
+    QuotaAlert.ResourceType.VIDEO_MONTHLY: ('quota_videos_mes', 'videos_mes', True),
+}
+
+
+def _cycle_start(today, billing_cycle_day):
+    """Mesma regra de Organization.get_billing_cycle_start, por dia de ciclo."""
+    cycle_day = min(billing_cycle_day, 28)
+    if today.day >= cycle_day:
+        return today.replace(day=cycle_day)
+    return (today.replace(day=1) - timedelta(days=1)).replace(day=cycle_day)
+
+
+def quota_alert_candidates(today):
+    """Orgs ativas com alerta habilitado, anotadas com uso x limite e com os
+    alertas já enviados (hoje p/ quota diária; no ciclo p/ mensal)."""
+    orgs = Organization.objects.filter(is_active=True).filter(
+        Q(alert_80_enabled=True) | Q(alert_100_enabled=True))
+    cycle_days = set(orgs.values_list('billing_cycle_day', flat=True))
+    cycle_start = Case(
+        *[When(billing_cycle_day=d, then=Value(_cycle_start(today, d))) for d in cycle_days],
+        default=Value(today), output_field=DateField())
+
+    usage = 'quota_usage_daily__'
+    in_day = Q(**{f'{usage}date': today})
+    in_cycle = Q(**{f'{usage}date__gte': F('cycle_start')})
+    post_adjustments = (
+        QuotaAdjustment.objects
+        .filter(organization=OuterRef('pk'), resource_type='post_monthly',
+                created_at__date__gte=OuterRef('cycle_start'))
+        .values('organization').annotate(total=Sum('amount')).values('total'))
+
+    sent = {}
+    for resource, (_limit, _used, monthly) in ALERT_RESOURCES.items():
+        since = OuterRef('cycle_start') if monthly else today
+        for level in QuotaAlert.AlertType.values:
+            sent[f'sent_{resource}_{level}'] = Exists(QuotaAlert.objects.filter(
+                organization=OuterRef('pk'), resource_type=resource, alert_type=level,
+                date__gte=since))
+
+    def total(expr, where):
+        return Coalesce(Sum(expr, filter=where), 0, output_field=IntegerField())
+
+    return (
+        orgs.annotate(cycle_start=cycle_start)
+        .annotate(
+            pautas_dia=total(F(f'{usage}pautas_requested') + F(f'{usage}pautas_adjustments'), in_day),
+            posts_dia=total(F(f'{usage}posts_created') + F(f'{usage}posts_adjustments'), in_day),
+            videos_dia=total(F(f'{usage}videos_created') + F(f'{usage}videos_adjustments'), in_day),
+            posts_mes=total(F(f'{usage}posts_created'), in_cycle)
+            + Coalesce(Subquery(post_adjustments, output_field=IntegerField()), 0),
+            videos_mes=total(F(f'{usage}videos_created'), in_cycle),
+            **sent,
+        )
+        .values('pk', 'name', 'alert_email', 'alert_80_enabled', 'alert_100_enabled',
+                'owner__email', *[limit for limit, _u, _m in ALERT_RESOURCES.values()],
+                'pautas_dia', 'posts_dia', 'videos_dia', 'posts_mes', 'videos_mes', *sent)
+    )
+
+
+def _alert_level(row, resource):
+    """'100'/'80' a disparar para o recurso, ou None."""
+    limit_field, used_field, _monthly = ALERT_RESOURCES[resource]
+    limit, used = row[limit_field], row[used_field]
+    if limit <= 0 or used <= 0:
+        return None
+    if used >= limit:
+        level = '100' if row['alert_100_enabled'] else None
+    elif used * 100 >= limit * 80:
+        level = '80' if row['alert_80_enabled'] else None
+    else:
+        return None
+    # 100% já avisado cobre o 80% (ex.: refund baixou o uso)
+    if level is None or row[f'sent_{resource}_100'] or row[f'sent_{resource}_{level}']:
+        return None
+    return level
+
+
+def _register_alerts(alerts):
+    """bulk_create; execução concorrente que já gravou algum -> um a um,
+    pulando os repetidos (pk None)."""
+    try:
+        with transaction.atomic():
+            return QuotaAlert.objects.bulk_create(alerts)
+    except IntegrityError:
+        for alert in alerts:
+            alert.pk = None
+            try:
+                with transaction.atomic():
+                    alert.save(force_insert=True)
+            except IntegrityError:
+                alert.pk = None
+        return alerts
 
 
 @shared_task
 def check_quota_alerts():
     """
     Task periódica que verifica uso de quotas e envia alertas.
-    Deve ser executada a cada hora via Celery Beat.
+    Executada a cada hora via Celery Beat (sistema/celery.py).
     """
+    from apps.core.services import quota
+
+    try:
+        quota.reconcile()   # contadores do Redis -> QuotaUsageDaily
+    except Exception as exc:
+        logger.warning('[quota_alerts] reconcile falhou (%s): avaliando com o banco', exc)
+
     today = timezone.now().date()
-    organizations = Organization.objects.filter(
-        is_active=True,
-        alert_enabled=True
-    )
-    
-    alerts_sent = 0
-    
-    for org in organizations:
-        # Verificar alertas diários
-        alerts_sent += check_daily_quota_alerts(org, today)
-        
-        # Verificar alertas mensais
-        alerts_sent += check_monthly_quota_alerts(org, today)
-    
-    return f"Alertas verificados: {alerts_sent} enviados"
-
-
-def check_daily_quota_alerts(org, today):
-    """Verificar alertas de quotas diárias (pautas e posts)"""
-    alerts_sent = 0
-    
-    # Buscar uso de hoje
+    alerts, payloads = [], []
+    for row in quota_alert_candidates(today):
+        sent_to = row['alert_email'] or row['owner__email']
+        if not sent_to:
+            continue
+        for resource in ALERT_RESOURCES:
+            level = _alert_level(row, resource)
+            if level is None:
+                continue
+            limit_field, used_field, _monthly = ALERT_RESOURCES[resource]
+            alerts.append(QuotaAlert(organization_id=row['pk'], alert_type=level,
+                                     resource_type=resource, date=today, sent_to=sent_to))
+            payloads.append({'org': row['name'], 'current': row[used_field],
+                             'limit': row[limit_field]})
+
+    # Registro ANTES do envio: a próxima execução já não duplica
+    items = [dict(payload, alert=alert.pk)
+             for alert, payload in zip(_register_alerts(alerts), payloads) if alert.pk]
+    for i in range(0, len(items), EMAIL_BATCH_SIZE):
+        send_quota_alert_emails.delay(items[i:i + EMAIL_BATCH_SIZE])
+
+    return f"Alertas verificados: {len(items)} enfileirados"
+
+
+@shared_task(bind=True, queue='email', max_retries=5, default_retry_delay=120)
+def send_quota_alert_emails(self, items):
+    """
+    Envia um lote de alertas de quota numa conexão SMTP. Só as mensagens que
+    falharam voltam no retry (conexão que não abre: o lote inteiro); esgotadas
+    as tentativas, o QuotaAlert é apagado para a próxima avaliação tentar de novo.
+    """
+    from django.core.mail import get_connection
+    from apps.core.emails import build_quota_alert_email
+
+    alerts = QuotaAlert.objects.in_bulk([item['alert'] for item in items])
+    connection = get_connection()
     try:
-        usage = QuotaUsageDaily.objects.get(organization=org, date=today)
-    except QuotaUsageDaily.DoesNotExist:
-        return 0
-    
-    # Verificar Pautas Diárias
-    if org.quota_pautas_dia > 0:
-        percentage = (usage.pautas_count / org.quota_pautas_dia) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'pautas_dia', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='pautas_dia',
-                    threshold=100,
-                    current=usage.pautas_count,
-                    limit=org.quota_pautas_dia,
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'pautas_dia', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='pautas_dia',
-                    threshold=80,
-                    current=usage.pautas_count,
-                    limit=org.quota_pautas_dia,
-                    date=today
-                )
-                alerts_sent += 1
-    
-    # Verificar Posts Diários
-    if org.quota_posts_dia > 0:
-        percentage = (usage.posts_count / org.quota_posts_dia) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'posts_dia', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_dia',
-                    threshold=100,
-                    current=usage.posts_count,
-                    limit=org.quota_posts_dia,
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'posts_dia', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_dia',
-                    threshold=80,
-                    current=usage.posts_count,
-                    limit=org.quota_posts_dia,
-                    date=today
-                )
-                alerts_sent += 1
-    
-    return alerts_sent
-
-
-def check_monthly_quota_alerts(org, today):
-    """Verificar alertas de quotas mensais (posts e custo)"""
-    alerts_sent = 0
-    
-    # Calcular uso do mês
-    first_day = today.replace(day=1)
-    usage_month = QuotaUsageDaily.objects.filter(
-        organization=org,
-        date__gte=first_day,
-        date__lte=today
-    ).aggregate(
-        total_posts=Sum('posts_count'),
-        total_cost=Sum('cost_usd')
-    )
-    
-    posts_mes = usage_month['total_posts'] or 0
-    cost_mes = float(usage_month['total_cost'] or 0)
-    
-    # Verificar Posts Mensais
-    if org.quota_posts_mes > 0:
-        percentage = (posts_mes / org.quota_posts_mes) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'posts_mes', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_mes',
-                    threshold=100,
-                    current=posts_mes,
-                    limit=org.quota_posts_mes,
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'posts_mes', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_mes',
-                    threshold=80,
-                    current=posts_mes,
-                    limit=org.quota_posts_mes,
-                    date=today
-                )
-                alerts_sent += 1
-    
-    # Verificar Custo Mensal
-    if org.quota_cost_mes_usd and org.quota_cost_mes_usd > 0:
-        percentage = (cost_mes / float(org.quota_cost_mes_usd)) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'cost_mes', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='cost_mes',
-                    threshold=100,
-                    current=cost_mes,
-                    limit=float(org.quota_cost_mes_usd),
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'cost_mes', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='cost_mes',
-                    threshold=80,
-                    current=cost_mes,
-                    limit=float(org.quota_cost_mes_usd),
-                    date=today
-                )
-                alerts_sent += 1
-    
-    return alerts_sent
-
-
-def alert_already_sent(org, alert_type, threshold, date):
-    """Verificar se alerta já foi enviado hoje para evitar duplicatas"""
-    return QuotaAlert.objects.filter(
-        organization=org,
-        alert_type=alert_type,
-        threshold_percentage=threshold,
-        sent_at__date=date
-    ).exists()
-
-
-def send_quota_alert(org, alert_type, threshold, current, limit, date):
-    """Enviar email de alerta de quota"""
-    
-    # Mapear tipos de alerta para nomes legíveis
-    alert_names = {
-        'pautas_dia': 'Pautas Diárias',
-        'posts_dia': 'Posts Diários',
-        'posts_mes': 'Posts Mensais',
-        'cost_mes': 'Custo Mensal (USD)'
-    }
-    
-    alert_name = alert_names.get(alert_type, alert_type)
-    percentage = (current / limit * 100) if limit > 0 else 0
-    
-    # Definir assunto e mensagem
-    if threshold >= 100:
-        subject = f'⚠️ ALERTA: Quota de {alert_name} ESGOTADA - {org.name}'
-        status = 'ESGOTADA (100%)'
-        urgency = 'CRÍTICO'
+        connection.open()
+    except Exception as exc:
+        # Sem conexão nada foi enviado: o lote inteiro volta no retry
+        logger.warning('[quota_alerts] conexão SMTP falhou (%d alertas): %s', len(items), exc)
+        failed = list(items)
     else:
-        subject = f'⚠️ Alerta: Quota de {alert_name} em {threshold}% - {org.name}'
-        status = f'em {percentage:.1f}%'
-        urgency = 'ATENÇÃO'
-    
-    # Formatar valores
-    if 'cost' in alert_type:
-        current_str = f'${current:.2f}'
-        limit_str = f'${limit:.2f}'
-    else:
-        current_str = str(int(current))
-        limit_str = str(int(limit))
-    
-    # Compor mensagem
-    message = f"""
-Olá,
-
-{urgency}: A quota de {alert_name} da organização {org.name} está {status}.
-
-Detalhes:
-- Tipo: {alert_name}
-- Uso atual: {current_str}
-- Limite: {limit_str}
-- Percentual: {percentage:.1f}%
-- Data: {date.strftime('%d/%m/%Y')}
-
-{'⚠️ A quota foi totalmente utilizada. Novas criações podem ser bloqueadas.' if threshold >= 100 else '⚠️ A quota está próxima do limite. Considere ajustar ou aguardar renovação.'}
-
----
-Sistema IAMKT - Alertas de Quota
-    """.strip()
-    
-    # Email de destino
-    email_to = org.alert_email or settings.DEFAULT_FROM_EMAIL
-    
-    # Enviar email
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email_to],
-            fail_silently=False,
-        )
-        
-        # Registrar alerta enviado
-        QuotaAlert.objects.create(
-            organization=org,
-            alert_type=alert_type,
-            threshold_percentage=threshold,
-            current_usage=Decimal(str(current)),
-            quota_limit=Decimal(str(limit)),
-            email_sent_to=email_to
-        )
-        
-        return True
-    
-    except Exception as e:
-        # Log do erro (em produção, usar logging adequado)
-        print(f"Erro ao enviar alerta para {org.name}: {e}")
-        return False
+        failed = []
+        try:
+            for item in items:
+                alert = alerts.get(item['alert'])
+                if alert is None:
+                    continue
+                message = build_quota_alert_email(alert, item['org'], item['current'],
+                                                  item['limit'], connection=connection)
+                try:
+                    message.send(fail_silently=False)
+                except Exception as exc:
+                    logger.warning('[quota_alerts] envio falhou alert=%s (%s): %s',
+                                   alert.pk, alert.sent_to, exc)
+                    failed.append(item)
+        finally:
+            connection.close()
+
+    if not failed:
+        return f"Alertas enviados: {len(items)}"
+    if self.request.retries < self.max_retries:
+        raise self.retry(args=[failed])
+    QuotaAlert.objects.filter(pk__in=[item['alert'] for item in failed]).delete()
+    logger.error('[quota_alerts] %d alertas descartados após %d tentativas',
+                 len(failed), self.max_retries)
+    return f"Alertas enviados: {len(items) - len(failed)}; falharam: {len(failed)}"
 
 
 @shared_task
@@ -281,6 +214,17 @@ def cleanup_old_quota_alerts(days=90):
     Limpar alertas antigos para evitar acúmulo no banco.
     Manter apenas últimos 90 dias por padrão.
     """
-    cutoff_date = timezone.now() - timezone.timedelta(days=days)
-    deleted_count = QuotaAlert.objects.filter(sent_at__lt=cutoff_date).delete()[0]
+    cutoff_date = timezone.now().date() - timedelta(days=days)
+    deleted_count = QuotaAlert.objects.filter(date__lt=cutoff_date).delete()[0]
     return f"Alertas antigos removidos: {deleted_count}"
+
+
+@shared_task
+def reconcile_quota_counters():
+    """
+    Grava em QuotaUsageDaily os contadores de quota (posts/vídeos) do Redis.
+    Executada a cada 5 minutos via Celery Beat (sistema/celery.py).
+    """
+    from apps.core.services import quota
+    written = quota.reconcile()
+    return f"Contadores reconciliados: {written}"
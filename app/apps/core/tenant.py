@@ -0,0 +1,129 @@
+"""
+IAMKT - Contexto de tenant por request
+
+O TenantMiddleware anexa `request.tenant` (TenantContext). Onboarding
+middleware, context processor e views leem os flags da Base de Conhecimento
+DAQUI — antes cada um fazia seu KnowledgeBase.objects...first() (linha
+inteira, com dezenas de JSONFields) no mesmo request.
+
+  request.tenant.organization
+  request.tenant.kb            -> KBFlags | None (projecao enxuta, lazy)
+  get_tenant_context(request)  -> sempre devolve um (cria se faltar)
+  invalidate_kb_flags(org_id)  -> chamado no save/delete da KB (signals)
+
+A projecao fica no cache compartilhado por TENANT_KB_CACHE_TTL segundos
+(default 60); o save da KB invalida na hora, o TTL so cobre escrita por
+.update() fora do model.
+"""
+import logging
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KB_FLAG_FIELDS = (
+    'id',
+    'onboarding_completed',
+    'suggestions_reviewed',
+    'compilation_status',
+    'completude_percentual',
+)
+
+# Sentinela de cache: "org sem KB" (None e o miss do cache.get)
+_NO_KB = 'none'
+
+
+@dataclass(frozen=True)
+class KBFlags:
+    """Projecao enxuta da KnowledgeBase (so o que o roteamento/sidebar usa)."""
+    id: int
+    onboarding_completed: bool
+    suggestions_reviewed: bool
+    compilation_status: str
+    completude_percentual: int
+
+
+def kb_flags_cache_key(org_id):
+    return f'tenant_kb_flags_{org_id}'
+
+
+def invalidate_kb_flags(org_id):
+    if not org_id:
+        return
+    try:
+        cache.delete(kb_flags_cache_key(org_id))
+    except Exception as e:
+        logger.warning(f'[TENANT] Falha ao invalidar cache da KB (org {org_id}): {e}')
+
+
+def load_kb_flags(organization):
+    """KBFlags da org (cache compartilhado -> banco). None = org sem KB."""
+    if not organization:
+        return None
+    key = kb_flags_cache_key(organization.pk)
+    try:
+        cached = cache.get(key)
+    except Exception:
+        cached = None
+    if cached == _NO_KB:
+        return None
+    if cached is not None:
+        return KBFlags(**cached)
+
+    from apps.knowledge.models import KnowledgeBase
+    row = (KnowledgeBase.objects.filter(organization=organization)
+           .order_by('id').values(*KB_FLAG_FIELDS).first())
+    try:
+        cache.set(key, row or _NO_KB, getattr(settings, 'TENANT_KB_CACHE_TTL', 60))
+    except Exception:
+        pass
+    return KBFlags(**row) if row else None
+
+
+class TenantContext:
+    """Estado do tenant para UM request. A KB so e carregada no 1o acesso a
+    `.kb` e memoizada ate o fim do request."""
+
+    _UNLOADED = object()
+
+    def __init__(self, organization=None):
+        self.organization = organization
+        self._kb = self._UNLOADED
+
+    @property
+    def kb(self):
+        if self._kb is self._UNLOADED:
+            self._kb = load_kb_flags(self.organization)
+        return self._kb
+
+    def refresh_kb(self):
+        """Descarta o memo (a view acabou de salvar a KB)."""
+        self._kb = self._UNLOADED
+
+    @property
+    def kb_exists(self):
+        return self.kb is not None
+
+    @property
+    def onboarding_completed(self):
+        return bool(self.kb and self.kb.onboarding_completed)
+
+    @property
+    def suggestions_reviewed(self):
+        return bool(self.kb and self.kb.suggestions_reviewed)
+
+    @property
+    def compilation_status(self):
+        return self.kb.compilation_status if self.kb else None
+
+
+def get_tenant_context(request):
+    """request.tenant (anexado pelo TenantMiddleware); cria um se o request
+    nao passou pelo middleware (URL publica, testes com RequestFactory)."""
+    tenant = getattr(request, 'tenant', None)
+    if tenant is None:
+        tenant = TenantContext(getattr(request, 'organization', None))
+        request.tenant = tenant
+    return tenant
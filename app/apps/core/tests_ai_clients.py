@@ -0,0 +1,83 @@
+"""
+Testes do registro de clientes de IA (apps.core.services.ai_clients)
+
+Valida que:
+1. O mesmo cliente/pool e devolvido entre chamadas e recriado apos fork
+2. Chamadas do SDK reaproveitam a conexao e contam requests/erros/retries
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.core.services import ai_clients
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    overloaded = 0   # quantas respostas 529 antes do 200
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if type(self).overloaded:
+            type(self).overloaded -= 1
+            status, body = 529, {'type': 'error', 'error': {'type': 'overloaded_error',
+                                                            'message': 'Overloaded'}}
+        else:
+            status, body = 200, {
+                'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'model': 'm',
+                'content': [{'type': 'text', 'text': 'ok'}], 'stop_reason': 'end_turn',
+                'stop_sequence': None, 'usage': {'input_tokens': 1, 'output_tokens': 1}}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('retry-after-ms', '1')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class AIClientRegistryTests(SimpleTestCase):
+    def setUp(self):
+        _Handler.connections, _Handler.overloaded = 0, 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        env = mock.patch.dict('os.environ', {
+            'ANTHROPIC_BASE_URL': f'http://127.0.0.1:{self.server.server_port}'})
+        env.start()
+        self.addCleanup(env.stop)
+        ai_clients.reset()
+        self.addCleanup(ai_clients.reset)
+
+    def test_cliente_reaproveitado_e_recriado_apos_fork(self):
+        client = ai_clients.anthropic_client('k')
+        self.assertIs(ai_clients.anthropic_client('k'), client)
+        retrying = ai_clients.anthropic_client('k', max_retries=6)
+        self.assertIsNot(retrying, client)
+        self.assertIs(retrying._client, client._client)   # mesmo pool httpx
+        with mock.patch.object(ai_clients.os, 'getpid', return_value=-1):
+            self.assertIsNot(ai_clients.anthropic_client('k'), client)
+
+    def test_keep_alive_e_metricas_com_retry(self):
+        _Handler.overloaded = 1
+        client = ai_clients.anthropic_client('k', max_retries=2)
+        for _ in range(2):
+            resp = client.messages.create(model='m', max_tokens=1,
+                                          messages=[{'role': 'user', 'content': 'oi'}])
+        self.assertEqual(resp.content[0].text, 'ok')
+        self.assertEqual(_Handler.connections, 1)
+        s = ai_clients.stats()['anthropic']
+        self.assertEqual((s['requests'], s['errors'], s['retries'], s['in_flight']),
+                         (3, 1, 1, 0))
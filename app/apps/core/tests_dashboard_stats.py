@@ -0,0 +1,67 @@
+"""
+Testes do snapshot de estatisticas do dashboard (apps.core.services.dashboard_stats)
+
+Valida que:
+1. Contadores saem de uma query agregada por modelo e ficam em cache por org
+2. Save de post/pauta invalida o snapshot
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.models import Organization
+from apps.core.services import dashboard_stats
+from apps.knowledge.models import KnowledgeBase
+from apps.pautas.models import Pauta
+from apps.posts.models import Post
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org = Organization.objects.create(name='Org D', slug='org-d', is_active=True)
+        self.user = get_user_model().objects.create_user(
+            username='user_d', email='user_d@test.com', password='test123', organization=self.org,
+        )
+        with self.captureOnCommitCallbacks(execute=True):   # quota conta no commit
+            for status in ('draft', 'draft', 'approved', 'pending'):
+                self._post(status)
+        kb = KnowledgeBase.objects.create(organization=self.org, nome_empresa='Org D',
+                                          onboarding_completed=True, suggestions_reviewed=True)
+        Pauta.objects.create(organization=self.org, knowledge_base=kb, user=self.user,
+                             title='P1', content='c', status='requested')
+
+    def _post(self, status):
+        return Post.objects.create(
+            organization=self.org, user=self.user, requested_theme='Tema',
+            social_network='instagram', content_type='post', formats=['feed'], status=status,
+            caption='', hashtags=[], copy_payload={}, designer_payload={},
+            local_pipeline_context={},
+        )
+
+    def test_snapshot_agregado_em_cache_e_invalidado_no_save(self):
+        with self.assertNumQueries(6):
+            stats = dashboard_stats.org_stats(self.org)
+        self.assertEqual((stats['posts_total'], stats['posts_draft'], stats['posts_aprovados']),
+                         (4, 2, 1))
+        self.assertEqual((stats['pautas_total'], stats['pautas_pendentes']), (1, 1))
+        self.assertEqual(stats['posts_hoje'], 4)
+        self.assertEqual(len(stats['atividades_recentes']), 4)   # 1 pauta + 3 posts
+        self.assertEqual(stats['atividades_recentes'][0]['titulo'], 'P1')
+
+        with self.assertNumQueries(0):
+            dashboard_stats.org_stats(self.org)
+
+        post = Post.objects.filter(organization=self.org, status='pending').get()
+        post.status = 'approved'
+        post.save(update_fields=['status'])
+        self.assertEqual(dashboard_stats.org_stats(self.org)['posts_aprovados'], 2)
+
+    def test_dashboard_renderiza_do_snapshot(self):
+        self.client.force_login(self.user)
+        resp = self.client.get('/dashboard/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['posts_total'], 4)
+        self.assertEqual(resp.context['quota_info']['posts_hoje'], 4)
@@ -0,0 +1,65 @@
+"""
+Testes do cliente HTTP compartilhado (apps.core.services.http_client)
+
+Valida que:
+1. Chamadas seguidas ao mesmo host reaproveitam a conexao (keep-alive)
+2. Erro HTTP conta nas metricas por host e fetch_bytes levanta
+3. Apos fork (pid novo) a Session e recriada
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from apps.core.services import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        status, body = (404, b'nope') if self.path == '/missing' else (200, b'\x89PNG')
+        self.send_response(status)
+        self.send_header('Content-Type', 'image/png; charset=binary')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTests(SimpleTestCase):
+
+    def setUp(self):
+        _Handler.connections = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        http_client.reset_stats()
+
+    def test_keep_alive_e_metricas(self):
+        for _ in range(3):
+            data, ct = http_client.fetch_bytes(f'{self.base}/logo.png')
+        self.assertEqual((data, ct), (b'\x89PNG', 'image/png'))
+        self.assertEqual(_Handler.connections, 1)
+
+        with self.assertRaises(requests.HTTPError):
+            http_client.fetch_bytes(f'{self.base}/missing')
+        host = http_client.stats()[f'127.0.0.1:{self.server.server_port}']
+        self.assertEqual((host['requests'], host['errors']), (4, 1))
+
+    def test_session_recriada_apos_fork(self):
+        session = http_client.get_session()
+        self.assertIs(http_client.get_session(), session)
+        with mock.patch.object(http_client.os, 'getpid', return_value=-1):
+            self.assertIsNot(http_client.get_session(), session)
@@ -0,0 +1,185 @@
+"""
+Testes da quota atomica de posts/videos (apps.core.services.quota)
+
+Valida que:
+1. Reserva concorrente nunca passa do limite diario (INCR atomico)
+2. O post_save consome a reserva (sem contar 2x); refund devolve a unidade
+3. Mes = dias anteriores do ciclo + ajustes; reconcile grava QuotaUsageDaily
+   sem apagar contagens feitas direto no banco com o Redis fora
+4. Alertas: avaliacao agregada de todas as orgs e envio em lote, sem repetir
+"""
+import threading
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core.models import Organization, QuotaAdjustment, QuotaAlert, QuotaUsageDaily
+from apps.core.services import quota
+from apps.posts.models import Post
+
+
+class QuotaReservationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org = Organization.objects.create(
+            name='Org Q', slug='org-q', is_active=True,
+            quota_posts_dia=3, quota_posts_mes=100, billing_cycle_day=1,
+        )
+        self.user = get_user_model().objects.create_user(
+            username='user_q', email='user_q@test.com', password='test123', organization=self.org,
+        )
+
+    def _new_post(self):
+        return Post.objects.create(
+            organization=self.org, user=self.user, requested_theme='Tema', social_network='instagram',
+            content_type='post', formats=['feed'], status='pending', caption='',
+            hashtags=[], copy_payload={}, designer_payload={}, local_pipeline_context={},
+        )
+
+    def _post(self):
+        # Criacao sem reserva conta no commit (on_commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self._new_post()
+
+    def test_reservas_concorrentes_respeitam_limite_diario(self):
+        quota.usage(self.org, 'post')   # seed (as threads nao tocam o banco)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(quota.reserve(self.org, 'post')))
+                   for _ in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sum(1 for r in results if r), 3)
+        denied = [r for r in results if not r]
+        self.assertEqual({r.code for r in denied}, {'daily_limit'})
+        self.assertEqual(quota.usage(self.org, 'post')['day'], 3)
+
+    def test_post_save_consome_reserva_e_refund_devolve(self):
+        reservation = quota.reserve(self.org, 'post')
+        self._post()
+        reservation.commit()
+        self.assertEqual(quota.usage(self.org, 'post'), {'day': 1, 'month': 1})
+
+        self._post()   # sem reserva (admin/shell): conta no signal
+        self.assertEqual(quota.usage(self.org, 'post')['day'], 2)
+
+        failed = quota.reserve(self.org, 'post')
+        self.assertEqual(quota.usage(self.org, 'post')['day'], 3)
+        self.assertEqual(self.org.can_create_post()[1], 'daily_limit')
+        failed.refund()
+        failed.refund()
+        self.assertEqual(quota.usage(self.org, 'post')['day'], 2)
+        self.assertTrue(self.org.can_create_post()[0])
+
+    def test_criacao_revertida_nao_conta(self):
+        from django.db import transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self._new_post()
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+        self.assertEqual(quota.usage(self.org, 'post')['day'], 0)
+
+    def test_mes_soma_ciclo_ajustes_e_reconcile_grava_banco(self):
+        today = timezone.now().date()
+        if today.day > 1:
+            QuotaUsageDaily.objects.create(organization=self.org, date=today - timedelta(days=1),
+                                           posts_created=5)
+        QuotaAdjustment.objects.create(organization=self.org, resource_type='post_monthly',
+                                       adjustment_type='bonus', amount=-2, reason='teste')
+        self._post()
+        expected = (5 if today.day > 1 else 0) - 2 + 1
+        self.assertEqual(self.org.get_posts_this_month(), expected)
+
+        # Novo ajuste invalida a base
+        QuotaAdjustment.objects.create(organization=self.org, resource_type='post_monthly',
+                                       adjustment_type='correction', amount=10, reason='teste')
+        self.assertEqual(self.org.get_posts_this_month(), expected + 10)
+
+        self.assertEqual(quota.reconcile(), 1)
+        self.assertEqual(QuotaUsageDaily.objects.get(organization=self.org, date=today).posts_created, 1)
+        self.assertEqual(quota.reconcile(), 0)
+
+    def test_contagem_no_banco_com_redis_fora_sobrevive_ao_flush(self):
+        from unittest import mock
+        self._post()   # contador vivo no Redis: 1
+        with mock.patch.object(quota, '_redis', side_effect=ConnectionError('redis fora')):
+            self._post()   # fallback: direto no banco
+        self._post()   # Redis de volta: 2 (nao viu o do fallback)
+
+        self.assertEqual(quota.reconcile(), 1)
+        today = timezone.now().date()
+        self.assertEqual(QuotaUsageDaily.objects.get(organization=self.org, date=today).posts_created, 3)
+        self.assertEqual(quota.usage(self.org, 'post')['day'], 3)   # contador recebeu o do banco
+
+        self._post()
+        quota.reconcile()
+        self.assertEqual(QuotaUsageDaily.objects.get(organization=self.org, date=today).posts_created, 4)
+
+
+class QuotaAlertTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = timezone.now().date()
+        self.full = self._org('full', posts_dia=3, posts=3)          # 100% diario
+        self.near = self._org('near', posts_dia=10, posts=4, posts_mes=5)   # 80% mensal
+        self.quiet = self._org('quiet', posts_dia=10, posts=1)
+        self.off = self._org('off', posts_dia=3, posts=3, alert_80_enabled=False,
+                             alert_100_enabled=False)
+
+    def _org(self, slug, posts_dia, posts, posts_mes=0, **extra):
+        org = Organization.objects.create(
+            name=slug, slug=slug, is_active=True, alert_email=f'{slug}@test.com',
+            quota_posts_dia=posts_dia, quota_posts_mes=posts_mes, quota_pautas_dia=3,
+            billing_cycle_day=1, **extra)
+        QuotaUsageDaily.objects.create(organization=org, date=self.today, posts_created=posts)
+        return org
+
+    def test_avaliacao_agregada_e_envio_em_lote(self):
+        from unittest import mock
+        from django.core import mail
+        from apps.core import tasks
+
+        with self.assertNumQueries(2):
+            rows = list(tasks.quota_alert_candidates(self.today))
+        self.assertEqual(len(rows), 3)
+
+        with mock.patch.object(tasks.send_quota_alert_emails, 'delay') as delay:
+            tasks.check_quota_alerts()
+        (items,), _ = delay.call_args
+        sent = set(QuotaAlert.objects.values_list('organization__slug', 'resource_type', 'alert_type'))
+        self.assertEqual(sent, {('full', 'post_daily', '100'), ('near', 'post_monthly', '80')})
+        self.assertEqual(len(items), 2)
+
+        # Ja registrados: nada novo na proxima hora
+        with mock.patch.object(tasks.send_quota_alert_emails, 'delay') as delay:
+            tasks.check_quota_alerts()
+        delay.assert_not_called()
+
+        tasks.send_quota_alert_emails.apply(args=[items]).get()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['full@test.com', 'near@test.com'])
+        self.assertIn('ESGOTADA', next(m.subject for m in mail.outbox if m.to == ['full@test.com']))
+
+    def test_conexao_smtp_falha_retenta_lote_e_libera_alertas(self):
+        from unittest import mock
+        from apps.core import tasks
+
+        with mock.patch.object(tasks.send_quota_alert_emails, 'delay') as delay:
+            tasks.check_quota_alerts()
+        (items,), _ = delay.call_args
+        connection = mock.Mock(**{'open.side_effect': OSError('smtp fora')})
+        with mock.patch('django.core.mail.get_connection', return_value=connection):
+            tasks.send_quota_alert_emails.apply(args=[items])
+        self.assertEqual(connection.open.call_count, tasks.send_quota_alert_emails.max_retries + 1)
+        # Esgotou: alertas apagados -> a proxima avaliacao tenta de novo
+        self.assertFalse(QuotaAlert.objects.exists())
@@ -0,0 +1,71 @@
+"""
+Testes da leitura interna do S3 (S3Service.read_bytes)
+
+Valida que:
+1. Objeto quente sai do LRU do processo (uma GetObject so)
+2. Entrada vencida revalida com If-None-Match (304 = reaproveita)
+3. Range le so o trecho; URL presigned do bucket vira chave
+"""
+import io
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.services.s3_service import S3Service
+
+
+class _FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+        self.calls = []
+
+    def get_object(self, Bucket, Key, Range=None, IfNoneMatch=None):
+        self.calls.append((Key, Range, IfNoneMatch))
+        data, etag = self.objects[Key]
+        if IfNoneMatch == etag:
+            raise ClientError({'Error': {'Code': '304', 'Message': 'Not Modified'},
+                               'ResponseMetadata': {'HTTPStatusCode': 304}}, 'GetObject')
+        if Range:
+            start, end = (int(x) for x in Range[len('bytes='):].split('-'))
+            data = data[start:end + 1]
+        return {'Body': io.BytesIO(data), 'ETag': etag}
+
+
+@override_settings(AWS_BUCKET_NAME='iamkt-uploads')
+class S3ReadBytesTests(SimpleTestCase):
+
+    def setUp(self):
+        S3Service.invalidate_read_cache()
+        self.s3 = _FakeS3({'org-1/logo.png': (b'0123456789', '"e1"')})
+        patcher = mock.patch.object(S3Service, '_get_s3_client', return_value=self.s3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(S3Service.invalidate_read_cache)
+
+    def test_lru_e_range(self):
+        self.assertEqual(S3Service.read_bytes('org-1/logo.png'), b'0123456789')
+        self.assertEqual(S3Service.read_bytes('org-1/logo.png'), b'0123456789')
+        self.assertEqual(S3Service.read_bytes('org-1/logo.png', byte_range=(2, 4)), b'234')
+        self.assertEqual(len(self.s3.calls), 1)
+
+        S3Service.invalidate_read_cache()
+        self.assertEqual(S3Service.read_bytes('org-1/logo.png', byte_range=(0, 1)), b'01')
+        self.assertEqual(self.s3.calls[-1], ('org-1/logo.png', 'bytes=0-1', None))
+
+    def test_revalidacao_condicional(self):
+        S3Service.read_bytes('org-1/logo.png')
+        with mock.patch.object(S3Service, 'READ_CACHE_FRESH_SECONDS', -1):
+            self.assertEqual(S3Service.read_bytes('org-1/logo.png'), b'0123456789')
+            self.assertEqual(self.s3.calls[-1][2], '"e1"')
+            self.s3.objects['org-1/logo.png'] = (b'novo', '"e2"')
+            self.assertEqual(S3Service.read_bytes('org-1/logo.png'), b'novo')
+
+    def test_key_from_url(self):
+        url = ('https://iamkt-uploads.s3.amazonaws.com/org-1/logo%20a.png'
+               '?X-Amz-Signature=abc')
+        self.assertEqual(S3Service.key_from_url(url), 'org-1/logo a.png')
+        self.assertEqual(S3Service.key_from_url(
+            'https://s3.us-east-1.amazonaws.com/iamkt-uploads/org-1/x.png'), 'org-1/x.png')
+        self.assertIsNone(S3Service.key_from_url('https://cdn.example.com/x.png'))
+        self.assertEqual(S3Service.read_url_bytes(url.replace('logo%20a', 'logo')), b'0123456789')
@@ -0,0 +1,94 @@
+"""
+Testes do contexto de tenant por request (request.tenant)
+
+Valida que:
+1. Middleware de onboarding + context processor leem a KB UMA vez por request
+2. A projecao fica no cache compartilhado e o save da KB invalida
+"""
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory
+from django.contrib.auth import get_user_model
+
+from apps.core.context_processors import tenant_context
+from apps.core.middleware import TenantMiddleware
+from apps.core.middleware_onboarding import OnboardingRequiredMiddleware
+from apps.core.models import Organization
+from apps.core.tenant import kb_flags_cache_key
+from apps.knowledge.models import KnowledgeBase
+
+User = get_user_model()
+
+
+class TenantContextTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='Org T', slug='org-t', is_active=True)
+        self.user = User.objects.create_user(
+            username='user_t', email='user_t@test.com', password='test123',
+            organization=self.org,
+        )
+        self.kb = KnowledgeBase.objects.create(
+            organization=self.org, nome_empresa='Org T',
+            onboarding_completed=True, suggestions_reviewed=True,
+        )
+        cache.clear()
+
+    def _request(self, path='/posts/'):
+        request = RequestFactory().get(path)
+        request.user = self.user
+        TenantMiddleware(lambda r: None).process_request(request)
+        return request
+
+    def test_kb_lida_uma_vez_por_request(self):
+        request = self._request()
+        with self.assertNumQueries(1):
+            self.assertIsNone(OnboardingRequiredMiddleware(lambda r: None).process_request(request))
+            ctx = tenant_context(request)
+        self.assertTrue(ctx['kb_onboarding_completed'])
+        self.assertTrue(ctx['kb_suggestions_reviewed'])
+
+        # Request seguinte: vem do cache compartilhado, sem query
+        request = self._request()
+        with self.assertNumQueries(0):
+            self.assertTrue(request.tenant.onboarding_completed)
+
+    def test_save_da_kb_invalida_cache(self):
+        self.assertTrue(self._request().tenant.suggestions_reviewed)
+        self.assertIsNotNone(cache.get(kb_flags_cache_key(self.org.id)))
+
+        self.kb.suggestions_reviewed = False
+        self.kb.save()
+        self.assertIsNone(cache.get(kb_flags_cache_key(self.org.id)))
+
+        request = self._request('/dashboard/')
+        self.assertFalse(request.tenant.suggestions_reviewed)
+        response = OnboardingRequiredMiddleware(lambda r: None).process_request(request)
+        self.assertEqual(response.status_code, 302)
+
+    def test_org_sem_kb(self):
+        self.kb.delete()
+        request = self._request()
+        self.assertFalse(request.tenant.kb_exists)
+        self.assertIsNone(request.tenant.compilation_status)
+        with self.assertNumQueries(0):
+            self.assertFalse(self._request().tenant.kb_exists)
+
+    def test_tenant_scoped_view_usa_contexto_e_refresh_kb(self):
+        from apps.core.decorators import tenant_scoped_view
+
+        request = self._request()
+        tenant = tenant_scoped_view(lambda r: r.tenant)(request)
+        self.assertIs(tenant, request.tenant)
+        self.assertTrue(tenant.suggestions_reviewed)
+
+        # Sem middleware: o decorator cria o contexto
+        bare = RequestFactory().get('/posts/')
+        bare.organization = self.org
+        self.assertEqual(tenant_scoped_view(lambda r: r.tenant.organization)(bare), self.org)
+
+        self.kb.suggestions_reviewed = False
+        self.kb.save()
+        self.assertTrue(tenant.suggestions_reviewed)   # memo do request
+        tenant.refresh_kb()
+        self.assertFalse(tenant.suggestions_reviewed)
@@ -3,6 +3,7 @@ IAMKT - Testes de Tenant Isolation
 
 Testes para garantir que o isolamento de tenants está funcionando corretamente.
 """
+from django.core.cache import cache
 from django.test import TestCase, RequestFactory
 from django.contrib.auth import get_user_model
 from apps.core.models import Organization, Area
@@ -22,6 +23,8 @@ class TenantIsolationTestCase(TestCase):
     
     def setUp(self):
         """Configurar ambiente de teste com 2 organizations"""
+        cache.clear()   # contadores de quota (Redis) nao voltam no rollback
+        self.addCleanup(cache.clear)
         # Criar organizations
         self.org1 = Organization.objects.create(
             name='Empresa A',
@@ -184,6 +187,8 @@ class ManagerMethodsTestCase(TestCase):
     
     def setUp(self):
         """Configurar ambiente de teste"""
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.org = Organization.objects.create(
             name='Test Org',
             slug='test-org',
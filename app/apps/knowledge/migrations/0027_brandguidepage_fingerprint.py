@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0026_brandgraficmodule_analysis_cost_usd_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brandguidepage',
+            name='analyzed_at',
+            field=models.DateTimeField(blank=True, help_text='Quando a IA classificou a página (vazio = pendente de análise)', null=True, verbose_name='Classificada em'),
+        ),
+        migrations.AddField(
+            model_name='brandguidepage',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='sha256 dos streams/recursos da página no PDF (+DPI); igual = reaproveita PNG, texto e análise', max_length=64, verbose_name='Fingerprint do conteúdo'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0027_brandguidepage_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brandguidepage',
+            name='ai_s3_key',
+            field=models.CharField(blank=True, default='', help_text='JPEG de tamanho médio enviado à análise de visão (vazio em páginas antigas)', max_length=500, verbose_name='Chave S3 da versão para IA'),
+        ),
+        migrations.AddField(
+            model_name='brandguidepage',
+            name='preview_s3_key',
+            field=models.CharField(blank=True, default='', help_text='WebP pequeno para grids/miniaturas (vazio em páginas antigas)', max_length=500, verbose_name='Chave S3 do preview'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0028_brandguidepage_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brandgraficmodule',
+            name='dhash',
+            field=models.CharField(blank=True, default='', max_length=16, verbose_name='Hash de diferença'),
+        ),
+        migrations.AddField(
+            model_name='brandgraficmodule',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Tamanho (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='brandgraficmodule',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Hash Perceptual'),
+        ),
+        migrations.AddField(
+            model_name='logo',
+            name='dhash',
+            field=models.CharField(blank=True, default='', max_length=16, verbose_name='Hash de diferença'),
+        ),
+        migrations.AddField(
+            model_name='logo',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Tamanho (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='logo',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Altura'),
+        ),
+        migrations.AddField(
+            model_name='logo',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Hash Perceptual'),
+        ),
+        migrations.AddField(
+            model_name='logo',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Largura'),
+        ),
+        migrations.AddField(
+            model_name='referenceimage',
+            name='dhash',
+            field=models.CharField(blank=True, default='', help_text='dHash 64 bits (confirma quase-duplicatas do pHash)', max_length=16, verbose_name='Hash de diferença'),
+        ),
+    ]
@@ -459,6 +459,9 @@ class KnowledgeBase(models.Model):
                 completude_percentual=self.completude_percentual,
                 is_complete=self.is_complete
             )
+            # .update() nao dispara post_save: invalida os flags do tenant aqui
+            from apps.core.tenant import invalidate_kb_flags
+            invalidate_kb_flags(self.organization_id)
     
     def calculate_completude(self):
         """
@@ -740,6 +743,13 @@ class ReferenceImage(models.Model):
         verbose_name='Hash Perceptual',
         help_text='Para evitar imagens similares'
     )
+    dhash = models.CharField(
+        max_length=16,
+        blank=True,
+        default='',
+        verbose_name='Hash de diferença',
+        help_text='dHash 64 bits (confirma quase-duplicatas do pHash)'
+    )
     file_size = models.BigIntegerField(verbose_name='Tamanho (bytes)')
     width = models.IntegerField(verbose_name='Largura')
     height = models.IntegerField(verbose_name='Altura')
@@ -907,6 +917,12 @@ class Logo(models.Model):
     s3_url = models.URLField(max_length=1000, verbose_name='URL S3')
     file_format = models.CharField(max_length=10, verbose_name='Formato')
     is_primary = models.BooleanField(default=False, verbose_name='Logo Principal')
+    # Assinatura perceptual (background: compute_image_signature_task)
+    perceptual_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='Hash Perceptual')
+    dhash = models.CharField(max_length=16, blank=True, default='', verbose_name='Hash de diferença')
+    file_size = models.BigIntegerField(null=True, blank=True, verbose_name='Tamanho (bytes)')
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name='Largura')
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name='Altura')
     uploaded_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -1351,6 +1367,34 @@ class BrandguidePage(models.Model):
         ],
         verbose_name='Relevância'
     )
+    preview_s3_key = models.CharField(
+        max_length=500,
+        blank=True,
+        default='',
+        verbose_name='Chave S3 do preview',
+        help_text='WebP pequeno para grids/miniaturas (vazio em páginas antigas)'
+    )
+    ai_s3_key = models.CharField(
+        max_length=500,
+        blank=True,
+        default='',
+        verbose_name='Chave S3 da versão para IA',
+        help_text='JPEG de tamanho médio enviado à análise de visão (vazio em páginas antigas)'
+    )
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name='Fingerprint do conteúdo',
+        help_text='sha256 dos streams/recursos da página no PDF (+DPI); igual = reaproveita PNG, texto e análise'
+    )
+    analyzed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Classificada em',
+        help_text='Quando a IA classificou a página (vazio = pendente de análise)'
+    )
 
     class Meta:
         verbose_name = 'Página de Brandguide'
@@ -1365,6 +1409,18 @@ class BrandguidePage(models.Model):
     def __str__(self):
         return f"{self.brandguide.original_filename} - pág {self.page_number}"
 
+    def rendition_key(self, purpose: str = 'full') -> str:
+        """
+        Menor arquivo adequado ao uso: 'preview' (grid, WebP), 'ai' (visão,
+        JPEG médio) ou 'full' (PNG no DPI de conversão). Página sem a
+        rendição (convertida antes delas) cai no PNG.
+        """
+        if purpose == 'preview':
+            return self.preview_s3_key or self.ai_s3_key or self.s3_key
+        if purpose == 'ai':
+            return self.ai_s3_key or self.s3_key
+        return self.s3_key
+
 
 class BrandgraficModule(models.Model):
     """
@@ -1418,6 +1474,10 @@ class BrandgraficModule(models.Model):
     )
     width = models.PositiveIntegerField(default=0, verbose_name='Largura')
     height = models.PositiveIntegerField(default=0, verbose_name='Altura')
+    # Assinatura perceptual (background: compute_image_signature_task)
+    perceptual_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='Hash Perceptual')
+    dhash = models.CharField(max_length=16, blank=True, default='', verbose_name='Hash de diferença')
+    file_size = models.BigIntegerField(null=True, blank=True, verbose_name='Tamanho (bytes)')
     orientation = models.CharField(
         max_length=20,
         default='both',
@@ -0,0 +1,125 @@
+"""
+Indice de similaridade perceptual por KB (quase-duplicatas de imagem).
+
+ReferenceImage, Logo e BrandgraficModule guardam pHash/dHash de 64 bits
+(compute_image_signature_task). Este modulo monta, por KB, uma BK-tree sobre
+o pHash — a consulta "tem algo a <= N bits disto?" visita uma fracao da
+arvore em vez de comparar hash a hash.
+
+  find_near_duplicates(kb_id, phash, dhash=None, max_distance=None, kinds=None)
+      -> [{'kind', 'id', 'distance'}, ...] (mais proximo primeiro)
+  invalidate_image_index(kb_id)  -> chamado pelos signals ao gravar hash
+
+A arvore fica em memoria do processo (ate IMAGE_INDEX_MAX_KBS KBs, LRU) e
+e revalidada por uma geracao no cache compartilhado: qualquer worker que
+grava um hash bumpa a geracao e os demais reconstroem na proxima consulta.
+Com dHash nos dois lados, ele tambem precisa ficar dentro do raio (corta
+falso positivo do pHash em imagens chapadas).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('reference', 'logo', 'asset')
+
+_lock = threading.Lock()
+_indexes = OrderedDict()  # kb_id -> (geracao, BKTree)
+
+
+def kind_model(kind):
+    from apps.knowledge.models import BrandgraficModule, Logo, ReferenceImage
+    return {'reference': ReferenceImage, 'logo': Logo, 'asset': BrandgraficModule}[kind]
+
+
+def _parse(hex_hash):
+    """int do hash de 64 bits; None p/ vazio, 'pending' ou legado (256 bits)."""
+    if not hex_hash or len(hex_hash) != 16:
+        return None
+    try:
+        return int(hex_hash, 16)
+    except ValueError:
+        return None
+
+
+def _generation_key(kb_id):
+    return f'image_index_gen:{kb_id}'
+
+
+def _generation(kb_id):
+    from django.core.cache import cache
+    try:
+        return cache.get(_generation_key(kb_id)) or 0
+    except Exception:
+        return 0
+
+
+def invalidate_image_index(kb_id):
+    """Marca o indice da KB como velho em todos os processos."""
+    from django.core.cache import cache
+    try:
+        cache.set(_generation_key(kb_id), time.time_ns(), None)
+    except Exception:
+        logger.warning('[image_index] falha ao invalidar kb=%s', kb_id)
+    with _lock:
+        _indexes.pop(kb_id, None)
+
+
+def _build(kb_id):
+    from apps.utils.image_hash import BKTree
+
+    tree = BKTree()
+    for kind in KINDS:
+        rows = kind_model(kind).objects.filter(knowledge_base_id=kb_id) \
+            .exclude(perceptual_hash='') \
+            .values_list('id', 'perceptual_hash', 'dhash')
+        for asset_id, phash, dhash in rows:
+            key = _parse(phash)
+            if key is not None:
+                tree.add(key, (kind, asset_id, _parse(dhash)))
+    return tree
+
+
+def image_index(kb_id):
+    """BK-tree da KB (reconstroi se a geracao mudou)."""
+    from django.conf import settings
+
+    generation = _generation(kb_id)
+    with _lock:
+        entry = _indexes.get(kb_id)
+        if entry is not None and entry[0] == generation:
+            _indexes.move_to_end(kb_id)
+            return entry[1]
+    tree = _build(kb_id)
+    with _lock:
+        _indexes[kb_id] = (generation, tree)
+        _indexes.move_to_end(kb_id)
+        while len(_indexes) > max(1, getattr(settings, 'IMAGE_INDEX_MAX_KBS', 64)):
+            _indexes.popitem(last=False)
+    logger.debug('[image_index] kb=%s reconstruido (%d hashes)', kb_id, len(tree))
+    return tree
+
+
+def find_near_duplicates(kb_id, phash, dhash=None, max_distance=None, kinds=None):
+    """Assets da KB a ate max_distance bits (default IMAGE_DUPLICATE_MAX_DISTANCE)."""
+    from django.conf import settings
+
+    from apps.utils.image_hash import hamming
+
+    key = _parse(phash)
+    if key is None:
+        return []
+    if max_distance is None:
+        max_distance = getattr(settings, 'IMAGE_DUPLICATE_MAX_DISTANCE', 4)
+    dkey = _parse(dhash)
+    matches = []
+    for distance, (kind, asset_id, other_dkey) in image_index(kb_id).search(key, max_distance):
+        if kinds and kind not in kinds:
+            continue
+        if dkey is not None and other_dkey is not None \
+                and hamming(dkey, other_dkey) > max_distance:
+            continue
+        matches.append({'kind': kind, 'id': asset_id, 'distance': distance})
+    return matches
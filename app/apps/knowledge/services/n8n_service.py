@@ -12,6 +12,7 @@ from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 import logging
+from apps.core.services import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -176,7 +177,7 @@ class N8NService:
                         f"KB: {kb_instance.id}, Org: {kb_instance.organization_id}"
                     )
                     
-                    response = requests.post(
+                    response = http_client.post(
                         settings.N8N_WEBHOOK_FUNDAMENTOS,
                         json=payload,
                         headers=headers,
@@ -357,7 +358,7 @@ class N8NService:
                         f"KB: {kb_instance.id}, Org: {kb_instance.organization_id}, Fluxo: {flow_type}"
                     )
                     
-                    response = requests.post(
+                    response = http_client.post(
                         webhook_url,
                         json=payload,
                         headers=headers,
@@ -12,6 +12,12 @@ resultado fica gravado em ReferenceImage.visual_analysis. Nunca reanalisa
 salvo se for uma imagem nova.
 
 Custo: ~$0.006-0.012 por chamada (Sonnet 4.5 com 1 imagem + ~700 tokens out).
+
+Modo LOTE (sweep com muitos assets pendentes, ex.: apos importar um
+brandguide): submit_dossier_batch / fetch_dossier_batch usam a Message
+Batches API (metade do preco, resultado assincrono). O request de cada asset
+e o MESMO da chamada unitaria (dossier_params); cada resultado volta isolado
+por custom_id.
 """
 
 import base64
@@ -19,9 +25,11 @@ import json
 import logging
 import os
 import re
-import urllib.request
 from decimal import Decimal
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from apps.core.services import http_client
+from apps.posts.services.ai_payload_cache import cached as ai_payload_cached
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +39,13 @@ MODEL = 'claude-sonnet-4-5'
 MAX_TOKENS = 5000
 COST_INPUT_PER_M = Decimal('3.0')
 COST_OUTPUT_PER_M = Decimal('15.0')
+BATCH_COST_FACTOR = Decimal('0.5')  # Message Batches API cobra metade
+
+def _get_client(api_key: str):
+    """anthropic.Anthropic do registro do processo (pool HTTP reaproveitado
+    entre assets e com o resto do sistema; recriado apos fork)."""
+    from apps.core.services.ai_clients import anthropic_client
+    return anthropic_client(api_key)
 
 
 SYSTEM_PROMPT = """Voce e um diretor de arte senior catalogando uma imagem de
@@ -176,71 +191,13 @@ def analyze_reference_image(
         logger.warning('[visual_analyzer] falha ao baixar imagem: %s', image_url[:80])
         return None
 
-    import anthropic
-    client = anthropic.Anthropic(api_key=api_key)
-
     try:
-        resp = client.messages.create(
-            model=MODEL,
-            max_tokens=MAX_TOKENS,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {
-                    'role': 'user',
-                    'content': [
-                        {
-                            'type': 'image',
-                            'source': {'type': 'base64', 'media_type': mime, 'data': b64},
-                        },
-                        {
-                            'type': 'text',
-                            'text': (
-                                'Analise esta imagem de referencia e produza o '
-                                'JSON do dossie visual conforme o system prompt.'
-                            ),
-                        },
-                    ],
-                },
-                {'role': 'assistant', 'content': '{'},  # prefill forca JSON
-            ],
-        )
+        resp = _get_client(api_key).messages.create(**dossier_params('reference', b64, mime))
     except Exception:
         logger.exception('[visual_analyzer] erro Claude')
         return None
 
-    raw = '{' + ''.join(
-        blk.text for blk in resp.content if getattr(blk, 'type', None) == 'text'
-    )
-    structured = _parse_json(raw)
-    if not structured:
-        logger.error('[visual_analyzer] parse JSON falhou. Raw: %s', raw[:400])
-        return None
-
-    # Registra o aspect ratio REAL da imagem de origem (W/H) — usado depois
-    # para adaptar o layout quando o post tiver um formato diferente da ref.
-    try:
-        from io import BytesIO
-        from PIL import Image
-        _w, _h = Image.open(BytesIO(base64.b64decode(b64))).size
-        if _h:
-            structured['_source_ar'] = round(_w / _h, 3)
-            structured['_source_dimensions'] = f'{_w}x{_h}'
-    except Exception:
-        pass
-
-    usage = _extract_usage(resp)
-    logger.info(
-        '[visual_analyzer] dossie OK | humanizada=%s | tokens=%d | cost=$%s',
-        structured.get('is_humanizada'), usage.get('total_tokens', 0),
-        usage.get('cost_usd', 0),
-    )
-
-    return {
-        'structured': structured,
-        'raw_text': raw,
-        'usage': usage,
-        'model': MODEL,
-    }
+    return dossier_result('reference', resp, source_size=image_size(b64))
 
 
 GRAFICO_SYSTEM_PROMPT = """Voce e um designer grafico senior catalogando um
@@ -307,16 +264,129 @@ def analyze_brand_asset(
         logger.warning('[visual_analyzer] ANTHROPIC_API_KEY ausente — skip')
         return None
 
+    b64, mime = _brand_asset_payload(image_url, file_format)
+    if not b64:
+        return None
+
+    try:
+        resp = _get_client(api_key).messages.create(**dossier_params('asset', b64, mime))
+    except Exception:
+        logger.exception('[visual_analyzer] erro Claude (grafismo)')
+        return None
+
+    return dossier_result('asset', resp)
+
+
+# ============================================================
+# REQUEST / RESULTADO (compartilhados pela chamada unitaria e pelo lote)
+# ============================================================
+
+_PROMPTS = {
+    'reference': (
+        SYSTEM_PROMPT,
+        'Analise esta imagem de referencia e produza o '
+        'JSON do dossie visual conforme o system prompt.',
+    ),
+    'asset': (
+        GRAFICO_SYSTEM_PROMPT,
+        'Analise este elemento grafico e produza o JSON conforme o system prompt.',
+    ),
+}
+
+
+def dossier_params(kind: str, b64: str, mime: str) -> Dict[str, Any]:
+    """Parametros de messages.create do dossie ('reference' | 'asset')."""
+    system, instruction = _PROMPTS[kind]
+    return {
+        'model': MODEL,
+        'max_tokens': MAX_TOKENS,
+        'system': system,
+        'messages': [
+            {
+                'role': 'user',
+                'content': [
+                    {
+                        'type': 'image',
+                        'source': {'type': 'base64', 'media_type': mime, 'data': b64},
+                    },
+                    {'type': 'text', 'text': instruction},
+                ],
+            },
+            {'role': 'assistant', 'content': '{'},  # prefill forca JSON
+        ],
+    }
+
+
+def dossier_result(
+    kind: str,
+    resp,
+    source_size: Optional[Tuple[int, int]] = None,
+    batch: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Message do Claude -> {structured, raw_text, usage, model} ou None (JSON
+    invalido). `source_size` (W, H) da imagem enviada vira _source_ar no
+    dossie de referencia — usado depois para adaptar o layout quando o post
+    tiver um formato diferente da ref.
+    """
+    raw = '{' + ''.join(
+        blk.text for blk in resp.content if getattr(blk, 'type', None) == 'text'
+    )
+    structured = _parse_json(raw)
+    if not structured:
+        logger.error('[visual_analyzer] parse JSON (%s) falhou. Raw: %s', kind, raw[:400])
+        return None
+
+    if kind == 'reference' and source_size and source_size[1]:
+        _w, _h = source_size
+        structured['_source_ar'] = round(_w / _h, 3)
+        structured['_source_dimensions'] = f'{_w}x{_h}'
+
+    usage = _extract_usage(resp, batch=batch)
+    if kind == 'reference':
+        logger.info(
+            '[visual_analyzer] dossie OK | humanizada=%s | tokens=%d | cost=$%s',
+            structured.get('is_humanizada'), usage.get('total_tokens', 0),
+            usage.get('cost_usd', 0),
+        )
+    else:
+        logger.info(
+            '[visual_analyzer] dossie grafismo OK | tipo=%s | tokens=%d | cost=$%s',
+            structured.get('tipo_elemento'), usage.get('total_tokens', 0),
+            usage.get('cost_usd', 0),
+        )
+    return {'structured': structured, 'raw_text': raw, 'usage': usage, 'model': MODEL}
+
+
+def image_size(b64: str) -> Optional[Tuple[int, int]]:
+    """(W, H) da imagem em base64 (so le o cabecalho)."""
+    try:
+        from io import BytesIO
+        from PIL import Image
+        with Image.open(BytesIO(base64.b64decode(b64))) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def dossier_payload(kind: str, image_url: str, file_format: str = 'png') -> Tuple[Optional[str], str]:
+    """(b64, mime) pronto para o request do dossie, como na chamada unitaria."""
+    if kind == 'asset':
+        return _brand_asset_payload(image_url, file_format)
+    return _download_to_base64(image_url)
+
+
+def _brand_asset_payload(image_url: str, file_format: str) -> Tuple[Optional[str], str]:
     raw_bytes, mime = _download_bytes(image_url)
     if not raw_bytes:
         logger.warning('[visual_analyzer] falha ao baixar grafismo: %s', image_url[:80])
-        return None
+        return None, 'image/png'
 
     if (file_format or '').lower() == 'svg' or 'svg' in mime:
         png = _svg_to_png(raw_bytes)
         if not png:
             logger.warning('[visual_analyzer] SVG nao rasterizado (lib ausente?) — skip')
-            return None
+            return None, 'image/png'
         raw_bytes, mime = png, 'image/png'
 
     if mime not in ('image/png', 'image/jpeg', 'image/webp', 'image/gif'):
@@ -324,45 +394,65 @@ def analyze_brand_asset(
     # Uploads de ate 15MB: compacta SO para o envio a IA.
     from apps.posts.services.artkit.image import shrink_for_ai
     raw_bytes, mime = shrink_for_ai(raw_bytes, mime)
-    b64 = base64.b64encode(raw_bytes).decode('ascii')
+    return base64.b64encode(raw_bytes).decode('ascii'), mime
 
-    import anthropic
-    client = anthropic.Anthropic(api_key=api_key)
+
+# ============================================================
+# MODO LOTE (Message Batches API)
+# ============================================================
+
+def submit_dossier_batch(requests: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    requests: [{'custom_id': str, 'params': dossier_params(...)}].
+    Retorna o id do lote ou None (sem chave / erro na API).
+    """
+    api_key = os.environ.get('ANTHROPIC_API_KEY')
+    if not api_key or not requests:
+        return None
     try:
-        resp = client.messages.create(
-            model=MODEL,
-            max_tokens=MAX_TOKENS,
-            system=GRAFICO_SYSTEM_PROMPT,
-            messages=[
-                {
-                    'role': 'user',
-                    'content': [
-                        {'type': 'image', 'source': {'type': 'base64', 'media_type': mime, 'data': b64}},
-                        {'type': 'text', 'text': 'Analise este elemento grafico e produza o JSON conforme o system prompt.'},
-                    ],
-                },
-                {'role': 'assistant', 'content': '{'},
-            ],
-        )
+        batch = _get_client(api_key).messages.batches.create(requests=requests)
     except Exception:
-        logger.exception('[visual_analyzer] erro Claude (grafismo)')
+        logger.exception('[visual_analyzer] falha ao submeter lote (%d itens)', len(requests))
         return None
+    logger.info('[visual_analyzer] lote %s submetido (%d itens)', batch.id, len(requests))
+    return batch.id
 
-    raw = '{' + ''.join(
-        blk.text for blk in resp.content if getattr(blk, 'type', None) == 'text'
-    )
-    structured = _parse_json(raw)
-    if not structured:
-        logger.error('[visual_analyzer] parse JSON grafismo falhou. Raw: %s', raw[:400])
+
+def fetch_dossier_batch(
+    batch_id: str,
+    kind: str,
+    sizes: Dict[str, Iterable[int]],
+) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+    """
+    None enquanto o lote processa; depois {custom_id: resultado | None}
+    (None = erro/expirado/JSON invalido naquele item). `sizes`: (W, H) da
+    imagem de cada custom_id para o _source_ar.
+    """
+    api_key = os.environ.get('ANTHROPIC_API_KEY')
+    if not api_key:
+        return {}
+    client = _get_client(api_key)
+    batch = client.messages.batches.retrieve(batch_id)
+    if batch.processing_status != 'ended':
         return None
 
-    usage = _extract_usage(resp)
-    logger.info(
-        '[visual_analyzer] dossie grafismo OK | tipo=%s | tokens=%d | cost=$%s',
-        structured.get('tipo_elemento'), usage.get('total_tokens', 0),
-        usage.get('cost_usd', 0),
-    )
-    return {'structured': structured, 'raw_text': raw, 'usage': usage, 'model': MODEL}
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    for entry in client.messages.batches.results(batch_id):
+        outcome = entry.result
+        if getattr(outcome, 'type', None) != 'succeeded':
+            logger.warning('[visual_analyzer] lote %s item %s: %s',
+                           batch_id, entry.custom_id, getattr(outcome, 'type', '?'))
+            results[entry.custom_id] = None
+            continue
+        size = sizes.get(entry.custom_id)
+        try:
+            results[entry.custom_id] = dossier_result(
+                kind, outcome.message, source_size=tuple(size) if size else None, batch=True,
+            )
+        except Exception:
+            logger.exception('[visual_analyzer] lote %s item %s ilegivel', batch_id, entry.custom_id)
+            results[entry.custom_id] = None
+    return results
 
 
 def _svg_to_png(svg_bytes: bytes, scale: float = 2) -> Optional[bytes]:
@@ -417,23 +507,16 @@ def _sniff_mime(data: bytes, fallback: str = 'image/png') -> str:
 
 def _download_bytes(url: str) -> Tuple[Optional[bytes], str]:
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'})
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            ct = resp.headers.get('Content-Type', 'image/png').split(';')[0].strip()
+        data, ct = http_client.fetch_bytes(url, timeout=30)
         return data, _sniff_mime(data, ct)
     except Exception:
         return None, 'image/png'
 
 
+@ai_payload_cached('visual-analyzer:4500000')
 def _download_to_base64(url: str) -> Tuple[Optional[str], str]:
     try:
-        req = urllib.request.Request(
-            url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            ct = resp.headers.get('Content-Type', 'image/png').split(';')[0].strip()
+        data, ct = http_client.fetch_bytes(url, timeout=30)
     except Exception:
         return None, 'image/png'
     # Uploads de ate 15MB: compacta SO para o envio a IA (limite 5MB/imagem
@@ -460,7 +543,7 @@ def _parse_json(text: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def _extract_usage(resp) -> Dict[str, Any]:
+def _extract_usage(resp, batch: bool = False) -> Dict[str, Any]:
     usage = getattr(resp, 'usage', None)
     if not usage:
         return {}
@@ -470,6 +553,8 @@ def _extract_usage(resp) -> Dict[str, Any]:
         COST_INPUT_PER_M * Decimal(in_tokens) / Decimal(1_000_000)
         + COST_OUTPUT_PER_M * Decimal(out_tokens) / Decimal(1_000_000)
     )
+    if batch:
+        cost *= BATCH_COST_FACTOR
     return {
         'input_tokens': in_tokens,
         'output_tokens': out_tokens,
@@ -0,0 +1,43 @@
+"""
+Signals da Base de Conhecimento
+
+Invalida a projecao de flags da KB (apps.core.tenant) no cache compartilhado
+sempre que a KB e salva ou apagada — o proximo request ja ve o estado novo.
+
+Idem para o indice de similaridade perceptual da KB
+(apps.knowledge.services.image_index) quando um asset visual grava hash ou
+e apagado.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.tenant import invalidate_kb_flags
+from apps.knowledge.models import BrandgraficModule, KnowledgeBase, Logo, ReferenceImage
+from apps.knowledge.services.image_index import invalidate_image_index
+
+_HASH_FIELDS = {'perceptual_hash', 'dhash'}
+
+
+@receiver(post_save, sender=KnowledgeBase)
+@receiver(post_delete, sender=KnowledgeBase)
+def invalidate_tenant_kb_flags(sender, instance, **kwargs):
+    invalidate_kb_flags(instance.organization_id)
+
+
+@receiver(post_save, sender=ReferenceImage)
+@receiver(post_save, sender=Logo)
+@receiver(post_save, sender=BrandgraficModule)
+def invalidate_kb_image_index_on_save(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=[status...]) da analise visual nao mexe no indice
+    if update_fields is not None and not _HASH_FIELDS.intersection(update_fields):
+        return
+    if instance.perceptual_hash and len(instance.perceptual_hash) == 16:
+        invalidate_image_index(instance.knowledge_base_id)
+
+
+@receiver(post_delete, sender=ReferenceImage)
+@receiver(post_delete, sender=Logo)
+@receiver(post_delete, sender=BrandgraficModule)
+def invalidate_kb_image_index_on_delete(sender, instance, **kwargs):
+    if instance.perceptual_hash:
+        invalidate_image_index(instance.knowledge_base_id)
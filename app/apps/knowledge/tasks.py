@@ -8,11 +8,21 @@ Pipeline de processamento de brandguide em 3 tasks coordenadas:
 
 Todas rodam na fila dedicada 'brandguide' (worker separado) para nao bloquear
 outros workers (geracao de posts, pautas, etc).
+
+O PDF baixa do S3 UMA vez (setup) para o spool local do worker
+(BRANDGUIDE_SPOOL_DIR/<id>-<sha256>.pdf); os lotes leem o arquivo e o finalize
+apaga. Lote que nao achar o arquivo (outro host, /tmp limpo) baixa de novo.
 """
 
+import glob
+import hashlib
 import io
 import logging
-from typing import Dict, List, Optional
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
 
 from celery import chord, shared_task
 from django.conf import settings
@@ -23,6 +33,12 @@ from apps.knowledge.models import BrandguidePage, BrandguideUpload
 
 logger = logging.getLogger(__name__)
 
+# Campos regravados quando o lote e reprocessado (retry / novo upload).
+_PAGE_UPSERT_FIELDS = [
+    's3_key', 's3_url', 'preview_s3_key', 'ai_s3_key', 'width', 'height',
+    'extracted_text', 'category', 'relevance', 'fingerprint', 'analyzed_at',
+]
+
 
 # ============================================================
 # ENTRY POINT - setup
@@ -39,8 +55,8 @@ def setup_brandguide_task(self, brandguide_id: int):
     Ponto de entrada. Prepara o brandguide para processamento em lotes paralelos.
 
     Fluxo:
-        1. Baixa PDF do S3 (para inspecao)
-        2. Descobre total_pages via pdfinfo_from_bytes (sem renderizar imagens)
+        1. Baixa PDF do S3 para o spool local (uma vez so para todos os lotes)
+        2. Descobre total_pages via pdfinfo_from_path (sem renderizar imagens)
         3. Atualiza BrandguideUpload (status=converting, total_pages)
         4. Limpa paginas antigas (re-processamento)
         5. Dispara chord de convert_pages_batch_task, callback finalize
@@ -54,7 +70,7 @@ def setup_brandguide_task(self, brandguide_id: int):
         return {'success': False, 'error': 'not_found'}
 
     try:
-        from pdf2image import pdfinfo_from_bytes
+        from pdf2image import pdfinfo_from_path
     except ImportError as exc:
         _mark_error(brandguide, f'Dependencias ausentes: {exc}')
         return {'success': False, 'error': 'deps_missing'}
@@ -62,17 +78,21 @@ def setup_brandguide_task(self, brandguide_id: int):
     brandguide.processing_status = 'converting'
     brandguide.save(update_fields=['processing_status'])
 
+    pdf_digest = None
     try:
-        pdf_bytes = _download_from_s3(brandguide.s3_key_pdf)
-        info = pdfinfo_from_bytes(pdf_bytes)
+        _sweep_spool()
+        pdf_path, pdf_digest = _spool_pdf(brandguide_id, brandguide.s3_key_pdf)
+        info = pdfinfo_from_path(pdf_path)
         total_pages = int(info.get('Pages', 0))
 
         if total_pages <= 0:
+            _remove_spooled(brandguide_id, pdf_digest)
             _mark_error(brandguide, 'PDF invalido ou sem paginas')
             return {'success': False, 'error': 'empty_pdf'}
 
         max_pages = getattr(settings, 'BRANDGUIDE_MAX_PAGES', 200)
         if total_pages > max_pages:
+            _remove_spooled(brandguide_id, pdf_digest)
             _mark_error(
                 brandguide,
                 f'PDF excede o limite de {max_pages} paginas ({total_pages} recebidas)'
@@ -82,15 +102,18 @@ def setup_brandguide_task(self, brandguide_id: int):
         brandguide.total_pages = total_pages
         brandguide.save(update_fields=['total_pages'])
 
-        # Limpa paginas antigas em caso de re-processamento
-        brandguide.pages.all().delete()
+        # Re-processamento: os lotes regravam as paginas (reaproveitando as
+        # de fingerprint igual); so sobra apagar as que o PDF novo nao tem.
+        brandguide.pages.filter(page_number__gt=total_pages).delete()
 
         # Monta os lotes
         batch_size = getattr(settings, 'BRANDGUIDE_BATCH_SIZE', 5)
         batch_tasks = []
         for start in range(1, total_pages + 1, batch_size):
             end = min(start + batch_size - 1, total_pages)
-            batch_tasks.append(convert_pages_batch_task.s(brandguide_id, start, end))
+            batch_tasks.append(
+                convert_pages_batch_task.s(brandguide_id, start, end, pdf_digest)
+            )
 
         logger.info(
             '[brandguide] Disparando chord: %s lotes para %s paginas (brandguide_id=%s)',
@@ -98,7 +121,7 @@ def setup_brandguide_task(self, brandguide_id: int):
         )
 
         # chord: executa todos os batch_tasks em paralelo, depois chama finalize
-        chord(batch_tasks)(finalize_brandguide_task.s(brandguide_id))
+        chord(batch_tasks)(finalize_brandguide_task.s(brandguide_id, pdf_digest))
 
         return {
             'success': True,
@@ -112,6 +135,8 @@ def setup_brandguide_task(self, brandguide_id: int):
         try:
             raise self.retry(exc=exc)
         except self.MaxRetriesExceededError:
+            if pdf_digest:
+                _remove_spooled(brandguide_id, pdf_digest)
             _mark_error(brandguide, f'Falhou apos retries (setup): {exc}')
             return {'success': False, 'error': str(exc)}
 
@@ -131,13 +156,19 @@ def convert_pages_batch_task(
     brandguide_id: int,
     start_page: int,
     end_page: int,
+    pdf_digest: Optional[str] = None,
 ) -> Dict:
     """
     Converte um intervalo de paginas do PDF em PNGs, extrai texto e cria
     BrandguidePage para cada uma.
 
-    Cada sub-task baixa o PDF do S3 independentemente (fast, <2s) para manter
-    a task stateless e evitar dependencia de cache compartilhado entre workers.
+    Le o PDF do spool local gravado pelo setup (`pdf_digest`); sem o arquivo
+    (outro host do worker, task antiga sem digest) baixa do S3 e spoola.
+    Rasteriza pagina a pagina: o pico de memoria e de UMA pagina, nao do lote.
+
+    Pagina com fingerprint igual a uma BrandguidePage ja existente da mesma KB
+    (versao anterior do brandguide / re-processamento) NAO e renderizada:
+    reaproveita PNG (copia no S3 se a chave muda), texto e classificacao.
     """
     logger.info(
         '[brandguide] batch brandguide_id=%s paginas %s-%s',
@@ -150,56 +181,107 @@ def convert_pages_batch_task(
         return {'success': False, 'start': start_page, 'end': end_page, 'error': 'not_found'}
 
     try:
-        from pdf2image import convert_from_bytes
-
-        pdf_bytes = _download_from_s3(brandguide.s3_key_pdf)
-
+        pdf_path = _spooled_pdf_path(brandguide_id, brandguide.s3_key_pdf, pdf_digest)
         dpi = getattr(settings, 'BRANDGUIDE_DPI', 200)
-        images = convert_from_bytes(
-            pdf_bytes,
-            dpi=dpi,
-            fmt='png',
-            first_page=start_page,
-            last_page=end_page,
-        )
 
-        # Extrai texto das paginas do lote (pdfplumber eh rapido; faz so o range)
-        texts = _extract_texts_range(pdf_bytes, start_page, end_page)
+        fingerprints = _page_fingerprints(pdf_path, start_page, end_page, dpi)
+        reusable = _reusable_pages(brandguide, fingerprints)
+        to_render = [
+            n for n in range(start_page, end_page + 1) if n not in reusable
+        ]
 
-        pages_prefix = _pages_prefix_from_pdf_key(brandguide.s3_key_pdf)
-        created = 0
-
-        for offset, img in enumerate(images):
-            page_num = start_page + offset
-            page_png_bytes = _image_to_png_bytes(img)
-            page_s3_key = f'{pages_prefix}page_{page_num:03d}.png'
-
-            _upload_png_to_s3(page_s3_key, page_png_bytes)
-            page_url = S3Service.get_public_url(page_s3_key)
-
-            # use update_or_create para ser idempotente em retries
-            BrandguidePage.objects.update_or_create(
-                brandguide=brandguide,
-                page_number=page_num,
-                defaults={
-                    's3_key': page_s3_key,
-                    's3_url': page_url,
-                    'width': img.width,
-                    'height': img.height,
-                    'extracted_text': texts.get(page_num, '')[:50000],
-                    'category': 'outro',
-                    'relevance': 'medium',
-                },
-            )
-            created += 1
-            img.close()
+        # Extrai texto so das paginas novas/alteradas (pdfplumber, so o range)
+        texts = _extract_texts_range(pdf_path, start_page, end_page, only=set(to_render))
 
-        # Libera memoria explicitamente antes de retornar
-        del images
+        pages_prefix = _pages_prefix_from_pdf_key(brandguide.s3_key_pdf)
+        rows: List[BrandguidePage] = []
+
+        # Uma pagina por vez: renderiza, codifica, sobe e solta antes da proxima
+        # (o lote inteiro em memoria era o que limitava batch/concurrency).
+        # O upload (PNG + preview WebP + JPEG para IA) vai para um pool
+        # pequeno e sobrepoe a renderizacao da pagina seguinte; no maximo
+        # `upload_workers` arquivos em voo.
+        upload_workers = max(1, getattr(settings, 'BRANDGUIDE_UPLOAD_WORKERS', 3))
+        with ThreadPoolExecutor(max_workers=upload_workers,
+                                thread_name_prefix='brandguide-upload') as pool:
+            in_flight = set()
+
+            def submit(fn, *args):
+                nonlocal in_flight
+                if len(in_flight) >= upload_workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        fut.result()
+                in_flight.add(pool.submit(fn, *args))
+
+            for page_num, source in sorted(reusable.items()):
+                keys = _page_keys(pages_prefix, page_num)
+                row = BrandguidePage(
+                    brandguide=brandguide,
+                    page_number=page_num,
+                    s3_key=keys['s3_key'],
+                    s3_url=S3Service.get_public_url(keys['s3_key']),
+                    width=source.width,
+                    height=source.height,
+                    extracted_text=source.extracted_text,
+                    category=source.category,
+                    relevance=source.relevance,
+                    fingerprint=source.fingerprint,
+                    analyzed_at=source.analyzed_at,
+                )
+                # Rendicoes so se a origem tem (pagina antiga -> fica sem)
+                for field, key in keys.items():
+                    source_key = getattr(source, field)
+                    if not source_key:
+                        continue
+                    setattr(row, field, key)
+                    if source_key != key:
+                        submit(_copy_page_file_in_s3, source_key, key)
+                rows.append(row)
+
+            for page_num, img in _iter_page_images(pdf_path, to_render, dpi):
+                keys = _page_keys(pages_prefix, page_num)
+                files = _page_files(img)
+                for field, (body, content_type) in files.items():
+                    submit(_upload_page_file_to_s3, keys[field], body, content_type)
+
+                rows.append(BrandguidePage(
+                    brandguide=brandguide,
+                    page_number=page_num,
+                    s3_key=keys['s3_key'],
+                    s3_url=S3Service.get_public_url(keys['s3_key']),
+                    preview_s3_key=keys['preview_s3_key'],
+                    ai_s3_key=keys['ai_s3_key'],
+                    width=img.width,
+                    height=img.height,
+                    extracted_text=texts.get(page_num, '')[:50000],
+                    category='outro',
+                    relevance='medium',
+                    fingerprint=fingerprints.get(page_num, ''),
+                    analyzed_at=None,
+                ))
+                img.close()
+                del img, files
+                _log_page_memory(brandguide_id, page_num)
+
+            # Upload falho levanta aqui -> retry do lote (antes de gravar linhas)
+            for fut in in_flight:
+                fut.result()
+
+        # Um INSERT ... ON CONFLICT por lote; idempotente em retries
+        # (unique brandguide+page_number).
+        BrandguidePage.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['brandguide', 'page_number'],
+            update_fields=_PAGE_UPSERT_FIELDS,
+        )
+        created = len(rows)
 
         logger.info(
-            '[brandguide] batch OK brandguide_id=%s paginas %s-%s (%s criadas)',
-            brandguide_id, start_page, end_page, created
+            '[brandguide] batch OK brandguide_id=%s paginas %s-%s '
+            '(%s criadas, %s reaproveitadas)',
+            brandguide_id, start_page, end_page, created, len(reusable)
         )
 
         return {
@@ -208,6 +290,7 @@ def convert_pages_batch_task(
             'start': start_page,
             'end': end_page,
             'created': created,
+            'reused': len(reusable),
         }
 
     except Exception as exc:
@@ -232,15 +315,21 @@ def convert_pages_batch_task(
 # ============================================================
 
 @shared_task(queue='brandguide')
-def finalize_brandguide_task(batch_results: List[Dict], brandguide_id: int):
+def finalize_brandguide_task(
+    batch_results: List[Dict],
+    brandguide_id: int,
+    pdf_digest: Optional[str] = None,
+):
     """
-    Callback do chord. Recebe a lista de resultados dos batches, valida todos
-    os lotes e decide o proximo passo:
+    Callback do chord. Remove o PDF do spool, valida todos os lotes e decide
+    o proximo passo:
 
     - Todos OK + N8N configurado -> encadeia analyze_brandguide_task (status=analyzing)
     - Todos OK + N8N nao configurado -> marca status=completed
     - Qualquer falha -> status=error com detalhes
     """
+    _remove_spooled(brandguide_id, pdf_digest)
+
     try:
         brandguide = BrandguideUpload.objects.get(id=brandguide_id)
     except BrandguideUpload.DoesNotExist:
@@ -251,6 +340,7 @@ def finalize_brandguide_task(batch_results: List[Dict], brandguide_id: int):
     failed = [r for r in batch_results if r and not r.get('success')]
 
     pages_created = sum(r.get('created', 0) for r in successful)
+    pages_reused = sum(r.get('reused', 0) for r in successful)
 
     if failed:
         error_lines = [
@@ -268,8 +358,8 @@ def finalize_brandguide_task(batch_results: List[Dict], brandguide_id: int):
         return
 
     logger.info(
-        '[brandguide] conversao OK brandguide_id=%s paginas=%s lotes=%s',
-        brandguide_id, pages_created, len(successful)
+        '[brandguide] conversao OK brandguide_id=%s paginas=%s reaproveitadas=%s lotes=%s',
+        brandguide_id, pages_created, pages_reused, len(successful)
     )
 
     # Se N8N configurado, encadeia analise por IA (Fase 3).
@@ -316,7 +406,8 @@ def analyze_brandguide_task(self, brandguide_id: int):
             "knowledge_base_id": int,
             "organization_id": int,
             "total_pages": int,
-            "pages": [{page_number, s3_url, extracted_text}],
+            "pages": [{page_number, s3_url, extracted_text}],   # a classificar
+            "reused_pages": [{..., category, relevance}],      # ja classificadas
             "callback_url": str,   # onde o N8N deve postar o resultado
             "existing_kb": {...}   # dados atuais da KB para contexto
         }
@@ -347,15 +438,27 @@ def analyze_brandguide_task(self, brandguide_id: int):
 
         # Gerar presigned URLs para cada pagina (as URLs publicas sao privadas no S3).
         # OpenAI precisa acessar as imagens diretamente, entao precisam ser presigned.
+        # Paginas ja classificadas (fingerprint igual a versao anterior) vao em
+        # `reused_pages` com a classificacao: so as novas/alteradas passam
+        # pela triagem de novo.
         pages_qs = brandguide.pages.all().order_by('page_number')
         pages_payload = []
+        reused_payload = []
         for page in pages_qs:
-            presigned_url = S3Service.generate_presigned_download_url(page.s3_key)
-            pages_payload.append({
+            # Versao media para visao (PNG cheio so em pagina sem rendicao)
+            presigned_url = S3Service.generate_presigned_download_url(
+                page.rendition_key('ai')
+            )
+            item = {
                 'page_number': page.page_number,
                 's3_url': presigned_url,
                 'extracted_text': page.extracted_text,
-            })
+            }
+            if page.analyzed_at:
+                item.update(category=page.category, relevance=page.relevance)
+                reused_payload.append(item)
+            else:
+                pages_payload.append(item)
 
         # Callback URL: o N8N vai postar o resultado aqui
         site_url = getattr(settings, 'SITE_URL', '').rstrip('/')
@@ -368,6 +471,7 @@ def analyze_brandguide_task(self, brandguide_id: int):
             'total_pages': brandguide.total_pages,
             'pdf_url': brandguide.s3_url_pdf,
             'pages': pages_payload,
+            'reused_pages': reused_payload,
             'callback_url': callback_url,
             'existing_kb': {
                 'nome_empresa': kb.nome_empresa,
@@ -388,8 +492,8 @@ def analyze_brandguide_task(self, brandguide_id: int):
         timeout = getattr(settings, 'N8N_WEBHOOK_TIMEOUT', 30)
 
         logger.info(
-            '[brandguide] POST para N8N webhook brandguide_id=%s paginas=%s',
-            brandguide_id, len(payload['pages'])
+            '[brandguide] POST para N8N webhook brandguide_id=%s paginas=%s reaproveitadas=%s',
+            brandguide_id, len(pages_payload), len(reused_payload)
         )
 
         response = requests.post(
@@ -443,29 +547,246 @@ def convert_brandguide_pdf_task(brandguide_id: int):
 # HELPERS
 # ============================================================
 
-def _download_from_s3(s3_key: str) -> bytes:
-    """Baixa um objeto do S3 e retorna bytes."""
+def _spool_dir() -> str:
+    return getattr(settings, 'BRANDGUIDE_SPOOL_DIR', '') or os.path.join(
+        tempfile.gettempdir(), 'iamkt-brandguide-spool'
+    )
+
+
+def _spool_pdf(brandguide_id: int, s3_key: str) -> Tuple[str, str]:
+    """
+    Baixa o PDF do S3 em streaming para o spool (sem segurar os bytes em
+    memoria), calculando o sha256 no caminho. Retorna (path, digest).
+    Arquivo final: <spool>/<brandguide_id>-<sha256>.pdf (rename atomico).
+    """
+    directory = _spool_dir()
+    os.makedirs(directory, exist_ok=True)
+    client = S3Service._get_s3_client()
+    body = client.get_object(Bucket=settings.AWS_BUCKET_NAME, Key=s3_key)['Body']
+
+    sha = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            for chunk in body.iter_chunks(chunk_size=1024 * 1024):
+                sha.update(chunk)
+                fh.write(chunk)
+        digest = sha.hexdigest()
+        path = os.path.join(directory, f'{brandguide_id}-{digest}.pdf')
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path, digest
+
+
+def _spooled_pdf_path(brandguide_id: int, s3_key: str, pdf_digest: Optional[str]) -> str:
+    """Path do PDF no spool; se nao estiver la, baixa de novo."""
+    if pdf_digest:
+        path = os.path.join(_spool_dir(), f'{brandguide_id}-{pdf_digest}.pdf')
+        if os.path.exists(path):
+            return path
+    path, digest = _spool_pdf(brandguide_id, s3_key)
+    if pdf_digest and digest != pdf_digest:
+        logger.warning(
+            '[brandguide] PDF mudou no S3 durante o processamento brandguide_id=%s',
+            brandguide_id
+        )
+    logger.info('[brandguide] spool ausente, PDF baixado de novo brandguide_id=%s', brandguide_id)
+    return path
+
+
+def _remove_spooled(brandguide_id: int, pdf_digest: Optional[str]) -> None:
+    """Apaga o PDF do spool (sem digest: todas as versoes do brandguide)."""
+    pattern = f'{brandguide_id}-{pdf_digest or "*"}.pdf'
+    for path in glob.glob(os.path.join(_spool_dir(), pattern)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _sweep_spool(max_age: int = 24 * 3600) -> None:
+    """Remove sobras do spool (chord que nunca chegou no finalize)."""
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(_spool_dir(), '*.pdf')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _upload_page_file_to_s3(s3_key: str, body: bytes, content_type: str = 'image/png') -> None:
+    """Upload de um arquivo de pagina para S3 com storage class otimizado."""
     client = S3Service._get_s3_client()
-    response = client.get_object(
+    client.put_object(
         Bucket=settings.AWS_BUCKET_NAME,
         Key=s3_key,
+        Body=body,
+        ContentType=content_type,
+        ServerSideEncryption='AES256',
+        StorageClass='INTELLIGENT_TIERING',
+    )
+
+
+def _iter_page_images(pdf_path: str, page_numbers: List[int], dpi: int):
+    """
+    Gera (page_number, PIL.Image) renderizando UMA pagina por chamada ao
+    pdftoppm. Quem consome fecha a imagem antes de pedir a proxima. Pagina
+    que nao renderiza e pulada (log); as demais do lote seguem.
+    """
+    from pdf2image import convert_from_path
+
+    for page_num in page_numbers:
+        images = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            fmt='png',
+            first_page=page_num,
+            last_page=page_num,
+        )
+        if not images:
+            logger.warning('[brandguide] pagina %s nao renderizou (%s)', page_num, pdf_path)
+            continue
+        yield page_num, images[0]
+
+
+def _log_page_memory(brandguide_id: int, page_num: int) -> None:
+    """RSS atual e pico do processo (e do pdftoppm) apos cada pagina."""
+    import resource
+
+    try:
+        with open('/proc/self/statm') as fh:
+            rss_mb = int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError):
+        rss_mb = -1
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    child_peak_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    logger.info(
+        '[brandguide] memoria brandguide_id=%s pag=%s rss=%.0fMB pico=%.0fMB '
+        'pico_pdftoppm=%.0fMB',
+        brandguide_id, page_num, rss_mb, peak_mb, child_peak_mb
     )
-    return response['Body'].read()
 
 
-def _upload_png_to_s3(s3_key: str, png_bytes: bytes) -> None:
-    """Upload de um PNG para S3 com storage class otimizado."""
+def _copy_page_file_in_s3(source_key: str, s3_key: str) -> None:
+    """Copia server-side um arquivo de pagina reaproveitada (sem download)."""
     client = S3Service._get_s3_client()
-    client.put_object(
+    client.copy_object(
         Bucket=settings.AWS_BUCKET_NAME,
         Key=s3_key,
-        Body=png_bytes,
-        ContentType='image/png',
+        CopySource={'Bucket': settings.AWS_BUCKET_NAME, 'Key': source_key},
+        MetadataDirective='COPY',
         ServerSideEncryption='AES256',
         StorageClass='INTELLIGENT_TIERING',
     )
 
 
+def _page_fingerprints(pdf_path: str, start_page: int, end_page: int, dpi: int) -> Dict[int, str]:
+    """
+    {page_number: sha256} do que a pagina desenha: content streams, recursos
+    (fontes, imagens, forms — resolvidos recursivamente), aparencia das
+    anotacoes, caixas/rotacao e o DPI de renderizacao. Sem renderizar nada.
+    Falhou -> {} (todas as paginas seguem o caminho normal).
+    """
+    import pdfplumber
+    from pdfminer.pdftypes import resolve1
+
+    fingerprints: Dict[int, str] = {}
+    memo: Dict[int, bytes] = {}
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            for idx in range(start_page - 1, min(end_page, len(pdf.pages))):
+                page = pdf.pages[idx].page_obj
+                annots = []
+                for annot in resolve1(page.annots) or []:
+                    annot = resolve1(annot)
+                    if isinstance(annot, dict):
+                        annots.append({k: annot.get(k) for k in ('Subtype', 'Rect', 'AP', 'F')})
+                digest = _pdf_obj_digest({
+                    'dpi': dpi,
+                    'rotate': page.rotate,
+                    'mediabox': page.mediabox,
+                    'cropbox': page.cropbox,
+                    'contents': page.contents,
+                    'resources': page.resources,
+                    'annots': annots,
+                }, memo)
+                fingerprints[idx + 1] = digest.hex()
+    except Exception:
+        logger.exception('[brandguide] Falha no fingerprint do range %s-%s', start_page, end_page)
+        return {}
+    return fingerprints
+
+
+def _pdf_obj_digest(obj, memo: Dict[int, bytes], stack: frozenset = frozenset()) -> bytes:
+    """sha256 estrutural de um objeto PDF (refs resolvidas; memo por objid)."""
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in memo:
+            return memo[obj.objid]
+        if obj.objid in stack:
+            return b'cycle'
+        digest = _pdf_obj_digest(obj.resolve(), memo, stack | {obj.objid})
+        memo[obj.objid] = digest
+        return digest
+
+    sha = hashlib.sha256()
+    if isinstance(obj, PDFStream):
+        attrs = {k: v for k, v in obj.attrs.items() if k != 'Length'}
+        sha.update(b'S' + _pdf_obj_digest(attrs, memo, stack))
+        sha.update(obj.get_rawdata() or b'')
+    elif isinstance(obj, dict):
+        sha.update(b'D')
+        for key in sorted(obj, key=str):
+            sha.update(str(key).encode('utf-8') + _pdf_obj_digest(obj[key], memo, stack))
+    elif isinstance(obj, (list, tuple)):
+        sha.update(b'L')
+        for item in obj:
+            sha.update(_pdf_obj_digest(item, memo, stack))
+    elif isinstance(obj, bytes):
+        sha.update(b'B' + obj)
+    else:
+        sha.update(repr(obj).encode('utf-8'))
+    return sha.digest()
+
+
+def _reusable_pages(brandguide: BrandguideUpload, fingerprints: Dict[int, str]) -> Dict[int, BrandguidePage]:
+    """
+    {page_number: BrandguidePage existente com o mesmo fingerprint na KB}.
+    Preferencia: a propria linha (re-processamento), depois o brandguide mais
+    recente. Do MESMO brandguide so vale a mesma posicao: o PNG de outra
+    posicao pode estar sendo regravado neste processamento.
+    """
+    wanted = {fp for fp in fingerprints.values() if fp}
+    if not wanted:
+        return {}
+    candidates: Dict[str, List[BrandguidePage]] = {}
+    qs = (
+        BrandguidePage.objects
+        .filter(brandguide__knowledge_base_id=brandguide.knowledge_base_id,
+                fingerprint__in=wanted)
+        .exclude(s3_key='')
+        .order_by('-brandguide_id', 'page_number')
+    )
+    for page in qs:
+        candidates.setdefault(page.fingerprint, []).append(page)
+
+    reusable: Dict[int, BrandguidePage] = {}
+    for page_num, fp in fingerprints.items():
+        options = [
+            p for p in candidates.get(fp, [])
+            if p.brandguide_id != brandguide.id or p.page_number == page_num
+        ]
+        options.sort(key=lambda p: p.brandguide_id != brandguide.id)
+        if options:
+            reusable[page_num] = options[0]
+    return reusable
+
+
 def _image_to_png_bytes(image) -> bytes:
     """Converte um objeto PIL Image em bytes PNG."""
     buf = io.BytesIO()
@@ -473,18 +794,67 @@ def _image_to_png_bytes(image) -> bytes:
     return buf.getvalue()
 
 
-def _extract_texts_range(pdf_bytes: bytes, start_page: int, end_page: int) -> Dict[int, str]:
+def _page_keys(pages_prefix: str, page_num: int) -> Dict[str, str]:
+    """Chaves S3 dos arquivos de uma pagina, por campo do BrandguidePage."""
+    base = f'{pages_prefix}page_{page_num:03d}'
+    return {
+        's3_key': f'{base}.png',
+        'preview_s3_key': f'{base}.webp',
+        'ai_s3_key': f'{base}_ai.jpg',
+    }
+
+
+def _page_files(image) -> Dict[str, Tuple[bytes, str]]:
+    """
+    {campo: (bytes, content_type)} de uma pagina renderizada:
+      - s3_key: PNG no DPI de conversao (fonte da verdade, download);
+      - ai_s3_key: JPEG com lado maior <= BRANDGUIDE_AI_MAX_PX (visao da IA);
+      - preview_s3_key: WebP com lado maior <= BRANDGUIDE_PREVIEW_MAX_PX (grid).
+    """
+    from PIL import Image
+
+    ai_px = getattr(settings, 'BRANDGUIDE_AI_MAX_PX', 1568)
+    preview_px = getattr(settings, 'BRANDGUIDE_PREVIEW_MAX_PX', 480)
+
+    rgb = image.convert('RGB') if image.mode != 'RGB' else image.copy()
+    rgb.thumbnail((ai_px, ai_px), Image.LANCZOS)
+    ai_buf = io.BytesIO()
+    rgb.save(ai_buf, format='JPEG', quality=85, optimize=True)
+
+    rgb.thumbnail((preview_px, preview_px), Image.LANCZOS)
+    preview_buf = io.BytesIO()
+    rgb.save(preview_buf, format='WEBP', quality=75, method=4)
+    rgb.close()
+
+    return {
+        's3_key': (_image_to_png_bytes(image), 'image/png'),
+        'ai_s3_key': (ai_buf.getvalue(), 'image/jpeg'),
+        'preview_s3_key': (preview_buf.getvalue(), 'image/webp'),
+    }
+
+
+def _extract_texts_range(
+    pdf_source,
+    start_page: int,
+    end_page: int,
+    only: Optional[set] = None,
+) -> Dict[int, str]:
     """
-    Extrai texto apenas das paginas [start_page, end_page] do PDF.
-    Retorna dict {page_number: text}.
+    Extrai texto apenas das paginas [start_page, end_page] do PDF (`only`:
+    restringe a essas paginas). `pdf_source`: path (spool) ou bytes.
+    Retorna {page_number: text}.
     """
     import pdfplumber
 
+    if isinstance(pdf_source, (bytes, bytearray)):
+        pdf_source = io.BytesIO(pdf_source)
     texts: Dict[int, str] = {}
     try:
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        with pdfplumber.open(pdf_source) as pdf:
             # pdfplumber usa indexacao 0-based
             for idx in range(start_page - 1, min(end_page, len(pdf.pages))):
+                if only is not None and idx + 1 not in only:
+                    continue
                 try:
                     texts[idx + 1] = pdf.pages[idx].extract_text() or ''
                 except Exception:
@@ -875,18 +1245,7 @@ def _run_visual_dossier(instance, analyzer_callable) -> bool:
     instance.analysis_status = 'processing'
     instance.save(update_fields=['analysis_status'])
 
-    # URL presigned fresca (s3_url salvo pode estar expirado)
-    url = None
-    if instance.s3_key:
-        try:
-            url = S3Service.generate_presigned_download_url(
-                instance.s3_key, expires_in=3600
-            )
-        except Exception:
-            url = instance.s3_url or None
-    else:
-        url = instance.s3_url or None
-
+    url = _visual_asset_url(instance)
     if not url:
         instance.analysis_status = 'error'
         instance.save(update_fields=['analysis_status'])
@@ -927,12 +1286,27 @@ def _run_visual_dossier(instance, analyzer_callable) -> bool:
     return True
 
 
+def _visual_asset_url(instance) -> Optional[str]:
+    """URL presigned fresca (s3_url salvo pode estar expirado)."""
+    if instance.s3_key:
+        try:
+            return S3Service.generate_presigned_download_url(
+                instance.s3_key, expires_in=3600
+            )
+        except Exception:
+            return instance.s3_url or None
+    return instance.s3_url or None
+
+
 def run_reference_image_analysis(reference) -> bool:
     """
     Analisa UMA ReferenceImage e persiste o dossie (foto/cena).
     Usado pela task de background, pelo sweep e pelo fallback inline do post.
+    Quase-duplicata de uma referencia ja analisada herda o dossie sem IA.
     """
     from apps.knowledge.services.visual_asset_analyzer import analyze_reference_image
+    if _reuse_duplicate_dossier('reference', reference):
+        return True
     return _run_visual_dossier(reference, analyze_reference_image)
 
 
@@ -942,6 +1316,8 @@ def run_brandgrafic_module_analysis(asset) -> bool:
     Passa file_format para o analyzer tratar SVG (rasteriza antes da Vision).
     """
     from apps.knowledge.services.visual_asset_analyzer import analyze_brand_asset
+    if _reuse_duplicate_dossier('asset', asset):
+        return True
     return _run_visual_dossier(
         asset, lambda url: analyze_brand_asset(url, asset.file_format)
     )
@@ -985,19 +1361,21 @@ def analyze_pending_reference_images_task(kb_id: int):
     Gatilho 2 (sweep): re-enfileira analise de toda ReferenceImage da KB que
     esteja 'pending' ou 'error'. Rede de seguranca para imagens que ficaram
     sem dossie (analise falhou no upload, Celery fora do ar, etc).
+    Muitas pendentes -> modo lote (ver _dispatch_visual_analysis).
     """
     from apps.knowledge.models import ReferenceImage
 
-    ids = list(
+    pending = list(
         ReferenceImage.objects.filter(
             knowledge_base_id=kb_id,
             analysis_status__in=['pending', 'error'],
-        ).values_list('id', flat=True)
+        )
     )
-    for rid in ids:
-        analyze_reference_image_task.delay(rid)
-    logger.info('[visual_analyzer] sweep refs kb=%s enfileirou %d imagens', kb_id, len(ids))
-    return {'kb_id': kb_id, 'enqueued': len(ids)}
+    ids, reused = _skip_duplicates('reference', pending)
+    mode = _dispatch_visual_analysis('reference', ids, analyze_reference_image_task)
+    logger.info('[visual_analyzer] sweep refs kb=%s enfileirou %d imagens (%s, %d duplicatas)',
+                kb_id, len(ids), mode, reused)
+    return {'kb_id': kb_id, 'enqueued': len(ids), 'mode': mode, 'duplicates': reused}
 
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=30)
@@ -1038,13 +1416,328 @@ def analyze_pending_brandgrafic_modules_task(kb_id: int):
     """
     from apps.knowledge.models import BrandgraficModule
 
-    ids = list(
+    pending = list(
         BrandgraficModule.objects.filter(
             knowledge_base_id=kb_id,
             analysis_status__in=['pending', 'error'],
-        ).values_list('id', flat=True)
+        )
     )
-    for aid in ids:
-        analyze_brandgrafic_module_task.delay(aid)
-    logger.info('[visual_analyzer] sweep grafismos kb=%s enfileirou %d', kb_id, len(ids))
-    return {'kb_id': kb_id, 'enqueued': len(ids)}
+    ids, reused = _skip_duplicates('asset', pending)
+    mode = _dispatch_visual_analysis('asset', ids, analyze_brandgrafic_module_task)
+    logger.info('[visual_analyzer] sweep grafismos kb=%s enfileirou %d (%s, %d duplicatas)',
+                kb_id, len(ids), mode, reused)
+    return {'kb_id': kb_id, 'enqueued': len(ids), 'mode': mode, 'duplicates': reused}
+
+
+# ============================================================
+# ASSINATURA PERCEPTUAL (pHash/dHash + indice de quase-duplicatas)
+# ============================================================
+
+def _is_svg(instance) -> bool:
+    return ((getattr(instance, 'file_format', '') or '').lower() == 'svg'
+            or (instance.s3_key or '').lower().endswith('.svg'))
+
+
+def _asset_signature(instance) -> Optional[dict]:
+    """Baixa o asset (leitura direta, com cache) e calcula pHash/dHash,
+    dimensoes e tamanho. SVG e rasterizado antes. None se nao der imagem."""
+    from apps.utils.image_hash import image_signature
+
+    data = S3Service.read_bytes(instance.s3_key)
+    raster = data
+    if _is_svg(instance):
+        from apps.knowledge.services.visual_asset_analyzer import _svg_to_png
+        raster = _svg_to_png(data)
+        if not raster:
+            return None
+    signature = image_signature(raster)
+    signature['file_size'] = len(data)
+    return signature
+
+
+def _store_signature(instance, signature: dict) -> None:
+    instance.perceptual_hash = signature['phash']
+    instance.dhash = signature['dhash']
+    instance.file_size = signature['file_size']
+    fields = ['perceptual_hash', 'dhash', 'file_size']
+    if not _is_svg(instance):  # dimensao do raster de SVG nao e a do arquivo
+        instance.width, instance.height = signature['width'], signature['height']
+        fields += ['width', 'height']
+    instance.save(update_fields=fields)
+
+
+def _has_signature(instance) -> bool:
+    # 'pending' (upload direto) e o pHash legado de 256 bits nao entram no indice
+    return len(instance.perceptual_hash or '') == 16
+
+
+def _fill_signatures(instances) -> None:
+    """Calcula as assinaturas que faltam: downloads em paralelo (ate
+    REF_FETCH_WORKERS), gravacao na thread da task. Falha fica sem hash."""
+    from apps.posts.services.ref_fetch import REF_FETCH_WORKERS
+
+    missing = [i for i in instances if not _has_signature(i) and i.s3_key]
+    if not missing:
+        return
+
+    def compute(instance):
+        try:
+            return _asset_signature(instance)
+        except Exception as exc:
+            logger.warning('[image_index] assinatura falhou %s %s: %s',
+                           type(instance).__name__, instance.id, exc)
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(REF_FETCH_WORKERS, len(missing))) as pool:
+        signatures = list(pool.map(compute, missing))
+    for instance, signature in zip(missing, signatures):
+        if signature:
+            _store_signature(instance, signature)
+
+
+def _reuse_duplicate_dossier(kind: str, instance) -> Optional[dict]:
+    """
+    Quase-duplicata (IMAGE_DUPLICATE_MAX_DISTANCE) de um asset do mesmo tipo
+    ja analisado na KB -> copia o dossie, custo zero, sem chamar a Vision.
+    O dossie copiado leva `_duplicate_of` ({kind, id, distance}) como flag;
+    _source_ar/_source_dimensions sao recalculados do width/height do asset.
+    Retorna o match usado ou None.
+    """
+    from apps.knowledge.services.image_index import find_near_duplicates
+
+    _fill_signatures([instance])
+    if not _has_signature(instance):
+        return None
+    model = type(instance)
+    matches = find_near_duplicates(
+        instance.knowledge_base_id, instance.perceptual_hash, instance.dhash, kinds=(kind,),
+    )
+    for match in matches:
+        if match['id'] == instance.id:
+            continue
+        source = model.objects.filter(id=match['id'], analysis_status='completed') \
+            .exclude(visual_analysis={}).first()
+        if source is None:
+            continue
+        dossier = {k: v for k, v in source.visual_analysis.items()
+                   if k not in ('_source_ar', '_source_dimensions')}
+        dossier['_duplicate_of'] = match
+        # Proporcao/dimensoes sao da PROPRIA imagem (duplicata pode ter outro tamanho)
+        if kind == 'reference' and instance.width and instance.height:
+            dossier['_source_ar'] = round(instance.width / instance.height, 3)
+            dossier['_source_dimensions'] = f'{instance.width}x{instance.height}'
+        now = timezone.now()
+        # Filtro no status: outra task ja analisando/analisada ganha a corrida
+        updated = model.objects.filter(id=instance.id, analysis_status__in=['pending', 'error']) \
+            .update(visual_analysis=dossier, analysis_status='completed',
+                    analyzed_at=now, analysis_cost_usd=0)
+        if not updated:
+            return None
+        instance.visual_analysis, instance.analysis_status = dossier, 'completed'
+        instance.analyzed_at, instance.analysis_cost_usd = now, 0
+        logger.info('[image_index] %s %s duplicata de %s (dist=%d) — dossie reaproveitado',
+                    model.__name__, instance.id, match['id'], match['distance'])
+        return match
+    return None
+
+
+def _skip_duplicates(kind: str, instances) -> Tuple[List[int], int]:
+    """Sweep: assina os pendentes e tira os que herdaram dossie de duplicata.
+    Retorna (ids que ainda precisam de analise, quantos foram reaproveitados)."""
+    _fill_signatures(instances)
+    ids, reused = [], 0
+    for instance in instances:
+        if _has_signature(instance) and _reuse_duplicate_dossier(kind, instance):
+            reused += 1
+        else:
+            ids.append(instance.id)
+    return ids, reused
+
+
+@shared_task
+def compute_image_signature_task(kind: str, asset_id: int):
+    """
+    Upload de ReferenceImage/Logo/grafismo: grava pHash/dHash, dimensoes e
+    tamanho (sem countdown — roda antes da analise visual, que tem 15s) e,
+    se for quase-duplicata de um asset ja analisado, herda o dossie.
+    """
+    from apps.knowledge.services.image_index import kind_model
+
+    instance = kind_model(kind).objects.filter(id=asset_id).first()
+    if not instance:
+        return {'skipped': 'not_found', 'kind': kind, 'id': asset_id}
+    _fill_signatures([instance])
+    if not _has_signature(instance):
+        return {'success': False, 'kind': kind, 'id': asset_id}
+    duplicate = None
+    if kind != 'logo' and instance.analysis_status in ('pending', 'error'):
+        duplicate = _reuse_duplicate_dossier(kind, instance)
+    return {'success': True, 'kind': kind, 'id': asset_id,
+            'phash': instance.perceptual_hash, 'duplicate_of': duplicate}
+
+
+@shared_task
+def index_kb_images_task(kb_id: int):
+    """Sweep/backfill: assina todo asset visual da KB ainda sem hash de 64
+    bits ('pending' ou pHash legado de 256 bits)."""
+    from apps.knowledge.services.image_index import KINDS, kind_model
+
+    filled = 0
+    for kind in KINDS:
+        instances = list(
+            kind_model(kind).objects.filter(knowledge_base_id=kb_id)
+            .exclude(perceptual_hash__regex=r'^[0-9a-f]{16}$')
+        )
+        _fill_signatures(instances)
+        filled += sum(1 for i in instances if _has_signature(i))
+    logger.info('[image_index] kb=%s: %d assinaturas novas', kb_id, filled)
+    return {'kb_id': kb_id, 'signed': filled}
+
+
+# ============================================================
+# ANALISE VISUAL EM LOTE (Message Batches API)
+# ============================================================
+
+def _visual_kind_model(kind: str):
+    from apps.knowledge.models import BrandgraficModule, ReferenceImage
+    return {'reference': ReferenceImage, 'asset': BrandgraficModule}[kind]
+
+
+def _dispatch_visual_analysis(kind: str, ids: List[int], single_task) -> str:
+    """
+    Poucos pendentes -> uma task por asset (resultado em segundos).
+    A partir de VISUAL_ANALYSIS_BATCH_MIN (0 desliga) -> lotes de ate
+    VISUAL_ANALYSIS_BATCH_SIZE na Message Batches API (metade do custo;
+    tipicamente minutos).
+    """
+    batch_min = getattr(settings, 'VISUAL_ANALYSIS_BATCH_MIN', 5)
+    if not batch_min or len(ids) < batch_min:
+        for asset_id in ids:
+            single_task.delay(asset_id)
+        return 'single'
+    size = max(1, getattr(settings, 'VISUAL_ANALYSIS_BATCH_SIZE', 20))
+    for i in range(0, len(ids), size):
+        submit_visual_dossier_batch_task.delay(kind, ids[i:i + size])
+    return 'batch'
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60)
+def submit_visual_dossier_batch_task(self, kind: str, ids: List[int]):
+    """
+    Baixa/normaliza os assets em paralelo (limite REF_FETCH_WORKERS), submete
+    um lote e agenda a coleta. Assets marcados 'processing' aqui (as tasks
+    unitarias pulam esses); download falho -> 'error' so naquele asset.
+    Falha no meio do caminho libera os que ficaram 'processing': voltam a
+    'pending' para o retry ou, sem tentativas, vao para 'error'.
+    """
+    model = _visual_kind_model(kind)
+    instances = list(model.objects.filter(id__in=ids, analysis_status__in=['pending', 'error']))
+    if not instances:
+        return {'kind': kind, 'submitted': 0}
+    claimed = [i.id for i in instances]
+    model.objects.filter(id__in=claimed).update(analysis_status='processing')
+
+    try:
+        return _submit_visual_batch(kind, model, instances)
+    except Exception as exc:
+        exhausted = self.request.retries >= self.max_retries
+        released = model.objects.filter(id__in=claimed, analysis_status='processing') \
+            .update(analysis_status='error' if exhausted else 'pending')
+        logger.exception('[visual_analyzer] lote %s falhou antes da coleta — %d assets -> %s',
+                         kind, released, 'error' if exhausted else 'pending')
+        if exhausted:
+            raise
+        raise self.retry(exc=exc)
+
+
+def _submit_visual_batch(kind, model, instances):
+    from apps.knowledge.services.visual_asset_analyzer import (
+        dossier_params, dossier_payload, image_size, submit_dossier_batch,
+    )
+    from apps.posts.services.ref_fetch import fetch_b64_many
+
+    urls = [_visual_asset_url(i) for i in instances]
+    formats = {url: getattr(i, 'file_format', 'png') for url, i in zip(urls, instances) if url}
+    payloads = fetch_b64_many(urls, lambda url: dossier_payload(kind, url, formats[url]))
+
+    batch_requests, sizes, failed = [], {}, []
+    for instance, (b64, mime) in zip(instances, payloads):
+        if not b64:
+            failed.append(instance.id)
+            continue
+        custom_id = f'{kind}-{instance.id}'
+        batch_requests.append({'custom_id': custom_id, 'params': dossier_params(kind, b64, mime)})
+        sizes[custom_id] = image_size(b64)
+    del payloads
+    if failed:
+        model.objects.filter(id__in=failed).update(analysis_status='error')
+        logger.warning('[visual_analyzer] lote %s: %d assets sem download -> error', kind, len(failed))
+
+    batch_id = submit_dossier_batch(batch_requests)
+    if not batch_id:
+        # Sem lote: devolve para o fluxo unitario (mesmo resultado, preco cheio)
+        pending = [int(r['custom_id'].split('-', 1)[1]) for r in batch_requests]
+        model.objects.filter(id__in=pending).update(analysis_status='pending')
+        single_task = (analyze_reference_image_task if kind == 'reference'
+                       else analyze_brandgrafic_module_task)
+        for asset_id in pending:
+            single_task.delay(asset_id)
+        return {'kind': kind, 'submitted': 0, 'fallback_single': len(pending)}
+
+    collect_visual_dossier_batch_task.apply_async(
+        (batch_id, kind, sizes),
+        countdown=getattr(settings, 'VISUAL_ANALYSIS_BATCH_POLL_SECONDS', 60),
+    )
+    return {'kind': kind, 'batch_id': batch_id, 'submitted': len(batch_requests)}
+
+
+@shared_task(bind=True, max_retries=24 * 60, default_retry_delay=60)
+def collect_visual_dossier_batch_task(self, batch_id: str, kind: str, sizes: Dict[str, list]):
+    """
+    Espera o lote terminar (retry a cada VISUAL_ANALYSIS_BATCH_POLL_SECONDS;
+    o lote expira em 24h) e persiste CADA dossie por _run_visual_dossier —
+    um asset ruim nao derruba os outros.
+    """
+    from apps.knowledge.services.visual_asset_analyzer import fetch_dossier_batch
+
+    model = _visual_kind_model(kind)
+    ids = {custom_id: int(custom_id.split('-', 1)[1]) for custom_id in sizes}
+    try:
+        results = fetch_dossier_batch(batch_id, kind, sizes)
+    except Exception as exc:
+        results, error = None, exc
+    else:
+        error = None
+    if results is None:
+        # Checado aqui: com exc=, o retry esgotado relanca `error` em vez do
+        # MaxRetriesExceededError e os assets ficariam presos em 'processing'
+        if self.request.retries >= self.max_retries:
+            model.objects.filter(id__in=ids.values(), analysis_status='processing') \
+                .update(analysis_status='error')
+            logger.error('[visual_analyzer] lote %s nao terminou — %d assets -> error',
+                         batch_id, len(ids))
+            return {'batch_id': batch_id, 'completed': 0, 'failed': len(ids)}
+        raise self.retry(
+            exc=error,
+            countdown=getattr(settings, 'VISUAL_ANALYSIS_BATCH_POLL_SECONDS', 60),
+        )
+
+    instances = model.objects.select_related('knowledge_base__organization') \
+        .in_bulk(list(ids.values()))
+    completed = failed = 0
+    for custom_id, asset_id in ids.items():
+        instance = instances.get(asset_id)
+        if instance is None:
+            continue
+        result = results.get(custom_id)
+        try:
+            ok = _run_visual_dossier(instance, lambda _url, result=result: result)
+        except Exception:
+            logger.exception('[visual_analyzer] lote %s: falha ao gravar %s', batch_id, custom_id)
+            model.objects.filter(id=asset_id).update(analysis_status='error')
+            ok = False
+        completed += int(ok)
+        failed += int(not ok)
+
+    logger.info('[visual_analyzer] lote %s coletado: %d ok, %d falhas', batch_id, completed, failed)
+    return {'batch_id': batch_id, 'completed': completed, 'failed': failed}
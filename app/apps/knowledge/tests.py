@@ -1,3 +1,390 @@
-from django.test import TestCase
+"""
+Testes do pipeline de brandguide (apps.knowledge.tasks)
 
-# Create your tests here.
+Valida que:
+1. O PDF vai para o spool uma vez (<id>-<sha256>.pdf) e os lotes leem o arquivo
+2. Spool ausente -> lote baixa de novo; finalize apaga o arquivo
+3. O lote rasteriza uma pagina por vez (uma imagem viva no pico) e grava
+   as paginas num upsert idempotente
+4. Pagina com o mesmo fingerprint de uma versao anterior e reaproveitada
+   (copia do PNG, texto e classificacao) sem renderizar
+5. Cada pagina sai com preview WebP e JPEG medio para a IA
+6. Sweep com muitos assets pendentes vai em lote (Message Batches, stub
+   local) e cada dossie e gravado isolado
+7. BK-tree acha o mesmo que a busca linear; upload quase-duplicado herda o
+   dossie (sem IA) e logo ganha pHash/dHash e dimensoes
+"""
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from botocore.response import StreamingBody
+from django.test import TestCase, override_settings
+
+from apps.core.services import S3Service
+from apps.knowledge import tasks
+
+PDF = b'%PDF-1.4 fake brandguide ' * 1000
+
+
+class _FakeS3:
+    def __init__(self):
+        self.gets = 0
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        return {'Body': StreamingBody(io.BytesIO(PDF), len(PDF))}
+
+
+class BrandguideSpoolTests(TestCase):
+
+    def setUp(self):
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.spool = spool.name
+        overrides = override_settings(BRANDGUIDE_SPOOL_DIR=self.spool, AWS_BUCKET_NAME='b')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.s3 = _FakeS3()
+        patcher = mock.patch.object(S3Service, '_get_s3_client', return_value=self.s3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_spool_unico_lido_pelos_lotes(self):
+        path, digest = tasks._spool_pdf(7, 'org-1/brandguides/1/original.pdf')
+        self.assertEqual(digest, hashlib.sha256(PDF).hexdigest())
+        self.assertEqual(os.path.basename(path), f'7-{digest}.pdf')
+        with open(path, 'rb') as fh:
+            self.assertEqual(fh.read(), PDF)
+
+        for _ in range(3):
+            self.assertEqual(tasks._spooled_pdf_path(7, 'k', digest), path)
+        self.assertEqual(self.s3.gets, 1)
+        self.assertEqual(os.listdir(self.spool), [os.path.basename(path)])
+
+    def test_spool_ausente_rebaixa_e_finalize_apaga(self):
+        digest = hashlib.sha256(PDF).hexdigest()
+        path = tasks._spooled_pdf_path(7, 'k', digest)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(self.s3.gets, 1)
+
+        tasks.finalize_brandguide_task([], 7, digest)
+        self.assertEqual(os.listdir(self.spool), [])
+
+
+class BrandguideBatchTests(TestCase):
+
+    def setUp(self):
+        from apps.core.models import Organization
+        from apps.knowledge.models import BrandguideUpload, KnowledgeBase
+
+        org = Organization.objects.create(name='bg', slug='bg', is_active=True)
+        kb = KnowledgeBase.objects.create(organization=org)
+        self.brandguide = BrandguideUpload.objects.create(
+            knowledge_base=kb, original_filename='guia.pdf',
+            s3_key_pdf='org-1/brandguides/1/original.pdf',
+            s3_url_pdf='https://b.s3.amazonaws.com/org-1/brandguides/1/original.pdf',
+        )
+        self.live, self.peak = set(), []
+
+    def _render(self, path, dpi, fmt, first_page, last_page):
+        from PIL import Image
+
+        self.assertEqual(first_page, last_page)
+        img = Image.new('RGB', (40, 30), 'white')
+        self.live.add(id(img))
+        self.peak.append(len(self.live))
+        original_close = img.close
+        img.close = lambda: (self.live.discard(id(img)), original_close())
+        return [img]
+
+    def _run_batch(self, brandguide, texts, fingerprints=None):
+        with mock.patch('pdf2image.convert_from_path', side_effect=self._render) as conv, \
+                mock.patch.object(tasks, '_spooled_pdf_path', return_value='/tmp/x.pdf'), \
+                mock.patch.object(tasks, '_page_fingerprints', return_value=fingerprints or {}), \
+                mock.patch.object(tasks, '_extract_texts_range', return_value=texts), \
+                mock.patch.object(tasks, '_upload_page_file_to_s3') as upload, \
+                mock.patch.object(tasks, '_copy_page_file_in_s3') as copy:
+            result = tasks.convert_pages_batch_task.apply(
+                args=(brandguide.id, 1, 3, 'abc')).get()
+        return result, conv, upload, copy
+
+    def test_rasteriza_uma_pagina_por_vez(self):
+        result, conv, upload, _copy = self._run_batch(self.brandguide, {2: 'Cores'})
+
+        self.assertEqual(result['created'], 3)
+        self.assertEqual(conv.call_count, 3)
+        self.assertEqual(upload.call_count, 9)  # PNG + preview WebP + JPEG IA
+        self.assertEqual(max(self.peak), 1)
+        pages = list(self.brandguide.pages.order_by('page_number'))
+        self.assertEqual([p.page_number for p in pages], [1, 2, 3])
+        self.assertEqual((pages[1].width, pages[1].extracted_text), (40, 'Cores'))
+
+        # Retry do lote: upsert por (brandguide, page_number), sem duplicar
+        self._run_batch(self.brandguide, {2: 'Tipos'})
+        self.assertEqual(self.brandguide.pages.count(), 3)
+        self.assertEqual(self.brandguide.pages.get(page_number=2).extracted_text, 'Tipos')
+
+    def test_pagina_vazia_nao_derruba_o_resto_do_lote(self):
+        render = self._render
+        self._render = lambda path, dpi, fmt, first_page, last_page: (
+            [] if first_page == 2 else render(path, dpi, fmt, first_page, last_page))
+
+        result, conv, _upload, _copy = self._run_batch(self.brandguide, {})
+
+        self.assertEqual(conv.call_count, 3)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(sorted(self.brandguide.pages.values_list('page_number', flat=True)), [1, 3])
+
+    def test_paginas_iguais_reaproveitadas_da_versao_anterior(self):
+        from django.utils import timezone
+
+        from apps.knowledge.models import BrandguideUpload
+
+        self._run_batch(self.brandguide, {1: 'Capa', 3: 'Cores'},
+                        fingerprints={1: 'f1', 2: 'f2', 3: 'f3'})
+        self.brandguide.pages.filter(page_number=3).update(
+            category='cores', relevance='high', analyzed_at=timezone.now())
+
+        v2 = BrandguideUpload.objects.create(
+            knowledge_base=self.brandguide.knowledge_base, original_filename='guia-v2.pdf',
+            s3_key_pdf='org-1/brandguides/2/original.pdf',
+            s3_url_pdf='https://b.s3.amazonaws.com/org-1/brandguides/2/original.pdf',
+        )
+        # v2: so a pagina 2 mudou
+        result, conv, upload, copy = self._run_batch(
+            v2, {2: 'Nova'}, fingerprints={1: 'f1', 2: 'f2-novo', 3: 'f3'})
+
+        self.assertEqual((result['created'], result['reused']), (3, 2))
+        self.assertEqual(conv.call_count, 1)
+        self.assertEqual(upload.call_count, 3)
+        copied = sorted(c.args for c in copy.call_args_list)
+        self.assertEqual(len(copied), 6)
+        self.assertIn(('org-1/brandguides/1/pages/page_003_ai.jpg',
+                       'org-1/brandguides/2/pages/page_003_ai.jpg'), copied)
+        p3 = v2.pages.get(page_number=3)
+        self.assertEqual(p3.rendition_key('preview'), 'org-1/brandguides/2/pages/page_003.webp')
+        self.assertEqual((p3.extracted_text, p3.category, p3.fingerprint), ('Cores', 'cores', 'f3'))
+        self.assertIsNotNone(p3.analyzed_at)
+        self.assertIsNone(v2.pages.get(page_number=2).analyzed_at)
+
+    def test_fingerprint_do_pdf_sem_renderizar(self):
+        from PIL import Image
+
+        def make_pdf(colors):
+            path = os.path.join(tempfile.mkdtemp(), 'guia.pdf')
+            self.addCleanup(os.remove, path)
+            imgs = [Image.new('RGB', (60, 40), c) for c in colors]
+            imgs[0].save(path, save_all=True, append_images=imgs[1:])
+            return path
+
+        v1 = tasks._page_fingerprints(make_pdf(['red', 'green', 'blue']), 1, 3, 200)
+        v2 = tasks._page_fingerprints(make_pdf(['red', 'yellow', 'blue']), 1, 3, 200)
+        self.assertEqual(sorted(v1), [1, 2, 3])
+        self.assertEqual(v1[1], v2[1])
+        self.assertNotEqual(v1[2], v2[2])
+        self.assertEqual(v1[3], v2[3])
+        self.assertNotEqual(v1[1], v1[3])
+        # DPI diferente = raster diferente
+        self.assertNotEqual(v1[1], tasks._page_fingerprints(make_pdf(['red']), 1, 1, 150)[1])
+
+    def test_rendicoes_da_pagina(self):
+        from PIL import Image
+
+        from apps.knowledge.models import BrandguidePage
+
+        page_img = Image.new('RGB', (1654, 2339), 'white')
+        with override_settings(BRANDGUIDE_AI_MAX_PX=1568, BRANDGUIDE_PREVIEW_MAX_PX=480):
+            files = tasks._page_files(page_img)
+        sizes = {}
+        for field, (body, content_type) in files.items():
+            with Image.open(io.BytesIO(body)) as im:
+                sizes[field] = (im.format, im.size, content_type)
+        self.assertEqual(sizes['s3_key'], ('PNG', (1654, 2339), 'image/png'))
+        self.assertEqual(sizes['ai_s3_key'], ('JPEG', (1109, 1568), 'image/jpeg'))
+        self.assertEqual(sizes['preview_s3_key'], ('WEBP', (339, 480), 'image/webp'))
+
+        legacy = BrandguidePage(s3_key='p.png')
+        self.assertEqual((legacy.rendition_key('preview'), legacy.rendition_key('ai')),
+                         ('p.png', 'p.png'))
+
+
+class _FakeBatches:
+    """Stub local da Message Batches API: 1o retrieve 'in_progress', depois 'ended'."""
+
+    def __init__(self, fail_ids=()):
+        self.requests, self.polls, self.fail_ids = [], 0, set(fail_ids)
+
+    def create(self, requests):
+        self.requests = list(requests)
+        return SimpleNamespace(id='msgbatch_1')
+
+    def retrieve(self, batch_id):
+        self.polls += 1
+        return SimpleNamespace(processing_status='ended' if self.polls > 1 else 'in_progress')
+
+    def results(self, batch_id):
+        for req in self.requests:
+            if req['custom_id'] in self.fail_ids:
+                yield SimpleNamespace(custom_id=req['custom_id'], result=SimpleNamespace(type='errored'))
+                continue
+            message = SimpleNamespace(
+                content=[SimpleNamespace(type='text', text='"descricao_geral": "ok"}')],
+                usage=SimpleNamespace(input_tokens=1000, output_tokens=1000),
+            )
+            yield SimpleNamespace(custom_id=req['custom_id'],
+                                  result=SimpleNamespace(type='succeeded', message=message))
+
+
+@override_settings(VISUAL_ANALYSIS_BATCH_MIN=5, VISUAL_ANALYSIS_BATCH_SIZE=20)
+class VisualDossierBatchTests(TestCase):
+
+    def setUp(self):
+        from apps.core.models import Organization
+        from apps.knowledge.models import KnowledgeBase, ReferenceImage
+
+        org = Organization.objects.create(name='vd', slug='vd', is_active=True)
+        self.kb = KnowledgeBase.objects.create(organization=org)
+        self.refs = [
+            ReferenceImage.objects.create(
+                knowledge_base=self.kb, title=f'r{i}', s3_key=f'org-1/refs/{i}.png',
+                s3_url=f'https://b.s3.amazonaws.com/org-1/refs/{i}.png',
+                perceptual_hash='pending', file_size=10, width=30, height=20,
+            )
+            for i in range(6)
+        ]
+
+    def test_lote_grava_cada_dossie_isolado(self):
+        from PIL import Image
+
+        from apps.knowledge.services import visual_asset_analyzer as vaa
+
+        buf = io.BytesIO()
+        Image.new('RGB', (30, 20), 'red').save(buf, format='PNG')
+        png_b64 = base64.b64encode(buf.getvalue()).decode('ascii')
+        broken, errored = self.refs[0], self.refs[1]
+
+        def payload(kind, url, file_format='png'):
+            return (None, 'image/png') if url.endswith('/0.png') else (png_b64, 'image/png')
+
+        batches = _FakeBatches(fail_ids={f'reference-{errored.id}'})
+        client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+        with mock.patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'k'}), \
+                mock.patch.object(vaa, '_get_client', return_value=client), \
+                mock.patch.object(vaa, 'dossier_payload', side_effect=payload), \
+                mock.patch.object(S3Service, 'generate_presigned_download_url',
+                                  side_effect=lambda key, **kw: f'https://b.s3.amazonaws.com/{key}'), \
+                mock.patch.object(tasks, '_asset_signature', return_value=None), \
+                mock.patch.object(tasks.submit_visual_dossier_batch_task, 'delay') as submit, \
+                mock.patch.object(tasks.collect_visual_dossier_batch_task, 'apply_async') as collect:
+            sweep = tasks.analyze_pending_reference_images_task.apply(args=(self.kb.id,)).get()
+            self.assertEqual(sweep['mode'], 'batch')
+            tasks.submit_visual_dossier_batch_task.apply(args=submit.call_args.args).get()
+            self.assertEqual(len(batches.requests), 5)  # download falho fica fora
+            result = tasks.collect_visual_dossier_batch_task.apply(
+                args=collect.call_args.args[0]).get()
+
+        self.assertEqual((result['completed'], result['failed']), (4, 1))
+        self.assertEqual(batches.polls, 2)
+        statuses = {r.id: r.analysis_status for r in self.kb.reference_images.all()}
+        self.assertEqual(statuses.pop(broken.id), 'error')
+        self.assertEqual(statuses.pop(errored.id), 'error')
+        self.assertEqual(set(statuses.values()), {'completed'})
+        done = self.kb.reference_images.get(id=self.refs[2].id)
+        self.assertEqual(done.visual_analysis['_source_dimensions'], '30x20')
+        self.assertEqual(str(done.analysis_cost_usd), '0.009000')  # metade do preco
+
+
+    def test_falhas_nunca_deixam_assets_em_processing(self):
+        from apps.knowledge.services import visual_asset_analyzer as vaa
+
+        ids = [r.id for r in self.refs]
+        with mock.patch.object(vaa, 'dossier_payload', return_value=('iVBORw0K', 'image/png')), \
+                mock.patch.object(vaa, 'submit_dossier_batch',
+                                  side_effect=RuntimeError('api fora')) as submit, \
+                mock.patch.object(S3Service, 'generate_presigned_download_url',
+                                  side_effect=lambda key, **kw: f'https://b.s3.amazonaws.com/{key}'):
+            tasks.submit_visual_dossier_batch_task.apply(args=('reference', ids))
+        # Cada retry re-reivindica os assets ('pending'); esgotado -> 'error'
+        self.assertEqual(submit.call_count, tasks.submit_visual_dossier_batch_task.max_retries + 1)
+        self.assertEqual(set(self.kb.reference_images.values_list('analysis_status', flat=True)),
+                         {'error'})
+
+        self.kb.reference_images.update(analysis_status='processing')
+        sizes = {f'reference-{i}': [30, 20] for i in ids}
+        with mock.patch.object(vaa, 'fetch_dossier_batch', side_effect=RuntimeError('poll')), \
+                mock.patch.object(tasks.collect_visual_dossier_batch_task, 'max_retries', 2):
+            tasks.collect_visual_dossier_batch_task.apply(args=('b1', 'reference', sizes))
+        self.assertEqual(set(self.kb.reference_images.values_list('analysis_status', flat=True)),
+                         {'error'})
+
+class ImageIndexTests(TestCase):
+
+    def setUp(self):
+        from apps.core.models import Organization
+        from apps.knowledge.models import KnowledgeBase
+
+        org = Organization.objects.create(name='ii', slug='ii', is_active=True)
+        self.kb = KnowledgeBase.objects.create(organization=org)
+
+    def test_bktree_igual_a_busca_linear(self):
+        import random
+
+        from apps.utils.image_hash import BKTree, hamming
+
+        rng = random.Random(7)
+        keys = [rng.getrandbits(64) for _ in range(500)]
+        keys += [k ^ (1 << rng.randrange(64)) for k in keys[:50]]  # vizinhos a 1 bit
+        tree = BKTree()
+        for i, key in enumerate(keys):
+            tree.add(key, i)
+        for probe in keys[:60]:
+            expected = sorted(i for i, k in enumerate(keys) if hamming(probe, k) <= 6)
+            self.assertEqual(sorted(i for _d, i in tree.search(probe, 6)), expected)
+
+    def test_duplicata_herda_dossie_e_logo_assinado(self):
+        from PIL import Image, ImageDraw
+
+        from apps.knowledge.models import Logo, ReferenceImage
+
+        def png(size, shade):
+            img = Image.new('RGB', size, 'white')
+            draw = ImageDraw.Draw(img)
+            draw.rectangle((0, 0, size[0] // 2, size[1]), fill=(shade, 40, 90))
+            draw.ellipse((size[0] // 3, size[1] // 4, size[0], size[1]), fill='black')
+            buf = io.BytesIO()
+            img.save(buf, format='PNG')
+            return buf.getvalue()
+
+        files = {'o.png': png((320, 200), 200), 'd.png': png((640, 400), 205),
+                 'logo.png': png((64, 64), 10)}
+        original = ReferenceImage.objects.create(
+            knowledge_base=self.kb, title='o', s3_key='o.png', s3_url='https://x/o.png',
+            perceptual_hash='pending', file_size=1, width=1, height=1,
+            analysis_status='completed',
+            visual_analysis={'composicao': 'split', '_source_ar': 1.6, '_source_dimensions': '320x200'},
+        )
+        dup = ReferenceImage.objects.create(
+            knowledge_base=self.kb, title='d', s3_key='d.png', s3_url='https://x/d.png',
+            perceptual_hash='pending', file_size=1, width=1, height=1,
+        )
+        logo = Logo.objects.create(knowledge_base=self.kb, name='l', s3_key='logo.png',
+                                   s3_url='https://x/logo.png', file_format='png')
+
+        with mock.patch.object(S3Service, 'read_bytes', side_effect=lambda key: files[key]):
+            tasks.index_kb_images_task.apply(args=(self.kb.id,)).get()
+            result = tasks.compute_image_signature_task.apply(args=('reference', dup.id)).get()
+
+        self.assertEqual(result['duplicate_of']['id'], original.id)
+        dup.refresh_from_db()
+        self.assertEqual((dup.width, dup.height, dup.file_size), (640, 400, len(files['d.png'])))
+        self.assertEqual(dup.analysis_status, 'completed')
+        self.assertEqual(dup.visual_analysis['composicao'], 'split')
+        self.assertEqual(dup.visual_analysis['_source_dimensions'], '640x400')
+        self.assertEqual(dup.analysis_cost_usd, 0)
+        logo.refresh_from_db()
+        self.assertEqual((len(logo.perceptual_hash), len(logo.dhash), logo.width), (16, 16, 64))
@@ -21,12 +21,11 @@ from .forms import (
     LogoUploadForm, CustomFontUploadForm
 )
 from .kb_services import KnowledgeBaseService
+from apps.core.tenant import get_tenant_context
 from .services.n8n_service import N8NService
 from apps.utils.s3 import upload_to_s3, get_signed_url
 from apps.utils.image_hash import (
-    calculate_perceptual_hash, 
-    find_similar_images_in_queryset,
-    get_image_dimensions,
+    image_signature,
     validate_image_file
 )
 
@@ -464,9 +463,11 @@ def knowledge_save_all(request):
             from apps.knowledge.tasks import (
                 analyze_pending_reference_images_task,
                 analyze_pending_brandgrafic_modules_task,
+                index_kb_images_task,
             )
             analyze_pending_reference_images_task.delay(kb.id)
             analyze_pending_brandgrafic_modules_task.delay(kb.id)
+            index_kb_images_task.delay(kb.id)
         except Exception:
             import logging
             logging.getLogger(__name__).exception(
@@ -483,6 +484,7 @@ def knowledge_save_all(request):
             kb.onboarding_completed_at = timezone.now()
             kb.onboarding_completed_by = request.user
             kb.save(update_fields=['onboarding_completed', 'onboarding_completed_at', 'onboarding_completed_by'])
+            get_tenant_context(request).refresh_kb()
             print(f"🔄 [REDIRECT] Primeira vez - redirecionando para perfil_view", flush=True)
             messages.success(request, '🎉 Base de Conhecimento salva com sucesso! Redirecionando para análise...')
         else:
@@ -526,14 +528,22 @@ def knowledge_upload_image(request):
                     'message': error_msg
                 }, status=400)
             
-            # Verificar similaridade
-            is_similar, similar_img, diff = find_similar_images_in_queryset(
-                image_file,
-                ReferenceImage.objects.filter(knowledge_base=kb),
-                threshold=10
+            # Hash perceptual e dimensões
+            image_file.seek(0)
+            signature = image_signature(image_file.read())
+            image_file.seek(0)
+            width, height = signature['width'], signature['height']
+
+            # Verificar similaridade (índice perceptual da KB)
+            from django.conf import settings
+            from .services.image_index import find_near_duplicates
+            matches = find_near_duplicates(
+                kb.id, signature['phash'], signature['dhash'],
+                max_distance=getattr(settings, 'IMAGE_SIMILAR_MAX_DISTANCE', 8),
+                kinds=('reference',),
             )
-            
-            if is_similar:
+            similar_img = matches and ReferenceImage.objects.filter(id=matches[0]['id']).first()
+            if similar_img:
                 return JsonResponse({
                     'success': False,
                     'message': f'Imagem similar já existe: {similar_img.title}',
@@ -541,14 +551,10 @@ def knowledge_upload_image(request):
                         'id': similar_img.id,
                         'title': similar_img.title,
                         'url': get_signed_url(similar_img.s3_key),
-                        'difference': diff
+                        'difference': matches[0]['distance']
                     }
                 }, status=400)
             
-            # Calcular hash e dimensões
-            perceptual_hash = calculate_perceptual_hash(image_file)
-            width, height = get_image_dimensions(image_file)
-            
             # Upload para S3
             s3_key = f'knowledge/reference_images/{kb.id}/{image_file.name}'
             result = upload_to_s3(
@@ -568,7 +574,8 @@ def knowledge_upload_image(request):
             ref_image.knowledge_base = kb
             ref_image.s3_key = s3_key
             ref_image.s3_url = result['url']
-            ref_image.perceptual_hash = perceptual_hash
+            ref_image.perceptual_hash = signature['phash']
+            ref_image.dhash = signature['dhash']
             ref_image.file_size = image_file.size
             ref_image.width = width
             ref_image.height = height
@@ -233,6 +233,8 @@ def get_brandguide_status(request, brandguide_id=None):
     Consulta status do processamento de um brandguide.
 
     Se brandguide_id nao for informado, retorna o upload mais recente da KB.
+    Com ?pages=1 inclui as paginas (URL do preview WebP) — o polling de
+    status normal nao paga por isso.
     """
     try:
         organization = request.organization
@@ -273,21 +275,34 @@ def get_brandguide_status(request, brandguide_id=None):
                     brandguide.id
                 )
 
-        return JsonResponse({
-            'success': True,
-            'data': {
-                'brandguideId': brandguide.id,
-                'originalFilename': brandguide.original_filename,
-                'status': brandguide.processing_status,
-                'totalPages': brandguide.total_pages,
-                'fileSize': brandguide.file_size,
-                'errorMessage': brandguide.error_message,
-                'createdAt': brandguide.created_at.isoformat(),
-                'completedAt': brandguide.completed_at.isoformat() if brandguide.completed_at else None,
-                'pagesProcessed': brandguide.pages.count(),
-                'pdfDownloadUrl': pdf_download_url,
-            }
-        })
+        data = {
+            'brandguideId': brandguide.id,
+            'originalFilename': brandguide.original_filename,
+            'status': brandguide.processing_status,
+            'totalPages': brandguide.total_pages,
+            'fileSize': brandguide.file_size,
+            'errorMessage': brandguide.error_message,
+            'createdAt': brandguide.created_at.isoformat(),
+            'completedAt': brandguide.completed_at.isoformat() if brandguide.completed_at else None,
+            'pagesProcessed': brandguide.pages.count(),
+            'pdfDownloadUrl': pdf_download_url,
+        }
+
+        # Grid de miniaturas: preview WebP (PNG so em pagina sem rendicao)
+        if request.GET.get('pages') == '1':
+            data['pages'] = [
+                {
+                    'pageNumber': page.page_number,
+                    'previewUrl': S3Service.generate_presigned_download_url(
+                        page.rendition_key('preview')
+                    ),
+                    'category': page.category,
+                    'relevance': page.relevance,
+                }
+                for page in brandguide.pages.order_by('page_number')
+            ]
+
+        return JsonResponse({'success': True, 'data': data})
 
     except Exception:
         logger.exception('Erro ao consultar status do brandguide')
@@ -540,10 +555,15 @@ def create_brandgrafic_module(request):
             is_active=True,
         )
 
-        # Gatilho 1 — dossie visual do grafismo em background (countdown
-        # absorve o "subiu errado e deletou"; a task tem guarda anti-corrida).
+        # Gatilho 1 — assinatura perceptual ja (duplicata herda o dossie) e
+        # dossie visual do grafismo em background (countdown absorve o "subiu
+        # errado e deletou"; a task tem guarda anti-corrida).
         try:
-            from apps.knowledge.tasks import analyze_brandgrafic_module_task
+            from apps.knowledge.tasks import (
+                analyze_brandgrafic_module_task,
+                compute_image_signature_task,
+            )
+            compute_image_signature_task.delay('asset', asset.id)
             analyze_brandgrafic_module_task.apply_async((asset.id,), countdown=15)
         except Exception:
             logger.exception('Falha ao enfileirar analise do grafismo %s', asset.id)
@@ -735,7 +755,8 @@ def _apply_analysis_result(brandguide: BrandguideUpload, data: dict) -> None:
     da KB e a criacao de ColorPalette/Typography acontece em
     apply_brandguide_to_kb_task (despachada apos esta funcao).
 
-    - Atualiza classificacoes das BrandguidePage
+    - Atualiza classificacoes das BrandguidePage (marca analyzed_at: a pagina
+      reaproveitada num proximo upload nao volta para a triagem)
     - Guarda suggested_kb_fields em kb.n8n_analysis['brandguide']['suggested_fields']
     - Guarda brand_visual_spec em kb.brand_visual_spec (source=brandguide_pdf)
     """
@@ -753,6 +774,7 @@ def _apply_analysis_result(brandguide: BrandguideUpload, data: dict) -> None:
         if pc.get('relevance') in ('high', 'medium', 'low'):
             updates['relevance'] = pc['relevance']
         if updates:
+            updates['analyzed_at'] = timezone.now()
             BrandguidePage.objects.filter(
                 brandguide=brandguide,
                 page_number=page_num,
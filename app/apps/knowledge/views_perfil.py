@@ -11,6 +11,7 @@ from django.utils import timezone
 from django.db import transaction
 import json
 
+from apps.core.tenant import get_tenant_context
 from apps.knowledge.models import KnowledgeBase, ColorPalette
 from apps.knowledge.services.n8n_service import N8NService
 import logging
@@ -198,6 +199,7 @@ def perfil_apply_suggestions(request):
             # 4. SALVAR ALTERAÇÕES (especificar campos para garantir persistência)
             if fields_to_save:
                 kb.save(update_fields=fields_to_save)
+                get_tenant_context(request).refresh_kb()
                 print(f"✅ [PERFIL_APPLY] Total de campos atualizados: {len(updated_fields)}", flush=True)
                 print(f"✅ [PERFIL_APPLY] Campos salvos: {updated_fields}", flush=True)
                 print(f"💾 [PERFIL_APPLY] Dados salvos no banco (KB id={kb.id})", flush=True)
@@ -211,6 +213,7 @@ def perfil_apply_suggestions(request):
             # Resetar compilation_status para pending (vai recompilar após fundamentos)
             kb.compilation_status = 'pending'
             kb.save(update_fields=['compilation_status'])
+            get_tenant_context(request).refresh_kb()
             print(f"🔄 [PERFIL_APPLY] compilation_status resetado para 'pending'", flush=True)
             
             n8n_result = N8NService.send_fundamentos(kb)
@@ -232,9 +235,11 @@ def perfil_apply_suggestions(request):
             from apps.knowledge.tasks import (
                 analyze_pending_reference_images_task,
                 analyze_pending_brandgrafic_modules_task,
+                index_kb_images_task,
             )
             analyze_pending_reference_images_task.delay(kb.id)
             analyze_pending_brandgrafic_modules_task.delay(kb.id)
+            index_kb_images_task.delay(kb.id)
         except Exception:
             logger.exception('Falha ao enfileirar sweep de análise visual (apply_suggestions)')
 
@@ -227,6 +227,16 @@ def create_logo(request):
             is_primary=is_primary,
             uploaded_by=request.user
         )
+
+        # Assinatura perceptual (pHash/dHash, dimensoes) em background
+        try:
+            from apps.knowledge.tasks import compute_image_signature_task
+            compute_image_signature_task.delay('logo', logo.id)
+        except Exception:
+            import logging
+            logging.getLogger(__name__).exception(
+                'Falha ao enfileirar assinatura do Logo %s', logo.id
+            )
         
         # Gerar URL de preview
         preview_url = S3Service.generate_presigned_download_url(s3_key)
@@ -445,11 +455,16 @@ def create_reference_image(request):
             uploaded_by=request.user
         )
         
-        # Gatilho 1 — analise visual em background. countdown absorve o caso
-        # "subiu errado e deleta rapido" sem gastar IA; a guarda na task torna
-        # a corrida um no-op se a imagem ja tiver sido removida.
+        # Gatilho 1 — assinatura perceptual ja (duplicata herda o dossie) e
+        # analise visual em background. countdown absorve o caso "subiu errado
+        # e deleta rapido" sem gastar IA; a guarda na task torna a corrida um
+        # no-op se a imagem ja tiver sido removida.
         try:
-            from apps.knowledge.tasks import analyze_reference_image_task
+            from apps.knowledge.tasks import (
+                analyze_reference_image_task,
+                compute_image_signature_task,
+            )
+            compute_image_signature_task.delay('reference', reference.id)
             analyze_reference_image_task.apply_async((reference.id,), countdown=15)
         except Exception:
             import logging
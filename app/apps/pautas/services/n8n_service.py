@@ -4,6 +4,7 @@ import requests
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from apps.core.services import http_client
 from apps.knowledge.models import KnowledgeBase
 
 User = get_user_model()
@@ -57,7 +58,7 @@ class PautaN8NService:
             }
             
             # 3. Enviar para N8N
-            response = requests.post(
+            response = http_client.post(
                 PautaN8NService.ENDPOINT_ENVIO,
                 json=payload,
                 headers={
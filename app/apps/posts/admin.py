@@ -167,9 +167,11 @@ class PostAdmin(admin.ModelAdmin):
     cost_brl_display.short_description = 'Custo BRL'
 
     def ai_usage_log_pretty(self, obj):
-        """Renderiza ai_usage_log como tabela HTML legivel."""
+        """Renderiza o historico de uso de IA (ledger AIUsageEvent + legado
+        do JSON) como tabela HTML legivel."""
         from django.utils.html import format_html
-        log = obj.ai_usage_log or []
+        from apps.core.services.ai_usage import post_usage_log
+        log = post_usage_log(obj) if obj.pk else []
         if not log:
             return '—'
         rows = []
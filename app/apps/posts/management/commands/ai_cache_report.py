@@ -0,0 +1,81 @@
+"""
+Hit rate do prompt caching da Anthropic por call site x prefixo de system
+(fonte: core.AIUsageEvent; prefixo = skills.system_prefix -> cache_prefix).
+
+Por origem/proposito/prefixo: chamadas, tokens de prompt lidos do cache,
+escritos no cache e sem cache; hit = lidos / total do prompt. Ordenado pelo
+que mais paga prompt cheio — o topo da lista e onde o cache esta falhando:
+  - prefixo vazio: call site fora do registro de skills (system montado a mao)
+  - varios prefixos no mesmo proposito: skill/instrucao/marca mudando
+  - so 'escrito': chamadas espacadas alem do TTL (ou prefixo < minimo cacheavel)
+
+  python manage.py ai_cache_report                 # ultimos 7 dias
+  python manage.py ai_cache_report --days 30 --org todxs
+  python manage.py ai_cache_report --csv
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Hit rate do cache de prompt (Claude) por call site x prefixo de system.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--org', default=None, help='filtra por slug de org')
+        parser.add_argument('--csv', action='store_true')
+
+    def handle(self, *args, **o):
+        from apps.core.models import AIUsageEvent
+
+        qs = AIUsageEvent.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=o['days']),
+            model__startswith='claude')
+        if o['org']:
+            qs = qs.filter(organization__slug=o['org'])
+
+        rows = list(
+            qs.values('source', 'purpose', 'cache_prefix')
+            .annotate(n=Count('id'),
+                      misses=Count('id', filter=Q(cache_read_tokens=0)),
+                      tin=Sum('input_tokens'),
+                      read=Sum('cache_read_tokens'),
+                      write=Sum('cache_creation_tokens'))
+        )
+        for r in rows:
+            prompt = (r['tin'] or 0) + (r['read'] or 0) + (r['write'] or 0)
+            r['hit'] = (r['read'] or 0) / prompt if prompt else 0.0
+            r['uncached'] = (r['tin'] or 0) + (r['write'] or 0)
+        rows.sort(key=lambda r: -r['uncached'])
+
+        if o['csv']:
+            self.stdout.write('origem,proposito,prefixo,chamadas,sem_leitura,'
+                              'tokens_sem_cache,tokens_escritos,tokens_lidos,hit_rate')
+            for r in rows:
+                self.stdout.write(
+                    f"{r['source']},{r['purpose']},{r['cache_prefix']},{r['n']},{r['misses']},"
+                    f"{r['tin'] or 0},{r['write'] or 0},{r['read'] or 0},{r['hit']:.4f}")
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{'origem/proposito':<36}{'prefixo':<26}{'cham':>6}{'miss':>6}"
+            f"{'sem cache':>11}{'escrito':>10}{'lido':>11}{'hit':>7}"))
+        for r in rows:
+            site = f"{r['source'] or '?'}/{r['purpose'] or '?'}"
+            line = (f"{site[:35]:<36}{(r['cache_prefix'] or '(sem prefixo)')[:25]:<26}"
+                    f"{r['n']:>6}{r['misses']:>6}{r['tin'] or 0:>11}{r['write'] or 0:>10}"
+                    f"{r['read'] or 0:>11}{r['hit']:>7.0%}")
+            style = self.style.ERROR if r['hit'] < 0.5 and r['n'] > 1 else None
+            self.stdout.write(style(line) if style else line)
+
+        read = sum(r['read'] or 0 for r in rows)
+        total = read + sum(r['uncached'] for r in rows)
+        self.stdout.write('')
+        self.stdout.write(
+            f"Total: {sum(r['n'] for r in rows)} chamadas Claude | "
+            f"hit {read / total if total else 0:.0%} dos tokens de prompt | "
+            f"call sites sem prefixo: "
+            f"{len({(r['source'], r['purpose']) for r in rows if not r['cache_prefix']})}")
@@ -9,20 +9,37 @@ Claude/Gemini; foto = placeholder) e compara pixel a pixel com a referencia.
   python manage.py golden_archetypes --record   # grava referencias + manifest
   python manage.py golden_archetypes --check    # re-renderiza e compara (CI do refactor)
   python manage.py golden_archetypes --check --only todxs
+  python manage.py golden_archetypes --bench --record   # grava baseline de desempenho
+  python manage.py golden_archetypes --bench            # compara com o baseline
 
 Arquivos:
   PNGs de referencia:  /app/golden/<slug>__<arch>__<fmt>.png   (gitignored)
   Manifest (sha256):   /app/apps/posts/golden_manifest.json    (COMMITADO)
   Em divergencia:      /app/golden/<caso>.actual.png + .diff.png p/ inspecao
+  Baseline de bench:   /app/apps/posts/golden_bench.json     (COMMITADO)
 
 Regra do refactor: QUALQUER passo do artkit so avanca com --check retornando
 0 divergencias. Ajuste legitimo de arquetipo => re-rodar --record e commitar
 o manifest junto da mudanca.
+
+--bench renderiza cada caso --repeat vezes (apos 1 aquecimento) e guarda,
+por caso: mediana de wall/CPU (ms), pico de RSS (MB; VmHWM zerado antes do
+caso — Linux; fora dele o pico do processo) e a mediana por fase do engine
+v3 (background, image_zones, text_fit, effects, png_encode; so com
+--engine v3 ou dialeto ja no v3). Falha se wall/CPU/RSS de algum caso
+passar do baseline em mais de --threshold (GOLDEN_BENCH_THRESHOLD; default
+0.25 = +25%), com folga absoluta minima para casos de poucos ms. Sem
+baseline do engine (ou caso novo fora dele) tambem falha: o baseline e
+gravado SO com --bench --record, na maquina de referencia, e commitado junto
+do manifest. Baseline e por engine e por maquina: regrave ao trocar de hardware.
 """
 import hashlib
 import io
 import json
 import os
+import platform
+import statistics
+import time
 
 from django.core.management.base import BaseCommand
 
@@ -32,12 +49,40 @@ ORG_SLUGS = ['todxs', 'vb-gastronomia', 'samsung-healthcare']
 GOLDEN_DIR = os.environ.get('GOLDEN_DIR', '/app/golden')
 MANIFEST = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
     os.path.abspath(__file__)))), 'golden_manifest.json')
+BENCH_BASELINE = os.path.join(os.path.dirname(MANIFEST), 'golden_bench.json')
+BENCH_THRESHOLD = float(os.environ.get('GOLDEN_BENCH_THRESHOLD', 0.25))
+# Folga absoluta: ruido de agendamento nao reprova caso de poucos ms
+BENCH_SLACK = {'wall_ms': 5.0, 'cpu_ms': 5.0, 'peak_rss_mb': 16.0}
 
 
 def _sha(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
 
+def _reset_peak_rss():
+    """Zera o pico de RSS do processo (Linux >= 4.0); False se nao suportado."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
 class Command(BaseCommand):
     help = 'Grava/verifica golden files dos arquetipos (rede de seguranca do refactor).'
 
@@ -48,13 +93,20 @@ class Command(BaseCommand):
         parser.add_argument('--engine', default='legacy', choices=['legacy', 'v3'],
                             help="v3 = renderiza pelo ENGINE V3 e compara com o "
                                  "manifest LEGADO (prova de paridade pixel)")
+        parser.add_argument('--bench', action='store_true',
+                            help='mede tempo/memoria por caso (com --record grava o baseline)')
+        parser.add_argument('--repeat', type=int, default=5, help='renders por caso no --bench')
+        parser.add_argument('--threshold', type=float, default=BENCH_THRESHOLD,
+                            help='regressao tolerada no --bench (0.25 = +25%%)')
 
     def handle(self, *args, **o):
         from apps.knowledge.models import KnowledgeBase
         from apps.posts.services.preview import render_preview, list_cases
 
+        if o['bench']:
+            return self._bench(o)
         if not (o['record'] or o['check']):
-            self.stderr.write(self.style.ERROR('use --record ou --check'))
+            self.stderr.write(self.style.ERROR('use --record, --check ou --bench'))
             return
         if o['record'] and o['engine'] != 'legacy':
             self.stderr.write(self.style.ERROR(
@@ -82,7 +134,8 @@ class Command(BaseCommand):
                 case = f'{slug}__{arch}__{fmt}'
                 total += 1
                 try:
-                    png = render_preview(org, kb, arch, fmt=fmt, engine=o['engine'])
+                    png = render_preview(org, kb, arch, fmt=fmt, engine=o['engine'],
+                                         use_cache=False)
                 except Exception as e:
                     diffs.append((case, f'RENDER FALHOU: {e}'))
                     self.stdout.write(self.style.ERROR(f'  ✗ {case}: render falhou: {e}'))
@@ -124,6 +177,110 @@ class Command(BaseCommand):
             raise SystemExit(1)
         self.stdout.write(self.style.SUCCESS(f'OK: {total}/{total} casos identicos ao golden.'))
 
+    def _cases(self, o):
+        from apps.knowledge.models import KnowledgeBase
+        from apps.posts.services.preview import list_cases
+
+        for slug in ORG_SLUGS:
+            if o['only'] and slug != o['only']:
+                continue
+            org = Organization.objects.get(slug=slug)
+            kb = KnowledgeBase.objects.filter(organization=org).first()
+            for arch, fmt in list_cases(org):
+                yield f'{slug}__{arch}__{fmt}', org, kb, arch, fmt
+
+    def _measure(self, org, kb, arch, fmt, engine, repeat):
+        """Mede um caso: 1 render de aquecimento (fontes/assets/primitivas em
+        cache, como num worker quente) + `repeat` renders cronometrados."""
+        from apps.posts.services.artkit.engine import phase_timings
+        from apps.posts.services.preview import render_preview
+
+        render_preview(org, kb, arch, fmt=fmt, engine=engine, use_cache=False)
+        _reset_peak_rss()
+        walls, cpus, phases = [], [], {}
+        for _ in range(max(1, repeat)):
+            with phase_timings() as t:
+                w0, c0 = time.perf_counter(), time.process_time()
+                render_preview(org, kb, arch, fmt=fmt, engine=engine, use_cache=False)
+                walls.append((time.perf_counter() - w0) * 1000)
+                cpus.append((time.process_time() - c0) * 1000)
+            for phase, secs in t.items():
+                phases.setdefault(phase, []).append(secs * 1000)
+        return {
+            'wall_ms': round(statistics.median(walls), 2),
+            'cpu_ms': round(statistics.median(cpus), 2),
+            'peak_rss_mb': round(_peak_rss_mb(), 1),
+            'phases_ms': {p: round(statistics.median(v), 2) for p, v in sorted(phases.items())},
+        }
+
+    def _bench(self, o):
+        import PIL
+
+        try:
+            with open(BENCH_BASELINE) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = {}
+        engine = o['engine']
+        expected = baseline.get(engine) or {}
+        if not expected and not o['record']:
+            self.stderr.write(self.style.ERROR(
+                f'sem baseline do engine {engine} em {BENCH_BASELINE} — '
+                f'rode --bench --record (maquina de referencia) e commite'))
+            raise SystemExit(1)
+        results, regressions, total = {}, [], 0
+        for case, org, kb, arch, fmt in self._cases(o):
+            total += 1
+            try:
+                stats = self._measure(org, kb, arch, fmt, engine, o['repeat'])
+            except Exception as e:
+                regressions.append((case, f'RENDER FALHOU: {e}'))
+                self.stdout.write(self.style.ERROR(f'  ✗ {case}: render falhou: {e}'))
+                continue
+            results[case] = stats
+            line = (f"{case}: {stats['wall_ms']:.1f}ms wall, {stats['cpu_ms']:.1f}ms cpu, "
+                    f"{stats['peak_rss_mb']:.0f}MB")
+            if stats['phases_ms']:
+                line += ' [' + ' '.join(f'{p}={v:.1f}' for p, v in stats['phases_ms'].items()) + ']'
+            if o['record']:
+                self.stdout.write(f'  ✓ {line}')
+                continue
+            ref = expected.get(case)
+            if ref is None:
+                regressions.append((case, 'CASO NOVO (sem baseline) — rode --bench --record'))
+                self.stdout.write(self.style.ERROR(f'  ? {line} (sem baseline)'))
+                continue
+            worse = [f'{m} {ref[m]:.1f}->{stats[m]:.1f}' for m in BENCH_SLACK
+                     if m in ref and stats[m] > max(ref[m] * (1 + o['threshold']),
+                                                    ref[m] + BENCH_SLACK[m])]
+            if worse:
+                regressions.append((case, ', '.join(worse)))
+                self.stdout.write(self.style.ERROR(f'  ✗ {line} — REGREDIU: {", ".join(worse)}'))
+            else:
+                self.stdout.write(f'  = {line}')
+
+        if o['record']:
+            baseline[engine] = {**expected, **results} if o['only'] else results
+            baseline.setdefault('_meta', {})[engine] = {
+                'repeat': o['repeat'], 'python': platform.python_version(),
+                'pillow': PIL.__version__, 'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+            }
+            with open(BENCH_BASELINE, 'w') as f:
+                json.dump(baseline, f, indent=1, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'OK: baseline de {len(results)} casos gravado; {BENCH_BASELINE}'))
+            if regressions:
+                raise SystemExit(1)
+            return
+        if regressions:
+            self.stdout.write(self.style.ERROR(
+                f'FALHOU: {len(regressions)}/{total} casos regrediram '
+                f'(limite +{o["threshold"]:.0%}).'))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS(
+            f'OK: {total}/{total} casos dentro de +{o["threshold"]:.0%} do baseline.'))
+
     def _write_diff(self, ref_path, actual_png, case):
         """Imagem de diff (pixels divergentes em magenta) para inspecao rapida."""
         try:
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_alter_post_pipeline_used_thermomix'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='posts_post_organiz_dcba75_idx'),
+        ),
+    ]
@@ -392,6 +392,8 @@ class Post(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
+            # listagem por org com cursor (-created_at, -id) — views._posts_page
+            models.Index(fields=['organization', '-created_at', '-id']),
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['area', '-created_at']),
             models.Index(fields=['status']),
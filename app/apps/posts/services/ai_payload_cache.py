@@ -0,0 +1,113 @@
+"""
+Cache enderecado por conteudo dos payloads de imagem PRONTOS PARA A IA
+(baixados, normalizados, recomprimidos).
+
+O mesmo logo/referencia da KB era baixado e recomprimido (shrink_for_ai /
+_shrink_for_claude) a cada post, chamada do orquestrador, transcricao e
+revisao — o logo principal de uma marca, centenas de vezes por dia.
+
+  cached_payload(url, profile, produce, s3_key=None) -> (b64|None, mime)
+  cached(profile)                       -> decorator p/ fn(url) -> (b64, mime)
+
+Chave: objeto S3 (da URL presigned) + ETag (HEAD no S3) + `profile` — o
+normalizador e o teto (ex.: 'claude:9000000', 'gemini:4500000'). Trocou o
+arquivo -> ETag novo -> entrada nova; a antiga sai pelo LRU.
+
+Camada: DISCO local do container (AI_PAYLOAD_CACHE_DIR, default
+/tmp/iamkt-ai-payloads), limitado a AI_PAYLOAD_CACHE_MB (default 512) com
+descarte LRU (mtime = ultimo uso; disk_lru). Nao vai para o Redis: ele e o
+broker do Celery com 128MB/allkeys-lru — payloads de MB despejariam a fila.
+
+Guarda os BYTES normalizados + mime (o base64 e refeito na leitura). URL fora
+do bucket, HEAD falhando ou download falho -> segue sem cache (nada quebra).
+"""
+import base64
+import functools
+import hashlib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get('AI_PAYLOAD_CACHE_DIR', '/tmp/iamkt-ai-payloads')
+MAX_BYTES = int(float(os.environ.get('AI_PAYLOAD_CACHE_MB', 512)) * 1024 * 1024)
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bypass': 0}
+
+
+def _etag(s3_key):
+    from django.conf import settings
+    from apps.core.services.s3_service import S3Service
+    head = S3Service._get_s3_client().head_object(
+        Bucket=settings.AWS_BUCKET_NAME, Key=s3_key,
+    )
+    return (head.get('ETag') or '').strip('"')
+
+
+def _path(s3_key, etag, profile):
+    digest = hashlib.sha256(f'{s3_key}\0{etag}\0{profile}'.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, digest[:2], digest)
+
+
+def _read(path):
+    from apps.posts.services import disk_lru
+    raw = disk_lru.read(path)
+    if raw is None:
+        return None
+    mime, _, data = raw.partition(b'\n')
+    return base64.b64encode(data).decode('ascii'), mime.decode('ascii')
+
+
+def _write(path, data, mime):
+    from apps.posts.services import disk_lru
+    disk_lru.write(CACHE_DIR, path, mime.encode('ascii') + b'\n' + data, MAX_BYTES)
+
+
+def cached_payload(url, profile, produce, s3_key=None):
+    """(b64, mime) do cache; senao `produce()` e grava. Excecoes de produce()
+    sobem intactas; resultado sem b64 (download falho) nao e cacheado.
+    `s3_key` dispensa a URL (leitura direta pelo boto3)."""
+    from apps.core.services.s3_service import S3Service
+    key = s3_key or S3Service.key_from_url(url)
+    etag = None
+    if key:
+        try:
+            etag = _etag(key)
+        except Exception as exc:
+            logger.info('[ai_payload_cache] HEAD falhou (%s): %s', key[:80], exc)
+    if not etag:
+        with _lock:
+            _stats['bypass'] += 1
+        return produce()
+
+    path = _path(key, etag, profile)
+    hit = _read(path)
+    if hit is not None:
+        with _lock:
+            _stats['hits'] += 1
+        return hit
+    with _lock:
+        _stats['misses'] += 1
+
+    b64, mime = produce()
+    if b64:
+        _write(path, base64.b64decode(b64), mime)
+    return b64, mime
+
+
+def cached(profile):
+    """Decorator para downloaders fn(url) -> (b64, mime)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(url):
+            return cached_payload(url, profile, lambda: fn(url))
+        wrapper.uncached = fn
+        return wrapper
+    return deco
+
+
+def cache_stats():
+    with _lock:
+        return dict(_stats)
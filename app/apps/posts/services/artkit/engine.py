@@ -14,24 +14,109 @@ Pipeline de desenho (ordem fixa):
 Retorna {'raw_png','final_png','elements','fonts_resolved'} — elements no
 formato CANONICO do editor (Ponto 5).
 
+Dentro de `with phase_timings() as t:` o render_v3 acumula em t os segundos
+por fase (background, image_zones, text_fit, effects, png_encode) — usado
+pelo `golden_archetypes --bench`; fora dele o cronometro e no-op.
+
 ctx exigido:
   font    callable(font_key, size_px) -> PIL.ImageFont
   assets  dict (background_image, product_hero, brand_lockup, ...)
   tokens  dict token->hex adicional (spec['tokens'] tem precedencia)
 """
+import functools
 import io
 import logging
-
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
 from PIL import Image, ImageDraw
 
 from .image import cover as _cover, contain as _contain
-from .text import wrap_greedy
+from .fit import fit_block, fit_shrink, largest_fit, text_length, wrap_cached
+from .fonts import get_font
 from .spec3 import unit_helpers
 
 logger = logging.getLogger(__name__)
 
 _EDITOR_ROLE = {'title': 'titulo', 'titulo': 'titulo'}
 
+# Primitivas de desenho (degrades, mascaras) memoizadas por parametro: o
+# mesmo fundo samsung/degrade se repete em todo post e export do editor.
+# Limite em bytes de pixels: ARTKIT_PRIMITIVE_CACHE_MB (env; default 64).
+_PRIMITIVE_MAX_BYTES = int(float(os.environ.get('ARTKIT_PRIMITIVE_CACHE_MB', 64)) * 1024 * 1024)
+_primitive_lock = threading.Lock()
+_primitives = OrderedDict()
+_primitive_bytes = 0
+
+
+def _memo_image(fn):
+    """Memoiza fn(*args hashaveis) -> PIL.Image (LRU por bytes). Devolve
+    COPIA: o caller desenha/compoe em cima sem sujar o cache."""
+    @functools.wraps(fn)
+    def wrapper(*args):
+        global _primitive_bytes
+        key = (fn.__name__,) + args
+        with _primitive_lock:
+            img = _primitives.get(key)
+            if img is not None:
+                _primitives.move_to_end(key)
+                return img.copy()
+        img = fn(*args)
+        size = img.width * img.height * len(img.getbands())
+        with _primitive_lock:
+            if key not in _primitives and size <= _PRIMITIVE_MAX_BYTES:
+                _primitives[key] = img
+                _primitive_bytes += size
+                while _primitive_bytes > _PRIMITIVE_MAX_BYTES:
+                    _, old = _primitives.popitem(last=False)
+                    _primitive_bytes -= old.width * old.height * len(old.getbands())
+        return img.copy()
+    return wrapper
+
+
+def primitive_cache_clear():
+    global _primitive_bytes
+    with _primitive_lock:
+        _primitives.clear()
+        _primitive_bytes = 0
+
+
+_phase_local = threading.local()
+
+
+@contextmanager
+def phase_timings():
+    """Acumula (por thread) os segundos de cada fase dos render_v3 do bloco."""
+    sink, prev = {}, getattr(_phase_local, 'sink', None)
+    _phase_local.sink = sink
+    try:
+        yield sink
+    finally:
+        _phase_local.sink = prev
+
+
+def _lap(phase, t0):
+    """Fecha a fase iniciada em t0 (perf_counter) e devolve o novo marco."""
+    now = time.perf_counter()
+    sink = getattr(_phase_local, 'sink', None)
+    if sink is not None:
+        sink[phase] = sink.get(phase, 0.0) + (now - t0)
+    return now
+
+
+def _hypot_grid(w, h, cx, cy):
+    """Distancias (h, w) de cada pixel ate (cx, cy). math.hypot via map (laco
+    em C): np.hypot difere no ultimo ulp e mudaria pixels dos goldens."""
+    xs = [xx - cx for xx in range(w)]
+    ys = [yy - cy for yy in range(h) for _ in range(w)]
+    return np.fromiter(map(math.hypot, xs * h, ys), dtype=np.float64,
+                       count=w * h).reshape(h, w)
+
 
 def _apply_case(text, case):
     if case == 'upper':
@@ -50,49 +135,16 @@ def _draw_line(draw, xy, line, font, fill, tracking=0.0):
         x += draw.textlength(ch, font=font) + extra
 
 
-def _fit_shrink(text, font_loader, font_key, box_w, box_h, max_lines,
-                start_px, leading, draw, step=1, min_px=12):
-    """Maior fonte que faz o texto caber (semantica samsung: tolerancia +1px).
-    NUNCA descarta texto: se nem min_px couber, devolve completo (best_effort)."""
-    size = int(start_px)
-    while size >= min_px:
-        font = font_loader(font_key, size)
-        lines = wrap_greedy(text, font, box_w, draw)
-        if len(lines) <= max_lines and len(lines) * size * leading <= box_h + 1:
-            return font, size, lines, True
-        size -= step
-    font = font_loader(font_key, min_px)
-    return font, min_px, wrap_greedy(text, font, box_w, draw), False
-
-
-def _fit_block(text, font_path, max_w, max_h, max_lines, start_px, draw,
-               min_px=14, leading=1.16, step=2):
-    """Maior corpo cujo BLOCO (linhas empilhadas com leading) cabe na caixa
-    (semantica todxs, fit_measure='block': mede altura TOTAL int() e checa a
-    largura real de cada linha). Fallback = ultimo tamanho tentado (>= min_px):
-    NUNCA descarta texto."""
-    from PIL import ImageFont
-    size = max(min_px, int(start_px))
-    best = None
-    while size >= min_px:
-        try:
-            font = ImageFont.truetype(font_path, size)
-        except Exception:
-            return None, [str(text)], size, int(size * leading)
-        lines = wrap_greedy(text, font, max_w, draw)
-        total_h = int(size * leading * len(lines))
-        fits_w = all(draw.textlength(ln, font=font) <= max_w for ln in lines)
-        if len(lines) <= max_lines and total_h <= max_h and fits_w:
-            return font, lines, size, total_h
-        best = (font, lines, size, total_h)
-        size -= step
-    return best if best else (None, [str(text)], min_px, int(min_px * leading))
-
-
 def _rounded(img, radius, corners):
     if not radius or not corners:
         return img
-    w, h = img.size
+    out = img.copy()
+    out.putalpha(_corner_mask(img.width, img.height, radius, tuple(corners)))
+    return out
+
+
+@_memo_image
+def _corner_mask(w, h, radius, corners):
     mask = Image.new('L', (w, h), 255)
     md = ImageDraw.Draw(mask)
     r = radius
@@ -109,42 +161,40 @@ def _rounded(img, radius, corners):
         x, y = spots[c]
         md.rectangle([x, y, x + r, y + r], fill=0)
         md.pieslice(bboxes[c], arcs[c][0], arcs[c][1], fill=255)
-    out = img.copy()
-    out.putalpha(mask)
-    return out
+    return mask
 
 
 def _gradient_bg(W, H, bg, color):
     """Gradiente radial (origem samsung): claro em (cx,cy) -> escuro nos cantos."""
-    import math
     from .image import hex_to_rgb
     light = hex_to_rgb(color(bg.get('light', '#33445C')))
     dark = hex_to_rgb(color(bg.get('dark', '#0A1420')))
-    cx, cy = bg.get('cx', 0.6), bg.get('cy', 0.32)
+    return _radial_gradient(W, H, light, dark, bg.get('cx', 0.6), bg.get('cy', 0.32))
+
+
+@_memo_image
+def _radial_gradient(W, H, light, dark, cx, cy):
     lw, lh = 96, 120
-    g = Image.new('RGB', (lw, lh))
-    px = g.load()
     ccx, ccy = cx * lw, cy * lh
     maxd = max(math.hypot(ccx, ccy), math.hypot(ccx - lw, ccy),
                math.hypot(ccx, ccy - lh), math.hypot(ccx - lw, ccy - lh))
-    for yy in range(lh):
-        for xx in range(lw):
-            t = min(1.0, math.hypot(xx - ccx, yy - ccy) / maxd)
-            px[xx, yy] = tuple(int(light[i] + (dark[i] - light[i]) * t) for i in range(3))
-    return g.resize((W, H), Image.BICUBIC)
+    t = np.minimum(1.0, _hypot_grid(lw, lh, ccx, ccy) / maxd)
+    px = np.empty((lh, lw, 3), dtype=np.uint8)
+    for i in range(3):   # int() trunca: valores sempre entre light e dark (>= 0)
+        px[..., i] = light[i] + (dark[i] - light[i]) * t
+    return Image.fromarray(px, 'RGB').resize((W, H), Image.BICUBIC)
 
 
 def _fetch(src):
     import base64
-    import urllib.request
     if isinstance(src, (bytes, bytearray)):
         data = bytes(src)
     elif isinstance(src, str) and src.startswith('data:'):
         data = base64.b64decode(src.partition(',')[2])
     else:
-        req = urllib.request.Request(src, headers={'User-Agent': 'Mozilla/5.0 IAMKT'})
-        with urllib.request.urlopen(req, timeout=30) as r:
-            data = r.read()
+        # URL do nosso bucket (presigned dos assets): le direto pelo boto3
+        from apps.core.services.s3_service import S3Service
+        data = S3Service.read_url_bytes(src)
     try:
         return Image.open(io.BytesIO(data)).convert('RGBA')
     except Exception:
@@ -183,7 +233,7 @@ def _zone_pct(z):
 
 def layout_element_zones(zones, content, ctx, W, H):
     """Resolve as zonas layer='elements' em elementos explicitos (sem desenhar)."""
-    from PIL import Image as _Img, ImageDraw as _IDraw, ImageFont
+    from PIL import Image as _Img, ImageDraw as _IDraw
     draw0 = _IDraw.Draw(_Img.new('RGB', (8, 8)))
     basis = min(W, H)
     font_paths = ctx.get('font_paths') or {}
@@ -334,16 +384,16 @@ def layout_element_zones(zones, content, ctx, W, H):
             start_px = (z.get('fs') or 0.037) * basis   # fs ja normalizado
             if z.get('fit') == 'fixed':
                 try:
-                    font = ImageFont.truetype(fpath, max(8, int(start_px)))
+                    font = get_font(fpath, max(8, int(start_px)))
                 except Exception:
                     font = None
-                lines = (wrap_greedy(text, font, max_w_px, draw0)[:max_lines]
+                lines = (wrap_cached(text, font, max_w_px, draw0)[:max_lines]
                          if font else [text])
                 size_px = int(start_px)
                 total_h_px = int(size_px * leading * len(lines))
             else:
                 min_px = int(round((z.get('min_fs') or (14.0 / basis)) * basis))
-                font, lines, size_px, total_h_px = _fit_block(
+                font, lines, size_px, total_h_px = fit_block(
                     text, fpath, max_w_px, max_h_px, max_lines, start_px, draw0,
                     min_px=min_px, leading=leading, step=int(z.get('fit_step', 2)))
             total_h_pct = total_h_px / H * 100.0
@@ -381,12 +431,11 @@ def _span_fonts(el, size):
     """(font_regular, font_bold) do elemento no corpo pedido."""
     from PIL import ImageFont
     try:
-        reg = ImageFont.truetype(el.get('_font_path'), size)
+        reg = get_font(el.get('_font_path'), size)
     except Exception:
         reg = ImageFont.load_default()
     try:
-        bold = ImageFont.truetype(el.get('_font_path_bold') or el.get('_font_path'),
-                                  size)
+        bold = get_font(el.get('_font_path_bold') or el.get('_font_path'), size)
     except Exception:
         bold = reg
     return reg, bold
@@ -432,7 +481,7 @@ def _draw_element_text(base, draw, el, W, H):
         _draw_spans_line(draw, el, spans, x, y, bw, size, align)
         return
     try:
-        font = ImageFont.truetype(el.get('_font_path'), size)
+        font = get_font(el.get('_font_path'), size)
     except Exception:
         font = ImageFont.load_default()
     fill = hex_to_rgb(el.get('color') or '#000000')
@@ -456,7 +505,6 @@ def _grad_fill_stops(w, h, grad):
     tipo 'linear' (angulo em graus, convencao CSS: 0=para cima, 90=direita)
     ou 'radial' (centro->borda); `escala` (10-100%) comprime a rampa — o resto
     satura na ultima parada. Calculado em resolucao reduzida + resize BICUBIC."""
-    import math
     from .image import hex_to_rgb
     raw = sorted((dict(s) for s in (grad.get('stops') or [])),
                  key=lambda s: float(s.get('pos', 0) or 0))
@@ -470,38 +518,40 @@ def _grad_fill_stops(w, h, grad):
     escala = max(0.05, min(1.0, float(grad.get('escala', 100) or 100) / 100.0))
     tipo = grad.get('tipo', 'linear')
     ang = math.radians(float(grad.get('angulo', 90) or 90))
+    return _stops_gradient(w, h, tuple(pts), escala, tipo, ang)
+
+
+@_memo_image
+def _stops_gradient(w, h, pts, escala, tipo, ang):
     lw, lh = max(2, min(w, 160)), max(2, min(h, 160))
-    img = Image.new('RGBA', (lw, lh))
-    px = img.load()
     if tipo == 'radial':
         cx, cy = lw / 2.0, lh / 2.0
         maxd = math.hypot(cx, cy) or 1.0
+        t = _hypot_grid(lw, lh, cx, cy) / maxd
     else:
         dx, dy = math.sin(ang), -math.cos(ang)
         projs = [xx * dx + yy * dy for xx in (0, lw - 1) for yy in (0, lh - 1)]
         pmin = min(projs)
         span = (max(projs) - pmin) or 1.0
-
-    def col(t):
-        t = max(0.0, min(1.0, t / escala))
-        if t <= pts[0][0]:
-            return pts[0][1]
-        if t >= pts[-1][0]:
-            return pts[-1][1]
-        for (p0, c0), (p1, c1) in zip(pts, pts[1:]):
-            if t <= p1:
-                f = 0.0 if p1 == p0 else (t - p0) / (p1 - p0)
-                return tuple(int(round(c0[i] + (c1[i] - c0[i]) * f)) for i in range(4))
-        return pts[-1][1]
-
-    for yy in range(lh):
-        for xx in range(lw):
-            if tipo == 'radial':
-                t = math.hypot(xx - cx, yy - cy) / maxd
-            else:
-                t = ((xx * dx + yy * dy) - pmin) / span
-            px[xx, yy] = col(t)
-    return img.resize((w, h), Image.BICUBIC)
+        proj = np.arange(lw, dtype=np.float64) * dx + np.arange(lh, dtype=np.float64)[:, None] * dy
+        t = (proj - pmin) / span
+    t = np.clip(t / escala, 0.0, 1.0)
+
+    # Mesma precedencia do degrade por pixel: abaixo da 1a parada -> 1a cor;
+    # acima da ultima -> ultima; no meio, o 1o segmento com t <= p1
+    px = np.empty((lh, lw, 4), dtype=np.uint8)
+    px[...] = pts[-1][1]
+    todo = (t > pts[0][0]) & (t < pts[-1][0])
+    for (p0, c0), (p1, c1) in zip(pts, pts[1:]):
+        seg = todo & (t <= p1)
+        if not seg.any():
+            continue
+        f = np.zeros_like(t[seg]) if p1 == p0 else (t[seg] - p0) / (p1 - p0)
+        for i in range(4):   # round() do Python = np.rint (meio -> par)
+            px[..., i][seg] = np.rint(c0[i] + (c1[i] - c0[i]) * f)
+        todo &= ~seg
+    px[t <= pts[0][0]] = pts[0][1]
+    return Image.fromarray(px, 'RGBA').resize((w, h), Image.BICUBIC)
 
 
 def _apply_text_shadow(base, shadow, paint):
@@ -523,31 +573,18 @@ def _apply_text_shadow(base, shadow, paint):
     base.alpha_composite(layer)
 
 
+@_memo_image
 def _grad_mask(w, h, tipo, direcao):
     """Mascara L (0->255) do degrade: linear H/V ou radial (centro->borda)."""
     if tipo == 'radial':
-        import math
         side = 64
-        g = Image.new('L', (side, side))
-        px = g.load()
         cx = cy = side / 2.0
         maxd = math.hypot(cx, cy)
-        for yy in range(side):
-            for xx in range(side):
-                px[xx, yy] = int(255 * min(1.0, math.hypot(xx - cx, yy - cy) / maxd))
-        return g.resize((w, h), Image.BICUBIC)
-    n = 256
-    if direcao == 'vertical':
-        g = Image.new('L', (1, n))
-        px = g.load()
-        for i in range(n):
-            px[0, i] = int(255 * i / (n - 1))
-    else:
-        g = Image.new('L', (n, 1))
-        px = g.load()
-        for i in range(n):
-            px[i, 0] = int(255 * i / (n - 1))
-    return g.resize((w, h), Image.BILINEAR)
+        ramp = 255 * np.minimum(1.0, _hypot_grid(side, side, cx, cy) / maxd)
+        return Image.fromarray(ramp.astype(np.uint8), 'L').resize((w, h), Image.BICUBIC)
+    ramp = np.arange(256, dtype=np.uint8)   # int(255 * i / 255) == i
+    shape = (256, 1) if direcao == 'vertical' else (1, 256)
+    return Image.fromarray(ramp.reshape(shape), 'L').resize((w, h), Image.BILINEAR)
 
 
 def _draw_element_grafismo(base, draw, el, W, H):
@@ -723,6 +760,7 @@ def render_v3(spec, *, content, ctx):
                 int(round(fw * W)), int(round(fh * H)))
 
     # ---- 1. background ----
+    mark = time.perf_counter()
     bg = spec.get('background') or {'type': 'solid', 'color': 'black'}
     if assets.get('background_image'):
         try:
@@ -735,9 +773,11 @@ def render_v3(spec, *, content, ctx):
     else:
         base = Image.new('RGB', (W, H), color(bg.get('color', 'black')))
     draw = ImageDraw.Draw(base)
+    mark = _lap('background', mark)
 
     # ---- 2. effects bg (ex.: scrim sobre a foto) ----
     base, draw = run_effects('bg', base, draw)
+    mark = _lap('effects', mark)
 
     # ---- 3. zonas de imagem (layer 'raw'; as de layer 'elements' vem depois) ----
     for z in spec['zones']:
@@ -792,9 +832,12 @@ def render_v3(spec, *, content, ctx):
                                    corners=corners, outline=color(bd.get('color', '#444')),
                                    width=width)
 
+    mark = _lap('image_zones', mark)
+
     # ---- 4. effects raw (ex.: guide_line) ----
     base, draw = run_effects('raw', base, draw)
     raw = base.copy()
+    mark = _lap('effects', mark)
 
     elements, fonts_resolved = [], {}
     font_loader = ctx['font']
@@ -876,15 +919,19 @@ def render_v3(spec, *, content, ctx):
         if spans and ''.join(s.get('t', '') for s in spans) == text:
             min_px = max(6, int(round((z.get('min_fs') or (12 / basis)) * basis)))
             bold_key = z.get('font_bold') or z['font']
-            size = start_px
-            while size > min_px:      # shrink pelo comprimento TOTAL dos runs
-                reg, bold = font_loader(z['font'], size), font_loader(bold_key, size)
-                total = sum(draw.textlength(
-                    s['t'], font=bold if int(s.get('weight', 400)) >= 700 else reg)
+            step = max(1, int(z.get('fit_step', 1)))
+
+            def _runs_fit(sz):   # shrink pelo comprimento TOTAL dos runs
+                reg, bold = font_loader(z['font'], sz), font_loader(bold_key, sz)
+                total = sum(text_length(
+                    draw, s['t'], bold if int(s.get('weight', 400)) >= 700 else reg)
                     for s in spans)
-                if total <= w:
-                    break
-                size -= int(z.get('fit_step', 1))
+                return total <= w, None
+            # grade historica: so tamanhos > min_px sao medidos; sem nenhum
+            # cabendo, fica o primeiro passo <= min_px
+            size, _, fitted = largest_fit(start_px, min_px + 1, step, _runs_fit)
+            if not fitted:
+                size = start_px if size is None else size - step
             reg, bold = font_loader(z['font'], size), font_loader(bold_key, size)
             lx = x
             hex_spans = [dict(s, color=color(s.get('color'))) for s in spans]
@@ -914,11 +961,11 @@ def render_v3(spec, *, content, ctx):
         fit_mode = z.get('fit', 'shrink')
         if fit_mode == 'fixed':
             font = font_loader(z['font'], start_px)
-            lines = wrap_greedy(text, font, w, draw)[: z.get('max_lines', 99)]
+            lines = wrap_cached(text, font, w, draw)[: z.get('max_lines', 99)]
             size, fitted = start_px, True
         else:
             min_px = max(6, int(round((z.get('min_fs') or (12 / basis)) * basis)))
-            font, size, lines, fitted = _fit_shrink(
+            font, size, lines, fitted = fit_shrink(
                 text, font_loader, z['font'], w, h, z.get('max_lines', 1),
                 start_px, leading, draw, step=int(z.get('fit_step', 1)),
                 min_px=min_px)
@@ -959,8 +1006,11 @@ def render_v3(spec, *, content, ctx):
             **({'shadow': shadow} if shadow else {}),
         })
 
+    mark = _lap('text_fit', mark)
+
     # ---- 7. effects final ----
     base, draw = run_effects('final', base, draw)
+    mark = _lap('effects', mark)
 
     def _png(im):
         b = io.BytesIO()
@@ -969,5 +1019,7 @@ def render_v3(spec, *, content, ctx):
 
     # final SEMPRE RGB (semantica historica dos 3 pipelines; no-op se ja RGB)
     final = base if base.mode == 'RGB' else base.convert('RGB')
-    return {'raw_png': _png(raw), 'final_png': _png(final),
+    raw_png, final_png = _png(raw), _png(final)
+    _lap('png_encode', mark)
+    return {'raw_png': raw_png, 'final_png': final_png,
             'elements': elements, 'fonts_resolved': fonts_resolved}
@@ -0,0 +1,182 @@
+"""
+Fit de texto por BISSECAO sobre o corpo da fonte (engine v3 + dialetos).
+
+Os fitters historicos descem 1-2px por vez e, a cada passo, re-quebram o texto
+inteiro e re-medem cada linha — um titulo longo num canvas 1350px chega a
+100+ wraps por zona. Aqui:
+
+  largest_fit(start, min_px, step, attempt)
+      maior tamanho da GRADE start, start-step, ... >= min_px em que
+      attempt(size) -> (ok, resultado) passa, em O(log n) tentativas.
+  wrap_cached(text, font, max_w, draw)
+      wrap_greedy memoizado por (fonte, tamanho, modo do draw, texto, largura).
+  text_length(draw, text, font)
+      draw.textlength memoizado (palavras/linhas por fonte+tamanho).
+  fit_shrink / fit_block
+      mesmas semanticas de _fit_shrink (samsung) e _fit_block (todxs).
+
+FIDELIDADE (regra 1 do artkit): o resultado e o MESMO tamanho que a descida
+linear escolheria. Vale porque "cabe" e monotono no corpo — larguras crescem
+com o tamanho, logo a quebra gulosa nunca tem MENOS linhas numa fonte maior
+(e altura = linhas * corpo * leading). O topo da grade e testado primeiro
+(caso comum: o texto ja cabe no corpo pedido = 1 wrap, como antes).
+Conferido com `golden_archetypes --check` (legado e --engine v3).
+"""
+import threading
+from collections import OrderedDict
+
+from .fonts import get_font
+from .text import wrap_greedy
+
+_WRAP_MAX = 4096
+_WIDTH_MAX = 32768
+
+_lock = threading.Lock()
+_wraps = OrderedDict()
+_widths = OrderedDict()
+
+
+def _font_key(font, draw):
+    """Chave estavel da fonte (FreeTypeFont do registro). None = nao cacheia
+    (ex.: ImageFont.load_default())."""
+    path = getattr(font, 'path', None)
+    if not isinstance(path, str):
+        return None
+    return (path, font.size, getattr(font, 'index', 0),
+            getattr(font, 'layout_engine', None), getattr(draw, 'fontmode', None))
+
+
+def _lru_get(store, key):
+    with _lock:
+        if key in store:
+            store.move_to_end(key)
+            return True, store[key]
+    return False, None
+
+
+def _lru_put(store, key, value, maxsize):
+    with _lock:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > maxsize:
+            store.popitem(last=False)
+
+
+def text_length(draw, text, font):
+    """draw.textlength(text, font=font) memoizado."""
+    fk = _font_key(font, draw)
+    if fk is None:
+        return draw.textlength(text, font=font)
+    key = (fk, text)
+    hit, val = _lru_get(_widths, key)
+    if hit:
+        return val
+    val = draw.textlength(text, font=font)
+    _lru_put(_widths, key, val, _WIDTH_MAX)
+    return val
+
+
+class _MeasuringDraw:
+    """Proxy do ImageDraw que responde textlength pelo cache (o wrap
+    historico chama draw.textlength diretamente)."""
+
+    def __init__(self, draw):
+        self._draw = draw
+        self.fontmode = getattr(draw, 'fontmode', None)
+
+    def textlength(self, text, font=None, **kw):
+        if kw:
+            return self._draw.textlength(text, font=font, **kw)
+        return text_length(self._draw, text, font)
+
+
+def wrap_cached(text, font, max_w, draw, wrap=wrap_greedy):
+    """wrap(text, font, max_w, draw) memoizado; devolve uma lista NOVA
+    (callers fatiam/alteram). `wrap` = quebra do dialeto (ex.: samsung._wrap,
+    que devolve [] para texto vazio)."""
+    fk = _font_key(font, draw)
+    if fk is None:
+        return wrap(text, font, max_w, draw)
+    key = (fk, wrap.__module__, wrap.__qualname__, str(text), max_w)
+    hit, val = _lru_get(_wraps, key)
+    if hit:
+        return list(val)
+    lines = wrap(text, font, max_w, _MeasuringDraw(draw))
+    _lru_put(_wraps, key, tuple(lines), _WRAP_MAX)
+    return list(lines)
+
+
+def largest_fit(start, min_px, step, attempt):
+    """Bissecao na grade start, start-step, ... (>= min_px).
+
+    attempt(size) -> (ok, resultado). Retorna (size, resultado, True) do MAIOR
+    tamanho que passa; se nenhum passa, (menor_size_da_grade, resultado dele,
+    False) — o "ultimo tentado" da descida linear. Grade vazia (start <
+    min_px) -> (None, None, False)."""
+    step = max(1, int(step))
+    start, min_px = int(start), int(min_px)
+    if start < min_px:
+        return None, None, False
+    n = (start - min_px) // step + 1
+    tried = {}
+
+    def ok(i):
+        if i not in tried:
+            tried[i] = attempt(start - i * step)
+        return tried[i][0]
+
+    if ok(0):
+        return start, tried[0][1], True
+    last = n - 1
+    if not ok(last):
+        return start - last * step, tried[last][1], False
+    lo, hi = 1, last   # ok(lo - 1) falso, ok(hi) verdadeiro
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ok(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return start - hi * step, tried[hi][1], True
+
+
+def fit_shrink(text, font_loader, font_key, box_w, box_h, max_lines,
+               start_px, leading, draw, step=1, min_px=12):
+    """Maior fonte que faz o texto caber (semantica samsung: tolerancia +1px).
+    NUNCA descarta texto: se nem min_px couber, devolve completo (best_effort).
+    -> (font, size, lines, fitted)"""
+    def attempt(size):
+        font = font_loader(font_key, size)
+        lines = wrap_cached(text, font, box_w, draw)
+        ok = len(lines) <= max_lines and len(lines) * size * leading <= box_h + 1
+        return ok, (font, lines)
+
+    size, res, fitted = largest_fit(int(start_px), min_px, step, attempt)
+    if fitted:
+        return res[0], size, res[1], True
+    font = font_loader(font_key, min_px)
+    return font, min_px, wrap_cached(text, font, box_w, draw), False
+
+
+def fit_block(text, font_path, max_w, max_h, max_lines, start_px, draw,
+              min_px=14, leading=1.16, step=2):
+    """Maior corpo cujo BLOCO (linhas empilhadas com leading) cabe na caixa
+    (semantica todxs, fit_measure='block': mede altura TOTAL int() e checa a
+    largura real de cada linha). Fallback = ultimo tamanho tentado (>= min_px):
+    NUNCA descarta texto. -> (font, lines, size, total_h)"""
+    start = max(min_px, int(start_px))
+    try:
+        get_font(font_path, start)
+    except Exception:
+        return None, [str(text)], start, int(start * leading)
+
+    def attempt(size):
+        font = get_font(font_path, size)
+        lines = wrap_cached(text, font, max_w, draw)
+        total_h = int(size * leading * len(lines))
+        fits_w = all(text_length(draw, ln, font) <= max_w for ln in lines)
+        ok = len(lines) <= max_lines and total_h <= max_h and fits_w
+        return ok, (font, lines, size, total_h)
+
+    _size, res, _fitted = largest_fit(start, min_px, step, attempt)
+    return res
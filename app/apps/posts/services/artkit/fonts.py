@@ -0,0 +1,62 @@
+"""
+Registro de fontes do processo — cache LRU limitado de PIL.ImageFont.
+
+Todo loop de fit (engine v3, overlay do Gemini, layout_engine, transcribe,
+loaders por org) pede a MESMA TTF em dezenas de tamanhos por render; sem
+cache, cada ImageFont.truetype() re-parseia o arquivo. Aqui a fonte e
+carregada uma vez por (caminho resolvido, tamanho, layout_engine) e
+reaproveitada entre renders do mesmo worker.
+
+  get_font(path, size)   -> FreeTypeFont (mesmas excecoes do truetype)
+  cache_stats()          -> {'hits','misses','size','maxsize'}
+  cache_clear()
+
+Limite: ARTKIT_FONT_CACHE_SIZE (env; default 256 entradas). Cheio, descarta a
+menos usada — memoria do worker fica plana. Falha de carga NUNCA e cacheada
+(o caller mantem o fallback DejaVu de sempre).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import ImageFont
+
+_MAXSIZE = max(1, int(os.environ.get('ARTKIT_FONT_CACHE_SIZE', 256)))
+
+_lock = threading.Lock()
+_fonts = OrderedDict()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_font(path, size, layout_engine=None):
+    """ImageFont.truetype(path, size) memoizado. `path` nao-str (bytes/stream)
+    passa direto, sem cache (nao ha chave estavel)."""
+    size = int(size)
+    if not isinstance(path, (str, os.PathLike)):
+        return ImageFont.truetype(path, size, layout_engine=layout_engine)
+    key = (os.path.realpath(path), size, layout_engine)
+    with _lock:
+        font = _fonts.get(key)
+        if font is not None:
+            _fonts.move_to_end(key)
+            _stats['hits'] += 1
+            return font
+        _stats['misses'] += 1
+    font = ImageFont.truetype(key[0], size, layout_engine=layout_engine)
+    with _lock:
+        _fonts[key] = font
+        _fonts.move_to_end(key)
+        while len(_fonts) > _MAXSIZE:
+            _fonts.popitem(last=False)
+    return font
+
+
+def cache_stats():
+    with _lock:
+        return {**_stats, 'size': len(_fonts), 'maxsize': _MAXSIZE}
+
+
+def cache_clear():
+    with _lock:
+        _fonts.clear()
+        _stats['hits'] = _stats['misses'] = 0
@@ -9,8 +9,6 @@ modifica-lo. Retorna a imagem + um debug sanitizado (sem base64) para trace.
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 from decimal import Decimal
 
 from ..gemini_image_generator import _resolved_endpoint, _extract_image_from_response
@@ -60,19 +58,15 @@ def generate_singleshot(*, prompt_text: str, image_inputs: list, temperature: fl
         'generationConfig': payload['generationConfig'],
     }
 
-    body = json.dumps(payload).encode('utf-8')
-    req = urllib.request.Request(
-        endpoint, data=body, method='POST',
+    from apps.core.services import http_client
+    resp = http_client.post(
+        endpoint, data=json.dumps(payload).encode('utf-8'), timeout=timeout,
         headers={'Content-Type': 'application/json', 'X-Goog-Api-Key': api_key},
     )
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
-    except urllib.error.HTTPError as exc:
-        err_body = exc.read().decode('utf-8', errors='ignore')
-        raise RuntimeError(f'Gemini retornou HTTP {exc.code}: {err_body[:500]}')
+    if resp.status_code >= 400:
+        raise RuntimeError(f'Gemini retornou HTTP {resp.status_code}: {resp.text[:500]}')
 
-    response_json = json.loads(data.decode('utf-8'))
+    response_json = resp.json()
     png_bytes, mime_type = _extract_image_from_response(response_json)
     if not png_bytes:
         raise RuntimeError(
@@ -11,26 +11,24 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def _presigned(s3_key, s3_url=None):
+def _read(s3_key, s3_url=None):
+    """Bytes da foto: direto do S3 pela chave (sem presigned); sem chave ou
+    leitura falhou, baixa a URL salva."""
     if s3_key:
         try:
             from apps.core.services.s3_service import S3Service
-            return S3Service.generate_presigned_download_url(s3_key, expires_in=3600)
+            return S3Service.read_bytes(s3_key)
         except Exception:
-            pass
-    return s3_url or None
-
-
-def _download(url):
-    import urllib.request
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'})
-        with urllib.request.urlopen(req, timeout=60) as r:
-            return r.read()
-    except Exception:
-        logger.warning('[photo_source] download falhou: %s', (url or '')[:80],
-                       exc_info=True)
-        return None
+            logger.warning('[photo_source] leitura S3 falhou: %s', s3_key[:80],
+                           exc_info=True)
+    if s3_url:
+        try:
+            from apps.core.services import http_client
+            return http_client.fetch_bytes(s3_url, timeout=60)[0]
+        except Exception:
+            logger.warning('[photo_source] download falhou: %s', s3_url[:80],
+                           exc_info=True)
+    return None
 
 
 def has_user_photo(post) -> bool:
@@ -58,11 +56,9 @@ def resolve_user_photo(post, kb):
     except Exception:
         up = None
     if up:
-        url = _presigned(up.s3_key, up.s3_url)
-        if url:
-            data = _download(url)
-            if data:
-                return data, 'user_upload'
+        data = _read(up.s3_key, up.s3_url)
+        if data:
+            return data, 'user_upload'
 
     # 2) ref da KB selecionada
     ctx = post.local_pipeline_context or {}
@@ -75,10 +71,8 @@ def resolve_user_photo(post, kb):
         except Exception:
             ref = None
         if ref:
-            url = _presigned(ref.s3_key, getattr(ref, 's3_url', None))
-            if url:
-                data = _download(url)
-                if data:
-                    return data, f'kb_reference_{ref.id}'
+            data = _read(ref.s3_key, getattr(ref, 's3_url', None))
+            if data:
+                return data, f'kb_reference_{ref.id}'
 
     return None, None
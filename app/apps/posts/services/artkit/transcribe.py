@@ -14,7 +14,6 @@ so vira re-render Pillow quando o usuario EDITA e salva (ai ele ve o resultado).
 import base64
 import json
 import logging
-import urllib.request
 
 logger = logging.getLogger(__name__)
 
@@ -90,11 +89,18 @@ def _overlay_measure_grid(png_b64):
     return base64.b64encode(buf.getvalue()).decode('ascii')
 
 
-def _fetch_b64(url, max_bytes=4_500_000):
+def _read_b64(s3_key, max_bytes=4_500_000):
+    """Le o objeto direto do S3 (sem presigned) e compacta p/ a IA."""
+    from apps.posts.services.ai_payload_cache import cached_payload
+    return cached_payload(None, f'transcribe:{max_bytes}',
+                          lambda: _read_b64_uncached(s3_key, max_bytes),
+                          s3_key=s3_key)
+
+
+def _read_b64_uncached(s3_key, max_bytes):
+    from apps.core.services.s3_service import S3Service
     from apps.posts.services.artkit.image import shrink_for_ai
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'})
-    with urllib.request.urlopen(req, timeout=60) as r:
-        data = r.read()
+    data = S3Service.read_bytes(s3_key)
     mime = 'image/png'
     if data[:3] == b'\xff\xd8\xff':
         mime = 'image/jpeg'
@@ -104,14 +110,6 @@ def _fetch_b64(url, max_bytes=4_500_000):
     return base64.b64encode(data).decode('ascii'), mime
 
 
-def _presign(s3_key, fallback=''):
-    try:
-        from apps.core.services.s3_service import S3Service
-        return S3Service.generate_presigned_download_url(s3_key, expires_in=600)
-    except Exception:
-        return fallback
-
-
 def _solve_font_px(text, font_path, box_w_px, n_lines, estimate_px):
     """Resolve GEOMETRICAMENTE o corpo da fonte: maior tamanho cujo texto,
     quebrado por palavra na LARGURA MEDIDA do bloco, cabe em <= n_lines
@@ -123,7 +121,8 @@ def _solve_font_px(text, font_path, box_w_px, n_lines, estimate_px):
     fonte real da arte (caso higge/post 280: subtitulo 5.7% vs 3.2% reais).
     Fallback: estimativa do modelo."""
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        from PIL import Image, ImageDraw
+        from apps.posts.services.artkit.fonts import get_font
         from apps.posts.services.artkit.text import wrap_greedy
         if not font_path or not text or box_w_px <= 0:
             return estimate_px
@@ -132,7 +131,7 @@ def _solve_font_px(text, font_path, box_w_px, n_lines, estimate_px):
         lo, hi, best = 8, 300, None
         while lo <= hi:
             mid = (lo + hi) // 2
-            font = ImageFont.truetype(font_path, mid)
+            font = get_font(font_path, mid)
             lines = wrap_greedy(text, font, box_w_px, draw)
             fits = (len(lines) <= n_lines
                     and all(draw.textlength(ln, font=font) <= box_w_px for ln in lines))
@@ -171,8 +170,8 @@ def transcribe_published_art(post):
             logger.info('[transcribe] post=%s sem raw/final — skip', post.id)
             return None, {}
 
-        raw_b64, raw_mime = _fetch_b64(_presign(post.raw_image_s3_key))
-        fin_b64, fin_mime = _fetch_b64(_presign(final_key))
+        raw_b64, raw_mime = _read_b64(post.raw_image_s3_key)
+        fin_b64, fin_mime = _read_b64(final_key)
 
         known = {
             'titulo': (post.title or '').strip(),
@@ -200,8 +199,8 @@ def transcribe_published_art(post):
                 'Meça e responda o JSON.')},
         ]
 
-        import anthropic
-        client = anthropic.Anthropic(api_key=api_key)
+        from apps.core.services.ai_clients import anthropic_client
+        client = anthropic_client(api_key)
         # sonnet-4-6 NAO suporta prefill de assistant — parse_json extrai o
         # JSON do texto livre.
         resp = client.messages.create(
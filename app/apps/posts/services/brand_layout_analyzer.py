@@ -14,10 +14,12 @@ import json
 import logging
 import os
 import re
-import urllib.request
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
+from apps.core.services import http_client
+from apps.posts.services.ai_payload_cache import cached as ai_payload_cached
+
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-5'
@@ -101,31 +103,34 @@ def analyze_brand_layout_from_references(
         logger.warning('[brand_layout] ANTHROPIC_API_KEY ausente, skip')
         return None
 
-    import anthropic
     from apps.core.services.s3_service import S3Service
 
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
 
-    # Baixa cada ref e converte pra base64
+    # Baixa as refs (em paralelo) e converte pra base64
+    from apps.posts.services.ref_fetch import fetch_b64_many
     content_blocks = []
     analyzed_ids = []
+    urls = []
     for ref in refs:
         try:
-            url = S3Service.generate_presigned_download_url(ref.s3_key, expires_in=3600)
-            b64, mime = _download_to_base64(url)
-            if not b64:
-                continue
-            content_blocks.append({
-                'type': 'image',
-                'source': {
-                    'type': 'base64',
-                    'media_type': mime,
-                    'data': b64,
-                },
-            })
-            analyzed_ids.append(ref.id)
+            urls.append(S3Service.generate_presigned_download_url(ref.s3_key, expires_in=3600))
         except Exception as exc:
-            logger.warning('[brand_layout] falha baixando ref %s: %s', ref.id, exc)
+            logger.warning('[brand_layout] falha presign ref %s: %s', ref.id, exc)
+            urls.append(None)
+    for ref, (b64, mime) in zip(refs, fetch_b64_many(urls, _download_to_base64)):
+        if not b64:
+            continue
+        content_blocks.append({
+            'type': 'image',
+            'source': {
+                'type': 'base64',
+                'media_type': mime,
+                'data': b64,
+            },
+        })
+        analyzed_ids.append(ref.id)
 
     if not content_blocks:
         logger.warning('[brand_layout] nenhuma ref baixada com sucesso')
@@ -191,14 +196,10 @@ def analyze_brand_layout_from_references(
     return spec
 
 
+@ai_payload_cached('layout-analyzer:4500000')
 def _download_to_base64(url: str):
     try:
-        req = urllib.request.Request(
-            url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            ct = resp.headers.get('Content-Type', 'image/png').split(';')[0].strip()
+        data, ct = http_client.fetch_bytes(url, timeout=30)
     except Exception as exc:
         logger.warning('Falha download ref: %s', exc)
         return None, 'image/png'
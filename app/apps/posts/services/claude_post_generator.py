@@ -175,8 +175,8 @@ def generate_post_text(
     if not api_key:
         raise RuntimeError('ANTHROPIC_API_KEY ausente no ambiente')
 
-    import anthropic
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
 
     user_text = _build_user_message(
         knowledge_base_summary=knowledge_base_summary,
@@ -415,8 +415,8 @@ def analyze_product_image(
     if not api_key:
         raise RuntimeError('ANTHROPIC_API_KEY ausente no ambiente')
 
-    import anthropic
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
 
     b64 = base64.b64encode(image_bytes).decode('ascii')
     if mime_type not in ('image/png', 'image/jpeg', 'image/webp', 'image/gif'):
@@ -15,40 +15,18 @@ import logging
 import os
 import re
 from decimal import Decimal
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from apps.posts.services.skills import system_prefix, tag_usage
+
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-6'
 MAX_TOKENS = 6000
 
-_SKILL_DIR = Path(__file__).parent / 'copywriter_skill'
-
-
-def _load_skill() -> str:
-    parts = []
-    files = [
-        _SKILL_DIR / 'SKILL.md',
-        _SKILL_DIR / 'references' / 'tone-guide.md',
-        _SKILL_DIR / 'references' / 'hook-bank.md',
-        _SKILL_DIR / 'references' / 'copy-examples.md',
-    ]
-    for fp in files:
-        try:
-            parts.append(f'\n\n=== ARQUIVO: {fp.name} ===\n\n')
-            parts.append(fp.read_text(encoding='utf-8'))
-        except Exception:
-            logger.warning('[copywriter] skill file faltando: %s', fp)
-    return ''.join(parts)
-
-
-COPYWRITER_SKILL = _load_skill()
-
-
 SYSTEM_INTRO = """Você é um copywriter especialista. Você recebe um briefing
 do iamkt (marca SaaS B2B/B2C multi-tenant) e produz copy estruturado em JSON
-seguindo a skill carregada abaixo (passos, regras de quality, schema de saída).
+seguindo a skill carregada acima (passos, regras de quality, schema de saída).
 
 Aplique o passo a passo do skill. Retorne APENAS o JSON do schema do Passo 5,
 sem texto antes/depois, sem markdown."""
@@ -71,37 +49,27 @@ def generate_copy(
         return None
 
     try:
-        import anthropic
+        import anthropic  # noqa: F401 — so checa o SDK
     except ImportError:
         logger.warning('[copywriter] anthropic SDK indisponivel')
         return None
 
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
     user_text = _build_user_text(
         post=post, kb_summary=kb_summary, references=references or [],
         copy_direction=copy_direction or {},
     )
 
-    # System como LIST: introducao curta + skill (separadamente cacheaveis;
-    # skill grande fica em cache de 1h).
-    system_blocks = [
-        {
-            'type': 'text',
-            'text': SYSTEM_INTRO,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-        {
-            'type': 'text',
-            'text': COPYWRITER_SKILL,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-    ]
+    # System [skill, introducao, marca] cacheado 1h (skills.py): a marca
+    # entra no prefixo — mesma org, mesmos bytes, cache lido.
+    prefix = system_prefix('copywriter', SYSTEM_INTRO, brand=kb_summary)
 
     try:
         resp = client.messages.create(
             model=MODEL,
             max_tokens=MAX_TOKENS,
-            system=system_blocks,
+            system=prefix.blocks,
             messages=[{'role': 'user', 'content': user_text}],
         )
     except Exception:
@@ -116,7 +84,7 @@ def generate_copy(
         logger.error('[copywriter] parse JSON falhou. Raw: %s', raw[:400])
         return None
 
-    usage = _extract_usage(resp, cache_ttl='1h')
+    usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
     logger.info(
         '[copywriter] post=%s tokens=%d cost=$%s recommended=%s',
         post.id, usage.get('total_tokens', 0), usage.get('cost_usd', 0),
@@ -166,7 +134,7 @@ def _build_user_text(*, post, kb_summary: str,
     parts.extend([
         '',
         '== Contexto da marca (KB) ==',
-        kb_summary[:2000] if kb_summary else '(sem resumo da marca)',
+        '(no system — bloco "Contexto da marca")' if kb_summary else '(sem resumo da marca)',
     ])
     if references:
         parts.append('')
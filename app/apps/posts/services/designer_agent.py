@@ -14,44 +14,16 @@ import os
 import re
 import urllib.request
 from decimal import Decimal
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from apps.posts.services.skills import system_prefix, tag_usage
+
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-6'
 MAX_TOKENS = 12000  # designer_payload eh grande (wireframe + image_prompts)
 MAX_INTERNAL_ITERATIONS = 2  # se status='iterate', tenta de novo
 
-_SERVICES_DIR = Path(__file__).parent
-_SHARED_DIR = _SERVICES_DIR / 'shared_skill'
-_DESIGNER_DIR = _SERVICES_DIR / 'designer_skill'
-
-
-def _load_skill() -> str:
-    parts = []
-    files = [
-        _SHARED_DIR / 'formats-and-safe-zones.md',
-        _SHARED_DIR / 'typography-scale.md',
-        _SHARED_DIR / 'contrast-rules.md',
-        _SHARED_DIR / 'design-principles.md',
-        _DESIGNER_DIR / 'SKILL.md',
-        _DESIGNER_DIR / 'references' / 'wireframe-examples.md',
-        _DESIGNER_DIR / 'references' / 'prompt-library.md',
-        _DESIGNER_DIR / 'references' / 'render-order-guide.md',
-    ]
-    for fp in files:
-        try:
-            parts.append(f'\n\n=== ARQUIVO: {fp.name} ===\n\n')
-            parts.append(fp.read_text(encoding='utf-8'))
-        except Exception:
-            logger.warning('[designer] skill file faltando: %s', fp)
-    return ''.join(parts)
-
-
-DESIGNER_SKILL_FULL = _load_skill()
-
-
 SYSTEM_INTRO = """Você é o designer do iamkt — 3º agente do pipeline. Recebe
 strategic_payload (do estrategista), copy_payload (do copywriter), KB, refs e
 modal_choices. Produz designer_payload conforme schema do Passo 8 do skill.
@@ -96,28 +68,19 @@ def generate_design(
         return None
 
     try:
-        import anthropic
+        import anthropic  # noqa: F401 — so checa o SDK
     except ImportError:
         logger.warning('[designer] anthropic SDK indisponivel')
         return None
 
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
     references = references or []
     kb_dossiers = kb_dossiers or []
     modal_choices = modal_choices or {}
 
-    system_blocks = [
-        {
-            'type': 'text',
-            'text': SYSTEM_INTRO,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-        {
-            'type': 'text',
-            'text': DESIGNER_SKILL_FULL,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-    ]
+    # Mesma skill (e ordem) do orquestrador: prefixo da skill compartilhado
+    prefix = system_prefix('designer', SYSTEM_INTRO)
 
     # Loop interno de iteracoes (designer pode auto-pedir revisao)
     previous_feedback: List[str] = []
@@ -141,7 +104,7 @@ def generate_design(
             resp = client.messages.create(
                 model=MODEL,
                 max_tokens=MAX_TOKENS,
-                system=system_blocks,
+                system=prefix.blocks,
                 messages=[{'role': 'user', 'content': content_blocks}],
             )
         except Exception:
@@ -157,7 +120,7 @@ def generate_design(
                          iteration, raw[:400])
             return None
 
-        usage = _extract_usage(resp, cache_ttl='1h')
+        usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
         _accumulate_usage(accumulated_usage, usage)
 
         approval = payload.get('approval') or {}
@@ -448,3 +411,5 @@ def _accumulate_usage(acc: Dict[str, Any], one: Dict[str, Any]) -> None:
               'cache_read_input_tokens', 'total_tokens'):
         acc[k] = acc.get(k, 0) + (one.get(k, 0) or 0)
     acc['cost_usd'] = acc.get('cost_usd', 0.0) + (one.get('cost_usd', 0.0) or 0.0)
+    if one.get('cache_prefix'):
+        acc['cache_prefix'] = one['cache_prefix']
@@ -222,6 +222,7 @@ def render_wireframe_png(designer_payload: Dict[str, Any],
     enviar ao Gemini como referência visual de layout.
     """
     from PIL import Image, ImageDraw, ImageFont
+    from apps.posts.services.artkit.fonts import get_font
     img = Image.new('RGB', (canvas_w, canvas_h), (245, 245, 248))
     draw = ImageDraw.Draw(img, 'RGBA')
 
@@ -233,11 +234,11 @@ def render_wireframe_png(designer_payload: Dict[str, Any],
         draw.line([(0, int(canvas_h * i / 10)), (canvas_w, int(canvas_h * i / 10))],
                   fill=c, width=1)
     try:
-        f_lbl = ImageFont.truetype(
+        f_lbl = get_font(
             '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
             max(14, int(canvas_w / 60))
         )
-        f_sm = ImageFont.truetype(
+        f_sm = get_font(
             '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
             max(11, int(canvas_w / 80))
         )
@@ -0,0 +1,93 @@
+"""
+Armazenamento em DISCO com teto e descarte LRU (mtime = ultimo uso) —
+base do ai_payload_cache e do render_cache.
+
+  read(path)                         -> bytes | None (e marca o uso)
+  write(root, path, data, max_bytes) -> grava atomico (tmp + replace)
+  evict(root, max_bytes)             -> varre `root` e descarta os mais velhos
+
+A varredura do diretorio NAO roda a cada gravacao: cada processo mantem o
+total de `root` (medido na ultima varredura + o que ele gravou depois) e so
+varre quando esse total passa de `max_bytes` ou a cada RESCAN_SECONDS (outros
+workers gravam no mesmo diretorio). O descarte desce ate LOW_WATER do teto
+para a proxima varredura nao vir logo na gravacao seguinte.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RESCAN_SECONDS = 300
+LOW_WATER = 0.9
+
+_lock = threading.Lock()
+_used = {}        # root -> bytes estimados
+_scanned_at = {}  # root -> monotonic da ultima varredura
+
+
+def read(path):
+    try:
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        os.utime(path)  # LRU: ultimo uso
+    except OSError:
+        return None
+    return data
+
+
+def write(root, path, data, max_bytes):
+    """Grava `data` em `path` (dentro de `root`); False se o disco falhou."""
+    try:
+        previous = os.path.getsize(path)
+    except OSError:
+        previous = 0
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning('[disk_lru] falha gravando %s: %s', path, exc)
+        return False
+
+    with _lock:
+        used = _used.get(root)
+        stale = used is None or time.monotonic() - _scanned_at.get(root, 0) > RESCAN_SECONDS
+        if not stale:
+            used += len(data) - previous
+            _used[root] = used
+    if stale or used > max_bytes:
+        evict(root, max_bytes)
+    return True
+
+
+def evict(root, max_bytes):
+    """Varre `root`; passou de `max_bytes` -> descarta os menos usados ate
+    LOW_WATER do teto. Atualiza o total do processo."""
+    with _lock:
+        entries, total = [], 0
+        for dirpath, _dirs, files in os.walk(root):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, full))
+                total += st.st_size
+        if total > max_bytes:
+            target = max_bytes * LOW_WATER
+            for _mtime, size, full in sorted(entries):
+                try:
+                    os.remove(full)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+        _used[root] = total
+        _scanned_at[root] = time.monotonic()
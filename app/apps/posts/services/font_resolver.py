@@ -16,10 +16,11 @@ Usamos UA Android 2.3.5 para forcar TTF.
 import logging
 import os
 import re
-import urllib.request
 from pathlib import Path
 from typing import Optional
 
+from apps.core.services import http_client
+
 logger = logging.getLogger(__name__)
 
 FONTS_CACHE_DIR = Path('/app/fonts_cache')
@@ -202,15 +203,12 @@ def _load_google_font(family: str, weight: str) -> Optional[str]:
             f':wght@{num}&display=swap'
         )
         try:
-            req = urllib.request.Request(
-                css_url,
-                headers={
-                    # UA Android 2.3.5: forca Google Fonts a servir TTF (nao WOFF2)
-                    'User-Agent': 'Mozilla/5.0 (Linux; U; Android 2.3.5)',
-                },
+            css, _ct = http_client.fetch_bytes(
+                css_url, timeout=30,
+                # UA Android 2.3.5: forca Google Fonts a servir TTF (nao WOFF2)
+                headers={'User-Agent': 'Mozilla/5.0 (Linux; U; Android 2.3.5)'},
             )
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                css = resp.read().decode('utf-8', errors='ignore')
+            css = css.decode('utf-8', errors='ignore')
         except Exception as exc:
             logger.debug('Google Font %s peso %d indisponivel: %s', family_clean, num, exc)
             continue
@@ -242,11 +240,9 @@ def _normalize_weight(weight: str) -> str:
 
 def _download(url: str, target: Path) -> bool:
     try:
-        req = urllib.request.Request(
-            url, headers={'User-Agent': 'Mozilla/5.0 IAMKT FontResolver'}
+        data, _ct = http_client.fetch_bytes(
+            url, timeout=30, headers={'User-Agent': 'Mozilla/5.0 IAMKT FontResolver'},
         )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
         if not data:
             return False
         target.parent.mkdir(exist_ok=True, parents=True)
@@ -13,10 +13,12 @@ import json
 import logging
 import os
 import re
-import urllib.request
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
+from apps.core.services import http_client
+from apps.posts.services.ai_payload_cache import cached as ai_payload_cached
+
 logger = logging.getLogger(__name__)
 
 GEMINI_MODEL = 'gemini-3-pro-image-preview'
@@ -128,14 +130,12 @@ def generate_post_image(
     if not api_key:
         raise RuntimeError('GEMINI_API_KEY ausente no ambiente')
 
-    # 1. Baixa cada referencia, converte para base64
+    # 1. Baixa as referencias (em paralelo, dedupe por objeto) -> base64
+    from apps.posts.services.ref_fetch import fetch_b64_many
     image_parts: List[Dict[str, Any]] = []
     sorted_refs = _sort_references(references)
-    for ref in sorted_refs:
-        url = ref.get('url')
-        if not url:
-            continue
-        b64, mime = _download_to_base64(url)
+    urls = [ref.get('url') for ref in sorted_refs if ref.get('url')]
+    for b64, mime in fetch_b64_many(urls, _download_to_base64):
         if b64:
             image_parts.append({
                 'inline_data': {'mime_type': mime, 'data': b64}
@@ -173,25 +173,19 @@ def generate_post_image(
 
     # 4. Chamada HTTP
     model_used, endpoint = _resolved_endpoint()
-    body = json.dumps(payload).encode('utf-8')
-    req = urllib.request.Request(
+    resp = http_client.post(
         endpoint,
-        data=body,
-        method='POST',
+        data=json.dumps(payload).encode('utf-8'),
         headers={
             'Content-Type': 'application/json',
             'X-Goog-Api-Key': api_key,
         },
+        timeout=180,
     )
+    if resp.status_code >= 400:
+        raise RuntimeError(f'Gemini retornou HTTP {resp.status_code}: {resp.text[:500]}')
 
-    try:
-        with urllib.request.urlopen(req, timeout=180) as resp:
-            data = resp.read()
-    except urllib.error.HTTPError as exc:
-        err_body = exc.read().decode('utf-8', errors='ignore')
-        raise RuntimeError(f'Gemini retornou HTTP {exc.code}: {err_body[:500]}')
-
-    response_json = json.loads(data.decode('utf-8'))
+    response_json = resp.json()
 
     # 5. Extrai imagem base64 dos candidates
     png_bytes, mime_type = _extract_image_from_response(response_json)
@@ -276,15 +270,13 @@ def _sort_references(references: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return sorted(references, key=key)
 
 
+@ai_payload_cached('gemini:4500000')
 def _download_to_base64(url: str) -> Tuple[Optional[str], str]:
     """Baixa imagem de URL (presigned) e retorna (base64_str, mime_type)."""
     try:
-        req = urllib.request.Request(
-            url, headers={'User-Agent': 'Mozilla/5.0 IAMKT GeminiClient'}
+        data, content_type = http_client.fetch_bytes(
+            url, timeout=30, headers={'User-Agent': 'Mozilla/5.0 IAMKT GeminiClient'},
         )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            content_type = resp.headers.get('Content-Type', 'image/png').split(';')[0].strip()
     except Exception as exc:
         logger.warning('Falha ao baixar referencia %s: %s', url[:100], exc)
         return None, 'image/png'
@@ -1005,15 +997,15 @@ def _fit_text_to_box(text, font_path, fallback_path, max_w, max_h, start_size, d
     """Shrink-to-fit considerando LARGURA E ALTURA da caixa declarada.
     Retorna (font, lines, fit_ok). fit_ok=False quando chegou ao min_size sem
     caber (e renderiza no minimo, mas loga aviso)."""
-    from PIL import ImageFont
+    from apps.posts.services.artkit.fonts import get_font
     size = max(int(min_size), int(start_size))
     font = None
     lines = []
     for _ in range(14):
         try:
-            font = ImageFont.truetype(font_path or fallback_path, size)
+            font = get_font(font_path or fallback_path, size)
         except Exception:
-            font = ImageFont.truetype(fallback_path, size)
+            font = get_font(fallback_path, size)
         lines = _wrap_text(text, font, max_w, draw)
         widest = 0
         for ln in lines:
@@ -1042,15 +1034,15 @@ def _fit_text(text, font_path, fallback_path, max_w, start_size, draw, min_size=
     """Shrink-to-fit: reduz o tamanho da fonte ate a linha mais larga caber em
     max_w (evita estouro/corte com palavras longas ou formatos estreitos).
     Retorna (font, lines)."""
-    from PIL import ImageFont
+    from apps.posts.services.artkit.fonts import get_font
     size = max(int(min_size), int(start_size))
     font = None
     lines = []
     for _ in range(8):
         try:
-            font = ImageFont.truetype(font_path or fallback_path, size)
+            font = get_font(font_path or fallback_path, size)
         except Exception:
-            font = ImageFont.truetype(fallback_path, size)
+            font = get_font(fallback_path, size)
         lines = _wrap_text(text, font, max_w, draw)
         widest = 0
         for ln in lines:
@@ -1104,7 +1096,8 @@ def apply_text_overlay(
     Retorna novos PNG bytes com o texto desenhado.
     """
     from io import BytesIO
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image, ImageDraw
+    from apps.posts.services.artkit.fonts import get_font
 
     spec = layout_spec or _DEFAULT_LAYOUT_SPEC
 
@@ -1125,17 +1118,17 @@ def apply_text_overlay(
     tf_path = title_font_path or '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
     sf_path = subtitle_font_path or '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
     try:
-        title_font = ImageFont.truetype(tf_path, title_size)
+        title_font = get_font(tf_path, title_size)
     except Exception:
-        title_font = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', title_size)
+        title_font = get_font('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', title_size)
     try:
-        subtitle_font = ImageFont.truetype(sf_path, subtitle_size)
+        subtitle_font = get_font(sf_path, subtitle_size)
     except Exception:
-        subtitle_font = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', subtitle_size)
+        subtitle_font = get_font('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', subtitle_size)
     try:
-        cta_font = ImageFont.truetype(tf_path, cta_size)
+        cta_font = get_font(tf_path, cta_size)
     except Exception:
-        cta_font = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', cta_size)
+        cta_font = get_font('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', cta_size)
 
     padding = int(W * float(spec.get('padding_pct', 5)) / 100)
     alignment = spec.get('alignment', 'left')
@@ -1356,9 +1349,8 @@ def _draw_logo_at(overlay, logo_url, x, y, target_w, target_h=None):
     from io import BytesIO
     from PIL import Image
     try:
-        req = urllib.request.Request(logo_url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'})
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = resp.read()
+        from apps.core.services.s3_service import S3Service
+        data = S3Service.read_url_bytes(logo_url, timeout=15)
         logo = Image.open(BytesIO(data)).convert('RGBA')
     except Exception:
         return None
@@ -1393,9 +1385,8 @@ def _draw_image_at(overlay, img_url, x, y, target_w, target_h):
             head, _, payload = img_url.partition(',')
             data = base64.b64decode(payload)
         else:
-            req = urllib.request.Request(img_url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'})
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                data = resp.read()
+            from apps.core.services.s3_service import S3Service
+            data = S3Service.read_url_bytes(img_url)
         sticker = Image.open(BytesIO(data)).convert('RGBA')
     except Exception:
         logger.exception('[layout_doc] sticker load fail')
@@ -1559,11 +1550,11 @@ def render_layout_document(png_bytes, elements, paleta=None, fonts=None,
             # NUNCA muda; caixa mais estreita = MAIS LINHAS (re-wrap). O
             # flow_y anti-overlap abaixo empurra os blocos seguintes se o
             # texto crescer alem da caixa (regra do dono, 2026-07-10).
-            from PIL import ImageFont as _IF
+            from apps.posts.services.artkit.fonts import get_font
             try:
-                font = _IF.truetype(rb['fpath'] or rb['fb'], start_size)
+                font = get_font(rb['fpath'] or rb['fb'], start_size)
             except Exception:
-                font = _IF.truetype(rb['fb'], start_size)
+                font = get_font(rb['fb'], start_size)
             lines = _wrap_text(rb['content'], font, max(40, bw - 2 * pad), draw)
             fit_ok = True
         if not fit_ok:
@@ -1904,11 +1895,8 @@ def _draw_logo_on_overlay(overlay, logo_url: str, position: str,
     from PIL import Image
 
     try:
-        req = urllib.request.Request(
-            logo_url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'}
-        )
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = resp.read()
+        from apps.core.services.s3_service import S3Service
+        data = S3Service.read_url_bytes(logo_url, timeout=15)
     except Exception as exc:
         logger.warning('Falha download logo overlay: %s', exc)
         return None
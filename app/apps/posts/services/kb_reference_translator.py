@@ -28,10 +28,12 @@ import json
 import logging
 import os
 import re
-import urllib.request
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
+from apps.core.services import http_client
+from apps.posts.services.ai_payload_cache import cached as ai_payload_cached
+
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-5'
@@ -176,19 +178,21 @@ def translate_kb_references(
         logger.warning('[kb_translator] ANTHROPIC_API_KEY ausente — skip')
         return None
 
-    import anthropic
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
 
     # Monta content multimodal
+    from apps.posts.services.ref_fetch import fetch_b64_many
     content: List[Dict[str, Any]] = []
     meta_lines = []
+    fetched = fetch_b64_many([ref.get('url') for ref in kb_refs], _download_to_base64)
     for i, ref in enumerate(kb_refs, 1):
         url = ref.get('url')
         usage_desc = (ref.get('usage_description') or '').strip() or '(nao informado)'
         meta_lines.append(f'Imagem {i}: usage_description do user: "{usage_desc}"')
         if not url:
             continue
-        b64, mime = _download_to_base64(url)
+        b64, mime = fetched[i - 1]
         if b64:
             content.append({
                 'type': 'image',
@@ -262,14 +266,10 @@ def _hash_inputs(kb_refs: List[Dict[str, Any]]) -> str:
     return hashlib.sha1('|'.join(payload).encode('utf-8')).hexdigest()[:16]
 
 
+@ai_payload_cached('kb-translator:raw')
 def _download_to_base64(url: str):
     try:
-        req = urllib.request.Request(
-            url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            ct = resp.headers.get('Content-Type', 'image/png').split(';')[0].strip()
+        data, ct = http_client.fetch_bytes(url, timeout=30)
     except Exception:
         return None, 'image/png'
     # Detecta o tipo REAL pelos magic bytes. O Content-Type do S3 mente com
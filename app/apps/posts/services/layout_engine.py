@@ -326,23 +326,27 @@ def _fit_font(
     """Encontra o maior font_size que faz o texto caber em max_lines × max_width.
     Retorna (font_size, lines, total_height_px).
     """
-    from PIL import ImageFont, ImageDraw, Image
+    from PIL import ImageFont
+    from apps.posts.services.artkit.fit import largest_fit
+    from apps.posts.services.artkit.fonts import get_font
 
     def try_size(sz):
         try:
-            font = ImageFont.truetype(font_path, sz)
+            font = get_font(font_path, sz)
         except Exception:
             font = ImageFont.load_default()
         lines = _wrap_text(text, font, max_width)
         lh = int(sz * 1.2)
         return font, lines, lh * len(lines)
 
-    size = max(size_min, min(size_start, 200))
-    while size >= size_min:
-        font, lines, total_h = try_size(size)
-        if len(lines) <= max_lines and total_h <= max_height:
-            return size, lines, total_h
-        size -= 1
+    def attempt(sz):
+        _font, lines, total_h = try_size(sz)
+        return len(lines) <= max_lines and total_h <= max_height, (lines, total_h)
+
+    # bissecao na descida de 1 em 1px (mesmo tamanho escolhido)
+    size, res, fitted = largest_fit(max(size_min, min(size_start, 200)), size_min, 1, attempt)
+    if fitted:
+        return size, res[0], res[1]
     font, lines, total_h = try_size(size_min)
     return size_min, lines[:max_lines], int(size_min * 1.2) * min(len(lines), max_lines)
 
@@ -370,8 +374,9 @@ def _wrap_text(text: str, font, max_width: int) -> List[str]:
 
 def _measure_text_width(text: str, font_path: str, size: int) -> int:
     from PIL import ImageFont, ImageDraw, Image
+    from apps.posts.services.artkit.fonts import get_font
     try:
-        font = ImageFont.truetype(font_path, size)
+        font = get_font(font_path, size)
     except Exception:
         font = ImageFont.load_default()
     img = Image.new('RGB', (1, 1))
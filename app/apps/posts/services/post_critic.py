@@ -19,65 +19,27 @@ import logging
 import os
 import re
 from decimal import Decimal
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from apps.posts.services.skills import system_prefix, tag_usage
+
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-6'
 MAX_TOKENS = 3000
 
-# Carrega o conhecimento do critico: base compartilhada (shared_skill/) +
-# specifica do critico (critic_skill/). Concatena em UM bloco que vira prefixo
-# cacheable no system prompt (1h TTL — escrita 1x/hora, leitura 90% off depois).
-_SERVICES_DIR = Path(__file__).parent
-_SHARED_DIR = _SERVICES_DIR / 'shared_skill'
-_CRITIC_DIR = _SERVICES_DIR / 'critic_skill'
-
-
-def _load_skill_for_critic() -> str:
-    """Skill do critico: shared/* + critic SKILL.md + critic payload-examples."""
-    parts = []
-    files = [
-        # Base compartilhada (carregada por designer + critico)
-        _SHARED_DIR / 'formats-and-safe-zones.md',
-        _SHARED_DIR / 'typography-scale.md',
-        _SHARED_DIR / 'contrast-rules.md',
-        _SHARED_DIR / 'design-principles.md',
-        # Especifica do critico
-        _CRITIC_DIR / 'SKILL.md',
-        _CRITIC_DIR / 'references' / 'payload-examples.md',
-    ]
-    for fp in files:
-        try:
-            parts.append(f'\n\n=== ARQUIVO: {fp.name} ===\n\n')
-            parts.append(fp.read_text(encoding='utf-8'))
-        except Exception:
-            logger.warning('[critic] skill file faltando: %s', fp)
-    return ''.join(parts)
-
-
-DESIGNER_SKILL = _load_skill_for_critic()
-if not DESIGNER_SKILL:
-    logger.warning('[critic] DESIGNER_SKILL vazio — pastas shared_skill/critic_skill nao encontradas')
-
-
 CRITIC_SYSTEM_PROMPT = """Voce e designer senior revisando esta arte JA
 RENDERIZADA com olhos novos. NAO foi voce que fez — voce esta vendo pela
 primeira vez.
 
-Voce tem acesso a um REPERTORIO DE SKILL (abaixo) — principios + sintomas +
-edits tipicos. Use como referencia ativa, NAO como checklist mecanico.
-Aplique olho de senior.
+Voce tem acesso a um REPERTORIO DE SKILL (bloco anterior do system) —
+principios + sintomas + edits tipicos. Use como referencia ativa, NAO como
+checklist mecanico. Aplique olho de senior.
 
 Quando propor edits, seja CIRURGICO: mude o minimo necessario, um campo
 de cada vez. Cada edit tem motivo claro. Se um elemento esta OK, nao
 toque nele.
 
-=================================================================
-""" + DESIGNER_SKILL + """
-=================================================================
-
 
 FORMATO DE SAIDA (JSON puro, sem markdown):
 {
@@ -127,12 +89,13 @@ def critique(
         return None
 
     try:
-        import anthropic
+        import anthropic  # noqa: F401 — so checa o SDK
     except ImportError:
         logger.warning('[critic] anthropic SDK indisponivel')
         return None
 
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
     b64 = base64.b64encode(png_preview_bytes).decode('ascii')
     user_text = _build_critic_text(
         post=post, orchestration=orchestration,
@@ -140,20 +103,14 @@ def critique(
         iteration=iteration, max_iterations=max_iterations,
     )
 
-    # System como LIST com cache_control 1h. A skill (estatica) eh cacheada:
+    # System [skill critic, instrucao] com cache_control 1h (skills.py):
     # 1a chamada da hora paga write (+100%), proximas 90% off.
-    system_blocks = [
-        {
-            'type': 'text',
-            'text': CRITIC_SYSTEM_PROMPT,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-    ]
+    prefix = system_prefix('critic', CRITIC_SYSTEM_PROMPT)
     try:
         resp = client.messages.create(
             model=MODEL,
             max_tokens=MAX_TOKENS,
-            system=system_blocks,
+            system=prefix.blocks,
             messages=[{
                 'role': 'user',
                 'content': [
@@ -181,7 +138,7 @@ def critique(
         logger.error('[critic] parse JSON falhou. Raw: %s', raw[:300])
         return None
 
-    usage = _extract_usage(resp, cache_ttl='1h')
+    usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
     parsed['usage'] = usage
     parsed['model'] = MODEL
     logger.info(
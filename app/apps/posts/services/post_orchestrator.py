@@ -21,11 +21,13 @@ import json
 import logging
 import os
 import re
-import urllib.request
 from decimal import Decimal
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from apps.core.services import http_client
+from apps.posts.services.ai_payload_cache import cached as ai_payload_cached
+from apps.posts.services.skills import system_prefix, tag_usage
+
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-6'
@@ -37,39 +39,6 @@ MAX_TOKENS = 8000
 # seguranca (9 MB) e recomprimimos localmente o que passar disso.
 _CLAUDE_B64_LIMIT = 9_000_000
 
-# Carrega o conhecimento do orquestrador-designer: base compartilhada
-# (shared_skill/) + designer_skill (SKILL + 3 references). Bloco cacheado
-# por 1h via cache_control no system message.
-_SERVICES_DIR = Path(__file__).parent
-_SHARED_DIR = _SERVICES_DIR / 'shared_skill'
-_DESIGNER_DIR = _SERVICES_DIR / 'designer_skill'
-
-
-def _load_skill_for_orchestrator() -> str:
-    parts = []
-    files = [
-        # Base compartilhada (designer + critico aplicam os mesmos principios)
-        _SHARED_DIR / 'formats-and-safe-zones.md',
-        _SHARED_DIR / 'typography-scale.md',
-        _SHARED_DIR / 'contrast-rules.md',
-        _SHARED_DIR / 'design-principles.md',
-        # Especifica do designer (criacao do wireframe, image_prompt, etc.)
-        _DESIGNER_DIR / 'SKILL.md',
-        _DESIGNER_DIR / 'references' / 'wireframe-examples.md',
-        _DESIGNER_DIR / 'references' / 'prompt-library.md',
-        _DESIGNER_DIR / 'references' / 'render-order-guide.md',
-    ]
-    for fp in files:
-        try:
-            parts.append(f'\n\n=== ARQUIVO: {fp.name} ===\n\n')
-            parts.append(fp.read_text(encoding='utf-8'))
-        except Exception:
-            logger.warning('[orchestrator] skill file faltando: %s', fp)
-    return ''.join(parts)
-
-
-DESIGNER_SKILL = _load_skill_for_orchestrator()
-
 # Aspecto escolhido no modal -> diretriz explicita do que extrair da referencia.
 # Substitui o texto livre "o que aproveitar" (removido do modal).
 ASPECT_DIRECTIVES = {
@@ -340,7 +309,8 @@ def orchestrate_post(
     # max_retries=6: o SDK ja re-tenta 408/409/429/5xx/529 com backoff
     # exponencial + jitter respeitando retry-after. Cobre picos de sobrecarga
     # transitoria (529 Overloaded) de segundos ate ~1-2 min sem mais nada.
-    client = anthropic.Anthropic(api_key=api_key, max_retries=6)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key, max_retries=6)
 
     # Monta content multimodal: lista de imagens + meta de cada + texto final
     content_blocks: List[Dict[str, Any]] = []
@@ -364,6 +334,9 @@ def orchestrate_post(
         'referencia': ('REFERENCIA DE ESTILO — inspiracao de estilo/luz/mood APENAS; '
                        'nao copiar nenhum elemento especifico.'),
     }
+    # Downloads em paralelo (ordem preservada; falha -> None, pulada abaixo)
+    from apps.posts.services.ref_fetch import fetch_b64_many
+    fetched = fetch_b64_many([ref.get('url') for ref in references], _download_to_base64)
     for i, ref in enumerate(references, 1):
         url = ref.get('url')
         tipo = str(ref.get('tipo', 'desconhecido')).lower()
@@ -377,16 +350,14 @@ def orchestrate_post(
 
         if not url:
             continue
-        try:
-            b64, mime = _download_to_base64(url)
-            if not b64:
-                continue
-            content_blocks.append({
-                'type': 'image',
-                'source': {'type': 'base64', 'media_type': mime, 'data': b64},
-            })
-        except Exception as exc:
-            logger.warning('[orchestrator] falha download imagem %d: %s', i, exc)
+        b64, mime = fetched[i - 1]
+        if not b64:
+            logger.warning('[orchestrator] falha download imagem %d', i)
+            continue
+        content_blocks.append({
+            'type': 'image',
+            'source': {'type': 'base64', 'media_type': mime, 'data': b64},
+        })
 
     # Regra dura: cada imagem serve SO ao papel acima. Sem emprestar aspectos.
     if image_meta_lines:
@@ -424,27 +395,15 @@ def orchestrate_post(
         )
     content_blocks.append({'type': 'text', 'text': user_text})
 
-    # System como LIST: [skill cacheada 1h, system_prompt cacheado 1h].
-    # Os 2 blocos sao estaticos por hora — sao escritos em cache na 1a chamada
-    # e lidos com -90% nas seguintes. O conteudo dinamico (refs, dossie,
+    # System: [skill designer, system_prompt] cacheados 1h (skills.py) — o
+    # mesmo prefixo do revise_scene. O conteudo dinamico (refs, dossie,
     # briefing) vai no messages.user, fora do cache.
-    system_blocks = [
-        {
-            'type': 'text',
-            'text': DESIGNER_SKILL,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-        {
-            'type': 'text',
-            'text': SYSTEM_PROMPT,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-    ]
+    prefix = system_prefix('designer', SYSTEM_PROMPT)
     try:
         resp = client.messages.create(
             model=MODEL,
             max_tokens=MAX_TOKENS,
-            system=system_blocks,
+            system=prefix.blocks,
             messages=[
                 {'role': 'user', 'content': content_blocks},
             ],
@@ -476,7 +435,7 @@ def orchestrate_post(
         logger.warning('[orchestrator] output sem image_prompt_final — invalido')
         return None
 
-    usage = _extract_usage(resp, cache_ttl='1h')
+    usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
     logger.info(
         '[orchestrator] post=%s tokens=%d cost=$%s strategy=%s mode=%s',
         post.id, usage.get('total_tokens', 0), usage.get('cost_usd', 0),
@@ -511,11 +470,11 @@ def revise_scene(post, change_message: str) -> Optional[Dict[str, Any]]:
         logger.warning('[revise_scene] ANTHROPIC_API_KEY ausente')
         return None
 
-    import anthropic
     # max_retries=6: o SDK ja re-tenta 408/409/429/5xx/529 com backoff
     # exponencial + jitter respeitando retry-after. Cobre picos de sobrecarga
     # transitoria (529 Overloaded) de segundos ate ~1-2 min sem mais nada.
-    client = anthropic.Anthropic(api_key=api_key, max_retries=6)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key, max_retries=6)
 
     ctx = post.local_pipeline_context or {}
     conv = ctx.get('orch_conversa') or {}
@@ -533,12 +492,7 @@ def revise_scene(post, change_message: str) -> Optional[Dict[str, Any]]:
         '`image_prompt_final` atualizado. Retorne APENAS o JSON.'
     )
 
-    system_blocks = [
-        {'type': 'text', 'text': DESIGNER_SKILL,
-         'cache_control': {'type': 'ephemeral', 'ttl': '1h'}},
-        {'type': 'text', 'text': SYSTEM_PROMPT,
-         'cache_control': {'type': 'ephemeral', 'ttl': '1h'}},
-    ]
+    prefix = system_prefix('designer', SYSTEM_PROMPT)
     if user_text and assistant_text:
         messages = [
             {'role': 'user', 'content': user_text},
@@ -552,7 +506,7 @@ def revise_scene(post, change_message: str) -> Optional[Dict[str, Any]]:
     try:
         resp = client.messages.create(
             model=MODEL, max_tokens=MAX_TOKENS,
-            system=system_blocks, messages=messages,
+            system=prefix.blocks, messages=messages,
         )
     except Exception:
         logger.exception('[revise_scene] erro Claude')
@@ -566,7 +520,7 @@ def revise_scene(post, change_message: str) -> Optional[Dict[str, Any]]:
         logger.error('[revise_scene] parse falhou / sem image_prompt_final. Raw: %s', raw[:300])
         return None
 
-    usage = _extract_usage(resp, cache_ttl='1h')
+    usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
     logger.info(
         '[revise_scene] post=%s tokens=%d cost=$%s cache_read=%d cache_write=%d',
         post.id, usage.get('total_tokens', 0), usage.get('cost_usd', 0),
@@ -667,14 +621,10 @@ def _build_user_text(
     return '\n'.join(lines)
 
 
+@ai_payload_cached(f'orchestrator:{_CLAUDE_B64_LIMIT}')
 def _download_to_base64(url: str):
     try:
-        req = urllib.request.Request(
-            url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            ct = resp.headers.get('Content-Type', 'image/png').split(';')[0].strip()
+        data, ct = http_client.fetch_bytes(url, timeout=30)
     except Exception:
         return None, 'image/png'
     # Detecta o tipo REAL pelos magic bytes. O Content-Type do S3 mente com
@@ -838,11 +788,11 @@ def adapt_layout_spec(
     if not api_key or not layout_spec:
         return None
 
-    import anthropic
     # max_retries=6: o SDK ja re-tenta 408/409/429/5xx/529 com backoff
     # exponencial + jitter respeitando retry-after. Cobre picos de sobrecarga
     # transitoria (529 Overloaded) de segundos ate ~1-2 min sem mais nada.
-    client = anthropic.Anthropic(api_key=api_key, max_retries=6)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key, max_retries=6)
 
     user = (
         f'LAYOUT_SPEC (origem aspect_ratio={source_ar}):\n'
@@ -4,9 +4,14 @@ Render DETERMINISTICO de arquetipos com conteudo de exemplo — sem Claude/Gemin
 Usado por:
   - management command `render_archetype_preview` (loop de refinamento de spec)
   - management command `golden_archetypes` (golden files do refactor artkit/v3)
+  - management command `set_archetype_thumb` (miniaturas da galeria)
 
 A spec vem do BANCO (PostArchetype, via catalogos por org); fotos viram
 placeholder cinza (o objetivo e validar geometria/tipografia, nao imagem).
+
+Render repetido com as mesmas entradas (spec, conteudo, fontes e assets da
+KB, versao do engine) sai do render_cache; golden_archetypes passa
+use_cache=False (mede e compara o render de verdade).
 """
 import io
 
@@ -70,11 +75,72 @@ def list_cases(org):
 
 
 def render_preview(org, kb, archetype, fmt=None, color=None, content_override=None,
-                   engine='legacy'):
+                   engine='legacy', use_cache=True):
     """PNG (bytes) do arquetipo com conteudo de exemplo. Raises ValueError.
 
     engine='v3' renderiza pelo ENGINE V3 (conversao on-the-fly, mesmos inputs)
     — usado pelo golden_archetypes --engine v3 p/ provar paridade pixel."""
+    try:
+        inputs = _cache_inputs(org, kb, archetype) if use_cache else None
+    except Exception:
+        inputs = None   # sem cache: o render segue como sempre
+    if inputs is None:
+        return _render_preview(org, kb, archetype, fmt, color, content_override, engine)
+
+    from apps.posts.services import render_cache
+    key = render_cache.render_key(
+        kind='preview', org=org.slug, archetype=archetype, fmt=fmt, color=color,
+        override=content_override or {}, engine=engine, **inputs)
+    png, _ = render_cache.cached_render(key, lambda: (
+        _render_preview(org, kb, archetype, fmt, color, content_override, engine), None))
+    return png
+
+
+def _cache_inputs(org, kb, archetype):
+    """Entradas do render que vem do banco/S3: spec do catalogo, fontes
+    resolvidas da KB e ETags dos assets. None = arquetipo inexistente (o
+    adaptador levanta o ValueError de sempre)."""
+    from apps.posts.services import render_cache as rc
+
+    slug = org.slug
+    inputs = {'kb': rc.kb_digest(kb)}
+    if slug == 'thermomix':
+        from apps.posts.services.thermomix.catalog import apply_org_wireframes
+        from apps.posts.services.thermomix.wireframes import WF
+        from apps.posts.services.thermomix.assets import font_paths, resolve_asset_urls
+        apply_org_wireframes(org)
+        spec = WF().get(archetype)
+        if spec:
+            inputs['fonts'] = rc.fonts_digest(font_paths(kb, spec.get('fonts') or {}).values())
+            inputs['assets'] = {k: rc.url_etag(u) for k, u in resolve_asset_urls(kb).items()}
+    elif slug == 'vb-gastronomia':
+        from apps.posts.services.vb.catalog import apply_org_specs
+        from apps.posts.services.vb.specs import SP
+        apply_org_specs(org)
+        spec = SP().get(archetype)
+    elif slug == 'samsung-healthcare':
+        from apps.posts.services.samsung.catalog import apply_org_wireframes
+        from apps.posts.services.samsung.wireframes import WF
+        apply_org_wireframes(org)
+        spec = WF().get(archetype)
+    else:
+        from apps.posts.services.todxs.catalog import apply_org_wireframes
+        from apps.posts.services.todxs.wireframes import WF
+        apply_org_wireframes(org)
+        spec = WF().get(archetype)
+        if spec and kb:
+            from apps.posts.services.todxs.assets import todxs_simbolo_url, todxs_wordmark_url
+            from apps.posts.services.todxs.pillow_render import resolve_todxs_weights
+            inputs['fonts'] = rc.fonts_digest(resolve_todxs_weights(kb).values())
+            inputs['assets'] = [rc.url_etag(todxs_simbolo_url(kb)),
+                                rc.url_etag(todxs_wordmark_url(kb))]
+    if not spec:
+        return None
+    inputs['spec'] = spec
+    return inputs
+
+
+def _render_preview(org, kb, archetype, fmt, color, content_override, engine):
     slug = org.slug
     override = content_override or {}
     if slug == 'thermomix':
@@ -78,11 +78,12 @@ def build_prompt(
     if not api_key:
         return None
     try:
-        import anthropic
+        import anthropic  # noqa: F401 — so checa o SDK
     except ImportError:
         return None
 
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
     user_text, ref_image_url = _build_user_text(
         strategic_payload, copy_payload, canvas_w, canvas_h, kb_dossiers or []
     )
@@ -0,0 +1,112 @@
+"""
+Estagio de download + normalizacao das referencias (logos, uploads, refs KB)
+antes da chamada a IA — em PARALELO, com concorrencia limitada.
+
+Antes cada consumidor (gemini_image_generator, post_orchestrator,
+kb_reference_translator, brand_layout_analyzer) baixava uma imagem por vez
+(urllib, 30s de timeout cada) e recomprimia em serie: com 4-6 refs por post
+eram segundos de preludio antes da 1a chamada ao modelo.
+
+  fetch_b64_many(urls, fetch_one) -> [(b64|None, mime), ...] (mesma ordem)
+
+`fetch_one` e o _download_to_base64 do proprio consumidor — cada um mantem a
+SUA normalizacao (shrink_for_ai no Gemini, magic bytes + _shrink_for_claude
+no Claude); aqui so se orquestra:
+  - ate REF_FETCH_WORKERS (env; default 6) downloads simultaneos — a
+    recompressao Pillow roda na mesma thread (libera o GIL);
+  - a mesma imagem (mesmo objeto S3: URL sem a query da assinatura) baixa
+    UMA vez e o resultado e repetido nas posicoes duplicadas;
+  - prazo por item (REF_FETCH_TIMEOUT, default 45s, cobre download +
+    recompressao, contado do inicio do proprio item): estourou -> (None, None);
+    download que falhou -> (None, 'image/png') (os consumidores pulam ambos).
+"""
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+REF_FETCH_WORKERS = max(1, int(os.environ.get('REF_FETCH_WORKERS', 6)))
+REF_FETCH_TIMEOUT = float(os.environ.get('REF_FETCH_TIMEOUT', 45))
+
+_MISSING = (None, 'image/png')
+_TIMED_OUT = (None, None)
+_QUEUE_POLL = 0.05
+
+
+def _identity(url):
+    """Chave de dedupe: objeto apontado (host + path), sem a assinatura."""
+    parts = urlsplit(url)
+    return (parts.netloc, parts.path) if parts.netloc else url
+
+
+def fetch_b64_many(urls, fetch_one, max_workers=None, timeout=None):
+    """Baixa/normaliza `urls` em paralelo. URL vazia/None -> (None, 'image/png')."""
+    timeout = REF_FETCH_TIMEOUT if timeout is None else timeout
+    unique = {}
+    for url in urls:
+        if url and _identity(url) not in unique:
+            unique[_identity(url)] = url
+    if not unique:
+        return [_MISSING for _ in urls]
+
+    # Mesmo com 1 worker/1 URL vai pelo pool: o prazo por item so existe la
+    workers = min(len(unique), max_workers or REF_FETCH_WORKERS)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ref-fetch')
+    try:
+        results = _collect(pool, workers, unique, fetch_one, timeout)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return [results.get(_identity(url), _MISSING) if url else _MISSING
+            for url in urls]
+
+
+def _collect(pool, workers, unique, fetch_one, timeout):
+    """Prazo POR item, contado de quando ele comeca a rodar (refs na fila
+    nao gastam o prazo esperando thread). Estourou -> (None, None)."""
+    started = {}
+
+    def run(ident, url):
+        started[ident] = time.monotonic()
+        return _safe(fetch_one, url)
+
+    futures = {pool.submit(run, ident, url): ident for ident, url in unique.items()}
+    results, pending, abandoned = {}, set(futures), set()
+    while pending:
+        now = time.monotonic()
+        expired = {fut for fut in pending
+                   if futures[fut] in started and now - started[futures[fut]] >= timeout}
+        abandoned |= expired
+        # Item estourado ainda rodando prende a thread; quando termina, ela
+        # volta ao pool. Todas presas ao mesmo tempo -> a fila nao anda mais
+        if sum(1 for fut in abandoned if not fut.done()) >= workers:
+            expired = set(pending)
+        for fut in expired:
+            logger.warning('[ref_fetch] referencia estourou %.0fs: %s',
+                           timeout, unique[futures[fut]][:100])
+            results[futures[fut]] = _TIMED_OUT
+        pending -= expired
+        if not pending:
+            break
+        running = [started[futures[fut]] for fut in pending if futures[fut] in started]
+        wait_for = min(running) + timeout - now if running else timeout
+        if len(running) < len(pending):
+            # Item na fila comeca quando uma thread vaga: o prazo dele
+            # precisa ser visto logo, nao so no fim do prazo atual
+            wait_for = min(wait_for, _QUEUE_POLL)
+        done, _ = wait(pending, timeout=max(0.0, wait_for), return_when=FIRST_COMPLETED)
+        for fut in done:
+            results[futures[fut]] = fut.result()
+        pending -= done
+    return results
+
+
+def _safe(fetch_one, url):
+    try:
+        return fetch_one(url)
+    except Exception as exc:
+        logger.warning('[ref_fetch] falha baixando %s: %s', url[:100], exc)
+        return _MISSING
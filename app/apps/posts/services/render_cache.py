@@ -0,0 +1,190 @@
+"""
+Cache enderecado por conteudo dos RENDERS (PNG + metadados, ex.: elements).
+
+Preview de arquetipo (galeria, seletor, set_archetype_thumb) e o re-render
+do publicado ao salvar no editor refaziam o pipeline inteiro — resolucao de
+fontes, download de assets, desenho e encode PNG — mesmo com entradas
+identicas as de uma chamada anterior.
+
+  render_key(**partes)            -> sha256 das entradas + versao do engine
+  cached_render(key, produce)     -> (png, meta); produce() -> (png, meta)
+  etag(s3_key) / url_etag(url)    -> validador do asset no S3 ('' = sem)
+  fonts_digest(paths)             -> sha256 dos arquivos de fonte resolvidos
+  kb_digest(kb)                   -> logos/grafismos/fontes da KB (linhas)
+
+A chave cobre: spec normalizada, conteudo, hashes dos arquivos de fonte,
+ETags dos assets e a VERSAO DO ENGINE — sha256 do codigo (e fontes
+empacotadas) dos renderizadores + versao do Pillow, calculado uma vez por
+processo. Deploy que muda o desenho -> chaves novas; as velhas saem pelo LRU.
+RENDER_CACHE_VERSION (env) forca a virada sem deploy.
+
+Camada: DISCO local (RENDER_CACHE_DIR, default /tmp/iamkt-renders), limitado
+a RENDER_CACHE_MB (default 256; 0 desliga) com descarte LRU (mtime = ultimo
+uso) — mesmo disk_lru do ai_payload_cache (Redis e o broker: PNG nao vai la).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get('RENDER_CACHE_DIR', '/tmp/iamkt-renders')
+MAX_BYTES = int(float(os.environ.get('RENDER_CACHE_MB', 256)) * 1024 * 1024)
+
+# Pacotes cujo codigo/fontes entram na versao do engine
+_ENGINE_DIRS = ('artkit', 'todxs', 'vb', 'samsung', 'thermomix')
+_ENGINE_FILES = ('gemini_image_generator.py', 'preview.py')
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+_engine_version = None
+_file_digests = {}  # (realpath, mtime_ns, size) -> sha256
+
+
+def engine_version():
+    global _engine_version
+    if _engine_version is None:
+        import PIL
+
+        here = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha256(f'pillow={PIL.__version__}\0'.encode())
+        paths = [os.path.join(here, name) for name in _ENGINE_FILES]
+        for sub in _ENGINE_DIRS:
+            for root, dirs, files in os.walk(os.path.join(here, sub)):
+                dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+                paths += [os.path.join(root, f) for f in files
+                          if f.endswith(('.py', '.ttf', '.otf', '.json'))]
+        for path in sorted(paths):
+            h.update(os.path.relpath(path, here).encode() + b'\0')
+            h.update(file_digest(path).encode())
+        h.update(os.environ.get('RENDER_CACHE_VERSION', '').encode())
+        _engine_version = h.hexdigest()[:16]
+    return _engine_version
+
+
+def file_digest(path):
+    """sha256 do arquivo (memo por caminho+mtime+tamanho); '' se nao existe."""
+    try:
+        real = os.path.realpath(path)
+        st = os.stat(real)
+    except (OSError, TypeError, ValueError):
+        return ''
+    memo_key = (real, st.st_mtime_ns, st.st_size)
+    with _lock:
+        digest = _file_digests.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(real, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with _lock:
+            _file_digests[memo_key] = digest
+    return digest
+
+
+def fonts_digest(paths):
+    """Hashes dos arquivos de fonte resolvidos (ordem estavel, sem caminho)."""
+    return sorted(file_digest(p) for p in set(paths or ()) if p)
+
+
+def etag(s3_key):
+    """ETag do objeto no bucket ('' se sem chave ou HEAD falhar)."""
+    if not s3_key:
+        return ''
+    from apps.posts.services.ai_payload_cache import _etag
+    try:
+        return _etag(s3_key)
+    except Exception as exc:
+        logger.info('[render_cache] HEAD falhou (%s): %s', s3_key[:80], exc)
+        return ''
+
+
+def url_etag(url):
+    """ETag do asset por URL do bucket; URL externa/dados -> a propria URL
+    sem a query (assinatura muda a cada presign, o conteudo nao)."""
+    from apps.core.services.s3_service import S3Service
+    if not url:
+        return ''
+    if isinstance(url, (bytes, bytearray)):
+        return hashlib.sha256(url).hexdigest()
+    key = S3Service.key_from_url(url)
+    if key:
+        return etag(key) or key
+    if url.startswith('data:'):
+        return hashlib.sha256(url.encode()).hexdigest()
+    return url.split('?', 1)[0]
+
+
+def kb_digest(kb):
+    """Linhas dos assets visuais da KB que os renderers escolhem por nome/
+    flag (logo primario, grafismo ativo, fonte por nome). Logo/grafismo novo
+    gera s3_key novo, entao a linha ja identifica o conteudo; fonte reusa a
+    chave — o conteudo entra por fonts_digest do arquivo resolvido."""
+    if kb is None:
+        return ''
+    rows = [
+        list(kb.logos.order_by('id').values_list('id', 'name', 's3_key', 'is_primary', 'logo_type')),
+        list(kb.custom_fonts.order_by('id').values_list('id', 'name', 's3_key')),
+        list(kb.grafic_modules.order_by('id').values_list('id', 'name', 's3_key', 'is_active')),
+    ]
+    return hashlib.sha256(json.dumps(rows, default=str).encode()).hexdigest()
+
+
+def render_key(**parts):
+    payload = json.dumps({'engine': engine_version(), **parts}, sort_keys=True,
+                         default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+
+def get(key):
+    """(png, meta) ou None."""
+    from apps.posts.services import disk_lru
+    raw = disk_lru.read(_path(key))
+    if raw is None:
+        return None
+    header, _, png = raw.partition(b'\n')
+    try:
+        return png, json.loads(header)
+    except ValueError:
+        return None
+
+
+def put(key, png, meta=None):
+    from apps.posts.services import disk_lru
+    try:
+        header = json.dumps(meta, default=str).encode('utf-8')
+    except (TypeError, ValueError) as exc:
+        logger.warning('[render_cache] meta nao serializavel (%s): %s', key[:16], exc)
+        return
+    disk_lru.write(CACHE_DIR, _path(key), header + b'\n' + png, MAX_BYTES)
+
+
+def cached_render(key, produce):
+    """(png, meta) do cache; senao produce() e grava. Sem chave ou cache
+    desligado -> produce() direto. Excecoes de produce() sobem intactas;
+    png vazio (render falho) nao e cacheado."""
+    if not key or MAX_BYTES <= 0:
+        return produce()
+    hit = get(key)
+    if hit is not None:
+        with _lock:
+            _stats['hits'] += 1
+        return hit
+    with _lock:
+        _stats['misses'] += 1
+    png, meta = produce()
+    if png:
+        put(key, png, meta)
+    return png, meta
+
+
+def cache_stats():
+    with _lock:
+        return dict(_stats)
@@ -15,12 +15,13 @@ import urllib.request
 
 from PIL import Image, ImageDraw, ImageFont
 
+from apps.posts.services.artkit.fonts import get_font
+
 from .wireframes import WF, TOKENS, FONT_FILES
 
 logger = logging.getLogger(__name__)
 
 _FONTS_DIR = os.path.join(os.path.dirname(__file__), 'fonts')
-_font_cache = {}
 
 # roles que o canvas da edição avançada entende
 _EDITOR_ROLE = {'title': 'titulo'}  # demais textos -> 'subtitulo'
@@ -29,13 +30,8 @@ _BOLD_KEYS = {'head_bold', 'body_bold'}
 
 def _font(font_key: str, size: int) -> ImageFont.FreeTypeFont:
     size = max(6, int(size))
-    ck = (font_key, size)
-    if ck in _font_cache:
-        return _font_cache[ck]
     path = os.path.join(_FONTS_DIR, FONT_FILES.get(font_key, FONT_FILES['head_regular']))
-    f = ImageFont.truetype(path, size)
-    _font_cache[ck] = f
-    return f
+    return get_font(path, size)
 
 
 def _color(token: str) -> str:
@@ -170,15 +166,21 @@ def _wrap(text, font, max_w, draw):
 
 
 def _fit(text, font_key, box_w, box_h, max_lines, start_px, leading, draw, min_px=12):
-    size = int(start_px)
-    while size >= min_px:
+    """Maior corpo (descendo de 1 em 1px) em que o texto cabe — por bissecao
+    (artkit.fit.largest_fit: mesmo tamanho da descida linear)."""
+    from apps.posts.services.artkit.fit import largest_fit, wrap_cached
+
+    def attempt(size):
         font = _font(font_key, size)
-        lines = _wrap(text, font, box_w, draw)
-        if len(lines) <= max_lines and len(lines) * size * leading <= box_h + 1:
-            return font, size, lines
-        size -= 1
+        lines = wrap_cached(text, font, box_w, draw, wrap=_wrap)
+        return (len(lines) <= max_lines
+                and len(lines) * size * leading <= box_h + 1), (font, lines)
+
+    size, res, fitted = largest_fit(int(start_px), min_px, 1, attempt)
+    if fitted:
+        return res[0], size, res[1]
     font = _font(font_key, min_px)
-    return font, min_px, _wrap(text, font, box_w, draw)[:max_lines]
+    return font, min_px, wrap_cached(text, font, box_w, draw, wrap=_wrap)[:max_lines]
 
 
 def _draw_line(draw, xy, line, font, fill, tracking=0.0):
@@ -54,11 +54,12 @@ def validate_scene(*, png_bytes: bytes, wireframe_plan: Dict[str, Any],
     if not api_key or not png_bytes:
         return None
     try:
-        import anthropic
+        import anthropic  # noqa: F401 — so checa o SDK
     except ImportError:
         return None
 
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
     b64 = base64.b64encode(png_bytes).decode('ascii')
     summary = _build_layout_summary(wireframe_plan, canvas_w, canvas_h)
 
@@ -98,8 +98,8 @@ def resolve_briefing(*, kb_summary, modal_selections, textos, formato, reference
     if not api_key:
         raise RuntimeError('OPENAI_API_KEY ausente')
 
-    from openai import OpenAI
-    client = OpenAI(api_key=api_key)
+    from apps.core.services.ai_clients import openai_client
+    client = openai_client(api_key)
 
     ref_layout_block = ''
     if reference_layout:
@@ -13,8 +13,6 @@ import base64
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 from decimal import Decimal
 
 from django.conf import settings
@@ -59,8 +57,8 @@ def generate_edit_prompt(image_bytes: bytes, user_message: str) -> dict:
     if not api_key:
         raise RuntimeError('OPENAI_API_KEY ausente')
 
-    from openai import OpenAI
-    client = OpenAI(api_key=api_key)
+    from apps.core.services.ai_clients import openai_client
+    client = openai_client(api_key)
 
     b64 = base64.b64encode(image_bytes).decode('ascii')
     resp = client.chat.completions.create(
@@ -120,18 +118,15 @@ def edit_image_with_gemini(image_bytes: bytes, edit_prompt: str,
     }
 
     model_used, endpoint = _resolved_endpoint()
-    req = urllib.request.Request(
-        endpoint, data=json.dumps(payload).encode('utf-8'), method='POST',
+    from apps.core.services import http_client
+    resp = http_client.post(
+        endpoint, data=json.dumps(payload).encode('utf-8'), timeout=180,
         headers={'Content-Type': 'application/json', 'X-Goog-Api-Key': api_key},
     )
-    try:
-        with urllib.request.urlopen(req, timeout=180) as resp:
-            data = resp.read()
-    except urllib.error.HTTPError as exc:
-        err = exc.read().decode('utf-8', errors='ignore')
-        raise RuntimeError(f'Gemini (edit image) HTTP {exc.code}: {err[:500]}')
-
-    response_json = json.loads(data.decode('utf-8'))
+    if resp.status_code >= 400:
+        raise RuntimeError(f'Gemini (edit image) HTTP {resp.status_code}: {resp.text[:500]}')
+
+    response_json = resp.json()
     png_bytes, _mime = _extract_image_from_response(response_json)
     if not png_bytes:
         raise RuntimeError(
@@ -185,8 +180,8 @@ def detect_visible_text(image_bytes: bytes, title: str = '', subtitle: str = '',
     api_key = getattr(settings, 'OPENAI_API_KEY', '') or ''
     if not api_key:
         raise RuntimeError('OPENAI_API_KEY ausente')
-    from openai import OpenAI
-    client = OpenAI(api_key=api_key)
+    from apps.core.services.ai_clients import openai_client
+    client = openai_client(api_key)
     b64 = base64.b64encode(image_bytes).decode('ascii')
     guard_text = (
         'Marketing texts we will overlay:\n'
@@ -21,8 +21,6 @@ import io
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 from decimal import Decimal
 
 from django.conf import settings
@@ -38,8 +36,9 @@ logger = logging.getLogger(__name__)
 def _render_specimen(text: str, font_path: str, font_px: int = 110) -> bytes:
     """Renderiza `text` no `font_path` (.ttf/.otf) e devolve PNG (specimen)."""
     from PIL import Image, ImageDraw, ImageFont
+    from apps.posts.services.artkit.fonts import get_font
     try:
-        font = ImageFont.truetype(font_path, font_px)
+        font = get_font(font_path, font_px)
     except Exception:
         font = ImageFont.load_default()
     sample = (text or 'ABCDEÁÉÍ abcdeáéí 0123').strip()[:60] or 'Aa Bb Cc'
@@ -197,18 +196,15 @@ def apply_text_to_image(*, background_png, font_paths, logo_png=None,
     }
 
     model_used, endpoint = _resolved_endpoint()
-    req = urllib.request.Request(
-        endpoint, data=json.dumps(payload).encode('utf-8'), method='POST',
+    from apps.core.services import http_client
+    resp = http_client.post(
+        endpoint, data=json.dumps(payload).encode('utf-8'), timeout=180,
         headers={'Content-Type': 'application/json', 'X-Goog-Api-Key': api_key},
     )
-    try:
-        with urllib.request.urlopen(req, timeout=180) as resp:
-            data = resp.read()
-    except urllib.error.HTTPError as exc:
-        err = exc.read().decode('utf-8', errors='ignore')
-        raise RuntimeError(f'Gemini (apply text) HTTP {exc.code}: {err[:500]}')
+    if resp.status_code >= 400:
+        raise RuntimeError(f'Gemini (apply text) HTTP {resp.status_code}: {resp.text[:500]}')
 
-    response_json = json.loads(data.decode('utf-8'))
+    response_json = resp.json()
     png_bytes, _mime = _extract_image_from_response(response_json)
     if not png_bytes:
         raise RuntimeError(
@@ -146,9 +146,9 @@ def generate_simple_post(*, kb_summary, rede, formato, is_carousel, image_count,
     if not api_key:
         raise RuntimeError('OPENAI_API_KEY ausente — pipeline simples desabilitado')
 
-    from openai import OpenAI
+    from apps.core.services.ai_clients import openai_client
 
-    client = OpenAI(api_key=api_key)
+    client = openai_client(api_key)
     user_text = _build_user_text(
         kb_summary=kb_summary,
         rede=rede,
@@ -0,0 +1,157 @@
+"""
+Registro das skills (markdown) e dos prefixos de system cacheados do Claude.
+
+Cada agente lia a sua skill no import e montava os blocos de system a mao
+(ordens diferentes: designer/copywriter punham a instrucao ANTES da skill,
+orquestrador depois). O cache ephemeral da Anthropic casa PREFIXO byte a
+byte — ordem ou espaco diferente = cache write pago de novo.
+
+  skill(name)                                  -> Skill (lida 1x por processo)
+  system_prefix(name, instruction, brand='')   -> SystemPrefix(blocks, key)
+  tag_usage(usage, prefix)                     -> usage['cache_prefix'] = key
+
+Ordem FIXA dos blocos (cada um com cache_control, ttl 1h):
+  1. skill        — igual para todo call site da mesma skill
+  2. instrucao    — do call site
+  3. marca (KB)   — opcional, por org (resumo normalizado)
+`key` ('<skill>:<sha12>') identifica o prefixo exato; vai para
+AIUsageEvent.cache_prefix e o `ai_cache_report` mostra hit rate por prefixo
+e os call sites que nao acertam o cache.
+"""
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SERVICES_DIR = Path(__file__).parent
+CACHE_TTL = '1h'
+
+# Base compartilhada (designer + critico aplicam os mesmos principios)
+_SHARED = (
+    'shared_skill/formats-and-safe-zones.md',
+    'shared_skill/typography-scale.md',
+    'shared_skill/contrast-rules.md',
+    'shared_skill/design-principles.md',
+)
+
+SKILLS: Dict[str, Tuple[str, ...]] = {
+    'designer': _SHARED + (
+        'designer_skill/SKILL.md',
+        'designer_skill/references/wireframe-examples.md',
+        'designer_skill/references/prompt-library.md',
+        'designer_skill/references/render-order-guide.md',
+    ),
+    'critic': _SHARED + (
+        'critic_skill/SKILL.md',
+        'critic_skill/references/payload-examples.md',
+    ),
+    'copywriter': (
+        'copywriter_skill/SKILL.md',
+        'copywriter_skill/references/tone-guide.md',
+        'copywriter_skill/references/hook-bank.md',
+        'copywriter_skill/references/copy-examples.md',
+    ),
+    'strategist': (
+        'strategist_skill/SKILL.md',
+        'strategist_skill/references/intention-visual-map.md',
+        'strategist_skill/references/briefing-examples.md',
+    ),
+    'todxs': (
+        'todxs/skill/SKILL.md',
+        'todxs/skill/tone-of-voice.md',
+        'todxs/skill/brand-spec.md',
+        'todxs/skill/prompt-templates.md',
+    ),
+    'vb_illustration': (
+        'vb/illustration/SKILL.md',
+        'vb/illustration/references/estilo.md',
+        'vb/illustration/references/vocabulario.md',
+        'vb/illustration/references/receitas.md',
+        'vb/illustration/assets/exemplos/peixe.json',
+        'vb/illustration/assets/exemplos/ovo.json',
+        'vb/illustration/assets/exemplos/tomate.json',
+    ),
+}
+
+BRAND_MAX_CHARS = 2000
+
+
+@dataclass(frozen=True)
+class Skill:
+    name: str
+    text: str
+    digest: str
+    files: Tuple[Tuple[str, int], ...]   # (arquivo, chars) dos que existem
+
+
+@dataclass(frozen=True)
+class SystemPrefix:
+    blocks: List[dict]
+    key: str
+
+
+_lock = threading.Lock()
+_skills: Dict[str, Skill] = {}
+
+
+def _load(name: str) -> Skill:
+    parts, files = [], []
+    for rel in SKILLS[name]:
+        fp = _SERVICES_DIR / rel
+        try:
+            body = fp.read_text(encoding='utf-8')
+        except OSError:
+            logger.warning('[skills] %s: arquivo faltando: %s', name, rel)
+            continue
+        parts.append(f'\n\n=== ARQUIVO: {fp.name} ===\n\n')
+        parts.append(body)
+        files.append((fp.name, len(body)))
+    text = ''.join(parts)
+    if not text:
+        logger.warning('[skills] skill %s vazia', name)
+    return Skill(name=name, text=text, files=tuple(files),
+                 digest=hashlib.sha256(text.encode('utf-8')).hexdigest())
+
+
+def skill(name: str) -> Skill:
+    """Skill `name` (KeyError se nao registrada), lida uma vez por processo."""
+    loaded = _skills.get(name)
+    if loaded is None:
+        with _lock:
+            loaded = _skills.get(name)
+            if loaded is None:
+                loaded = _skills[name] = _load(name)
+    return loaded
+
+
+def brand_block(kb_summary: str) -> str:
+    """Resumo da marca normalizado (fim de linha/espacos) — mesma KB, mesmos
+    bytes; '' sem resumo."""
+    text = '\n'.join(ln.rstrip() for ln in (kb_summary or '').strip().splitlines())
+    if not text:
+        return ''
+    return '== Contexto da marca (KB) ==\n' + text[:BRAND_MAX_CHARS]
+
+
+def system_prefix(name: str, instruction: str, brand: str = '') -> SystemPrefix:
+    """Blocos de system [skill, instrucao, marca] com cache_control."""
+    texts = [skill(name).text, instruction, brand_block(brand)]
+    blocks = [{'type': 'text', 'text': t,
+               'cache_control': {'type': 'ephemeral', 'ttl': CACHE_TTL}}
+              for t in texts if t]
+    h = hashlib.sha256()
+    for t in texts:
+        h.update(t.encode('utf-8') + b'\0')
+    return SystemPrefix(blocks=blocks, key=f'{name}:{h.hexdigest()[:12]}')
+
+
+def tag_usage(usage: dict, prefix: SystemPrefix) -> dict:
+    """Marca o usage (extract_usage) com o prefixo — vira
+    AIUsageEvent.cache_prefix em record_ai_event."""
+    if usage is not None:
+        usage['cache_prefix'] = prefix.key
+    return usage
@@ -0,0 +1,145 @@
+"""
+Barramento de STATUS de posts (Redis pub/sub) — substitui o polling do front.
+
+Todo save relevante do Post (status, imagem, elementos do editor, fundo) passa
+por publish_status() via signal; as tasks (generate_post_simple_task,
+generate_post_image_task, arquetipos, transcritor) publicam sem codigo extra.
+So DELTAS saem: se o snapshot nao mudou, nada e publicado.
+
+Redis (mesmo do cache):
+  posts:status:<post_id>        snapshot JSON (TTL 1 dia)
+  posts:status:seq              contador global -> `seq` de cada delta
+  posts:status:org:<org_id>     canal pub/sub da org
+
+  publish_status(post)                -> snapshot publicado | None
+  read_snapshots(ids, org_id, since)  -> snapshots com seq > since (sem banco)
+  iter_deltas(ids, org_id, since, max_seconds)
+      snapshots pendentes e depois o que chegar no canal ate max_seconds;
+      yield None = keepalive (sem novidade ha ~15s).
+
+Falha de Redis NUNCA quebra task/view: publish vira no-op, leitura vazia.
+"""
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL = 24 * 3600
+KEEPALIVE_SECONDS = 15
+_PREFIX = 'posts:status'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _key(post_id):
+    return f'{_PREFIX}:{post_id}'
+
+
+def _channel(org_id):
+    return f'{_PREFIX}:org:{org_id}'
+
+
+def build_snapshot(post):
+    """O que o front precisa para decidir se re-busca o post (sem seq)."""
+    has_elements = bool(
+        (post.designer_payload or {}).get('_layout_elements')
+        or (post.copy_payload or {}).get('_layout_elements')
+    )
+    return {
+        'id': post.id,
+        'org': post.organization_id,
+        'status': post.status,
+        'has_image': bool(post.has_image),
+        'editable': bool((post.image_s3_key or '').strip()) and has_elements,
+        'raw_key': post.raw_image_s3_key or '',
+        'last_error': (post.local_pipeline_context or {}).get('last_error', '') or '',
+    }
+
+
+def publish_status(post):
+    """Publica o snapshot do post se mudou desde o ultimo publicado."""
+    if not post.pk or not post.organization_id:
+        return None
+    snap = build_snapshot(post)
+    try:
+        r = _redis()
+        raw = r.get(_key(post.pk))
+        if raw:
+            prev = json.loads(raw)
+            prev.pop('seq', None)
+            if prev == snap:
+                return None
+        snap['seq'] = int(r.incr(f'{_PREFIX}:seq'))
+        payload = json.dumps(snap)
+        pipe = r.pipeline()
+        pipe.set(_key(post.pk), payload, ex=SNAPSHOT_TTL)
+        pipe.publish(_channel(post.organization_id), payload)
+        pipe.execute()
+        return snap
+    except Exception as e:
+        logger.warning(f'[STATUS_BUS] Falha ao publicar post #{post.pk}: {e}')
+        return None
+
+
+def read_snapshots(post_ids, org_id, since=0):
+    """Snapshots (seq > since) dos posts da org — uma MGET, zero queries."""
+    ids = [int(i) for i in post_ids]
+    if not ids:
+        return []
+    try:
+        raws = _redis().mget([_key(i) for i in ids])
+    except Exception as e:
+        logger.warning(f'[STATUS_BUS] Falha ao ler snapshots: {e}')
+        return []
+    out = []
+    for raw in raws:
+        if not raw:
+            continue
+        snap = json.loads(raw)
+        if snap.get('org') == org_id and snap.get('seq', 0) > since:
+            out.append(snap)
+    return sorted(out, key=lambda s: s['seq'])
+
+
+def iter_deltas(post_ids, org_id, since=0, max_seconds=25):
+    """Gera snapshots novos dos posts ate max_seconds. Assina o canal ANTES
+    de ler os snapshots (nada se perde entre os dois); duplicatas saem pelo
+    seq."""
+    ids = {int(i) for i in post_ids}
+    try:
+        pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(_channel(org_id))
+    except Exception as e:
+        logger.warning(f'[STATUS_BUS] Falha ao assinar canal da org {org_id}: {e}')
+        yield from read_snapshots(ids, org_id, since)
+        return
+
+    try:
+        for snap in read_snapshots(ids, org_id, since):
+            since = max(since, snap['seq'])
+            yield snap
+        deadline = time.monotonic() + max_seconds
+        last_sent = time.monotonic()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            msg = pubsub.get_message(timeout=min(1.0, remaining))
+            if msg and msg.get('type') == 'message':
+                snap = json.loads(msg['data'])
+                if snap.get('id') in ids and snap.get('seq', 0) > since:
+                    since = snap['seq']
+                    last_sent = time.monotonic()
+                    yield snap
+            elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield None
+    finally:
+        try:
+            pubsub.close()
+        except Exception:
+            pass
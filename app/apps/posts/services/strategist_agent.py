@@ -14,43 +14,22 @@ import logging
 import os
 import re
 from decimal import Decimal
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from apps.posts.services.skills import system_prefix, tag_usage
+
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-6'
 MAX_TOKENS = 4000
 
-_SKILL_DIR = Path(__file__).parent / 'strategist_skill'
-
-
-def _load_skill() -> str:
-    parts = []
-    files = [
-        _SKILL_DIR / 'SKILL.md',
-        _SKILL_DIR / 'references' / 'intention-visual-map.md',
-        _SKILL_DIR / 'references' / 'briefing-examples.md',
-    ]
-    for fp in files:
-        try:
-            parts.append(f'\n\n=== ARQUIVO: {fp.name} ===\n\n')
-            parts.append(fp.read_text(encoding='utf-8'))
-        except Exception:
-            logger.warning('[strategist] skill file faltando: %s', fp)
-    return ''.join(parts)
-
-
-STRATEGIST_SKILL = _load_skill()
-
-
 SYSTEM_INTRO = """Você é o estrategista criativo do iamkt. Você é o PRIMEIRO
 agente do pipeline. Sua única função é ler o briefing + KB + escolhas do modal
 e produzir o strategic_payload — JSON estruturado que vira brief para os
 agentes downstream (copywriter recebe copy_direction; designer recebe
 visual_direction).
 
-Aplique o passo a passo da skill carregada abaixo. Respeite a cadeia de
+Aplique o passo a passo da skill carregada acima. Respeite a cadeia de
 prioridade (user_explicit > reference_visual > brand_kb > inferred).
 
 Retorne APENAS o JSON do schema do Passo 5, sem texto antes/depois, sem
@@ -77,12 +56,13 @@ def generate_strategy(
         return None
 
     try:
-        import anthropic
+        import anthropic  # noqa: F401 — so checa o SDK
     except ImportError:
         logger.warning('[strategist] anthropic SDK indisponivel')
         return None
 
-    client = anthropic.Anthropic(api_key=api_key)
+    from apps.core.services.ai_clients import anthropic_client
+    client = anthropic_client(api_key)
     user_text = _build_user_text(
         post=post,
         kb_summary=kb_summary,
@@ -93,24 +73,13 @@ def generate_strategy(
         kb_dossiers=kb_dossiers or [],
     )
 
-    system_blocks = [
-        {
-            'type': 'text',
-            'text': SYSTEM_INTRO,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-        {
-            'type': 'text',
-            'text': STRATEGIST_SKILL,
-            'cache_control': {'type': 'ephemeral', 'ttl': '1h'},
-        },
-    ]
+    prefix = system_prefix('strategist', SYSTEM_INTRO, brand=kb_summary)
 
     try:
         resp = client.messages.create(
             model=MODEL,
             max_tokens=MAX_TOKENS,
-            system=system_blocks,
+            system=prefix.blocks,
             messages=[{'role': 'user', 'content': user_text}],
         )
     except Exception:
@@ -125,7 +94,7 @@ def generate_strategy(
         logger.error('[strategist] parse JSON falhou. Raw: %s', raw[:400])
         return None
 
-    usage = _extract_usage(resp, cache_ttl='1h')
+    usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
     intent = (payload.get('intention') or {}).get('primary', '?')
     confidence = (payload.get('briefing_meta') or {}).get('confidence', '?')
     img_style = (payload.get('visual_direction') or {}).get('image_style', '?')
@@ -180,7 +149,7 @@ def _build_user_text(*, post, kb_summary: str,
         '',
         '== Contexto da marca (KB) ==',
         '(prioridade brand_kb na cadeia)',
-        kb_summary[:2000] if kb_summary else '(sem resumo da marca)',
+        '(resumo no system — bloco "Contexto da marca")' if kb_summary else '(sem resumo da marca)',
     ])
 
     if paleta:
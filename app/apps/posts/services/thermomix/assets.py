@@ -16,6 +16,8 @@ _DEJAVU = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
 
 
 def _presigned(logo):
+    # A URL vai para os elementos do editor (browser); o render le o mesmo
+    # objeto direto do S3 (engine._fetch -> S3Service.read_url_bytes).
     try:
         from apps.core.services.s3_service import S3Service
         return S3Service.generate_presigned_download_url(logo.s3_key, expires_in=3600)
@@ -104,12 +106,12 @@ def font_paths(kb, fonts_map: dict) -> dict:
 
 def font_loader(paths: dict):
     """callable(font_key, size_px) -> PIL.ImageFont (contrato do engine v3)."""
-    from PIL import ImageFont
+    from apps.posts.services.artkit.fonts import get_font
 
     def _font(key, size):
         path = paths.get(key) or _DEJAVU
         try:
-            return ImageFont.truetype(path, int(size))
+            return get_font(path, int(size))
         except Exception:
-            return ImageFont.truetype(_DEJAVU, int(size))
+            return get_font(_DEJAVU, int(size))
     return _font
@@ -153,7 +153,8 @@ def render_ana_banana_specimen(kb, text: str):
     anexar ao Gemini como guia tipografico. Best-effort: None se falhar.
     """
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        from PIL import Image, ImageDraw
+        from apps.posts.services.artkit.fonts import get_font
         from apps.posts.services.font_resolver import _load_custom_font
         # Resolve direto pelo CustomFont (Ana Banana), independente de Typography:
         # prefere o peso Black; cai para qualquer titulo; por fim qualquer fonte.
@@ -166,7 +167,7 @@ def render_ana_banana_specimen(kb, text: str):
         if not path:
             return None
         sample = (text or 'TODXS').strip()[:28].upper() or 'TODXS'
-        font = ImageFont.truetype(path, 120)
+        font = get_font(path, 120)
         img = Image.new('RGB', (1400, 320), (244, 241, 217))  # off-white da marca
         draw = ImageDraw.Draw(img)
         draw.text((40, 90), sample, font=font, fill=(0, 0, 0))
@@ -45,23 +45,11 @@ _LH = 1.16  # entrelinha (igual ao render_layout_document ~1.18, com folga)
 
 
 def _fit(text, font_path, max_w, max_h, max_lines, start_px, draw, min_px=14, leading=_LH):
-    """Maior tamanho que cabe o texto em <= max_lines dentro de (max_w,max_h)."""
-    from PIL import ImageFont
-    size = max(min_px, int(start_px))
-    best = None
-    while size >= min_px:
-        try:
-            font = ImageFont.truetype(font_path, size)
-        except Exception:
-            return None, [str(text)], size, int(size * leading)
-        lines = _greedy_wrap(text, font, max_w, draw)
-        total_h = int(size * leading * len(lines))
-        fits_w = all(draw.textlength(ln, font=font) <= max_w for ln in lines)
-        if len(lines) <= max_lines and total_h <= max_h and fits_w:
-            return font, lines, size, total_h
-        best = (font, lines, size, total_h)
-        size -= 2
-    return best if best else (None, [str(text)], min_px, int(min_px * leading))
+    """Maior tamanho que cabe o texto em <= max_lines dentro de (max_w,max_h).
+    (Bissecao de artkit.fit.fit_block — mesmo resultado da descida de 2 em 2px.)"""
+    from apps.posts.services.artkit.fit import fit_block
+    return fit_block(text, font_path, max_w, max_h, max_lines, start_px, draw,
+                     min_px=min_px, leading=leading, step=2)
 
 
 def compute_layout(archetype, content, color_hex, fmt, W, H, weights):
@@ -114,9 +102,9 @@ def compute_layout(archetype, content, color_hex, fmt, W, H, weights):
             if z.get('fixed_fs'):
                 # tamanho TRAVADO: usa o fs exato (nao encolhe) -> consistente
                 # entre posts, independente do texto. So quebra em linhas.
-                from PIL import ImageFont
+                from apps.posts.services.artkit.fonts import get_font
                 try:
-                    font = ImageFont.truetype(font_path, max(8, int(start_px)))
+                    font = get_font(font_path, max(8, int(start_px)))
                 except Exception:
                     font = None
                 lines = _greedy_wrap(text, font, max_w_px, draw)[:max_lines] if font else [text]
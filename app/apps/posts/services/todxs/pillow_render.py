@@ -84,11 +84,9 @@ def resolve_todxs_weights(kb) -> dict:
 
 
 def _download_bytes(url):
-    import urllib.request
+    from apps.core.services.s3_service import S3Service
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 IAMKT'})
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            return resp.read()
+        return S3Service.read_url_bytes(url)
     except Exception:
         logger.warning('[todxs.pillow] download falhou: %s', (url or '')[:80], exc_info=True)
         return None
@@ -211,11 +209,12 @@ def _expand_seals(elements, x_png_bytes):
 
 def _draw_text_el(draw, el, W, H):
     from PIL import ImageFont
+    from apps.posts.services.artkit.fonts import get_font
     basis = min(W, H)
     size = max(8, int(float(el.get('font_size_pct', 5)) / 100.0 * basis))
     path = el.get('_font_path')
     try:
-        font = ImageFont.truetype(path, size)
+        font = get_font(path, size)
     except Exception:
         font = ImageFont.load_default()
     x = float(el.get('x_pct', 0)) / 100.0 * W
@@ -343,8 +342,8 @@ def render_todxs_v3(*, archetype, content, color_hex, fmt, kb,
     weights = resolve_todxs_weights(kb) if kb else {}
 
     def _loader(key, size):
-        from PIL import ImageFont
-        return ImageFont.truetype(weights.get(key), int(size))
+        from apps.posts.services.artkit.fonts import get_font
+        return get_font(weights.get(key), int(size))
 
     norm = spec3.normalize(todxs_to_v3(archetype, fmt, color_hex, src=src))
     return render_v3(norm, content=content,
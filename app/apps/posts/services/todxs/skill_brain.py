@@ -13,33 +13,16 @@ produzir exatamente isso. Reusa _parse_json/_extract_usage do orquestrador.
 """
 import logging
 import os
-from pathlib import Path
 
-from ..artkit.brain import call_brain, cached_system_blocks
+from ..artkit.brain import call_brain
 from ..artkit.brain import parse_json as _parse_json, extract_usage as _extract_usage
+from ..skills import skill, system_prefix, tag_usage
 
 logger = logging.getLogger(__name__)
 
 MODEL = 'claude-sonnet-4-6'
 MAX_TOKENS = 4000
 
-_SKILL_DIR = Path(__file__).parent / 'skill'
-_SKILL_FILES = ['SKILL.md', 'tone-of-voice.md', 'brand-spec.md', 'prompt-templates.md']
-
-
-def _load_skill() -> str:
-    parts = []
-    for name in _SKILL_FILES:
-        try:
-            parts.append(f'\n\n=== ARQUIVO: {name} ===\n\n')
-            parts.append((_SKILL_DIR / name).read_text(encoding='utf-8'))
-        except Exception:
-            logger.warning('[todxs.skill_brain] arquivo de skill faltando: %s', name)
-    return ''.join(parts)
-
-
-SKILL_TEXT = _load_skill()
-
 SYSTEM_INSTRUCTION = """\
 Voce e o MOTOR da skill `todxs-social-posts` (acima). Recebe um briefing de post
 da TODXS + um MENU DE ARQUETIPOS validos para o formato e devolve UM objeto JSON,
@@ -165,22 +148,21 @@ def run_skill_brain(*, brief: dict, brand: dict) -> dict:
 
     user_text = _build_user_text(brief=brief, brand=brand)
 
-    system_blocks = cached_system_blocks(SKILL_TEXT, SYSTEM_INSTRUCTION, ttl='1h')
+    prefix = system_prefix('todxs', SYSTEM_INSTRUCTION)
 
     debug_request = {
         'model': MODEL,
         'system_files': [
-            {'arquivo': n, 'chars': len((_SKILL_DIR / n).read_text(encoding='utf-8'))}
-            for n in _SKILL_FILES if (_SKILL_DIR / n).exists()
+            {'arquivo': n, 'chars': chars} for n, chars in skill('todxs').files
         ],
         'system_instruction': SYSTEM_INSTRUCTION,
         'user': user_text,
     }
 
     resp, raw = call_brain(model=MODEL, max_tokens=MAX_TOKENS,
-                           system=system_blocks, user_text=user_text)
+                           system=prefix.blocks, user_text=user_text)
     structured = _parse_json(raw)
-    usage = _extract_usage(resp, cache_ttl='1h')
+    usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
 
     if not structured or 'archetype' not in structured:
         logger.error('[todxs.skill_brain] output invalido. Raw: %s', raw[:400])
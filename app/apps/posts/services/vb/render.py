@@ -13,6 +13,8 @@ import importlib.util
 
 from PIL import Image, ImageDraw, ImageFont
 
+from apps.posts.services.artkit.fonts import get_font
+
 from .specs import PALETTE
 
 _HERE = os.path.dirname(os.path.abspath(__file__))
@@ -47,7 +49,7 @@ def _rgb(token_or_hex):
 
 
 def _font(font_key, fs):
-    return ImageFont.truetype(os.path.join(_FONTS, _FONT_FILES[font_key]), int(fs))
+    return get_font(os.path.join(_FONTS, _FONT_FILES[font_key]), int(fs))
 
 
 def _lum(rgb):
@@ -315,7 +317,7 @@ def draw_vb_text(img, elements, W, H):
             continue
         size = max(8, int(float(el.get('font_size_pct', 5)) / 100.0 * basis))
         try:
-            font = ImageFont.truetype(el.get('_font_path') or _font_path(el.get('font_key')), size)
+            font = get_font(el.get('_font_path') or _font_path(el.get('font_key')), size)
         except Exception:
             font = ImageFont.load_default()
         # Texto VERTICAL (rotacionado): rasteriza as linhas (exatas do editor) e cola
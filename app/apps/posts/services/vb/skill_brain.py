@@ -12,35 +12,15 @@ contexto cacheado, para compor receitas válidas no traço da marca.
 import json
 import logging
 import os
-from pathlib import Path
 
-from ..artkit.brain import call_brain, cached_system_blocks
+from ..artkit.brain import call_brain
 from ..artkit.brain import parse_json as _parse_json, extract_usage as _extract_usage
+from ..skills import system_prefix, tag_usage
 
 logger = logging.getLogger(__name__)
 MODEL = 'claude-sonnet-4-6'
 MAX_TOKENS = 3000
 
-_ILLU = Path(__file__).parent / 'illustration'
-
-
-def _illustration_skill_text() -> str:
-    parts = []
-    for rel in ['SKILL.md', 'references/estilo.md', 'references/vocabulario.md',
-                'references/receitas.md']:
-        p = _ILLU / rel
-        if p.exists():
-            parts.append(f'\n\n=== {rel} ===\n\n' + p.read_text(encoding='utf-8'))
-    # receitas-exemplo (JSON)
-    for name in ['peixe', 'ovo', 'tomate']:
-        jp = _ILLU / 'assets' / 'exemplos' / f'{name}.json'
-        if jp.exists():
-            parts.append(f'\n\n=== exemplo {name}.json ===\n\n' + jp.read_text(encoding='utf-8'))
-    return ''.join(parts)
-
-
-_SKILL_TEXT = _illustration_skill_text()
-
 # Zonas de texto por arquetipo (o que o brain deve preencher).
 ARCH_ZONES = {
     '01': ('titulo (pergunta/gancho do cotidiano corporativo, caixa baixa, ATE ~10 palavras, '
@@ -127,11 +107,11 @@ Evitar: {', '.join(brand.get('palavras_evitar') or [])}
 Produza o JSON (texto + receita de ilustracao relacionada ao tema).
 """
 
-    system_blocks = cached_system_blocks(_SKILL_TEXT, SYSTEM, ttl='1h')
+    prefix = system_prefix('vb_illustration', SYSTEM)
     resp, raw = call_brain(model=MODEL, max_tokens=MAX_TOKENS,
-                           system=system_blocks, user_text=user_text)
+                           system=prefix.blocks, user_text=user_text)
     structured = _parse_json(raw)
-    usage = _extract_usage(resp, cache_ttl='1h')
+    usage = tag_usage(_extract_usage(resp, cache_ttl='1h'), prefix)
     if not structured or 'content' not in structured:
         logger.error('[vb.skill_brain] output invalido. Raw: %s', raw[:400])
     return {'structured': structured, 'usage': usage, 'model': MODEL,
@@ -1,4 +1,5 @@
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from .models import Post, PostImage
 from apps.core.services import S3Service
@@ -21,6 +22,25 @@ def upload_image_to_s3(sender, instance, **kwargs):
     return
 
 
+# Campos que mudam o que o front exibe enquanto espera (status_bus)
+_STATUS_FIELDS = {
+    'status', 'has_image', 'image_s3_key', 'raw_image_s3_key',
+    'designer_payload', 'copy_payload', 'local_pipeline_context',
+}
+
+
+@receiver(post_save, sender=Post)
+def publish_post_status(sender, instance, update_fields=None, **kwargs):
+    """
+    Publica o delta de status no Redis (front escuta em posts/api/status/)
+    depois do commit. Sem mudanca no snapshot, o publish_status nao emite.
+    """
+    if update_fields is not None and not (set(update_fields) & _STATUS_FIELDS):
+        return
+    from apps.posts.services.status_bus import publish_status
+    transaction.on_commit(lambda: publish_status(instance))
+
+
 @receiver(pre_save, sender=PostImage)
 def upload_post_image_to_s3(sender, instance, **kwargs):
     """
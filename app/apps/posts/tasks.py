@@ -10,7 +10,6 @@ Tasks:
 """
 
 import logging
-from decimal import Decimal
 
 from celery import shared_task
 from django.utils import timezone
@@ -496,7 +495,7 @@ def generate_post_image_task(self, post_id: int, message: str = ''):
                 ctx['orchestration_usage'] = orch_result.get('usage', {})
                 post.local_pipeline_context = ctx
                 post.save(update_fields=['local_pipeline_context'])
-                # Loga custo do orquestrador no ai_usage_log
+                # Loga custo do orquestrador no ledger de uso de IA
                 _record_ai_usage(
                     post,
                     step='text_generation',
@@ -738,7 +737,7 @@ def generate_post_image_task(self, post_id: int, message: str = ''):
                     'edits': cresp.get('edits', []),
                     'usage': cresp.get('usage', {}),
                 })
-                # Loga custo da iteracao do critico no ai_usage_log
+                # Loga custo da iteracao do critico no ledger de uso de IA
                 try:
                     _record_ai_usage(
                         post,
@@ -910,8 +909,6 @@ def regenerate_background_task(self, post_id: int, message: str):
       6. Atualiza post.raw_image_s3_key/url.
     """
     import os as _os
-    import urllib.request as _ur
-    import urllib.error as _ue
     import base64 as _b64
     import json as _json
     from apps.posts.models import Post as _Post
@@ -998,18 +995,17 @@ def regenerate_background_task(self, post_id: int, message: str):
     }
 
     model_used, endpoint = _resolved_endpoint()
-    body = _json.dumps(payload).encode('utf-8')
-    req = _ur.Request(
-        endpoint, data=body, method='POST',
-        headers={'Content-Type': 'application/json', 'X-Goog-Api-Key': api_key},
-    )
+    from apps.core.services import http_client
     try:
-        with _ur.urlopen(req, timeout=180) as resp:
-            response_data = resp.read()
-    except _ue.HTTPError as exc:
-        err_body = exc.read().decode('utf-8', errors='ignore')[:500]
-        logger.error('[regen_bg] Gemini HTTP %s: %s', exc.code, err_body)
-        return {'success': False, 'error': f'gemini_http_{exc.code}', 'detail': err_body}
+        resp = http_client.post(
+            endpoint, data=_json.dumps(payload).encode('utf-8'), timeout=180,
+            headers={'Content-Type': 'application/json', 'X-Goog-Api-Key': api_key},
+        )
+        if resp.status_code >= 400:
+            err_body = resp.text[:500]
+            logger.error('[regen_bg] Gemini HTTP %s: %s', resp.status_code, err_body)
+            return {'success': False, 'error': f'gemini_http_{resp.status_code}', 'detail': err_body}
+        response_data = resp.content
     except Exception:
         logger.exception('[regen_bg] falha chamada Gemini post=%s', post_id)
         return {'success': False, 'error': 'gemini_call_failed'}
@@ -2125,7 +2121,7 @@ def _upload_image_to_s3(*, org_id: int, post_id: int, png_bytes: bytes, mime_typ
 def _log_usage_gemini(post, model: str, cost_usd: float, usage_metadata: dict = None,
                       purpose: str = ''):
     """
-    Loga custo Gemini no Post.ai_usage_log.
+    Loga custo Gemini no ledger de uso de IA do Post.
     usage_metadata: dict do response.usageMetadata do Gemini (tokens reais)
     purpose: granular (C0.2) — ex.: gemini_main, gemini_background,
              gemini_text_apply, gemini_edit_image, gemini_regenerate_background
@@ -2178,78 +2174,35 @@ def _derive_cache_status(cache_creation: int, cache_read: int) -> str:
 def _record_ai_usage(post, *, step: str, model: str, usage_dict: dict,
                      purpose: str = '', images_generated: int = 0):
     """
-    Acumula custo de IA no Post + adiciona entry granular no ai_usage_log.
+    Registra custo de IA do Post no ledger (core.AIUsageEvent).
 
     step: 'text_generation' | 'image_generation' (categoria de billing agregado)
     purpose: 'phase1_text' | 'orchestrator' | 'critic_iter_N' | 'gemini' (granular)
     usage_dict: dict com input_tokens, output_tokens, cost_usd (e demais)
     images_generated: para Gemini, quantas imagens foram geradas (cobranca flat)
-    """
-    from django.conf import settings as dj_settings
-    from django.utils import timezone as dj_tz
-
-    rate = float(getattr(dj_settings, 'USD_TO_BRL_RATE', 5.80))
-    cost_usd_dec = Decimal(str(usage_dict.get('cost_usd', 0) or 0))
-    cost_brl_dec = cost_usd_dec * Decimal(str(rate))
-    cache_read = int(usage_dict.get('cache_read_input_tokens', 0) or 0)
-    cache_creation = int(usage_dict.get('cache_creation_input_tokens', 0) or 0)
-    cache_status = _derive_cache_status(cache_creation, cache_read)
-
-    entry = {
-        'timestamp': dj_tz.now().isoformat(),
-        'step': step,
-        'purpose': purpose,
-        'model': model,
-        'input_tokens': int(usage_dict.get('input_tokens', 0) or 0),
-        'output_tokens': int(usage_dict.get('output_tokens', 0) or 0),
-        'cache_read_tokens': cache_read,
-        'cache_creation_tokens': cache_creation,
-        'cache_status': cache_status,
-        'total_tokens': int(usage_dict.get('total_tokens', 0) or 0),
-        'images_generated': int(images_generated or 0),
-        'cost_usd': float(cost_usd_dec),
-        'cost_brl': float(cost_brl_dec.quantize(Decimal('0.0001'))),
-        'usd_to_brl_rate': rate,
-    }
-
-    # Re-fetch para evitar race conditions (multiplas chamadas em paralelo)
-    try:
-        from apps.posts.models import Post
-        post.refresh_from_db(fields=[
-            'ai_usage_log', 'total_text_cost_usd', 'total_image_cost_usd',
-            'total_cost_usd',
-        ])
-    except Exception:
-        pass
-
-    log = post.ai_usage_log if isinstance(post.ai_usage_log, list) else []
-    log.append(entry)
-    post.ai_usage_log = log
-
-    if step == 'text_generation':
-        post.total_text_cost_usd = (post.total_text_cost_usd or Decimal('0')) + cost_usd_dec
-    elif step == 'image_generation':
-        post.total_image_cost_usd = (post.total_image_cost_usd or Decimal('0')) + cost_usd_dec
-    post.total_cost_usd = (post.total_cost_usd or Decimal('0')) + cost_usd_dec
 
-    post.save(update_fields=[
-        'ai_usage_log',
-        'total_text_cost_usd',
-        'total_image_cost_usd',
-        'total_cost_usd',
-    ])
-
-    # Evento na fonte única org-level (C0.3) — nunca levanta exceção.
+    O evento e a UNICA escrita: Post.total_*_cost_usd sobem via F() e o
+    historico do post e a view core.services.ai_usage.post_usage_log. Dentro
+    de task Celery o evento vai para o lote gravado no fim da task.
+    """
     from apps.core.services.ai_usage import record_ai_event
-    record_ai_event(getattr(post, 'organization', None), step=step, model=model,
-                    usage_dict=usage_dict, purpose=purpose, post=post,
-                    source='posts', images_generated=images_generated)
 
+    event = record_ai_event(getattr(post, 'organization', None), step=step, model=model,
+                            usage_dict=usage_dict, purpose=purpose, post=post,
+                            source='posts', images_generated=images_generated)
+
+    cache_status = _derive_cache_status(
+        int(usage_dict.get('cache_creation_input_tokens', 0) or 0),
+        int(usage_dict.get('cache_read_input_tokens', 0) or 0),
+    )
     logger.info(
-        '[ai_cost] post=%s step=%s model=%s tokens_in=%d tokens_out=%d images=%d cost=$%s (R$%s)',
+        '[ai_cost] post=%s step=%s model=%s tokens_in=%d tokens_out=%d images=%d cache=%s cost=$%s (R$%s)',
         post.id, step, model,
-        entry['input_tokens'], entry['output_tokens'], entry['images_generated'],
-        entry['cost_usd'], entry['cost_brl'],
+        int(usage_dict.get('input_tokens', 0) or 0),
+        int(usage_dict.get('output_tokens', 0) or 0),
+        int(images_generated or 0), cache_status,
+        event.cost_usd if event else usage_dict.get('cost_usd', 0),
+        event.cost_brl if event else '?',
     )
 
 
@@ -655,7 +655,7 @@ def revise_scene_task(self, post_id: int, message: str = ''):
         post.save(update_fields=['status'])
         return {'success': False, 'post_id': post_id, 'error': 'revise_failed'}
 
-    # Registra o CUSTO da alteracao (com cache_status) no ai_usage_log.
+    # Registra o CUSTO da alteracao (com cache_status) no ledger de uso de IA.
     _record_ai_usage(post, step='text_generation',
                      model=result.get('model', 'claude-sonnet-4-6'),
                      usage_dict=result.get('usage') or {}, purpose='orchestrator_revision')
@@ -215,6 +215,8 @@ def _thermomix_render_stage(task, post_id: int, from_gate: bool = False):
         t_ctx['gate'] = {'stage': 'approved', 'at': dj_tz.now().isoformat()}
 
     # ---------------- Etapa 2: fotos por TIPO ----------------
+    # Retrato pode virar elemento do editor (URL p/ o browser) -> presigned.
+    # O fundo so alimenta o render -> bytes lidos direto do S3 (boto3).
     def _presigned_up(up):
         if up and up.s3_key:
             try:
@@ -223,6 +225,14 @@ def _thermomix_render_stage(task, post_id: int, from_gate: bool = False):
                 pass
         return (up.s3_url or None) if up else None
 
+    def _bytes(s3_key, fallback_url=None):
+        if s3_key:
+            try:
+                return S3Service.read_bytes(s3_key)
+            except Exception:
+                logger.warning('[thermomix] leitura S3 falhou: %s', s3_key, exc_info=True)
+        return fallback_url or None
+
     assets = resolve_asset_urls(kb)
     photo_origin = None
     ref = None
@@ -231,20 +241,16 @@ def _thermomix_render_stage(task, post_id: int, from_gate: bool = False):
     if pessoa_up:
         assets['retrato'] = _presigned_up(pessoa_up)
 
-    url = _presigned_up(fundo_up)
-    if url:
-        assets['background_image'] = url
+    fundo = _bytes(fundo_up.s3_key, fundo_up.s3_url) if fundo_up else None
+    if fundo:
+        assets['background_image'] = fundo
         photo_origin = 'user_upload'
     else:
         ids = ctx.get('selected_reference_ids') or []
         ref = (ReferenceImage.objects.filter(knowledge_base=kb, id__in=ids).first()
                if (ids and kb) else None)
         if ref and ref.s3_key:
-            try:
-                assets['background_image'] = S3Service.generate_presigned_download_url(
-                    ref.s3_key, expires_in=3600)
-            except Exception:
-                assets['background_image'] = ref.s3_url or None
+            assets['background_image'] = _bytes(ref.s3_key, ref.s3_url)
             photo_origin = 'kb_reference_selected'
     if 'background_image' not in assets and img_prompt:
         try:
@@ -0,0 +1,166 @@
+"""
+Testes do nucleo ARTKIT (primitivas puras: fontes, fit de texto, degrades).
+
+Sem banco e sem rede — so Pillow + DejaVu do sistema.
+
+Rodar: docker exec iamkt_web python manage.py test apps.posts.test_artkit
+"""
+from django.test import SimpleTestCase
+
+from apps.posts.services.artkit import engine, fit, fonts
+
+DEJAVU = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+
+
+class FontCacheTests(SimpleTestCase):
+    def setUp(self):
+        fonts.cache_clear()
+
+    def test_mesma_fonte_reaproveitada(self):
+        a = fonts.get_font(DEJAVU, 40)
+        b = fonts.get_font(DEJAVU, 40)
+        self.assertIs(a, b)
+        self.assertEqual(fonts.cache_stats()['hits'], 1)
+        self.assertEqual(fonts.cache_stats()['misses'], 1)
+
+    def test_tamanho_e_parte_da_chave(self):
+        self.assertIsNot(fonts.get_font(DEJAVU, 40), fonts.get_font(DEJAVU, 41))
+        self.assertEqual(fonts.get_font(DEJAVU, 41.0).size, 41)
+
+    def test_limite_lru(self):
+        for size in range(10, 10 + fonts._MAXSIZE + 5):
+            fonts.get_font(DEJAVU, size)
+        self.assertEqual(fonts.cache_stats()['size'], fonts._MAXSIZE)
+
+    def test_falha_nao_e_cacheada(self):
+        with self.assertRaises(OSError):
+            fonts.get_font('/nao/existe.ttf', 20)
+        self.assertEqual(fonts.cache_stats()['size'], 0)
+
+
+class LargestFitTests(SimpleTestCase):
+    def _linear(self, start, min_px, step, limit):
+        size = start
+        while size >= min_px:
+            if size <= limit:
+                return size, True
+            size -= step
+        return size + step, False
+
+    def test_mesmo_tamanho_da_descida_linear(self):
+        calls = []
+
+        def attempt(size):
+            calls.append(size)
+            return size <= limit, size
+
+        for step in (1, 2, 3):
+            for limit in range(0, 130, 7):
+                calls.clear()
+                size, res, ok = fit.largest_fit(120, 14, step, attempt)
+                self.assertEqual((size, ok), self._linear(120, 14, step, limit))
+                self.assertEqual(res, size)
+                self.assertLessEqual(len(calls), 10)
+
+    def test_grade_vazia(self):
+        self.assertEqual(fit.largest_fit(10, 14, 1, lambda s: (True, s)),
+                         (None, None, False))
+
+    def test_fit_block_cabe_e_nunca_descarta_texto(self):
+        from PIL import Image, ImageDraw
+        draw = ImageDraw.Draw(Image.new('RGB', (8, 8)))
+        text = 'transformacao extraordinaria em poucas palavras'
+        font, lines, size, total_h = fit.fit_block(text, DEJAVU, 300, 200, 3, 90, draw)
+        self.assertLessEqual(len(lines), 3)
+        self.assertLessEqual(total_h, 200)
+        self.assertEqual(' '.join(lines), text)
+        self.assertEqual(font.size, size)
+        _f, lines, size, _h = fit.fit_block(text, DEJAVU, 40, 20, 1, 90, draw)
+        self.assertEqual(size, 14)
+        self.assertEqual(' '.join(lines), text)
+
+
+class GradientPrimitiveTests(SimpleTestCase):
+    def setUp(self):
+        engine.primitive_cache_clear()
+
+    def test_degrade_radial_igual_ao_calculo_por_pixel(self):
+        import math
+
+        from PIL import Image
+
+        light, dark, cx, cy = (51, 68, 92), (10, 20, 32), 0.6, 0.32
+        ref = Image.new('RGB', (96, 120))
+        ccx, ccy = cx * 96, cy * 120
+        maxd = max(math.hypot(ccx, ccy), math.hypot(ccx - 96, ccy),
+                   math.hypot(ccx, ccy - 120), math.hypot(ccx - 96, ccy - 120))
+        for yy in range(120):
+            for xx in range(96):
+                t = min(1.0, math.hypot(xx - ccx, yy - ccy) / maxd)
+                ref.putpixel((xx, yy), tuple(int(light[i] + (dark[i] - light[i]) * t)
+                                             for i in range(3)))
+        out = engine._gradient_bg(96, 120, {'light': '#33445C', 'dark': '#0A1420'},
+                                  lambda c: c)
+        self.assertEqual(out.tobytes(), ref.resize((96, 120), Image.BICUBIC).tobytes())
+
+    def test_memoizado_devolve_copia(self):
+        grad = {'stops': [{'cor': '#ff0000', 'pos': 0}, {'cor': '#0000ff', 'pos': 100}]}
+        a = engine._grad_fill_stops(200, 80, grad)
+        a.paste((0, 0, 0, 0), (0, 0, 200, 80))   # caller desenha em cima
+        b = engine._grad_fill_stops(200, 80, grad)
+        self.assertEqual(b.getpixel((0, 40)), (255, 0, 0, 255))
+        self.assertEqual(len(engine._primitives), 1)
+
+
+class PhaseTimingTests(SimpleTestCase):
+    def test_fases_do_render_v3_so_dentro_do_bloco(self):
+        from apps.posts.services import preview
+        from apps.posts.services.samsung.wireframes import WF
+
+        arch = sorted(WF())[0]
+        with engine.phase_timings() as t:
+            preview._samsung_v3(None, None, arch, None, None, {})
+        self.assertEqual(set(t), {'background', 'image_zones', 'text_fit',
+                                  'effects', 'png_encode'})
+        self.assertTrue(all(v >= 0 for v in t.values()))
+        preview._samsung_v3(None, None, arch, None, None, {})
+        self.assertIsNone(getattr(engine._phase_local, 'sink', None))
+
+
+class GoldenBenchBaselineTests(SimpleTestCase):
+    def test_sem_baseline_falha_e_record_grava(self):
+        import json
+        import os
+        import tempfile
+        from io import StringIO
+        from unittest import mock
+
+        from django.core.management import call_command
+
+        from apps.posts.management.commands import golden_archetypes as cmd
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'golden_bench.json')
+        cases = [('vb__01__feed', None, None, '01', 'feed')]
+        stats = {'wall_ms': 100.0, 'cpu_ms': 90.0, 'peak_rss_mb': 200.0, 'phases_ms': {}}
+        out = {'stdout': StringIO(), 'stderr': StringIO()}
+        with mock.patch.object(cmd, 'BENCH_BASELINE', path), \
+                mock.patch.object(cmd.Command, '_cases', side_effect=lambda o: list(cases)), \
+                mock.patch.object(cmd.Command, '_measure', side_effect=lambda *a: dict(stats)):
+            with self.assertRaises(SystemExit):   # sem baseline: nunca semeia sozinho
+                call_command('golden_archetypes', '--bench', **out)
+            self.assertFalse(os.path.exists(path))
+
+            call_command('golden_archetypes', '--bench', '--record', **out)
+            with open(path) as f:
+                self.assertEqual(json.load(f)['legacy']['vb__01__feed']['wall_ms'], 100.0)
+            call_command('golden_archetypes', '--bench', **out)   # igual: passa
+
+            stats['wall_ms'] = 200.0
+            with self.assertRaises(SystemExit):
+                call_command('golden_archetypes', '--bench', **out)
+            stats['wall_ms'] = 100.0
+            cases.append(('vb__02__feed', None, None, '02', 'feed'))
+            with self.assertRaises(SystemExit):   # caso novo fora do baseline
+                call_command('golden_archetypes', '--bench', **out)
@@ -10,12 +10,13 @@ Rodar: docker exec iamkt_web python manage.py test apps.posts.test_simple_pipeli
 import json
 from unittest.mock import patch, MagicMock
 
-from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from apps.core.models import Organization
-from apps.posts.models import Post, PostFormat
+from apps.posts.models import Post, PostChangeRequest, PostFormat, PostImage
 
 User = get_user_model()
 
@@ -64,6 +65,8 @@ class FormatosApiTests(TestCase):
 
 class GerarSimplesViewTests(TestCase):
     def setUp(self):
+        cache.clear()   # contadores de quota (Redis) nao voltam no rollback
+        self.addCleanup(cache.clear)
         self.org, self.user = make_org_user()
         self.url = reverse('posts:gerar_simples')
 
@@ -116,6 +119,8 @@ class AdminGatingTests(TestCase):
     """simple-debug é admin-only (visível em prod só para admin)."""
 
     def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.org, self.common = make_org_user(profile='operacional', slug='org-c', email='c@test.com')
         # admin na MESMA org
         self.admin = User.objects.create_user(
@@ -142,6 +147,8 @@ class SimpleTextTaskTests(TestCase):
     """generate_post_simple_task preenche o Post a partir do agente (mockado)."""
 
     def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.org, self.user = make_org_user(slug='org-t', email='t@test.com')
         self.post = make_simple_post(self.org, self.user, status='generating')
 
@@ -221,6 +228,8 @@ class ClaudeOverloadRetryTests(TestCase):
     estado de falha (sem travar em 'generating')."""
 
     def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.org, self.user = make_org_user(slug='org-529', email='r@test.com')
         # Post com os textos do OpenAI JA persistidos (simula 1a tentativa que
         # gerou o texto) -> a task pula o OpenAI e vai direto ao orquestrador.
@@ -311,6 +320,8 @@ class RetryVsRegenerateTests(TestCase):
       texto, forcando a task a re-gerar no OpenAI."""
 
     def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.org, self.user = make_org_user(slug='org-retry', email='rt@test.com')
         self.post = make_simple_post(
             self.org, self.user, status='failed',
@@ -343,3 +354,466 @@ class RetryVsRegenerateTests(TestCase):
         self.assertIsNone(ctx.get('simple_text_saved'))  # cache LIMPO (gera do zero)
         self.assertIsNone(ctx.get('last_error'))
         mock_task.delay.assert_called_once_with(self.post.id)
+
+
+class PostsListApiTests(TestCase):
+    """Listagem em lotes (api/posts/): cursor estavel, contagens anotadas
+    (queries constantes por lote) e so o 1o lote embutido no HTML."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org, self.user = make_org_user(slug='org-lista', email='ls@test.com')
+        self.posts = [make_simple_post(self.org, self.user, title=f'Post {i}')
+                      for i in range(7)]
+        for post in self.posts:
+            PostImage.objects.create(post=post, s3_key=f'k/{post.id}.png', order=0)
+            PostChangeRequest.objects.create(post=post, message='m', change_type='image')
+            PostChangeRequest.objects.create(post=post, message='m', change_type='text')
+            PostChangeRequest.objects.create(post=post, message='m', change_type='text',
+                                             is_initial=True)
+        self.client.force_login(self.user)
+
+    def test_cursor_percorre_tudo_sem_repetir(self):
+        url = reverse('posts:api_posts')
+        resp = self.client.get(url, {'limit': 3})
+        data = resp.json()
+        self.assertEqual(data['total'], 7)
+        ids = [p['id'] for p in data['posts']]
+        while data['next_cursor']:
+            data = self.client.get(url, {'limit': 3, 'cursor': data['next_cursor']}).json()
+            self.assertNotIn('total', data)
+            ids += [p['id'] for p in data['posts']]
+        expected = list(Post.objects.filter(organization=self.org)
+                        .order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_contagens_anotadas_em_queries_constantes(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.posts.tasks_simple import MAX_TEXT_REVISIONS
+        url = reverse('posts:api_posts')
+        self.client.get(url, {'limit': 1})  # aquece sessao/middlewares
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url, {'limit': 1})
+        with CaptureQueriesContext(connection) as big:
+            data = self.client.get(url, {'limit': 7}).json()
+        self.assertEqual(len(big), len(small))  # nada de N+1 por post
+        post = data['posts'][0]
+        self.assertEqual(post['imageChanges'], 1)
+        self.assertEqual(len(post['imagens']), 1)
+        self.assertEqual(post['revisoesTextoRestantes'], MAX_TEXT_REVISIONS - 1)
+
+    def test_filtro_e_cursor_invalido(self):
+        url = reverse('posts:api_posts')
+        data = self.client.get(url, {'search': 'Post 3'}).json()
+        self.assertEqual([p['id'] for p in data['posts']], [self.posts[3].id])
+        self.assertEqual(self.client.get(url, {'cursor': 'lixo'}).status_code, 400)
+
+    def test_pagina_embute_so_o_primeiro_lote(self):
+        with patch('apps.posts.views.POSTS_PAGE_SIZE', 4):
+            resp = self.client.get(reverse('posts:list'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(json.loads(resp.context['posts_json'])), 4)
+        self.assertEqual(resp.context['posts_total'], 7)
+        self.assertTrue(resp.context['posts_next_cursor'])
+
+
+class PostStatusBusTests(TestCase):
+    """Barramento de status (Redis): save do post publica so DELTAS e o
+    endpoint devolve snapshots sem tocar o banco do post."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org, self.user = make_org_user(slug='org-bus', email='bus@test.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = make_simple_post(self.org, self.user, status='generating')
+        self.client.force_login(self.user)
+
+    def _status(self, **params):
+        params.setdefault('ids', str(self.post.id))
+        return self.client.get(reverse('posts:api_status'), params).json()
+
+    def test_transicao_publica_delta(self):
+        first = self._status()
+        self.assertEqual([e['status'] for e in first['events']], ['generating'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.status = 'pending'
+            self.post.save(update_fields=['status'])
+        data = self._status(since=first['seq'])
+        self.assertEqual([e['status'] for e in data['events']], ['pending'])
+        self.assertGreater(data['seq'], first['seq'])
+
+        # save sem mudanca no snapshot nao emite nada novo
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save(update_fields=['status'])
+        self.assertEqual(self._status(since=data['seq'])['events'], [])
+
+    def test_outra_org_nao_ve(self):
+        _org, other = make_org_user(slug='org-bus-2', email='bus2@test.com')
+        self.client.force_login(other)
+        self.assertEqual(self._status()['events'], [])
+
+    def test_stream_desligado_por_padrao(self):
+        resp = self.client.get(reverse('posts:api_status'),
+                               {'ids': self.post.id, 'stream': 1})
+        self.assertEqual(resp.status_code, 404)
+
+    @override_settings(POST_STATUS_STREAM_SECONDS=1)
+    def test_stream_sse(self):
+        resp = self.client.get(reverse('posts:api_status'),
+                               {'ids': self.post.id, 'stream': 1})
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        body = b''.join(resp.streaming_content).decode()
+        self.assertIn('event: status', body)
+        self.assertIn('"status": "generating"', body)
+
+
+class RefFetchTests(SimpleTestCase):
+    """Estagio paralelo de download das referencias (ref_fetch)."""
+
+    def test_ordem_dedupe_e_paralelismo(self):
+        import time
+        from apps.posts.services.ref_fetch import fetch_b64_many
+        calls = []
+
+        def fetch_one(url):
+            calls.append(url)
+            time.sleep(0.3)
+            return url.split('?')[0][-1], 'image/png'
+
+        urls = ['https://s3/k/a?sig=1', None, 'https://s3/k/b', 'https://s3/k/a?sig=2',
+                'https://s3/k/c', 'https://s3/k/d']
+        t0 = time.monotonic()
+        out = fetch_b64_many(urls, fetch_one)
+        self.assertLess(time.monotonic() - t0, 0.9)
+        self.assertEqual([b64 for b64, _ in out], ['a', None, 'b', 'a', 'c', 'd'])
+        self.assertEqual(len(calls), 4)  # 'a' baixada uma vez so
+
+    def test_item_lento_vira_falha(self):
+        import time
+        from apps.posts.services.ref_fetch import fetch_b64_many
+
+        def fetch_one(url):
+            if url.endswith('lenta'):
+                time.sleep(1.0)
+            return 'ok', 'image/jpeg'
+
+        out = fetch_b64_many(['https://s3/rapida', 'https://s3/lenta'], fetch_one, timeout=0.3)
+        self.assertEqual(out, [('ok', 'image/jpeg'), (None, None)])
+
+    def test_prazo_por_item_nao_conta_fila(self):
+        import time
+        from apps.posts.services.ref_fetch import fetch_b64_many
+
+        def fetch_one(url):
+            time.sleep(0.2)
+            return url[-1], 'image/png'
+
+        # 4 refs em 2 threads: a 2a leva de itens so comeca em ~0.2s, mas
+        # cada uma tem seus 0.3s
+        out = fetch_b64_many([f'https://s3/{c}' for c in 'abcd'], fetch_one,
+                             max_workers=2, timeout=0.3)
+        self.assertEqual([b64 for b64, _ in out], list('abcd'))
+
+    def test_thread_liberada_apos_estouro_volta_a_servir_a_fila(self):
+        import time
+        from apps.posts.services.ref_fetch import fetch_b64_many
+
+        naps = {'a': 0.33, 'b': 0.15, 'c': 1.0, 'd': 0.2, 'e': 0.05}
+
+        def fetch_one(url):
+            time.sleep(naps[url[-1]])
+            return url[-1], 'image/png'
+
+        # 2 threads, prazo 0.3s: 'a' estoura e termina (thread volta ao pool)
+        # antes de 'c' estourar -> so 1 thread presa, 'e' ainda roda
+        out = fetch_b64_many([f'https://s3/{c}' for c in 'abcde'], fetch_one,
+                             max_workers=2, timeout=0.3)
+        self.assertEqual([b64 for b64, _ in out], [None, 'b', None, 'd', 'e'])
+
+    def test_url_unica_tambem_tem_prazo(self):
+        import time
+        from apps.posts.services.ref_fetch import fetch_b64_many
+
+        t0 = time.monotonic()
+        out = fetch_b64_many(['https://s3/lenta'], lambda url: time.sleep(1.0) or ('x', 'image/png'),
+                             timeout=0.2)
+        self.assertEqual(out, [(None, None)])
+        self.assertLess(time.monotonic() - t0, 0.8)
+
+
+@override_settings(AWS_BUCKET_NAME='iamkt-uploads')
+class AIPayloadCacheTests(SimpleTestCase):
+    """Cache em disco dos payloads de imagem prontos para a IA."""
+
+    def setUp(self):
+        import tempfile
+        from unittest import mock
+        from apps.posts.services import ai_payload_cache
+        self.cache = ai_payload_cache
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for patcher in (mock.patch.object(ai_payload_cache, 'CACHE_DIR', tmp.name),
+                        mock.patch.object(ai_payload_cache, '_etag', side_effect=lambda k: self.etag)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.etag = 'v1'
+        self.calls = 0
+
+    def _produce(self, b64='iVBORw0K', mime='image/png'):
+        def produce():
+            self.calls += 1
+            return b64, mime
+        return produce
+
+    def test_hit_mesmo_objeto_com_assinatura_diferente(self):
+        url = 'https://iamkt-uploads.s3.amazonaws.com/org-1/logos/a.png?X-Amz-Signature='
+        self.assertEqual(self.cache.cached_payload(url + '1', 'gemini:1', self._produce()),
+                         ('iVBORw0K', 'image/png'))
+        self.assertEqual(self.cache.cached_payload(url + '2', 'gemini:1', self._produce()),
+                         ('iVBORw0K', 'image/png'))
+        self.assertEqual(self.calls, 1)
+        # Outro teto / outro ETag -> outra entrada
+        self.cache.cached_payload(url, 'claude:1', self._produce())
+        self.etag = 'v2'
+        self.cache.cached_payload(url, 'gemini:1', self._produce())
+        self.assertEqual(self.calls, 3)
+
+    def test_falha_e_url_externa_nao_cacheiam(self):
+        url = 'https://iamkt-uploads.s3.amazonaws.com/org-1/logos/b.png'
+        for _ in range(2):
+            self.cache.cached_payload(url, 'gemini:1', self._produce(b64=None))
+            self.cache.cached_payload('https://cdn.example.com/b.png', 'gemini:1', self._produce())
+        self.assertEqual(self.calls, 4)
+
+    def test_lru_respeita_teto(self):
+        from unittest import mock
+        import base64
+        import os
+        import time
+        blob = base64.b64encode(b'x' * 1000).decode('ascii')
+        with mock.patch.object(self.cache, 'MAX_BYTES', 2500):
+            for name in ('a', 'b', 'c'):
+                self.cache.cached_payload(
+                    f'https://iamkt-uploads.s3.amazonaws.com/{name}.png', 'p', self._produce(b64=blob))
+                time.sleep(0.01)
+        sizes = [os.path.getsize(os.path.join(r, f))
+                 for r, _d, fs in os.walk(self.cache.CACHE_DIR) for f in fs]
+        self.assertEqual(len(sizes), 2)
+        self.assertLessEqual(sum(sizes), 2500)
+
+    def test_lru_nao_varre_o_diretorio_a_cada_gravacao(self):
+        from unittest import mock
+        import os
+        from apps.posts.services import disk_lru
+        walks = []
+        real_walk = os.walk
+
+        def walk(root):
+            walks.append(root)
+            return real_walk(root)
+
+        with mock.patch.object(disk_lru.os, 'walk', side_effect=walk):
+            for name in 'abcde':
+                self.cache.cached_payload(
+                    f'https://iamkt-uploads.s3.amazonaws.com/{name}.png', 'p', self._produce())
+        self.assertEqual(len(walks), 1)   # so a 1a gravacao (total desconhecido)
+
+
+class RenderCacheTests(SimpleTestCase):
+    """Cache enderecado por conteudo dos renders (preview / re-render)."""
+
+    def setUp(self):
+        import tempfile
+        from unittest import mock
+        from apps.posts.services import render_cache
+        self.cache = render_cache
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(render_cache, 'CACHE_DIR', tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = 0
+
+    def _produce(self, png=b'\x89PNG-a'):
+        def produce():
+            self.calls += 1
+            return png, {'elements': [{'type': 'headline'}]}
+        return produce
+
+    def test_hit_devolve_png_e_meta(self):
+        key = self.cache.render_key(kind='preview', spec={'a': 1}, fonts=['f1'])
+        first = self.cache.cached_render(key, self._produce())
+        second = self.cache.cached_render(key, self._produce(png=b'outro'))
+        self.assertEqual(first, second)
+        self.assertEqual(second[1]['elements'][0]['type'], 'headline')
+        self.assertEqual(self.calls, 1)
+
+    def test_chave_muda_com_entradas_e_engine(self):
+        from unittest import mock
+        key = self.cache.render_key(kind='preview', spec={'a': 1}, fonts=['f1'])
+        self.assertEqual(key, self.cache.render_key(fonts=['f1'], spec={'a': 1}, kind='preview'))
+        self.assertNotEqual(key, self.cache.render_key(kind='preview', spec={'a': 1}, fonts=['f2']))
+        with mock.patch.object(self.cache, '_engine_version', 'outro-deploy'):
+            self.assertNotEqual(key, self.cache.render_key(kind='preview', spec={'a': 1}, fonts=['f1']))
+
+    def test_falha_e_sem_chave_nao_cacheiam(self):
+        for _ in range(2):
+            self.cache.cached_render('k' * 64, self._produce(png=None))
+            self.cache.cached_render(None, self._produce())
+        self.assertEqual(self.calls, 4)
+
+
+class SaveElementsRenderCacheTests(TestCase):
+    """save_elements: mesmo fundo + elementos + spec do publicado -> devolve o
+    publicado; editar os elementos ou a spec da org (banco) -> novo render."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        from unittest import mock
+        from apps.posts import views_overlay
+        self.org, self.user = make_org_user(slug='vb-gastronomia', email='se@test.com')
+        self.post = make_simple_post(
+            self.org, self.user, pipeline_used='vb', raw_image_s3_key='raw/1.png',
+            local_pipeline_context={'vb': {'archetype': '01'}},
+        )
+        self.renders = []
+        for patcher in (
+            mock.patch('apps.posts.services.render_cache.etag', return_value='etag-raw'),
+            mock.patch.object(views_overlay, '_vb_rerender_published', side_effect=self._rerender),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+
+    def _rerender(self, post, elements, render_key=None):
+        self.renders.append(render_key)
+        post.image_s3_key = f'img/{len(self.renders)}.png'
+        post.save(update_fields=['image_s3_key'])
+        return 'https://s3/' + post.image_s3_key
+
+    def _save(self, text):
+        resp = self.client.post(
+            reverse('posts:save_elements', args=[self.post.id]),
+            data=json.dumps({'elements': [{'role': 'headline', 'text': text}]}),
+            content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_hit_e_miss_por_elementos_e_spec(self):
+        from apps.posts.models import PostArchetype
+        from apps.posts.services.vb.specs import SPECS
+
+        self._save('Ola')
+        self.assertEqual(self._save('Ola')['image_s3_key'], 'img/1.png')
+        self.assertEqual(len(self.renders), 1)   # hit: nada redesenhado
+
+        self._save('Ola mundo')
+        self.assertEqual(len(self.renders), 2)   # elementos mudaram
+
+        spec = dict(SPECS['01'], safe=SPECS['01'].get('safe', 0) + 10)
+        PostArchetype.objects.create(organization=self.org, key='01', name='Hook', spec=spec)
+        self._save('Ola mundo')
+        self.assertEqual(len(self.renders), 3)   # spec da org mudou no banco
+        self.assertEqual(len(set(self.renders)), 3)
+
+
+class SkillRegistryTests(TestCase):
+    """Prefixos de system byte-estaveis + hit rate por prefixo no ledger."""
+
+    def test_prefixo_estavel_e_skill_compartilhada(self):
+        from apps.posts.services.skills import system_prefix
+        a = system_prefix('designer', 'INSTRUCAO A', brand='Marca X  \r\nlinha 2\n')
+        b = system_prefix('designer', 'INSTRUCAO A', brand='Marca X\nlinha 2')
+        self.assertEqual((a.key, a.blocks), (b.key, b.blocks))
+        self.assertTrue(a.key.startswith('designer:'))
+        self.assertIn('SKILL.md', a.blocks[0]['text'])
+        # outro call site da MESMA skill: bloco 1 identico (prefixo lido do cache)
+        other = system_prefix('designer', 'INSTRUCAO B')
+        self.assertEqual(other.blocks[0], a.blocks[0])
+        self.assertNotEqual(other.key, a.key)
+        self.assertEqual(len(other.blocks), 2)
+
+    def test_cache_prefix_no_evento_e_relatorio(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from apps.core.services.ai_usage import record_ai_event
+        from apps.posts.services.skills import system_prefix, tag_usage
+        org, _ = make_org_user(slug='org-cache', email='cache@test.com')
+        prefix = system_prefix('critic', 'instrucao')
+        for read in (0, 900, 900):
+            usage = tag_usage({'input_tokens': 100, 'cache_read_input_tokens': read,
+                               'cache_creation_input_tokens': 900 - read}, prefix)
+            record_ai_event(org, step='text_generation', model='claude-sonnet-4-6',
+                            usage_dict=usage, purpose='critic_iter_1', source='posts')
+        record_ai_event(org, step='text_generation', model='claude-sonnet-4-6',
+                        usage_dict={'input_tokens': 500}, purpose='adhoc', source='posts')
+        self.assertEqual(org.ai_usage_events.filter(cache_prefix=prefix.key).count(), 3)
+        out = StringIO()
+        call_command('ai_cache_report', '--csv', stdout=out)
+        lines = out.getvalue().splitlines()
+        # ordenado pelo prompt pago cheio (sem cache + escrito): 1200 > 500
+        self.assertTrue(lines[1].startswith(f'posts,critic_iter_1,{prefix.key},3,1,300,900,1800,0.6'))
+        self.assertTrue(lines[2].startswith('posts,adhoc,,1,1,500,0,0,0.0'))
+        out = StringIO()
+        call_command('ai_cache_report', stdout=out)
+        self.assertIn('call sites sem prefixo: 1', out.getvalue())
+
+
+class AIUsageLedgerTests(TestCase):
+    """Custo de IA: AIUsageEvent e a unica escrita; totais via F(); lote por task."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org, self.user = make_org_user(slug='org-ledger', email='ledger@test.com')
+        self.post = make_simple_post(self.org, self.user)
+
+    def _record(self, step='text_generation', cost=0.01, **kw):
+        from apps.posts.tasks import _record_ai_usage
+        _record_ai_usage(self.post, step=step, model='m', purpose='p',
+                         usage_dict={'input_tokens': 10, 'output_tokens': 5,
+                                     'cost_usd': cost, **kw})
+
+    def test_evento_imediato_e_totais_atomicos(self):
+        from decimal import Decimal
+        from apps.core.services.ai_usage import post_usage_log
+        self._record(cache_read_input_tokens=7)
+        self._record(step='image_generation', cost=0.134)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.ai_usage_events.count(), 2)
+        self.assertEqual(self.post.total_text_cost_usd, Decimal('0.01'))
+        self.assertEqual(self.post.total_image_cost_usd, Decimal('0.134'))
+        self.assertEqual(self.post.total_cost_usd, Decimal('0.144'))
+        self.assertEqual(self.post.ai_usage_log, [])
+        log = post_usage_log(self.post)
+        self.assertEqual([e['step'] for e in log], ['text_generation', 'image_generation'])
+        self.assertEqual(log[0]['cache_status'], 'warm')
+
+    def test_lote_grava_no_fim(self):
+        from decimal import Decimal
+        from apps.core.models import AIUsageEvent
+        from apps.core.services.ai_usage import ai_usage_batch
+        with ai_usage_batch():
+            with self.assertNumQueries(0):
+                for _ in range(4):
+                    self._record()
+            self.assertFalse(AIUsageEvent.objects.exists())
+        self.assertEqual(AIUsageEvent.objects.filter(post=self.post).count(), 4)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_cost_usd, Decimal('0.04'))
+
+    def test_log_legado_antes_do_ledger(self):
+        from apps.core.services.ai_usage import post_usage_log
+        Post.objects.filter(pk=self.post.pk).update(ai_usage_log=[
+            {'timestamp': '2026-01-01T00:00:00+00:00', 'step': 'text_generation', 'cost_usd': 0.5},
+        ])
+        self.post.refresh_from_db()
+        self._record()
+        log = post_usage_log(self.post)
+        self.assertEqual(len(log), 2)
+        self.assertEqual(log[0]['timestamp'][:10], '2026-01-01')
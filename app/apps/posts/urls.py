@@ -9,6 +9,8 @@ urlpatterns = [
     # API
     path('api/formatos/', views_api.get_post_formats, name='api_formatos'),
     path('api/org-assets/', views_api.get_org_assets, name='api_org_assets'),
+    path('api/posts/', views.posts_page_json, name='api_posts'),
+    path('api/status/', views.post_status, name='api_status'),
     
     # Gerar Post
     path('gerar/', views_gerar.gerar_post, name='gerar'),
@@ -1,10 +1,20 @@
+import base64
+import json
+from datetime import datetime
+
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Q
 from .models import Post
 
+# Listagem: o front pagina 1 post por vez, mas busca em LOTES pela API
+# (cursor sobre -created_at,-id). A pagina HTML embute so o 1o lote.
+POSTS_PAGE_SIZE = 20
+POSTS_PAGE_MAX = 100
+
 
 def _post_payload(post):
     """Dict de um post para o front (mesmo formato do INITIAL_POSTS embutido).
@@ -23,7 +33,8 @@ def _post_payload(post):
         (post.designer_payload or {}).get('_layout_elements')
         or (post.copy_payload or {}).get('_layout_elements')
     )
-    post_images = post.images.all().order_by('order')
+    # .all() respeita o prefetch (Meta.ordering ja e 'order').
+    post_images = post.images.all()
     imagens_data = [
         {
             'id': img.id,
@@ -44,19 +55,24 @@ def _post_payload(post):
         image_status = 'none'
 
     # Contar alterações de imagem
-    image_changes = post.change_requests.filter(
-        change_type='image',
-        is_initial=False
-    ).count()
+    # (anotado por _posts_queryset; post_json sem anotacao conta aqui)
+    image_changes = getattr(post, 'n_image_changes', None)
+    if image_changes is None:
+        image_changes = post.change_requests.filter(
+            change_type='image',
+            is_initial=False
+        ).count()
 
     # Obter limite de alterações da organização
     max_image_revisions = post.organization.max_image_revisions if post.organization else 1
 
     # Alterações de CENA ("Alterar Cena - IA") restantes (limite local)
     from apps.posts.tasks_simple import MAX_TEXT_REVISIONS
-    text_changes = post.change_requests.filter(
-        change_type='text', is_initial=False
-    ).count()
+    text_changes = getattr(post, 'n_text_changes', None)
+    if text_changes is None:
+        text_changes = post.change_requests.filter(
+            change_type='text', is_initial=False
+        ).count()
     revisoes_texto_restantes = max(0, MAX_TEXT_REVISIONS - text_changes)
 
     # Descricao da imagem mostrada/aprovada no front.
@@ -127,62 +143,190 @@ def post_json(request, post_id):
     return JsonResponse({'success': True, 'post': _post_payload(post)})
 
 
-@login_required
-def posts_list(request):
-    """
-    Lista de posts com filtros e paginação
-    """
-    # Filtrar posts da organização do usuário
+def _filtered_posts(request):
+    """Posts da org do usuario com os filtros da listagem (data/status/busca).
+    -> (queryset, filtros)"""
     posts = Post.objects.filter(organization=request.user.organization)
-    
-    # Aplicar filtros
     filtros = {}
-    
+
     # Filtro por data
     data = request.GET.get('data')
     if data:
         posts = posts.filter(created_at__date=data)
         filtros['data'] = data
-    
+
     # Filtro por status
     status = request.GET.get('status')
     if status and status != 'all':
         posts = posts.filter(status=status)
         filtros['status'] = status
-    
-    # Filtro por busca (título)
-    search = request.GET.get('search')
+
+    # Filtro por busca (título; numero = id, como o filtro antigo do front)
+    search = (request.GET.get('search') or '').strip()
     if search:
-        posts = posts.filter(title__icontains=search)
+        q = Q(title__icontains=search)
+        if search.isdigit():
+            q |= Q(id=int(search))
+        posts = posts.filter(q)
         filtros['search'] = search
-    
+
+    return posts, filtros
+
+
+def _posts_queryset(posts):
+    """Queryset pronto para _post_payload: contagens de alteracao ANOTADAS
+    (1 query para o lote, em vez de 2 COUNTs por post), imagens em prefetch
+    e organizacao no mesmo SELECT. Ordem estavel para o cursor."""
+    def _changes(kind):
+        return Count('change_requests', filter=Q(
+            change_requests__change_type=kind,
+            change_requests__is_initial=False,
+        ))
+
+    return (posts
+            .select_related('organization')
+            .prefetch_related('images')
+            .annotate(n_image_changes=_changes('image'),
+                      n_text_changes=_changes('text'))
+            .order_by('-created_at', '-id'))
+
+
+def _encode_cursor(post):
+    raw = f'{post.created_at.isoformat()}|{post.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """-> (created_at, id). ValueError se o cursor nao for nosso."""
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    created, _, pk = raw.rpartition('|')
+    created_at = datetime.fromisoformat(created)
+    if created_at.tzinfo is None:
+        raise ValueError('cursor sem timezone')
+    return created_at, int(pk)
+
+
+def _posts_page(posts, cursor=None, limit=POSTS_PAGE_SIZE):
+    """Um lote da listagem, do cursor em diante (keyset: sem OFFSET, custo
+    constante em orgs com milhares de posts). -> (payloads, next_cursor)"""
+    qs = _posts_queryset(posts)
+    if cursor:
+        created_at, pk = _decode_cursor(cursor)
+        qs = qs.filter(Q(created_at__lt=created_at)
+                       | Q(created_at=created_at, id__lt=pk))
+    batch = list(qs[:limit + 1])
+    has_more = len(batch) > limit
+    batch = batch[:limit]
+
+    payloads = []
+    for post in batch:
+        try:
+            payloads.append(_post_payload(post))
+        except Exception:
+            continue
+    next_cursor = _encode_cursor(batch[-1]) if has_more else None
+    return payloads, next_cursor
+
+
+@login_required
+def posts_page_json(request):
+    """Lote JSON da listagem (mesmos filtros da pagina): ?cursor=&limit=.
+    `total` so vem no 1o lote (sem cursor) — o front guarda."""
+    posts, _filtros = _filtered_posts(request)
+    try:
+        limit = int(request.GET.get('limit') or POSTS_PAGE_SIZE)
+    except ValueError:
+        limit = POSTS_PAGE_SIZE
+    limit = max(1, min(POSTS_PAGE_MAX, limit))
+    cursor = request.GET.get('cursor') or None
+    try:
+        payloads, next_cursor = _posts_page(posts, cursor, limit)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+
+    data = {'success': True, 'posts': payloads, 'next_cursor': next_cursor}
+    if not cursor:
+        data['total'] = posts.count()
+    return JsonResponse(data)
+
+
+@login_required
+def post_status(request):
+    """Deltas de status dos posts (status_bus/Redis) — sem tocar o banco.
+    ?ids=1,2&since=<seq>
+      JSON (padrao): snapshots com seq > since; `wait`=s segura ate chegar
+        algo (limitado a POST_STATUS_STREAM_SECONDS).
+      ?stream=1: text/event-stream (SSE) por ate POST_STATUS_STREAM_SECONDS;
+        o EventSource reconecta sozinho com Last-Event-ID.
+    Segurar conexao so faz sentido com workers async/threads; com o gunicorn
+    sync o default (0) desliga stream/wait e o front consulta o snapshot."""
+    from apps.posts.services import status_bus
+
+    try:
+        ids = [int(x) for x in (request.GET.get('ids') or '').split(',') if x.strip()]
+        since = int(request.headers.get('Last-Event-ID') or request.GET.get('since') or 0)
+        wait = int(request.GET.get('wait') or 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Parâmetros inválidos'}, status=400)
+    ids = ids[:50]
+    org = getattr(request, 'organization', None)
+    max_wait = max(0, settings.POST_STATUS_STREAM_SECONDS)
+
+    if request.GET.get('stream') == '1':
+        if not max_wait or not org or not ids:
+            return JsonResponse({'success': False, 'error': 'Stream indisponível'}, status=404)
+
+        def events():
+            yield 'retry: 3000\n\n'
+            for snap in status_bus.iter_deltas(ids, org.id, since, max_wait):
+                if snap is None:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"id: {snap['seq']}\nevent: status\ndata: {json.dumps(snap)}\n\n"
+
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    events = status_bus.read_snapshots(ids, org.id, since) if (org and ids) else []
+    wait = min(wait, max_wait)
+    if not events and wait > 0 and org and ids:
+        snap = next((s for s in status_bus.iter_deltas(ids, org.id, since, wait) if s), None)
+        events = [snap] if snap else []
+    seq = max([since] + [e['seq'] for e in events])
+    return JsonResponse({'success': True, 'events': events, 'seq': seq})
+
+
+@login_required
+def posts_list(request):
+    """
+    Lista de posts com filtros e paginação
+    """
+    posts, filtros = _filtered_posts(request)
+
     # Paginação - 1 post por vez (como no resumo.html)
     paginator = Paginator(posts, 1)  # 1 post por página
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
     
-    # Verificar se tem knowledge base
-    knowledge_base = hasattr(request.user.organization, 'knowledge_base')
-    
-    # Preparar dados para JavaScript - ENVIAR TODOS OS POSTS (como no resumo.html)
-    # O JavaScript faz a paginação no frontend
-    import json
-    
-    posts_json = []
-    for post in posts.prefetch_related('images', 'change_requests').order_by('-created_at'):
-        try:
-            posts_json.append(_post_payload(post))
-        except Exception:
-            continue
-    
-    # Converter para JSON string para passar ao template
-    posts_json = json.dumps(posts_json)
+    # Verificar se tem knowledge base (request.tenant: sem query extra)
+    from apps.core.tenant import get_tenant_context
+    knowledge_base = get_tenant_context(request).kb_exists
     
+    # Dados para o JavaScript: so o 1o LOTE (o front pede os seguintes em
+    # api/posts/ conforme navega). Total vem do paginator acima.
+    first_page, next_cursor = _posts_page(posts, None, POSTS_PAGE_SIZE)
+    posts_json = json.dumps(first_page)
+
     context = {
         'page_obj': page_obj,
         'filtros': filtros,
         'knowledge_base': knowledge_base,
         'posts_json': posts_json,
+        'posts_next_cursor': next_cursor or '',
+        'posts_total': page_obj.paginator.count,
+        'post_status_stream': settings.POST_STATUS_STREAM_SECONDS > 0,
         'posts_webhook_url': settings.N8N_WEBHOOK_GERAR_POST,
         'enable_local_pipeline': settings.ENABLE_LOCAL_PIPELINE,
         # Equipe INTERNA = superuser ou staff. Controla o seletor de pipeline,
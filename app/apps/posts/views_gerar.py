@@ -38,6 +38,7 @@ def gerar_post(request):
             }
         }
     """
+    reservation = None
     try:
         # Parse JSON body
         data = json.loads(request.body)
@@ -132,10 +133,11 @@ def gerar_post(request):
         else:
             content_type = 'post'
         
-        # Quota: limite DIARIO/MENSAL de posts da organizacao.
-        can_create, _qcode, qmsg = request.user.organization.can_create_post()
-        if not can_create:
-            return JsonResponse({'success': False, 'error': qmsg}, status=403)
+        # Quota: reserva atomica no limite DIARIO/MENSAL de posts da organizacao.
+        from apps.core.services import quota
+        reservation = quota.reserve(request.user.organization, 'post')
+        if not reservation:
+            return JsonResponse({'success': False, 'error': reservation.message}, status=403)
 
         # Criar Post com transaction
         with transaction.atomic():
@@ -178,6 +180,7 @@ def gerar_post(request):
                 )
             
             logger.info(f"Post {post.id} criado com {len(reference_images)} imagens de referência")
+        reservation.commit()
         
         # Enviar para N8N (se configurado)
         n8n_success = False
@@ -323,6 +326,8 @@ def gerar_post(request):
             'error': 'JSON inválido'
         }, status=400)
     except Exception as e:
+        if reservation is not None:
+            reservation.refund()
         logger.error(f"Erro ao criar post: {str(e)}", exc_info=True)
         
         return JsonResponse({
@@ -153,9 +153,10 @@ def gerar_post_local(request):
     )
 
     # Quota: limite DIARIO/MENSAL de posts da organizacao.
-    can_create, _qcode, qmsg = request.user.organization.can_create_post()
-    if not can_create:
-        return JsonResponse({'success': False, 'error': qmsg}, status=403)
+    from apps.core.services import quota
+    reservation = quota.reserve(request.user.organization, 'post')
+    if not reservation:
+        return JsonResponse({'success': False, 'error': reservation.message}, status=403)
 
     # ---- Cria Post + dispara task ----
     try:
@@ -205,6 +206,7 @@ def gerar_post_local(request):
                 post.id, len(reference_images),
             )
 
+        reservation.commit()
         # Dispara task fora da transacao para garantir que o Post foi commitado
         generate_post_text_task.delay(post.id)
 
@@ -218,6 +220,7 @@ def gerar_post_local(request):
         })
 
     except Exception:
+        reservation.refund()
         logger.exception('[posts.local] Falha ao criar post local')
         return JsonResponse(
             {'success': False, 'error': 'Erro interno ao criar post'},
@@ -75,9 +75,10 @@ def gerar_post_samsung(request):
 
     content_type = 'carrossel' if is_carousel else ('story' if formato == 'stories' else 'post')
 
-    can_create, _qcode, qmsg = request.user.organization.can_create_post()
-    if not can_create:
-        return JsonResponse({'success': False, 'error': qmsg}, status=403)
+    from apps.core.services import quota
+    reservation = quota.reserve(request.user.organization, 'post')
+    if not reservation:
+        return JsonResponse({'success': False, 'error': reservation.message}, status=403)
 
     try:
         with transaction.atomic():
@@ -125,6 +126,7 @@ def gerar_post_samsung(request):
                 )
             logger.info('[posts.samsung] Post %s criado pipeline=samsung', post.id)
 
+        reservation.commit()
         generate_post_samsung_task.delay(post.id)
 
         return JsonResponse({
@@ -136,5 +138,6 @@ def gerar_post_samsung(request):
             'message': 'Post Samsung criado. Gerando arte (Claude + render Pillow determinístico)...',
         })
     except Exception:
+        reservation.refund()
         logger.exception('[posts.samsung] Falha ao criar post samsung')
         return JsonResponse({'success': False, 'error': 'Erro interno ao criar post'}, status=500)
@@ -152,11 +152,12 @@ def gerar_post_simples(request):
         else ('story' if formato == 'stories' else 'post')
     )
 
-    # Quota: respeita o limite DIARIO/MENSAL de posts da organizacao
-    # (can_create_post valida dia + mes + suspensao/aprovacao).
-    can_create, _qcode, qmsg = request.user.organization.can_create_post()
-    if not can_create:
-        return JsonResponse({'success': False, 'error': qmsg}, status=403)
+    # Quota: reserva atomica de 1 post no limite DIARIO/MENSAL da organizacao
+    # (valida tambem suspensao/aprovacao); devolvida se a criacao falhar.
+    from apps.core.services import quota
+    reservation = quota.reserve(request.user.organization, 'post')
+    if not reservation:
+        return JsonResponse({'success': False, 'error': reservation.message}, status=403)
 
     try:
         with transaction.atomic():
@@ -203,6 +204,7 @@ def gerar_post_simples(request):
             logger.info('[posts.simple] Post %s criado pipeline=simple refs=%d',
                         post.id, len(reference_images))
 
+        reservation.commit()
         generate_post_simple_task.delay(post.id)
 
         return JsonResponse({
@@ -215,5 +217,6 @@ def gerar_post_simples(request):
         })
 
     except Exception:
+        reservation.refund()
         logger.exception('[posts.simple] Falha ao criar post simples')
         return JsonResponse({'success': False, 'error': 'Erro interno ao criar post'}, status=500)
@@ -76,9 +76,10 @@ def gerar_post_thermomix(request):
 
     content_type = 'carrossel' if is_carousel else ('story' if formato == 'stories' else 'post')
 
-    can_create, _qcode, qmsg = request.user.organization.can_create_post()
-    if not can_create:
-        return JsonResponse({'success': False, 'error': qmsg}, status=403)
+    from apps.core.services import quota
+    reservation = quota.reserve(request.user.organization, 'post')
+    if not reservation:
+        return JsonResponse({'success': False, 'error': reservation.message}, status=403)
 
     try:
         with transaction.atomic():
@@ -126,6 +127,7 @@ def gerar_post_thermomix(request):
                 )
             logger.info('[posts.thermomix] Post %s criado pipeline=thermomix', post.id)
 
+        reservation.commit()
         generate_post_thermomix_task.delay(post.id)
 
         return JsonResponse({
@@ -137,5 +139,6 @@ def gerar_post_thermomix(request):
             'message': 'Post Thermomix criado. Gerando arte (Claude + render determinístico)...',
         })
     except Exception:
+        reservation.refund()
         logger.exception('[posts.thermomix] Falha ao criar post thermomix')
         return JsonResponse({'success': False, 'error': 'Erro interno ao criar post'}, status=500)
@@ -88,9 +88,10 @@ def gerar_post_todxs(request):
     )
 
     # Quota: mesma regra do fluxo padrao (dia/mes/suspensao)
-    can_create, _qcode, qmsg = request.user.organization.can_create_post()
-    if not can_create:
-        return JsonResponse({'success': False, 'error': qmsg}, status=403)
+    from apps.core.services import quota
+    reservation = quota.reserve(request.user.organization, 'post')
+    if not reservation:
+        return JsonResponse({'success': False, 'error': reservation.message}, status=403)
 
     try:
         with transaction.atomic():
@@ -139,6 +140,7 @@ def gerar_post_todxs(request):
                 )
             logger.info('[posts.todxs] Post %s criado pipeline=todxs', post.id)
 
+        reservation.commit()
         generate_post_todxs_task.delay(post.id)
 
         return JsonResponse({
@@ -150,5 +152,6 @@ def gerar_post_todxs(request):
             'message': 'Post TODXS criado. Gerando arte via skill (Claude + Gemini single-shot)...',
         })
     except Exception:
+        reservation.refund()
         logger.exception('[posts.todxs] Falha ao criar post todxs')
         return JsonResponse({'success': False, 'error': 'Erro interno ao criar post'}, status=500)
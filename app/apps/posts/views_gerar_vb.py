@@ -53,9 +53,10 @@ def gerar_post_vb(request):
 
     content_type = 'story' if formato == 'stories' else 'post'
 
-    can_create, _code, qmsg = request.user.organization.can_create_post()
-    if not can_create:
-        return JsonResponse({'success': False, 'error': qmsg}, status=403)
+    from apps.core.services import quota
+    reservation = quota.reserve(request.user.organization, 'post')
+    if not reservation:
+        return JsonResponse({'success': False, 'error': reservation.message}, status=403)
 
     try:
         with transaction.atomic():
@@ -73,10 +74,12 @@ def gerar_post_vb(request):
             )
             logger.info('[posts.vb] Post %s criado pipeline=vb arquetipo=%s', post.id, force_archetype)
 
+        reservation.commit()
         generate_post_vb_task.delay(post.id)
         return JsonResponse({'success': True, 'id': post.id, 'post_id': post.id,
                              'status': 'generating', 'pipeline': 'vb',
                              'message': 'Post VB criado. Gerando arte...'})
     except Exception:
+        reservation.refund()
         logger.exception('[posts.vb] Falha ao criar post vb')
         return JsonResponse({'success': False, 'error': 'Erro interno ao criar post'}, status=500)
@@ -8,7 +8,6 @@ import json
 import logging
 import mimetypes
 import os
-import urllib.request
 from pathlib import Path
 
 from django.contrib.auth.decorators import login_required
@@ -26,12 +25,10 @@ def _download_as_data_uri(url: str) -> str:
     if not url:
         return ''
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            mime = resp.headers.get('Content-Type', 'image/jpeg').split(';')[0].strip()
-            if not mime.startswith('image/'):
-                mime = 'image/jpeg'
+        from apps.core.services import http_client
+        data, mime = http_client.fetch_bytes(url, timeout=30)
+        if not mime.startswith('image/'):
+            mime = 'image/jpeg'
         uri = f"data:{mime};base64,{base64.b64encode(data).decode()}"
         logger.info('[overlay] download OK: %d bytes, %s', len(data), mime)
         return uri
@@ -40,6 +37,22 @@ def _download_as_data_uri(url: str) -> str:
         return ''
 
 
+def _s3_data_uri(s3_key: str, fallback_url: str = '') -> str:
+    """Data URI base64 lendo o objeto direto do S3 (boto3, sem presigned).
+    Sem chave ou leitura falhou: baixa `fallback_url`. Retorna '' se falhar."""
+    if s3_key:
+        try:
+            from apps.core.services.s3_service import S3Service
+            data = S3Service.read_bytes(s3_key)
+            mime = mimetypes.guess_type(s3_key)[0] or 'image/jpeg'
+            if not mime.startswith('image/'):
+                mime = 'image/jpeg'
+            return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+        except Exception:
+            logger.exception('[overlay] falha ao ler S3: %s', s3_key[:80])
+    return _download_as_data_uri(fallback_url)
+
+
 @login_required
 @require_GET
 def overlay_data(request, post_id):
@@ -272,13 +285,10 @@ def export_png(request, post_id):
     # Persiste posições editadas
     _save_elements(post.pk, elements)
 
-    # Gera presigned URLs novas e baixa no servidor → data URIs para o Playwright
-    raw_image_url = _get_raw_image_url(post)
+    # Le direto do S3 no servidor → data URIs para o render
+    raw_image_data = _s3_data_uri(post.raw_image_s3_key, post.raw_image_s3_url or '')
     logo_url = _get_logo_url(post)
 
-    raw_image_data = _download_as_data_uri(raw_image_url)
-    logo_data = _download_as_data_uri(logo_url)
-
     if not raw_image_data:
         logger.error('[overlay] imagem não pôde ser baixada para export post=%s', post_id)
         return JsonResponse({'error': 'image_download_failed'}, status=500)
@@ -687,39 +697,122 @@ def save_elements(request, post_id):
 
     # TODXS: re-renderiza e ATUALIZA a imagem publicada, para o preview da pagina
     # refletir as edicoes (senao o usuario so ve a mudanca abrindo o editor).
+    # Mesmo fundo + mesmos elementos do ultimo publicado (save repetido) ->
+    # devolve o publicado sem desenhar nem subir nada.
     image_url = None
-    if post.pipeline_used == 'todxs':
-        try:
-            image_url = _todxs_rerender_published(post, elements)
-        except Exception:
-            logger.exception('[overlay] re-render todxs (save) falhou post=%s', post.id)
-    elif post.pipeline_used == 'vb':
-        try:
-            image_url = _vb_rerender_published(post, elements)
-        except Exception:
-            logger.exception('[overlay] re-render vb (save) falhou post=%s', post.id)
-    elif post.pipeline_used == 'samsung':
-        try:
-            image_url = _samsung_rerender_published(post, elements)
-        except Exception:
-            logger.exception('[overlay] re-render samsung (save) falhou post=%s', post.id)
-    elif post.pipeline_used == 'thermomix':
-        try:
-            image_url = _thermomix_rerender_published(post, elements)
-        except Exception:
-            logger.exception('[overlay] re-render thermomix (save) falhou post=%s', post.id)
-    elif post.pipeline_used == 'simple':
+    rerender = {
+        'todxs': _todxs_rerender_published,
+        'vb': _vb_rerender_published,
+        'samsung': _samsung_rerender_published,
+        'thermomix': _thermomix_rerender_published,
+        'simple': _simple_rerender_published,
+    }.get(post.pipeline_used)
+    if rerender:
+        render_key = None
         try:
-            image_url = _simple_rerender_published(post, elements)
+            render_key = _rerender_key(post, elements)
         except Exception:
-            logger.exception('[overlay] re-render simple (save) falhou post=%s', post.id)
+            logger.exception('[overlay] chave de render falhou post=%s', post.id)
+        ctx = post.local_pipeline_context or {}
+        published = ctx.get('published_render') or {}
+        if (render_key and published.get('key') == render_key
+                and post.image_s3_key and published.get('s3_key') == post.image_s3_key):
+            image_url = _presigned_or(post.image_s3_key, post.image_s3_url)
+        else:
+            try:
+                image_url = rerender(post, elements, render_key=render_key)
+            except Exception:
+                logger.exception('[overlay] re-render %s (save) falhou post=%s',
+                                 post.pipeline_used, post.id)
+            if image_url and render_key:
+                ctx = post.local_pipeline_context or {}
+                ctx['published_render'] = {'key': render_key, 's3_key': post.image_s3_key}
+                post.local_pipeline_context = ctx
+                post.save(update_fields=['local_pipeline_context'])
     # image_s3_key: o front sincroniza o s3_key da imagem ativa (botao de download
     # da pagina presigna por chave — sem isso, baixaria a arte ANTIGA).
     return JsonResponse({'ok': True, 'image_url': image_url,
                          'image_s3_key': (post.image_s3_key if image_url else None)})
 
 
-def _simple_rerender_published(post, elements):
+def _rerender_key(post, elements):
+    """Chave do re-render no render_cache: fundo raw (ETag) + elementos +
+    spec do arquetipo (catalogo da org no banco) + fontes resolvidas +
+    logo/assets da KB. None = raw sem ETag (sem cache)."""
+    from apps.knowledge.models import KnowledgeBase
+    from apps.posts.services import render_cache
+
+    raw = render_cache.etag(post.raw_image_s3_key)
+    if not raw:
+        return None
+    kb = KnowledgeBase.objects.filter(organization=post.organization).first()
+    ctx = post.local_pipeline_context or {}
+    dialect = ctx.get(post.pipeline_used)
+    archetype = dialect.get('archetype') if isinstance(dialect, dict) else None
+    spec, spec_fonts = _rerender_spec(post, kb, archetype)
+    font_files = [el.get('_font_path') for el in elements if isinstance(el, dict)]
+    font_files += spec_fonts
+    if post.pipeline_used == 'simple':
+        font_files += list(_get_font_paths(post).values())
+    logo = _get_logo(post)
+    return render_cache.render_key(
+        kind='rerender', pipeline=post.pipeline_used, raw=raw, elements=elements,
+        canvas=_get_canvas(post), archetype=archetype, spec=spec,
+        fonts=render_cache.fonts_digest(font_files),
+        logo=render_cache.etag(logo.s3_key) if logo else '',
+        kb=render_cache.kb_digest(kb),
+    )
+
+
+def _rerender_spec(post, kb, archetype):
+    """(spec, arquivos de fonte) que o re-render do pipeline resolve: spec do
+    arquetipo com o override da org no banco e as fontes da KB para ela
+    (mesmas entradas do preview._cache_inputs)."""
+    org = post.organization
+    pipeline = post.pipeline_used
+    if pipeline == 'thermomix':
+        from apps.posts.services.thermomix.assets import font_paths
+        from apps.posts.services.thermomix.catalog import apply_org_wireframes
+        from apps.posts.services.thermomix.wireframes import WF
+        apply_org_wireframes(org)
+        spec = WF().get(archetype) or next(iter(WF().values()), None)
+        fonts = list(font_paths(kb, spec.get('fonts') or {}).values()) if spec else []
+        return spec, fonts
+    if pipeline == 'vb':
+        from apps.posts.services.vb.catalog import apply_org_specs
+        from apps.posts.services.vb.specs import SP
+        apply_org_specs(org)
+        return SP().get((archetype or '').strip()), []
+    if pipeline == 'samsung':
+        from apps.posts.services.samsung.catalog import apply_org_wireframes
+        from apps.posts.services.samsung.wireframes import WF
+        apply_org_wireframes(org)
+        return WF().get(archetype), []
+    if pipeline == 'todxs':
+        from apps.posts.services.todxs.catalog import apply_org_wireframes
+        from apps.posts.services.todxs.pillow_render import resolve_todxs_weights
+        from apps.posts.services.todxs.wireframes import WF
+        apply_org_wireframes(org)
+        return WF().get(archetype), list(resolve_todxs_weights(kb).values()) if kb else []
+    return None, []
+
+
+def _cached_png(render_key, produce):
+    """PNG do re-render pelo render_cache (sem chave: desenha direto)."""
+    from apps.posts.services import render_cache
+    png, _ = render_cache.cached_render(render_key, lambda: (produce(), None))
+    return png
+
+
+def _presigned_or(s3_key, url, expires_in=86400):
+    try:
+        from apps.core.services.s3_service import S3Service
+        return S3Service.generate_presigned_download_url(s3_key, expires_in=expires_in)
+    except Exception:
+        return url
+
+
+def _simple_rerender_published(post, elements, render_key=None):
     """SIMPLE (transcritor/C3): raw (fundo sem texto do Gemini) + elements
     editados -> re-render Pillow (render_layout_document, o MESMO motor do
     export) vira o PUBLICADO. Q1 conservador: isso so acontece quando o
@@ -731,19 +824,20 @@ def _simple_rerender_published(post, elements):
     from apps.core.services.s3_service import S3Service
     from apps.posts.services.gemini_image_generator import render_layout_document
 
-    raw_data = _download_as_data_uri(_get_raw_image_url(post))
-    if not raw_data:
-        return None
-    _, _, payload = raw_data.partition(',')
-    raw_bytes = _b64.b64decode(payload)
-
-    els = _prepare_stickers_for_export(elements)
-    png_bytes = render_layout_document(
-        raw_bytes, els,
-        fonts=_get_font_paths(post) or {},
-        logo_url=_get_logo_url(post),
-        fit_text=False,   # editor: fonte do usuario e lei; caixa so re-quebra
-    )
+    def _render():
+        raw_data = _s3_data_uri(post.raw_image_s3_key, post.raw_image_s3_url or '')
+        if not raw_data:
+            return None
+        _, _, payload = raw_data.partition(',')
+        els = _prepare_stickers_for_export(elements)
+        return render_layout_document(
+            _b64.b64decode(payload), els,
+            fonts=_get_font_paths(post) or {},
+            logo_url=_get_logo_url(post),
+            fit_text=False,   # editor: fonte do usuario e lei; caixa so re-quebra
+        )
+
+    png_bytes = _cached_png(render_key, _render)
     if not png_bytes:
         return None
 
@@ -785,7 +879,7 @@ def _simple_rerender_published(post, elements):
         return url
 
 
-def _vb_rerender_published(post, elements):
+def _vb_rerender_published(post, elements, render_key=None):
     """Redesenha a arte VB (raw cena + texto editado) e atualiza a imagem publicada."""
     import base64 as _b64
     from apps.posts.models import PostImage
@@ -796,22 +890,28 @@ def _vb_rerender_published(post, elements):
     from PIL import Image
     import io as _io
 
-    raw_data = _download_as_data_uri(_get_raw_image_url(post))
-    if not raw_data:
+    def _render():
+        raw_data = _s3_data_uri(post.raw_image_s3_key, post.raw_image_s3_url or '')
+        if not raw_data:
+            return None
+        _, _, payload = raw_data.partition(',')
+        base = Image.open(_io.BytesIO(_b64.b64decode(payload))).convert('RGBA')
+        vbx = (post.local_pipeline_context or {}).get('vb') or {}
+        sp = SPECS.get((vbx.get('archetype') or '').strip())
+        cw, ch = (sp['canvas'] if sp else _get_canvas(post))
+        if base.size != (cw, ch):
+            base = base.resize((cw, ch), Image.LANCZOS)
+        draw_vb_compose(base, elements, cw, ch)  # imagem (stickers) + texto
+        out = _io.BytesIO(); base.convert('RGB').save(out, 'PNG')
+        return out.getvalue()
+
+    png = _cached_png(render_key, _render)
+    if not png:
         return None
-    _, _, payload = raw_data.partition(',')
-    base = Image.open(_io.BytesIO(_b64.b64decode(payload))).convert('RGBA')
-    vbx = (post.local_pipeline_context or {}).get('vb') or {}
-    sp = SPECS.get((vbx.get('archetype') or '').strip())
-    cw, ch = (sp['canvas'] if sp else _get_canvas(post))
-    if base.size != (cw, ch):
-        base = base.resize((cw, ch), Image.LANCZOS)
-    draw_vb_compose(base, elements, cw, ch)  # imagem (stickers) + texto
-    out = _io.BytesIO(); base.convert('RGB').save(out, 'PNG')
 
     old_key = post.image_s3_key
     key, url = _upload_image_to_s3(org_id=post.organization_id, post_id=post.id,
-                                   png_bytes=out.getvalue(), mime_type='image/png')
+                                   png_bytes=png, mime_type='image/png')
     # Atualiza SOMENTE a PostImage do publicado (a versao "editavel") — UMA
     # linha, nunca as outras versoes da galeria (regra do dono: cada imagem
     # permanece como foi gerada/corrigida). Sem linha casando, CRIA uma nova
@@ -836,7 +936,7 @@ def _vb_rerender_published(post, elements):
         return url
 
 
-def _thermomix_rerender_published(post, elements):
+def _thermomix_rerender_published(post, elements, render_key=None):
     """Redesenha a arte Thermomix (raw + elementos editados) e atualiza a
     imagem publicada (espelha _samsung_rerender_published; desenhador do
     engine v3 => editor == publicado)."""
@@ -849,25 +949,31 @@ def _thermomix_rerender_published(post, elements):
     from PIL import Image
     import io as _io
 
-    raw_data = _download_as_data_uri(_get_raw_image_url(post))
-    if not raw_data:
+    def _render():
+        raw_data = _s3_data_uri(post.raw_image_s3_key, post.raw_image_s3_url or '')
+        if not raw_data:
+            return None
+        _, _, payload = raw_data.partition(',')
+        base = Image.open(_io.BytesIO(_b64.b64decode(payload))).convert('RGBA')
+        cw, ch = _get_canvas(post)
+        if base.size != (cw, ch):
+            base = base.resize((cw, ch), Image.LANCZOS)
+        apply_org_wireframes(post.organization)
+        kb = _KB.objects.filter(organization=post.organization).first()
+        tx = (post.local_pipeline_context or {}).get('thermomix') or {}
+        els = _prepare_stickers_for_export(elements)
+        base = draw_thermomix_compose(base, els, cw, ch, kb,
+                                      archetype=tx.get('archetype'))
+        out = _io.BytesIO(); base.convert('RGB').save(out, 'PNG')
+        return out.getvalue()
+
+    png = _cached_png(render_key, _render)
+    if not png:
         return None
-    _, _, payload = raw_data.partition(',')
-    base = Image.open(_io.BytesIO(_b64.b64decode(payload))).convert('RGBA')
-    cw, ch = _get_canvas(post)
-    if base.size != (cw, ch):
-        base = base.resize((cw, ch), Image.LANCZOS)
-    apply_org_wireframes(post.organization)
-    kb = _KB.objects.filter(organization=post.organization).first()
-    tx = (post.local_pipeline_context or {}).get('thermomix') or {}
-    els = _prepare_stickers_for_export(elements)
-    base = draw_thermomix_compose(base, els, cw, ch, kb,
-                                  archetype=tx.get('archetype'))
-    out = _io.BytesIO(); base.convert('RGB').save(out, 'PNG')
 
     old_key = post.image_s3_key
     key, url = _upload_image_to_s3(org_id=post.organization_id, post_id=post.id,
-                                   png_bytes=out.getvalue(), mime_type='image/png')
+                                   png_bytes=png, mime_type='image/png')
     _im = (post.images.filter(s3_key=old_key).order_by('-order').first()
            if old_key else None)
     if _im:
@@ -889,7 +995,7 @@ def _thermomix_rerender_published(post, elements):
         return url
 
 
-def _samsung_rerender_published(post, elements):
+def _samsung_rerender_published(post, elements, render_key=None):
     """Redesenha a arte Samsung (raw fundo + elementos editados) e atualiza a
     imagem publicada (espelha _vb_rerender_published)."""
     import base64 as _b64
@@ -900,21 +1006,27 @@ def _samsung_rerender_published(post, elements):
     from PIL import Image
     import io as _io
 
-    raw_data = _download_as_data_uri(_get_raw_image_url(post))
-    if not raw_data:
+    def _render():
+        raw_data = _s3_data_uri(post.raw_image_s3_key, post.raw_image_s3_url or '')
+        if not raw_data:
+            return None
+        _, _, payload = raw_data.partition(',')
+        base = Image.open(_io.BytesIO(_b64.b64decode(payload))).convert('RGBA')
+        cw, ch = _get_canvas(post)
+        if base.size != (cw, ch):
+            base = base.resize((cw, ch), Image.LANCZOS)
+        els = _prepare_stickers_for_export(elements)
+        base = draw_samsung_compose(base, els, cw, ch)
+        out = _io.BytesIO(); base.convert('RGB').save(out, 'PNG')
+        return out.getvalue()
+
+    png = _cached_png(render_key, _render)
+    if not png:
         return None
-    _, _, payload = raw_data.partition(',')
-    base = Image.open(_io.BytesIO(_b64.b64decode(payload))).convert('RGBA')
-    cw, ch = _get_canvas(post)
-    if base.size != (cw, ch):
-        base = base.resize((cw, ch), Image.LANCZOS)
-    els = _prepare_stickers_for_export(elements)
-    base = draw_samsung_compose(base, els, cw, ch)
-    out = _io.BytesIO(); base.convert('RGB').save(out, 'PNG')
 
     old_key = post.image_s3_key
     key, url = _upload_image_to_s3(org_id=post.organization_id, post_id=post.id,
-                                   png_bytes=out.getvalue(), mime_type='image/png')
+                                   png_bytes=png, mime_type='image/png')
     # Atualiza SOMENTE a PostImage do publicado (a versao "editavel") — UMA
     # linha, nunca as outras versoes da galeria (regra do dono: cada imagem
     # permanece como foi gerada/corrigida). Sem linha casando, CRIA uma nova
@@ -939,7 +1051,7 @@ def _samsung_rerender_published(post, elements):
         return url
 
 
-def _todxs_rerender_published(post, elements):
+def _todxs_rerender_published(post, elements, render_key=None):
     """Redesenha a arte do post todxs (draw_todxs) a partir do fundo + elementos
     editados e atualiza post.image_s3_key/url + a PostImage ativa. Retorna a URL."""
     import base64 as _b64
@@ -950,16 +1062,20 @@ def _todxs_rerender_published(post, elements):
     from apps.posts.tasks import _upload_image_to_s3
     from apps.core.services.s3_service import S3Service
 
-    raw_data = _download_as_data_uri(_get_raw_image_url(post))
-    if not raw_data:
+    def _render():
+        raw_data = _s3_data_uri(post.raw_image_s3_key, post.raw_image_s3_url or '')
+        if not raw_data:
+            return None
+        _, _, payload = raw_data.partition(',')
+        cw, ch = _get_canvas(post)
+        kb = KnowledgeBase.objects.filter(organization=post.organization).first()
+        logo_url = todxs_wordmark_url(kb) if kb else _get_logo_url(post)
+        els = _prepare_stickers_for_export(elements)
+        return draw_todxs(_b64.b64decode(payload), els, cw, ch, logo_url=logo_url)
+
+    png = _cached_png(render_key, _render)
+    if not png:
         return None
-    _, _, payload = raw_data.partition(',')
-    bg_bytes = _b64.b64decode(payload)
-    cw, ch = _get_canvas(post)
-    kb = KnowledgeBase.objects.filter(organization=post.organization).first()
-    logo_url = todxs_wordmark_url(kb) if kb else _get_logo_url(post)
-    els = _prepare_stickers_for_export(elements)
-    png = draw_todxs(bg_bytes, els, cw, ch, logo_url=logo_url)
 
     old_key = post.image_s3_key
     key, url = _upload_image_to_s3(org_id=post.organization_id, post_id=post.id,
@@ -1007,11 +1123,10 @@ async def _playwright_screenshot(html: str, width: int, height: int) -> bytes:
 # ── helpers ────────────────────────────────────────────────────────────────
 
 def _prepare_stickers_for_export(elements: list) -> list:
-    """Para cada elemento role='image' (sticker), regenera presigned URL pelo
-    s3_key (se houver) e baixa o arquivo como data URI no campo `url` — assim
-    o html_renderer consegue inline na <img src> e o Playwright renderiza.
+    """Para cada elemento role='image' (sticker), le o arquivo pelo s3_key
+    (direto do S3; a URL salva pode ter expirado) ou baixa a `url`, e grava
+    como data URI no campo `url` — o render usa inline.
     Mantem todos os outros elementos intactos."""
-    from apps.core.services.s3_service import S3Service
     out = []
     for el in elements or []:
         if (el.get('role') or '').lower() != 'image':
@@ -1020,14 +1135,9 @@ def _prepare_stickers_for_export(elements: list) -> list:
         new_el = dict(el)
         url = el.get('url') or ''
         s3_key = el.get('s3_key') or ''
-        # Sempre regenera URL pelo s3_key (presigned pode ter expirado)
-        if s3_key:
-            try:
-                url = S3Service.generate_presigned_download_url(s3_key, expires_in=600)
-            except Exception:
-                pass
-        if url:
-            data_uri = _download_as_data_uri(url)
+        if s3_key or url:
+            data_uri = (_s3_data_uri(s3_key, url) if s3_key
+                        else _download_as_data_uri(url))
             if data_uri:
                 new_el['url'] = data_uri
         out.append(new_el)
@@ -1131,21 +1241,30 @@ def _get_raw_image_url(post: Post) -> str:
         return post.raw_image_s3_url or ''
 
 
-def _get_logo_url(post: Post) -> str:
+def _get_logo(post: Post):
+    """Logo do post (selecionado no modal > primario > primeiro) com s3_key."""
     try:
         from apps.knowledge.models import KnowledgeBase
-        from apps.core.services.s3_service import S3Service
         kb = KnowledgeBase.objects.filter(organization=post.organization).first()
         if not kb:
-            return ''
+            return None
         ctx = post.local_pipeline_context or {}
         selected_ids = ctx.get('selected_logo_ids') or []
         logo = (
             kb.logos.filter(id__in=selected_ids).first() if selected_ids
             else kb.logos.filter(is_primary=True).first() or kb.logos.first()
         )
-        if not logo or not logo.s3_key:
-            return ''
+        return logo if logo and logo.s3_key else None
+    except Exception:
+        return None
+
+
+def _get_logo_url(post: Post) -> str:
+    logo = _get_logo(post)
+    if not logo:
+        return ''
+    try:
+        from apps.core.services.s3_service import S3Service
         return S3Service.generate_presigned_download_url(logo.s3_key, expires_in=3600)
     except Exception:
         return ''
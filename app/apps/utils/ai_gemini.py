@@ -7,16 +7,25 @@ import google.generativeai as genai
 from django.conf import settings
 from datetime import datetime
 
+from apps.core.services.ai_clients import track
+
 logger = logging.getLogger(__name__)
 
 
 class GeminiManager:
     """Gerenciador de operações com Google Gemini"""
     
-    def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model_text = genai.GenerativeModel(settings.GEMINI_MODEL_TEXT)
-        self.model_vision = genai.GenerativeModel(settings.GEMINI_MODEL_IMAGE)
+    # Modelos do registro do processo: configurar o SDK (gRPC) no import
+    # criava o canal ANTES do fork do worker.
+    @property
+    def model_text(self):
+        from apps.core.services.ai_clients import gemini_model
+        return gemini_model(settings.GEMINI_MODEL_TEXT)
+
+    @property
+    def model_vision(self):
+        from apps.core.services.ai_clients import gemini_model
+        return gemini_model(settings.GEMINI_MODEL_IMAGE)
     
     def generate_text(self, prompt, max_tokens=2000, temperature=0.7):
         """
@@ -46,10 +55,11 @@ class GeminiManager:
                 temperature=temperature
             )
             
-            response = self.model_text.generate_content(
-                prompt,
-                generation_config=generation_config
-            )
+            with track('gemini'):
+                response = self.model_text.generate_content(
+                    prompt,
+                    generation_config=generation_config
+                )
             
             completed_at = datetime.now()
             execution_time = (completed_at - started_at).total_seconds()
@@ -187,7 +197,8 @@ Retorne APENAS a legenda, sem explicações adicionais."""
             
             img = PIL.Image.open(image_path)
             
-            response = self.model_vision.generate_content([prompt, img])
+            with track('gemini'):
+                response = self.model_vision.generate_content([prompt, img])
             
             completed_at = datetime.now()
             execution_time = (completed_at - started_at).total_seconds()
@@ -3,7 +3,6 @@ IAMKT - OpenAI Integration
 Funções para GPT-4 (texto) e DALL-E 3 (imagens)
 """
 import logging
-from openai import OpenAI
 from django.conf import settings
 from datetime import datetime
 
@@ -14,9 +13,14 @@ class OpenAIManager:
     """Gerenciador de operações com OpenAI"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model_text = settings.OPENAI_MODEL_TEXT
         self.model_image = settings.OPENAI_MODEL_IMAGE
+
+    @property
+    def client(self):
+        """Cliente do registro do processo (pool HTTP compartilhado; pos-fork)."""
+        from apps.core.services.ai_clients import openai_client
+        return openai_client(settings.OPENAI_API_KEY)
     
     def generate_text(self, prompt, system_prompt=None, max_tokens=2000, temperature=0.7):
         """
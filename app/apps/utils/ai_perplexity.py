@@ -3,10 +3,11 @@ IAMKT - Perplexity AI Integration
 Funções para pesquisa web e insights em tempo real
 """
 import logging
-import httpx
 from django.conf import settings
 from datetime import datetime
 
+from apps.core.services.ai_clients import perplexity_http
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,14 +62,13 @@ class PerplexityManager:
                 "return_citations": True
             }
             
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(
-                    self.base_url,
-                    headers=headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = perplexity_http().post(
+                self.base_url,
+                headers=headers,
+                json=payload
+            )
+            response.raise_for_status()
+            data = response.json()
             
             completed_at = datetime.now()
             execution_time = (completed_at - started_at).total_seconds()
@@ -321,3 +321,88 @@ def validate_image_file(image_file, max_size_mb=10, allowed_formats=None):
         
     except Exception as e:
         return False, f"Erro ao validar imagem: {str(e)}"
+
+
+# ============================================================
+# ASSINATURA 64 BITS + BK-TREE (quase-duplicatas em tempo sub-linear)
+# ============================================================
+
+def image_signature(data):
+    """
+    Assinatura compacta de uma imagem (bytes): pHash e dHash de 64 bits
+    (16 hex), dimensoes e tamanho do arquivo.
+
+    Returns:
+        dict: {'phash', 'dhash', 'width', 'height', 'file_size'}
+    """
+    img = Image.open(BytesIO(data))
+    width, height = img.size
+    if img.mode not in ('RGB', 'L'):
+        # Transparencia vira fundo branco (logo PNG x mesmo logo em JPG)
+        rgba = img.convert('RGBA')
+        img = Image.new('RGB', rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel('A'))
+    return {
+        'phash': str(imagehash.phash(img, hash_size=8)),
+        'dhash': str(imagehash.dhash(img, hash_size=8)),
+        'width': width,
+        'height': height,
+        'file_size': len(data),
+    }
+
+
+def hamming(a, b):
+    """Distancia de Hamming entre dois hashes inteiros."""
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    BK-tree sobre a distancia de Hamming: a busca por raio r so desce nos
+    filhos com aresta em [d-r, d+r] (desigualdade triangular), em vez de
+    comparar contra todos os hashes.
+
+        tree = BKTree()
+        tree.add(int(phash, 16), item)
+        tree.search(int(novo, 16), radius=4)  # -> [(distancia, item), ...]
+    """
+
+    __slots__ = ('_root', '_size')
+
+    def __init__(self):
+        self._root = None  # [hash, [itens], {distancia: no}]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, item):
+        self._size += 1
+        if self._root is None:
+            self._root = [key, [item], {}]
+            return
+        node = self._root
+        while True:
+            dist = hamming(key, node[0])
+            if dist == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [key, [item], {}]
+                return
+            node = child
+
+    def search(self, key, radius):
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_key, items, children = stack.pop()
+            dist = hamming(key, node_key)
+            if dist <= radius:
+                found.extend((dist, item) for item in items)
+            for edge, child in children.items():
+                if dist - radius <= edge <= dist + radius:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
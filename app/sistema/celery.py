@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistema.settings.development')
@@ -29,6 +30,9 @@ app.conf.task_routes = {
     'apps.knowledge.tasks.finalize_brandguide_task': {'queue': 'brandguide'},
     'apps.knowledge.tasks.convert_brandguide_pdf_task': {'queue': 'brandguide'},
     'apps.knowledge.tasks.analyze_brandguide_task': {'queue': 'brandguide'},
+    # Emails de alerta em lote: SMTP lento/fora nao segura a fila principal
+    # (consumida pelo iamkt_celery: -Q celery,email)
+    'apps.core.tasks.send_quota_alert_emails': {'queue': 'email'},
 }
 
 # Celery Beat Schedule - Tasks Periódicas
@@ -41,8 +45,33 @@ app.conf.beat_schedule = {
         'task': 'apps.content.tasks.cleanup_old_cache_task',
         'schedule': crontab(day_of_week=0, hour=2, minute=0),  # Domingos às 2h
     },
+    'check-quota-alerts-hourly': {
+        'task': 'apps.core.tasks.check_quota_alerts',
+        'schedule': crontab(minute=15),  # De hora em hora
+    },
+    'reconcile-quota-counters': {
+        'task': 'apps.core.tasks.reconcile_quota_counters',
+        'schedule': crontab(minute='*/5'),  # Contadores de quota (Redis) -> QuotaUsageDaily
+    },
 }
 
+# -----------------------------------------------------------------
+# LEDGER DE USO DE IA EM LOTE POR TASK
+# -----------------------------------------------------------------
+# Os AIUsageEvent de uma task ficam num buffer e saem num bulk_create so no
+# fim (sucesso, erro ou retry) — apps.core.services.ai_usage.
+@task_prerun.connect
+def _ai_usage_batch_begin(**kwargs):
+    from apps.core.services.ai_usage import begin_ai_usage_batch
+    begin_ai_usage_batch()
+
+
+@task_postrun.connect
+def _ai_usage_batch_end(**kwargs):
+    from apps.core.services.ai_usage import end_ai_usage_batch
+    end_ai_usage_batch()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
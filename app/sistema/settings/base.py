@@ -241,9 +241,32 @@ BRANDGUIDE_MAX_FILE_SIZE = config('BRANDGUIDE_MAX_FILE_SIZE', default=50 * 1024
 BRANDGUIDE_MAX_PAGES = config('BRANDGUIDE_MAX_PAGES', default=200, cast=int)
 BRANDGUIDE_DPI = config('BRANDGUIDE_DPI', default=200, cast=int)  # 200 DPI otimo para analise IA
 BRANDGUIDE_BATCH_SIZE = config('BRANDGUIDE_BATCH_SIZE', default=5, cast=int)  # paginas por lote (evita OOM)
+# PDF baixado uma vez no setup e lido pelos lotes (vazio = <tmp>/iamkt-brandguide-spool)
+BRANDGUIDE_SPOOL_DIR = config('BRANDGUIDE_SPOOL_DIR', default='')
+BRANDGUIDE_UPLOAD_WORKERS = config('BRANDGUIDE_UPLOAD_WORKERS', default=3, cast=int)  # uploads de PNG em paralelo por lote
+BRANDGUIDE_AI_MAX_PX = config('BRANDGUIDE_AI_MAX_PX', default=1568, cast=int)  # lado maior do JPEG enviado a analise IA
+BRANDGUIDE_PREVIEW_MAX_PX = config('BRANDGUIDE_PREVIEW_MAX_PX', default=480, cast=int)  # lado maior do preview WebP (grid)
+
+# ANALISE VISUAL DE ASSETS DA KB (dossie por imagem/grafismo)
+# Sweep com >= MIN pendentes vai pela Message Batches API (0 = sempre unitario)
+VISUAL_ANALYSIS_BATCH_MIN = config('VISUAL_ANALYSIS_BATCH_MIN', default=5, cast=int)
+VISUAL_ANALYSIS_BATCH_SIZE = config('VISUAL_ANALYSIS_BATCH_SIZE', default=20, cast=int)  # assets por lote
+VISUAL_ANALYSIS_BATCH_POLL_SECONDS = config('VISUAL_ANALYSIS_BATCH_POLL_SECONDS', default=60, cast=int)
+# Quase-duplicatas por pHash/dHash de 64 bits (bits de diferenca): ate
+# DUPLICATE herda o dossie sem IA; ate SIMILAR o upload legado recusa
+IMAGE_DUPLICATE_MAX_DISTANCE = config('IMAGE_DUPLICATE_MAX_DISTANCE', default=4, cast=int)
+IMAGE_SIMILAR_MAX_DISTANCE = config('IMAGE_SIMILAR_MAX_DISTANCE', default=8, cast=int)
+IMAGE_INDEX_MAX_KBS = config('IMAGE_INDEX_MAX_KBS', default=64, cast=int)  # BK-trees em memoria por processo
 
 # IA CACHE
 IA_CACHE_TTL = config('IA_CACHE_TTL', default=2592000, cast=int)  # 30 dias
+# Flags da KB por org (request.tenant); invalidado no save da KB
+TENANT_KB_CACHE_TTL = config('TENANT_KB_CACHE_TTL', default=60, cast=int)
+# Snapshot de estatisticas do dashboard por org; invalidado no save de post/pauta
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=300, cast=int)
+# Status de posts ao vivo (SSE/long-poll em posts/api/status/). 0 = nao segura
+# conexao (gunicorn sync); use >0 so com workers gthread/ASGI.
+POST_STATUS_STREAM_SECONDS = config('POST_STATUS_STREAM_SECONDS', default=0, cast=int)
 
 # USAGE LIMITS
 DEFAULT_MONTHLY_GENERATION_LIMIT = config('DEFAULT_MONTHLY_GENERATION_LIMIT', default=100, cast=int)
@@ -33,6 +33,10 @@
 
   // Dados iniciais (injetados pelo Django template)
   const INITIAL_POSTS = window.INITIAL_POSTS || [];
+  // Listagem em LOTES: INITIAL_POSTS e so o 1o; o resto vem da API por cursor
+  const POSTS_API_URL = window.POSTS_API_URL || '/posts/api/posts/';
+  const POSTS_PAGE_SIZE = 20;
+  const POSTS_PAGE_MAX = 100;
   const CURRENT_USER = window.CURRENT_USER || '';
   const ORGANIZATION_ID = window.ORGANIZATION_ID || 0;
 
@@ -211,9 +215,14 @@
     filtered: [],
     page: 1,
     perPage: 1,
-    filters: { date: '', status: 'all', search: '' },
+    filters: Object.assign({ date: '', status: 'all', search: '' }, window.POSTS_FILTERS || {}),
     selectedId: null,
-    restoredFromStorage: false
+    restoredFromStorage: false,
+    // Paginacao no servidor (api/posts/)
+    total: typeof window.POSTS_TOTAL === 'number' ? window.POSTS_TOTAL : INITIAL_POSTS.length,
+    nextCursor: window.POSTS_NEXT_CURSOR || null,
+    loading: null,     // Promise do lote em andamento
+    generation: 0      // descarta respostas de filtros antigos
   };
 
   // Editor avançado re-renderizou a arte publicada (todxs/vb/samsung): sincroniza
@@ -241,8 +250,8 @@
     }
   });
 
-  // Normalizar dados dos posts
-  postsState.items.forEach(item => {
+  // Normalizar dados dos posts (1o lote e os que chegam da API)
+  function normalizePost(item) {
     if (!item) return;
     
     // Garantir serverId
@@ -262,7 +271,8 @@
     if (!item.statusLabel && item.status) {
       item.statusLabel = (statusInfo[item.status]?.label) || '';
     }
-  });
+  }
+  postsState.items.forEach(normalizePost);
 
   // ============================================================================
   // REFERÊNCIAS DO DOM
@@ -356,6 +366,7 @@
     });
     
     dom.filtroStatus.innerHTML = options.join('');
+    dom.filtroStatus.value = postsState.filters.status || 'all';
   }
 
   // ============================================================================
@@ -1060,55 +1071,106 @@
   // ============================================================================
 
   /**
-   * Aplica filtros aos posts (retorna items filtrados)
+   * Filtros sao aplicados no SERVIDOR (api/posts/); aqui so espelha os itens
+   * ja carregados (retorna items filtrados)
    */
   function applyFilters() {
+    postsState.filtered = postsState.items;
+    return postsState.filtered;
+  }
+
+  /**
+   * Busca um lote de posts (filtros atuais) a partir do cursor
+   */
+  async function fetchPostsPage(cursor, limit) {
     const { date, status, search } = postsState.filters;
-    let items = postsState.items.slice();
-    
-    // Filtro por data
-    if (date) {
-      items = items.filter(post => {
-        const postDate = new Date(post.created_at).toISOString().split('T')[0];
-        return postDate === date;
-      });
-    }
-    
-    // Filtro por status
-    if (status && status !== 'all') {
-      items = items.filter(post => post.status === status);
+    const params = new URLSearchParams({ limit: String(limit || POSTS_PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+    if (date) params.set('data', date);
+    if (status && status !== 'all') params.set('status', status);
+    if (search) params.set('search', search);
+
+    const response = await fetch(`${POSTS_API_URL}?${params}`, {
+      headers: { 'Accept': 'application/json' },
+      credentials: 'same-origin'
+    });
+    const data = await response.json().catch(() => ({}));
+    if (!response.ok || !data.success) {
+      throw new Error(data.error || 'HTTP ' + response.status);
     }
-    
-    // Busca por título
-    if (search) {
-      const q = search.toLowerCase();
-      items = items.filter(post => 
-        (post.title || '').toLowerCase().includes(q) ||
-        String(post.id).includes(q)
-      );
+    return data;
+  }
+
+  /**
+   * Garante ao menos `minCount` posts carregados (ou o fim da lista)
+   */
+  function loadMorePosts(minCount) {
+    if (postsState.loading) return postsState.loading;
+    const generation = postsState.generation;
+    postsState.loading = (async () => {
+      try {
+        while (postsState.nextCursor && postsState.items.length < minCount) {
+          const need = minCount - postsState.items.length;
+          const data = await fetchPostsPage(
+            postsState.nextCursor,
+            Math.min(POSTS_PAGE_MAX, Math.max(POSTS_PAGE_SIZE, need))
+          );
+          if (generation !== postsState.generation) return;
+          const seen = new Set(postsState.items.map(p => p && p.id));
+          (data.posts || []).forEach(post => {
+            if (!post || seen.has(post.id)) return;
+            normalizePost(post);
+            postsState.items.push(post);
+          });
+          postsState.nextCursor = data.next_cursor || null;
+        }
+      } finally {
+        if (generation === postsState.generation) postsState.loading = null;
+      }
+    })();
+    return postsState.loading;
+  }
+
+  /**
+   * Recarrega a listagem do zero (mudou filtro)
+   */
+  async function reloadPosts() {
+    const generation = ++postsState.generation;
+    postsState.loading = null;
+    postsState.page = 1;
+    postsState.selectedId = null;
+    try {
+      const data = await fetchPostsPage(null, POSTS_PAGE_SIZE);
+      if (generation !== postsState.generation) return;
+      postsState.items = (data.posts || []).filter(Boolean);
+      postsState.items.forEach(normalizePost);
+      postsState.nextCursor = data.next_cursor || null;
+      postsState.total = typeof data.total === 'number' ? data.total : postsState.items.length;
+    } catch (err) {
+      logger.error('[POSTS] Falha ao carregar posts:', err);
+      if (window.toaster) window.toaster.error('Não foi possível carregar os posts. Tente novamente.');
+      return;
     }
-    
-    postsState.filtered = items;
-    return items;
+    renderPosts(true);
   }
 
   // Event listeners para filtros
   dom.filtroStatus?.addEventListener('change', () => {
     postsState.filters.status = dom.filtroStatus.value;
     postsState.page = 1;
-    renderPosts(true);
+    reloadPosts();
   });
   
   dom.filtroData?.addEventListener('change', () => {
     postsState.filters.date = dom.filtroData.value;
     postsState.page = 1;
-    renderPosts(true);
+    reloadPosts();
   });
   
   dom.btnBuscar?.addEventListener('click', () => {
     postsState.filters.search = dom.filtroBusca?.value.trim() || '';
     postsState.page = 1;
-    renderPosts(true);
+    reloadPosts();
   });
   
   dom.filtroBusca?.addEventListener('keypress', (e) => {
@@ -1116,7 +1178,7 @@
       e.preventDefault();
       postsState.filters.search = dom.filtroBusca.value.trim();
       postsState.page = 1;
-      renderPosts(true);
+      reloadPosts();
     }
   });
 
@@ -1131,7 +1193,7 @@
     postsState.filters.search = '';
     postsState.page = 1;
     
-    renderPosts(true);
+    reloadPosts();
   });
 
   /**
@@ -1240,45 +1302,135 @@
    * Atualiza área visual do post (imagens, galeria, banners)
    * EXATAMENTE IDÊNTICO ao resumo.html
    */
+  // ============================================================================
+  // STATUS AO VIVO — deltas publicados pelas tasks (posts/api/status/)
+  // ============================================================================
+  // Substitui o polling de /posts/<id>/json/: a consulta aqui le so snapshots
+  // no Redis (sem banco) e so re-busca o post quando algo MUDOU. Com
+  // POST_STATUS_STREAM (workers async/threads) usa SSE; senao snapshot a cada 4s.
+  const POST_STATUS_URL = window.POST_STATUS_URL || '/posts/api/status/';
+  const statusBus = { watchers: {}, since: 0, timer: null, source: null, ids: '' };
+
+  function _statusDispatch(events) {
+    (events || []).forEach((ev) => {
+      if (!ev) return;
+      statusBus.since = Math.max(statusBus.since, ev.seq || 0);
+      Object.keys(statusBus.watchers).forEach((key) => {
+        const w = statusBus.watchers[key];
+        if (w && String(w.pid) === String(ev.id)) {
+          try { w.fn(ev); } catch (e) { logger.error('[STATUS] watcher', e); }
+        }
+      });
+    });
+  }
+
+  function _statusRestart() {
+    const ids = Array.from(new Set(Object.values(statusBus.watchers).map(w => w.pid))).sort().join(',');
+    if (ids === statusBus.ids && (statusBus.timer || statusBus.source)) return;
+    statusBus.ids = ids;
+    // ids mudaram: pede de novo o snapshot atual de todos (watchers sao
+    // idempotentes) — senao um watcher novo perde transicao ja publicada
+    statusBus.since = 0;
+    if (statusBus.timer) { clearInterval(statusBus.timer); statusBus.timer = null; }
+    if (statusBus.source) { statusBus.source.close(); statusBus.source = null; }
+    if (!ids) return;
+
+    if (window.POST_STATUS_STREAM && window.EventSource) {
+      // EventSource reconecta sozinho (Last-Event-ID) quando o servidor fecha
+      const src = new EventSource(`${POST_STATUS_URL}?stream=1&ids=${ids}&since=${statusBus.since}`);
+      src.addEventListener('status', (e) => {
+        try { _statusDispatch([JSON.parse(e.data)]); } catch (_) { /* evento invalido */ }
+      });
+      statusBus.source = src;
+      return;
+    }
+    const tick = async () => {
+      try {
+        const resp = await fetch(`${POST_STATUS_URL}?ids=${statusBus.ids}&since=${statusBus.since}`);
+        if (!resp.ok) return;
+        const data = await resp.json();
+        _statusDispatch(data.events);
+      } catch (e) { /* rede instavel: tenta de novo no proximo tick */ }
+    };
+    statusBus.timer = setInterval(tick, 4000);
+    tick();
+  }
+
+  function watchPostStatus(pid, kind, fn) {
+    if (!pid) return;
+    statusBus.watchers[`${pid}:${kind}`] = { pid, fn };
+    _statusRestart();
+  }
+
+  function unwatchPostStatus(pid, kind) {
+    delete statusBus.watchers[`${pid}:${kind}`];
+    _statusRestart();
+  }
+
+  // Exposto para o editor (posts_list.html: troca de fundo em background)
+  window.PostStatusBus = { watch: watchPostStatus, unwatch: unwatchPostStatus };
+
+  async function _fetchPostSnapshot(pid) {
+    const resp = await fetch(`/posts/${pid}/json/`);
+    if (!resp.ok) return null;
+    const json = await resp.json();
+    return (json && json.post) || null;
+  }
+
+  function _isCurrentPost(pid) {
+    const idx = Math.min(postsState.filtered.length - 1, Math.max(0, postsState.page - 1));
+    const current = postsState.filtered[idx];
+    return !!current && String(current.serverId || current.id) === String(pid);
+  }
+
+  // Post em andamento (texto/imagem/alteracao): quando a task trocar o status,
+  // re-busca o post UMA vez e re-renderiza — antes so com "Atualizar Status".
+  const IN_PROGRESS = ['generating', 'image_generating', 'agent'];
+  function _watchInProgress(post) {
+    const pid = post && (post.serverId || post.id);
+    if (!pid || !IN_PROGRESS.includes(post.status)) return;
+    if (statusBus.watchers[`${pid}:progress`]) return;
+    watchPostStatus(pid, 'progress', async (ev) => {
+      if (ev.status === post.status) return;
+      try {
+        const fresh = await _fetchPostSnapshot(pid);
+        if (!fresh) return;
+        normalizePost(fresh);
+        Object.assign(post, fresh, { activeImageIndex: undefined });
+        if (!IN_PROGRESS.includes(post.status)) unwatchPostStatus(pid, 'progress');
+        if (_isCurrentPost(pid)) renderPosts();
+      } catch (e) { /* proximo delta tenta de novo */ }
+    });
+  }
+
   // Vigia do botao "Edicao Avancada": no pipeline simples o transcritor grava
   // os _layout_elements DEPOIS do image_ready (~15-40s), entao logo apos a
-  // geracao o is_editable ainda e false. Consulta /posts/<id>/json/ a cada 5s
-  // (max 90s) e re-renderiza quando a versao editavel aparecer.
-  const _editableWatchers = {};
+  // geracao o is_editable ainda e false. Espera o delta `editable` (max 90s)
+  // e so entao re-busca o post e re-renderiza.
   function _watchEditableFlag(post) {
     const pid = post.serverId || post.id;
-    if (!pid || _editableWatchers[pid]) return;
-    let tries = 0;
-    _editableWatchers[pid] = setInterval(async () => {
-      tries += 1;
-      if (tries > 18) {
-        clearInterval(_editableWatchers[pid]);
-        delete _editableWatchers[pid];
-        return;
-      }
+    if (!pid || statusBus.watchers[`${pid}:editable`]) return;
+    const giveUp = setTimeout(() => unwatchPostStatus(pid, 'editable'), 90000);
+    watchPostStatus(pid, 'editable', async (ev) => {
+      if (!ev.editable) return;
       try {
-        const resp = await fetch(`/posts/${pid}/json/`);
-        if (!resp.ok) return;
-        const json = await resp.json();
-        const fresh = json && json.post;
+        const fresh = await _fetchPostSnapshot(pid);
         const ready = fresh && Array.isArray(fresh.imagens)
           && fresh.imagens.some((it) => it && typeof it === 'object' && it.is_editable);
         if (!ready) return;
-        clearInterval(_editableWatchers[pid]);
-        delete _editableWatchers[pid];
+        clearTimeout(giveUp);
+        unwatchPostStatus(pid, 'editable');
         post.imagens = fresh.imagens;
         post.status = fresh.status;
         post.imageStatus = fresh.imageStatus;
         post.has_image = fresh.has_image;
         post.activeImageIndex = undefined; // re-seleciona a versao editavel
         // So re-renderiza se este post continua sendo o exibido no detalhe.
-        const idx = Math.min(postsState.filtered.length - 1, Math.max(0, postsState.page - 1));
-        const current = postsState.filtered[idx];
-        if (current && (current.serverId || current.id) === pid) {
+        if (_isCurrentPost(pid)) {
           updatePostVisual(post);
         }
-      } catch (e) { /* rede instavel: tenta de novo no proximo tick */ }
-    }, 5000);
+      } catch (e) { /* rede instavel: espera o proximo delta */ }
+    });
   }
 
   function updatePostVisual(post) {
@@ -1709,7 +1861,7 @@
   function renderPosts(scrollIntoView = false) {
     console.log('[DEBUG renderPosts] Início');
     const filtered = applyFilters();
-    const total = filtered.length;
+    const total = Math.max(postsState.total, filtered.length);
     console.log('[DEBUG renderPosts] Total filtrado:', total);
 
     if (total === 0) {
@@ -1718,7 +1870,7 @@
       if (dom.postsEmpty) dom.postsEmpty.style.display = '';
       if (dom.postsMain) dom.postsMain.hidden = true;
       if (dom.postPagerInfo) {
-        const msg = postsState.items.length && (postsState.filters.date || postsState.filters.search || postsState.filters.status !== 'all')
+        const msg = (postsState.filters.date || postsState.filters.search || postsState.filters.status !== 'all')
           ? 'Nenhum post corresponde aos filtros aplicados'
           : '0 posts';
         dom.postPagerInfo.textContent = msg;
@@ -1759,6 +1911,23 @@
 
     postsState.page = Math.min(totalPages, Math.max(1, postsState.page));
     const startIndex = (postsState.page - 1) * postsState.perPage;
+
+    // Pagina ainda nao carregada: busca os lotes ate ela e re-renderiza
+    if (startIndex >= filtered.length && postsState.nextCursor) {
+      buildPagination(total, totalPages);
+      loadMorePosts(startIndex + 1)
+        .then(() => renderPosts(scrollIntoView))
+        .catch(err => {
+          logger.error('[POSTS] Falha ao carregar posts:', err);
+          if (window.toaster) window.toaster.error('Não foi possível carregar os posts. Tente novamente.');
+        });
+      return;
+    }
+    // Perto do fim do que ja veio: adianta o proximo lote (sem re-render)
+    if (postsState.nextCursor && startIndex >= filtered.length - 3) {
+      loadMorePosts(filtered.length + POSTS_PAGE_SIZE).catch(() => {});
+    }
+
     let current = filtered[startIndex] || null;
     if (!current && filtered.length) {
       current = filtered[0];
@@ -1784,6 +1953,7 @@
     updatePostVisual(current);
     console.log('[DEBUG renderPosts] Chamando buildPostActions...');
     buildPostActions(current);
+    _watchInProgress(current);
     console.log('[DEBUG renderPosts] Chamando buildPagination...');
     buildPagination(total, totalPages);
     console.log('[DEBUG renderPosts] Fim');